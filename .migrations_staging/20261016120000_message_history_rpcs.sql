@@ -0,0 +1,20 @@
+-- Server-side aggregation for message-history reads.
+-- Idempotent: safe to replay in production.
+
+-- Keyset pagination in SupabaseQueryHandler.iter_message_pages walks
+-- (channel_id, message_id); make sure that range scan is index-backed.
+create index if not exists idx_discord_messages_channel_message
+    on public.discord_messages (channel_id, message_id);
+
+create or replace function public.get_channel_message_dates(p_channel_id bigint)
+returns table (message_date date)
+language sql
+stable
+as $$
+    select distinct (created_at at time zone 'utc')::date as message_date
+    from public.discord_messages
+    where channel_id = p_channel_id
+    order by message_date;
+$$;
+
+grant execute on function public.get_channel_message_dates(bigint) to service_role;
@@ -0,0 +1,30 @@
+-- Set-based soft delete for discord_reactions, used by
+-- DatabaseHandler.bulk_upsert_reactions when syncing archived pages.
+-- Idempotent: safe to replay in production.
+
+create or replace function public.soft_delete_reactions(
+    p_keys jsonb,
+    p_removed_at timestamptz default now()
+)
+returns integer
+language sql
+volatile
+as $$
+    with keys as (
+        select *
+        from jsonb_to_recordset(p_keys) as k(message_id bigint, user_id bigint, emoji text)
+    ),
+    updated as (
+        update public.discord_reactions r
+        set removed_at = p_removed_at
+        from keys
+        where r.message_id = keys.message_id
+          and r.user_id = keys.user_id
+          and r.emoji = keys.emoji
+          and r.removed_at is null
+        returning 1
+    )
+    select count(*)::integer from updated;
+$$;
+
+grant execute on function public.soft_delete_reactions(jsonb, timestamptz) to service_role;
@@ -0,0 +1,162 @@
+-- Indexed message search for StorageHandler.search_messages_unified and
+-- scripts/discord_tools.find_messages (see src/common/message_search.py).
+--
+-- Full-text matches use the expression to_tsvector('simple', coalesce(content,
+-- '')), substring matches a pg_trgm index, so `content ilike '%q%'` no longer
+-- scans the table. Every filter is applied in SQL and pagination is
+-- keyset-based on the active sort key, so pages are complete and stable.
+--
+-- The supporting GIN/btree indexes are built CONCURRENTLY by the follow-up
+-- migration 20261016140500_search_discord_messages_indexes.sql; there is no
+-- stored tsvector column, so nothing here rewrites or long-locks the table.
+-- Idempotent: safe to replay in production.
+
+create extension if not exists pg_trgm;
+
+create or replace function public.search_discord_messages(
+    p_query text default null,
+    p_guild_id bigint default null,
+    p_channel_ids bigint[] default null,
+    p_author_id bigint default null,
+    p_exclude_author_ids bigint[] default null,
+    p_after timestamptz default null,
+    p_before timestamptz default null,
+    p_is_reply boolean default null,
+    p_has text[] default null,
+    p_min_reactions integer default null,
+    p_mentions_author_id bigint default null,
+    p_exclude_nsfw boolean default false,
+    p_sort text default 'relevance',
+    p_cursor jsonb default null,
+    p_limit integer default 20
+)
+returns table (
+    message_id bigint,
+    guild_id bigint,
+    channel_id bigint,
+    thread_id bigint,
+    author_id bigint,
+    content text,
+    created_at timestamptz,
+    attachments jsonb,
+    embeds jsonb,
+    reaction_count integer,
+    reactors jsonb,
+    reference_id bigint,
+    rank real
+)
+language plpgsql
+stable
+as $$
+declare
+    v_query text := nullif(btrim(coalesce(p_query, '')), '');
+    v_sort text := case
+        when p_sort in ('date', 'reactions') then p_sort
+        when nullif(btrim(coalesce(p_query, '')), '') is null then 'date'
+        else 'relevance'
+    end;
+    v_keyset text;
+    v_order text;
+begin
+    -- The sort key decides both the ORDER BY and the keyset predicate; the
+    -- cursor carries the last row's values for exactly these columns.
+    if v_sort = 'date' then
+        v_order := 'h.created_at desc, h.message_id desc';
+        v_keyset := '(h.created_at, h.message_id) < (($1->>''created_at'')::timestamptz, ($1->>''message_id'')::bigint)';
+    elsif v_sort = 'reactions' then
+        v_order := 'h.reaction_count desc, h.created_at desc, h.message_id desc';
+        v_keyset := '(h.reaction_count, h.created_at, h.message_id) < (($1->>''reaction_count'')::integer, ($1->>''created_at'')::timestamptz, ($1->>''message_id'')::bigint)';
+    else
+        v_order := 'h.rank desc, h.created_at desc, h.message_id desc';
+        v_keyset := '(h.rank, h.created_at, h.message_id) < (($1->>''rank'')::real, ($1->>''created_at'')::timestamptz, ($1->>''message_id'')::bigint)';
+    end if;
+
+    return query execute format($sql$
+        with hits as (
+            select
+                m.message_id::bigint,
+                m.guild_id::bigint,
+                m.channel_id::bigint,
+                m.thread_id::bigint,
+                m.author_id::bigint,
+                m.content,
+                m.created_at,
+                j.att as attachments,
+                j.emb as embeds,
+                coalesce(m.reaction_count, 0)::integer as reaction_count,
+                to_jsonb(m.reactors) as reactors,
+                m.reference_id::bigint,
+                case
+                    when $2 is null then 0::real
+                    else (ts_rank_cd(to_tsvector('simple', coalesce(m.content, '')), websearch_to_tsquery('simple', $2))
+                          + word_similarity($2, m.content))::real
+                end as rank
+            from public.discord_messages m
+            cross join lateral (
+                select
+                    case when jsonb_typeof(to_jsonb(m.attachments)) = 'array' then to_jsonb(m.attachments) else '[]'::jsonb end as att,
+                    case when jsonb_typeof(to_jsonb(m.embeds)) = 'array' then to_jsonb(m.embeds) else '[]'::jsonb end as emb
+            ) j
+            where m.is_deleted = false
+              and ($2 is null
+                   or to_tsvector('simple', coalesce(m.content, '')) @@ websearch_to_tsquery('simple', $2)
+                   or m.content ilike '%%' || replace(replace(replace($2, '\', '\\'), '%%', '\%%'), '_', '\_') || '%%')
+              and ($3 is null or m.guild_id = $3)
+              and ($4 is null or m.channel_id = any($4))
+              and ($5 is null or m.author_id = $5)
+              and ($6 is null or not (m.author_id = any($6)))
+              and ($7 is null or m.created_at >= $7)
+              and ($8 is null or m.created_at <= $8)
+              and ($9 is null or (m.reference_id is not null) = $9)
+              and ($10 is null or coalesce(m.reaction_count, 0) >= $10)
+              and ($11 is null or position($11::text in coalesce(m.content, '')) > 0)
+              and ($12 is null or (
+                    (not 'file' = any($12) or jsonb_array_length(j.att) > 0)
+                and (not 'embed' = any($12) or jsonb_array_length(j.emb) > 0)
+                and (not 'link' = any($12) or m.content ~* 'https?://' or jsonb_array_length(j.emb) > 0)
+                and (not 'image' = any($12) or exists (
+                        select 1 from jsonb_array_elements(j.att) a
+                        where a->>'content_type' ilike 'image/%%'
+                           or lower(a->>'filename') ~ '\.(png|jpe?g|gif|webp)$'))
+                and (not 'video' = any($12) or exists (
+                        select 1 from jsonb_array_elements(j.att) a
+                        where a->>'content_type' ilike 'video/%%'
+                           or lower(a->>'filename') ~ '\.(mp4|mov|webm|mkv)$'))
+                and (not 'audio' = any($12) or exists (
+                        select 1 from jsonb_array_elements(j.att) a
+                        where a->>'content_type' ilike 'audio/%%'
+                           or lower(a->>'filename') ~ '\.(mp3|wav|m4a|ogg|flac)$'))
+              ))
+              and (not $13 or not exists (
+                    select 1 from public.discord_channels c
+                    where c.channel_id = m.channel_id
+                      and (coalesce(c.nsfw, false) or c.channel_name ilike '%%nsfw%%')))
+        )
+        select h.*
+        from hits h
+        where $1 is null or %s
+        order by %s
+        limit $14
+    $sql$, v_keyset, v_order)
+    using
+        p_cursor,
+        v_query,
+        p_guild_id,
+        p_channel_ids,
+        p_author_id,
+        p_exclude_author_ids,
+        p_after,
+        p_before,
+        p_is_reply,
+        p_min_reactions,
+        p_mentions_author_id,
+        (select array_agg(lower(k)) from unnest(p_has) k),
+        coalesce(p_exclude_nsfw, false),
+        greatest(1, least(coalesce(p_limit, 20), 501));
+end;
+$$;
+
+grant execute on function public.search_discord_messages(
+    text, bigint, bigint[], bigint, bigint[], timestamptz, timestamptz, boolean,
+    text[], integer, bigint, boolean, text, jsonb, integer
+) to service_role;
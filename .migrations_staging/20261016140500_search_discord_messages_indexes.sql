@@ -0,0 +1,21 @@
+-- Indexes behind public.search_discord_messages
+-- (20261016140000_search_discord_messages_rpc.sql).
+--
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block: apply this
+-- file on its own, outside BEGIN/COMMIT (e.g. `psql -f`, not a wrapped
+-- migration). Each build scans discord_messages without blocking writes.
+-- The full-text index is on the same expression the function filters on, so
+-- no generated column (and no table rewrite) is needed.
+--
+-- A failed concurrent build leaves an INVALID index that "if not exists" would
+-- skip; drop it with `drop index concurrently <name>` and re-run this file.
+-- Idempotent: safe to replay in production.
+
+create index concurrently if not exists discord_messages_content_fts_idx
+    on public.discord_messages using gin (to_tsvector('simple', coalesce(content, '')));
+
+create index concurrently if not exists discord_messages_content_trgm_idx
+    on public.discord_messages using gin (content gin_trgm_ops);
+
+create index concurrently if not exists discord_messages_guild_created_idx
+    on public.discord_messages (guild_id, created_at desc, message_id desc);
@@ -0,0 +1,24 @@
+-- Set-based posted_message_id stamp for approval_requests, used by
+-- DatabaseHandler.mark_approval_requests_posted when GatingCog posts or
+-- reconciles a batch of web approval intros.
+-- Idempotent: safe to replay in production.
+
+create or replace function public.mark_approval_requests_posted(
+    p_stamps jsonb
+)
+returns table (id text)
+language sql
+volatile
+as $$
+    with stamps as (
+        select *
+        from jsonb_to_recordset(p_stamps) as s(id uuid, message_id bigint)
+    )
+    update public.approval_requests a
+    set posted_message_id = stamps.message_id
+    from stamps
+    where a.id = stamps.id
+    returning a.id::text;
+$$;
+
+grant execute on function public.mark_approval_requests_posted(jsonb) to service_role;
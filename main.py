@@ -23,6 +23,7 @@ from src.common.db_handler import DatabaseHandler
 from src.common.openmuse_interactor import OpenMuseInteractor
 from src.common.llm.claude_client import ClaudeClient
 from src.common.health_server import HealthServer
+from src.common.metrics import instrument_loop
 from src.features.curating.curator_cog import CuratorCog
 from src.features.summarising.summariser_cog import SummarizerCog
 from src.features.logging.logger_cog import LoggerCog
@@ -343,6 +344,7 @@ async def main_async(args):
             logger.info("Ready to start hourly message fetch loop")
 
         # Start the hourly fetch task
+        instrument_loop(hourly_message_fetch)
         hourly_message_fetch.start()
         logger.info("Hourly message fetch task scheduled")
 
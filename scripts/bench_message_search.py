@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark: archive message search, ILIKE scan + Python post-filter vs the
+indexed search_discord_messages RPC, on a synthetic discord_messages fixture.
+
+Runs fully offline against LocalMessageSearch (SQLite FTS5 stand-in for the
+tsvector + pg_trgm RPC). The legacy path is replayed on the same tables the
+way StorageHandler used to run it: newest-first ``content LIKE '%q%'`` capped
+at 250 rows, then has:/is_reply filters in Python. For each query it reports
+first-page latency, the cost per page when following cursors, and how many
+matches each path can actually reach.
+
+Usage:
+    python scripts/bench_message_search.py
+    python scripts/bench_message_search.py --messages 100000 --db /tmp/search.db
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.local_message_search import LocalMessageSearch
+from src.common.message_search import MessageSearch, message_has_kind, search_messages
+
+_WORDS = (
+    "lora wan ltx flux comfy node video image motion depth control upscale "
+    "workflow release benchmark training dataset sampler animation style "
+    "character inpaint outpaint audio lipsync camera pose realtime model "
+    "the a and to of is it this that with for on in just got new try"
+).split()
+_RARE = ["hunyuan", "kandinsky", "wuerstchen", "animatediff", "ipadapter", "controlnext"]
+
+LEGACY_FETCH_LIMIT = 250
+
+QUERIES = [
+    ("common word", MessageSearch(query="lora", guild_id=1, limit=20)),
+    ("rare word", MessageSearch(query="kandinsky", guild_id=1, limit=20)),
+    ("phrase", MessageSearch(query='"wan video"', guild_id=1, limit=20)),
+    ("substring", MessageSearch(query="upscal", guild_id=1, limit=20)),
+    ("word + has:video", MessageSearch(query="motion", guild_id=1, has=("video",), limit=20)),
+    ("rare + channel", MessageSearch(query="animatediff", guild_id=1, channel_ids=(12,), limit=20)),
+]
+
+
+def build_fixture(index, n_messages, seed=11, batch=50_000):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    weights = [1.0 / (rank + 1) for rank in range(len(_WORDS))]
+    index.add_channels([{"channel_id": 10 + c, "channel_name": f"channel-{c}", "nsfw": c == 7} for c in range(8)])
+    for offset in range(0, n_messages, batch):
+        rows = []
+        for i in range(offset, min(offset + batch, n_messages)):
+            words = rng.choices(_WORDS, weights=weights, k=rng.randint(3, 18))
+            if rng.random() < 0.002:
+                words.insert(rng.randrange(len(words)), rng.choice(_RARE))
+            roll = rng.random()
+            attachments = []
+            if roll < 0.05:
+                attachments = [{"filename": f"clip{i}.mp4", "content_type": "video/mp4"}]
+            elif roll < 0.15:
+                attachments = [{"filename": f"img{i}.png", "content_type": "image/png"}]
+            rows.append({
+                "message_id": 10 ** 17 + i,
+                "guild_id": 1,
+                "channel_id": 10 + rng.randrange(8),
+                "author_id": 1000 + rng.randrange(5000),
+                "content": " ".join(words),
+                "created_at": start + timedelta(seconds=i * 30),
+                "attachments": attachments,
+                "reaction_count": int(rng.paretovariate(2.0)) - 1,
+                "reference_id": 10 ** 17 + i - 1 if i and rng.random() < 0.3 else None,
+            })
+        index.add_messages(rows)
+
+
+def legacy_search(index, search):
+    """The pre-RPC StorageHandler.search_messages_unified path, replayed on SQLite."""
+    sql = ("SELECT * FROM discord_messages WHERE is_deleted = 0 AND guild_id = ? AND content LIKE ? "
+           + ("AND channel_id IN (%s) " % ",".join(str(c) for c in search.channel_ids) if search.channel_ids else "")
+           + "ORDER BY created_at DESC LIMIT ?")
+    raw = search.query.strip('"')
+    rows = [dict(r) for r in index._conn.execute(sql, (search.guild_id, f"%{raw}%", LEGACY_FETCH_LIMIT))]
+    for kind in search.has:
+        rows = [r for r in rows if message_has_kind(r["content"], r["attachments"], r["embeds"], kind)]
+    return rows[:search.limit], len(rows)
+
+
+def indexed_pages(index, search, max_rows):
+    """Follow next_cursor in pages of 500 until exhausted or ``max_rows`` reached."""
+    total, pages, cursor = 0, 0, None
+    while total < max_rows:
+        page = search_messages(index, MessageSearch(**{**search.__dict__, "cursor": cursor, "limit": 500}))
+        total += len(page["messages"])
+        pages += 1
+        if not page["has_more"]:
+            break
+        cursor = page["next_cursor"]
+    return total, pages
+
+
+def _time(fn, repeat=3):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(n_messages, db_path, max_rows):
+    index = LocalMessageSearch(db_path or ':memory:')
+    if index._conn.execute("SELECT count(*) FROM discord_messages").fetchone()[0] != n_messages:
+        started = time.perf_counter()
+        build_fixture(index, n_messages)
+        print(f"built {n_messages:,} messages in {time.perf_counter() - started:.1f}s")
+
+    print(f"{'query':<18} {'legacy ms':>10} {'legacy reach':>13} {'indexed ms':>11} "
+          f"{'indexed reach':>14} {'ms/page':>8}")
+    for label, search in QUERIES:
+        legacy_s, (_, legacy_reach) = _time(lambda: legacy_search(index, search))
+        indexed_s, _ = _time(lambda: search_messages(index, search))
+        paged_s, (reach, pages) = _time(lambda: indexed_pages(index, search, max_rows), repeat=1)
+        print(f"{label:<18} {legacy_s * 1000:>10.1f} {legacy_reach:>13,} {indexed_s * 1000:>11.1f} "
+              f"{reach:>14,} {paged_s * 1000 / pages:>8.1f}")
+    index.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=1_000_000)
+    parser.add_argument('--db', help='SQLite file to build/reuse the fixture in (default: in memory)')
+    parser.add_argument('--max-rows', type=int, default=5000, help='stop following cursors after this many rows')
+    args = parser.parse_args()
+    run(args.messages, args.db, args.max_rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: Reactor watchlist matching, linear scan vs CompiledRuleIndex.
+
+The linear functions below reproduce the matching loop Reactor.check_message /
+check_reaction used before the index (every rule visited, re.search per rule).
+
+Usage:
+    python scripts/bench_reactor_rules.py
+    python scripts/bench_reactor_rules.py --rules 50 500 5000 --events 20000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.features.reacting.rule_index import CompiledRuleIndex
+
+
+def linear_match_reaction(rules, user_id, emoji):
+    for rule in rules:
+        if rule.get('trigger_type', 'reaction') != 'reaction':
+            continue
+        if rule['user_id'] == '*':
+            user_match = True
+        else:
+            user_match = isinstance(rule['user_id'], list) and user_id in rule['user_id']
+        if user_match and (rule['emoji'] == '*' or rule['emoji'] == emoji):
+            return rule
+    return None
+
+
+def linear_match_message(rules, channel_id, user_id, content, content_types=()):
+    for rule in rules:
+        trigger_type = rule.get('trigger_type')
+        if trigger_type not in ('text', 'attachment'):
+            continue
+        if rule.get('channel_id', '*') not in ('*', channel_id):
+            continue
+        if rule.get('user_id', '*') not in ('*', user_id):
+            continue
+        if trigger_type == 'text':
+            if 'text_pattern' in rule:
+                if re.search(rule['text_pattern'], content):
+                    return rule
+            elif rule['text_contains'].lower() in content.lower():
+                return rule
+        else:
+            target_type = rule['attachment_type'].lower()
+            for content_type in content_types:
+                if (target_type == '*' or content_type == target_type
+                        or (target_type.endswith('/*') and content_type.startswith(target_type[:-1]))):
+                    return rule
+    return None
+
+
+def build_rules(n_rules, n_channels=200, n_users=2000, seed=7):
+    """Generate normalized rules shaped like real watchlists (mostly scoped, a few wildcards)."""
+    rng = random.Random(seed)
+    emojis = ['🔥', '👍', '🐦', '✅', '❌', '⭐', '🎉', '👀']
+    rules = []
+    for i in range(n_rules):
+        kind = rng.random()
+        channel = '*' if rng.random() < 0.05 else str(rng.randrange(n_channels))
+        user = '*' if rng.random() < 0.7 else str(rng.randrange(n_users))
+        if kind < 0.4:
+            rules.append({
+                'trigger_type': 'reaction',
+                'user_id': '*' if rng.random() < 0.05 else [str(rng.randrange(n_users))],
+                'emoji': rng.choice(emojis),
+                'action': f'react_{i}',
+            })
+        elif kind < 0.7:
+            rules.append({'trigger_type': 'text', 'text_contains': f'keyword{i}',
+                          'channel_id': channel, 'user_id': user, 'action': f'contains_{i}'})
+        elif kind < 0.9:
+            rules.append({'trigger_type': 'text', 'text_pattern': rf'(?i)\bpattern{i}\b',
+                          'channel_id': channel, 'user_id': user, 'action': f'regex_{i}'})
+        else:
+            rules.append({'trigger_type': 'attachment', 'attachment_type': 'image/*',
+                          'channel_id': channel, 'user_id': user, 'action': f'attach_{i}'})
+    return rules
+
+
+def build_events(n_events, n_rules, n_channels=200, n_users=2000, seed=11):
+    rng = random.Random(seed)
+    events = []
+    for _ in range(n_events):
+        words = ['lorem', 'ipsum', 'dolor', 'sit', 'amet'] * 6
+        if rng.random() < 0.1:
+            words.append(rng.choice(['keyword', 'pattern']) + str(rng.randrange(n_rules)))
+        rng.shuffle(words)
+        events.append((
+            str(rng.randrange(n_channels)),
+            str(rng.randrange(n_users)),
+            ' '.join(words),
+            ('image/png',) if rng.random() < 0.05 else (),
+        ))
+    return events
+
+
+def _time(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def run(rule_counts, n_events):
+    emojis = ['🔥', '👍', '🐦', '✅']
+    print(f"{'rules':>7} {'linear msg µs':>14} {'index msg µs':>13} {'speedup':>8} "
+          f"{'linear rx µs':>13} {'index rx µs':>12} {'speedup':>8}")
+    for n_rules in rule_counts:
+        rules = build_rules(n_rules)
+        events = build_events(n_events, n_rules)
+        index = CompiledRuleIndex(rules)
+
+        for channel, user, content, types in events[:500]:
+            expected = linear_match_message(rules, channel, user, content, types)
+            got = index.match_message(channel, user, content, [(t, None) for t in types])
+            assert (got[0] if got else None) is expected, 'index disagrees with linear scan'
+
+        indexed_events = [(c, u, text, [(t, None) for t in types]) for c, u, text, types in events]
+        linear_msg = _time(lambda: [linear_match_message(rules, *event) for event in events])
+        index_msg = _time(lambda: [index.match_message(*event) for event in indexed_events])
+        linear_rx = _time(lambda: [linear_match_reaction(rules, u, emojis[i % 4]) for i, (_, u, _, _) in enumerate(events)])
+        index_rx = _time(lambda: [index.match_reaction(u, emojis[i % 4]) for i, (_, u, _, _) in enumerate(events)])
+
+        per = 1e6 / n_events
+        print(f"{n_rules:>7} {linear_msg * per:>14.2f} {index_msg * per:>13.2f} {linear_msg / index_msg:>7.1f}x "
+              f"{linear_rx * per:>13.2f} {index_rx * per:>12.2f} {linear_rx / index_rx:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rules', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--events', type=int, default=10000)
+    args = parser.parse_args()
+    run(args.rules, args.events)
+
+
+if __name__ == '__main__':
+    main()
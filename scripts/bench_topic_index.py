@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: TopicEditor collision/alias lookups, linear scan vs TopicTrigramIndex.
+
+Generates synthetic topics (headline, canonical key, authors, aliases), checks
+that the index returns exactly what detect_topic_collisions / resolve_topic_alias
+return, then times both over the same query set.
+
+Usage:
+    python scripts/bench_topic_index.py
+    python scripts/bench_topic_index.py --topics 300 3000 30000 --queries 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.features.summarising.topic_editor import (
+    canonicalize_topic_key,
+    detect_topic_collisions,
+    resolve_topic_alias,
+)
+from src.features.summarising.topic_index import TopicTrigramIndex
+
+_WORDS = (
+    "lora wan ltx flux comfy node video image motion depth control upscale "
+    "workflow release benchmark training dataset sampler animation style "
+    "character inpaint outpaint audio lipsync camera pose realtime model"
+).split()
+
+
+def build_topics(n_topics, n_authors=None, seed=5):
+    rng = random.Random(seed)
+    n_authors = n_authors or max(20, n_topics // 10)
+    topics, alias_rows = [], []
+    for i in range(n_topics):
+        headline = " ".join(rng.sample(_WORDS, 4)) + f" {i}"
+        key = canonicalize_topic_key(headline)
+        alias = f"{rng.choice(_WORDS)}-{rng.choice(_WORDS)}-{i}"
+        topics.append({
+            "topic_id": f"topic-{i}",
+            "canonical_key": key,
+            "headline": headline,
+            "source_authors": [f"author{rng.randrange(n_authors)}"],
+            "aliases": [alias],
+            "state": "posted" if i % 3 else "watching",
+        })
+        alias_rows.append({"topic_id": f"topic-{i}", "alias_key": alias, "environment": "prod", "guild_id": 1})
+    return topics, alias_rows
+
+
+def build_queries(topics, n_queries, seed=9):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n_queries):
+        base = rng.choice(topics)
+        roll = rng.random()
+        if roll < 0.3:
+            # Near-duplicate headline from the same author.
+            headline = base["headline"].rsplit(" ", 1)[0]
+            authors = list(base["source_authors"])
+        elif roll < 0.5:
+            headline = base["canonical_key"].split("-")[0] + " " + " ".join(rng.sample(_WORDS, 3))
+            authors = [f"author{rng.randrange(10 ** 6)}"]
+        else:
+            headline = " ".join(rng.sample(_WORDS, 5))
+            authors = [rng.choice(topics)["source_authors"][0]]
+        queries.append((canonicalize_topic_key(headline), headline, authors, rng.choice(topics)["aliases"][0]))
+    return queries
+
+
+def _time(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def run(topic_counts, n_queries):
+    print(f"{'topics':>7} {'build ms':>9} {'linear coll µs':>15} {'index coll µs':>14} {'speedup':>8} "
+          f"{'linear alias µs':>16} {'index alias µs':>15} {'speedup':>8}")
+    for n_topics in topic_counts:
+        topics, alias_rows = build_topics(n_topics)
+        queries = build_queries(topics, n_queries)
+        build = _time(lambda: TopicTrigramIndex(topics, alias_rows))
+        index = TopicTrigramIndex(topics, alias_rows)
+
+        def linear_collisions(q):
+            return detect_topic_collisions(
+                proposed_canonical_key=q[0], headline=q[1], source_authors=q[2], existing_topics=topics,
+            )
+
+        def index_collisions(q):
+            return index.detect_collisions(proposed_canonical_key=q[0], headline=q[1], source_authors=q[2])
+
+        for q in queries[:20]:
+            assert index_collisions(q) == linear_collisions(q), 'index disagrees with linear scan'
+            assert index.resolve_alias(q[3], environment="prod", guild_id=1) is resolve_topic_alias(
+                q[3], alias_rows, environment="prod", guild_id=1)
+
+        linear_coll = _time(lambda: [linear_collisions(q) for q in queries])
+        index_coll = _time(lambda: [index_collisions(q) for q in queries])
+        linear_alias = _time(lambda: [resolve_topic_alias(q[3], alias_rows, environment="prod", guild_id=1) for q in queries])
+        index_alias = _time(lambda: [index.resolve_alias(q[3], environment="prod", guild_id=1) for q in queries])
+
+        per = 1e6 / n_queries
+        print(f"{n_topics:>7} {build * 1000:>9.1f} {linear_coll * per:>15.1f} {index_coll * per:>14.1f} "
+              f"{linear_coll / index_coll:>7.1f}x {linear_alias * per:>16.1f} {index_alias * per:>15.2f} "
+              f"{linear_alias / index_alias:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--topics', type=int, nargs='+', default=[300, 3000, 30000])
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+    run(args.topics, args.queries)
+
+
+if __name__ == '__main__':
+    main()
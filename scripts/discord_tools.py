@@ -53,6 +53,9 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
+from src.common.bulk_export import KeysetScan, iter_rows
+from src.common.message_search import MessageSearch, is_missing_search_rpc
+from src.common.message_search import search_messages as search_indexed_messages
 from src.common.urls import message_jump_url
 
 _DEFAULT_GUILD_ID = (
@@ -64,6 +67,8 @@ MSG_SELECT = (
     'message_id, guild_id, channel_id, thread_id, author_id, content, created_at, '
     'attachments, reaction_count, reactors, reference_id'
 )
+# Flipped off the first time the database reports search_discord_messages missing.
+_search_rpc_available = True
 
 
 def _month_to_date_range(month: str):
@@ -269,8 +274,11 @@ def find_messages(query: str = '', days: int = None, month: str = None,
     All other search functions (search, top, user) delegate to this.
     The bot's admin_chat tools can also call this directly.
 
+    Runs on the indexed search_discord_messages RPC (src/common/message_search.py),
+    falling back to an ILIKE scan on databases without it.
+
     Args:
-        query: Text search (case-insensitive substring match)
+        query: Text search (words, "phrases", -exclusions, or substrings; case-insensitive)
         days: Filter to last N days (mutually exclusive with month)
         month: Filter to YYYY-MM month (overrides days)
         channel_id: Filter to specific channel
@@ -278,22 +286,78 @@ def find_messages(query: str = '', days: int = None, month: str = None,
         min_reactions: Minimum reaction count
         has_media: Only posts with attachments
         limit: Max results
-        sort: 'date', 'reactions', or 'unique_reactors'
+        sort: 'date', 'reactions', 'unique_reactors', or 'relevance' (needs a query)
         exclude_nsfw: Exclude NSFW channels (ignored if channel_id or allowed_channel_ids set)
         show_reactors: Resolve reactor member IDs to names
         allowed_channel_ids: Restrict to these channel IDs (for permission filtering)
     """
+    global _search_rpc_available
     db = _supabase()
 
-    q = db.table('discord_messages').select(MSG_SELECT)
-
-    # Date filtering
+    date_from = date_to = None
     if month or days:
         date_range = _resolve_date_range(days, month)
         if isinstance(date_range, tuple):
-            q = q.gte('created_at', date_range[0]).lte('created_at', date_range[1])
+            date_from, date_to = date_range
         else:
-            q = q.gte('created_at', date_range)
+            date_from = date_range
+
+    messages = None
+    if _search_rpc_available:
+        if channel_id:
+            channel_ids = (channel_id,)
+        elif allowed_channel_ids is not None:
+            channel_ids = tuple(allowed_channel_ids)
+        else:
+            channel_ids = None
+        search = MessageSearch(
+            query=query or None,
+            guild_id=_get_active_guild_id(),
+            channel_ids=channel_ids,
+            author_id=author_id or None,
+            after=date_from,
+            before=date_to,
+            has=('file',) if has_media else (),
+            min_reactions=min_reactions or None,
+            exclude_nsfw=exclude_nsfw and channel_ids is None,
+            sort={'unique_reactors': 'reactions'}.get(sort, sort),
+            limit=limit * 3 if sort == 'unique_reactors' else limit,
+        )
+        try:
+            messages = search_indexed_messages(db, search)['messages']
+        except Exception as e:
+            if not is_missing_search_rpc(e):
+                raise
+            _search_rpc_available = False
+
+    if messages is None:
+        messages = _find_messages_ilike(db, query, date_from, date_to, channel_id, author_id,
+                                        min_reactions, has_media, limit, sort, exclude_nsfw,
+                                        allowed_channel_ids)
+
+    # Enrich
+    cmap = _channel_map(exclude_nsfw=False)
+    _enrich(messages, channel_names=cmap, resolve_reactors=show_reactors)
+
+    # Client-side sort for unique_reactors
+    if sort == 'unique_reactors':
+        messages.sort(key=lambda m: m.get('unique_reactor_count', 0), reverse=True)
+        messages = messages[:limit]
+
+    return messages
+
+
+def _find_messages_ilike(db, query, date_from, date_to, channel_id, author_id,
+                         min_reactions, has_media, limit, sort, exclude_nsfw,
+                         allowed_channel_ids) -> List[Dict]:
+    """find_messages for databases without the search_discord_messages RPC."""
+    q = db.table('discord_messages').select(MSG_SELECT)
+
+    # Date filtering
+    if date_from:
+        q = q.gte('created_at', date_from)
+    if date_to:
+        q = q.lte('created_at', date_to)
 
     # Guild filter
     if _get_active_guild_id():
@@ -326,18 +390,7 @@ def find_messages(query: str = '', days: int = None, month: str = None,
     else:
         q = q.order('created_at', desc=True).limit(limit)
 
-    messages = q.execute().data
-
-    # Enrich
-    cmap = _channel_map(exclude_nsfw=False)
-    _enrich(messages, channel_names=cmap, resolve_reactors=show_reactors)
-
-    # Client-side sort for unique_reactors
-    if sort == 'unique_reactors':
-        messages.sort(key=lambda m: m.get('unique_reactor_count', 0), reverse=True)
-        messages = messages[:limit]
-
-    return messages
+    return q.execute().data
 
 
 def search(query: str, days: int = 7, month: str = None, channel_id: int = None,
@@ -613,30 +666,14 @@ def _categorize_channels() -> Dict[str, List[int]]:
     return categories
 
 
-def _paginated_fetch(db, table: str, select: str, filters: Dict,
-                     order_col: str = 'created_at', page_size: int = 1000,
-                     max_pages: int = 50) -> List[Dict]:
-    """Fetch all rows matching filters with pagination."""
-    all_rows = []
-    for page in range(max_pages):
-        q = db.table(table).select(select)
-        for col, val in filters.items():
-            if isinstance(val, tuple) and len(val) == 2:
-                op, v = val
-                if op == 'gte':
-                    q = q.gte(col, v)
-                elif op == 'lte':
-                    q = q.lte(col, v)
-                elif op == 'in':
-                    q = q.in_(col, v)
-            else:
-                q = q.eq(col, val)
-        q = q.order(order_col).range(page * page_size, (page + 1) * page_size - 1)
-        rows = q.execute().data
-        all_rows.extend(rows)
-        if len(rows) < page_size:
-            break
-    return all_rows
+def _paginated_fetch(db, table: str, select: str, filters: List[tuple],
+                     key=('created_at', 'message_id'), page_size: int = 1000) -> List[Dict]:
+    """Fetch all rows matching filters, keyset-paginated on ``key`` (oldest first).
+
+    ``filters`` are (op, column, value) tuples, e.g. ('gte', 'created_at', start).
+    """
+    scan = KeysetScan(table, columns=select, key=key, filters=tuple(filters), page_size=page_size)
+    return list(iter_rows(db, scan))
 
 
 def contributors(month: str) -> Dict[str, Any]:
@@ -656,29 +693,16 @@ def contributors(month: str) -> Dict[str, Any]:
     safe_channel_ids = [cid for cid, name in safe_cmap.items()
                         if 'summary' not in name.lower()]
 
-    # ---- Fetch all messages for the month (paginated) ----
-    filters = {
-        'created_at': ('gte', start),
-    }
-    # Add end date filter separately since we need two filters on same col
-    # Build query manually for dual date filter
-    all_messages = []
-    page = 0
-    page_size = 1000
-    while True:
-        q = db.table('discord_messages').select(
-            'message_id, author_id, channel_id, content, created_at, '
-            'reaction_count, reactors, reference_id, attachments'
-        ).gte('created_at', start).lte('created_at', end)
-        if guild_id:
-            q = q.eq('guild_id', guild_id)
-        q = q.in_('channel_id', safe_channel_ids)
-        q = q.order('created_at').range(page * page_size, (page + 1) * page_size - 1)
-        rows = q.execute().data
-        all_messages.extend(rows)
-        if len(rows) < page_size:
-            break
-        page += 1
+    # ---- Fetch all messages for the month (keyset-paginated) ----
+    month_filters = [('gte', 'created_at', start), ('lte', 'created_at', end)]
+    if guild_id:
+        month_filters.append(('eq', 'guild_id', guild_id))
+    all_messages = _paginated_fetch(
+        db, 'discord_messages',
+        'message_id, author_id, channel_id, content, created_at, '
+        'reaction_count, reactors, reference_id, attachments',
+        month_filters + [('in', 'channel_id', safe_channel_ids)],
+    )
 
     if not all_messages:
         return {"month": month, "total_messages": 0, "contributors": []}
@@ -689,21 +713,10 @@ def contributors(month: str) -> Dict[str, Any]:
 
     # ---- Fetch #updates channel posts and extract mentioned names ----
     updates_channel_id = 1138790534987661363
-    updates_messages = []
-    upage = 0
-    while True:
-        uq = db.table('discord_messages').select(
-            'message_id, content, created_at, reaction_count'
-        ).eq('channel_id', updates_channel_id
-        ).gte('created_at', start).lte('created_at', end
-        ).order('created_at').range(upage * page_size, (upage + 1) * page_size - 1)
-        if guild_id:
-            uq = uq.eq('guild_id', guild_id)
-        rows = uq.execute().data
-        updates_messages.extend(rows)
-        if len(rows) < page_size:
-            break
-        upage += 1
+    updates_messages = _paginated_fetch(
+        db, 'discord_messages', 'message_id, content, created_at, reaction_count',
+        month_filters + [('eq', 'channel_id', updates_channel_id)],
+    )
     all_updates_text = "\n".join(m.get('content', '') or '' for m in updates_messages)
 
     # ---- Build per-author raw data ----
@@ -827,21 +840,11 @@ def contributors(month: str) -> Dict[str, Any]:
                     parts = line.strip().split(',')
                     equity_holders_names.add(parts[0].strip().lower())
 
-    # Fetch reactions for the month (paginated)
-    all_reactions = []
-    page = 0
-    while True:
-        rq = db.table('discord_reactions').select(
-            'message_id, user_id, emoji'
-        ).gte('created_at', start).lte('created_at', end)
-        if guild_id:
-            rq = rq.eq('guild_id', guild_id)
-        rq = rq.order('created_at').range(page * page_size, (page + 1) * page_size - 1)
-        rows = rq.execute().data
-        all_reactions.extend(rows)
-        if len(rows) < page_size:
-            break
-        page += 1
+    # Fetch reactions for the month (keyset-paginated)
+    all_reactions = _paginated_fetch(
+        db, 'discord_reactions', 'message_id, user_id, emoji', month_filters,
+        key=('created_at', 'message_id', 'user_id', 'emoji'),
+    )
 
     # Resolve equity holder member IDs
     # First get all member records for equity holders
@@ -1035,22 +1038,15 @@ def profile(username: str, month: str) -> Dict[str, Any]:
     display_name = _member_name(member)
 
     # ---- Get their messages for the month ----
-    msgs = []
-    page = 0
-    page_size = 1000
-    while True:
-        q = db.table('discord_messages').select(
-            'message_id, channel_id, thread_id, content, created_at, '
-            'reaction_count, reactors, reference_id, attachments'
-        ).eq('author_id', uid).gte('created_at', start).lte('created_at', end)
-        if guild_id:
-            q = q.eq('guild_id', guild_id)
-        q = q.order('created_at').range(page * page_size, (page + 1) * page_size - 1)
-        rows = q.execute().data
-        msgs.extend(rows)
-        if len(rows) < page_size:
-            break
-        page += 1
+    msg_filters = [('eq', 'author_id', uid), ('gte', 'created_at', start), ('lte', 'created_at', end)]
+    if guild_id:
+        msg_filters.append(('eq', 'guild_id', guild_id))
+    msgs = _paginated_fetch(
+        db, 'discord_messages',
+        'message_id, channel_id, thread_id, content, created_at, '
+        'reaction_count, reactors, reference_id, attachments',
+        msg_filters,
+    )
 
     if not msgs:
         return {"username": display_name, "month": month, "total_messages": 0,
@@ -20,6 +20,10 @@ from typing import Any, Dict, Iterable, List, Optional, Set
 from dotenv import load_dotenv
 from supabase import create_client
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.bulk_export import EXPORT_FORMATS, KeysetScan, export_scan, iter_rows
+
 load_dotenv()
 
 DEFAULT_COLUMNS = (
@@ -27,6 +31,7 @@ DEFAULT_COLUMNS = (
     "edited_at,attachments,reaction_count,reactors,reference_id,is_deleted"
 )
 MEMBER_COLUMNS = "member_id,bot,allow_content_sharing"
+CHECKPOINT_FILENAME = ".export_checkpoint.json"
 CHANNEL_COLUMNS = "channel_id,channel_name,category_id,nsfw,guild_id"
 
 
@@ -49,48 +54,62 @@ def get_client():
     return create_client(url, key)
 
 
-def paged_select(query, *, batch_size: int) -> Iterable[Dict[str, Any]]:
-    offset = 0
-    while True:
-        result = query.range(offset, offset + batch_size - 1).execute()
-        rows = result.data or []
-        if not rows:
-            break
-        yield from rows
-        if len(rows) < batch_size:
-            break
-        offset += batch_size
-
-
 def fetch_opted_out_author_ids(client, *, batch_size: int) -> Set[int]:
-    query = (
-        client.table("members")
-        .select("member_id")
-        .eq("allow_content_sharing", False)
-        .order("member_id")
+    scan = KeysetScan(
+        "members",
+        columns="member_id",
+        key="member_id",
+        filters=(("eq", "allow_content_sharing", False),),
+        page_size=batch_size,
     )
     return {
         int(row["member_id"])
-        for row in paged_select(query, batch_size=batch_size)
+        for row in iter_rows(client, scan)
         if row.get("member_id") is not None
     }
 
 
 def fetch_bot_author_ids(client, *, batch_size: int) -> Set[int]:
-    query = client.table("members").select("member_id").eq("bot", True).order("member_id")
+    scan = KeysetScan("members", columns="member_id", key="member_id", filters=(("eq", "bot", True),), page_size=batch_size)
     return {
         int(row["member_id"])
-        for row in paged_select(query, batch_size=batch_size)
+        for row in iter_rows(client, scan)
         if row.get("member_id") is not None
     }
 
 
 def fetch_channel_map(client, *, guild_id: Optional[int], batch_size: int) -> Dict[int, Dict[str, Any]]:
-    query = client.table("discord_channels").select(CHANNEL_COLUMNS).order("channel_id")
+    filters = (("eq", "guild_id", guild_id),) if guild_id is not None else ()
+    scan = KeysetScan("discord_channels", columns=CHANNEL_COLUMNS, key="channel_id", filters=filters, page_size=batch_size)
+    return {int(row["channel_id"]): row for row in iter_rows(client, scan) if row.get("channel_id") is not None}
+
+
+def message_scan(
+    *,
+    guild_id: Optional[int],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    include_deleted: bool,
+    batch_size: int,
+) -> KeysetScan:
+    """Newest-first keyset scan over discord_messages."""
+    filters = []
     if guild_id is not None:
-        query = query.eq("guild_id", guild_id)
-    rows = paged_select(query, batch_size=batch_size)
-    return {int(row["channel_id"]): row for row in rows if row.get("channel_id") is not None}
+        filters.append(("eq", "guild_id", guild_id))
+    if start_date:
+        filters.append(("gte", "created_at", start_date))
+    if end_date:
+        filters.append(("lt", "created_at", end_date))
+    if not include_deleted:
+        filters.append(("neq", "is_deleted", True))
+    return KeysetScan(
+        "discord_messages",
+        columns=DEFAULT_COLUMNS,
+        key="message_id",
+        filters=tuple(filters),
+        descending=True,
+        page_size=batch_size,
+    )
 
 
 def iter_messages(
@@ -102,32 +121,16 @@ def iter_messages(
     include_deleted: bool,
     batch_size: int,
 ) -> Iterable[Dict[str, Any]]:
-    last_message_id: Optional[int] = None
-    while True:
-        query = client.table("discord_messages").select(DEFAULT_COLUMNS).order("message_id", desc=True)
-        if guild_id is not None:
-            query = query.eq("guild_id", guild_id)
-        if start_date:
-            query = query.gte("created_at", start_date)
-        if end_date:
-            query = query.lt("created_at", end_date)
-        if not include_deleted:
-            query = query.neq("is_deleted", True)
-        if last_message_id is not None:
-            query = query.lt("message_id", last_message_id)
-
-        result = query.limit(batch_size).execute()
-        rows = result.data or []
-        if not rows:
-            break
-        yield from rows
-
-        last_row_id = as_int(rows[-1].get("message_id"))
-        if last_row_id is None or last_row_id == last_message_id:
-            break
-        last_message_id = last_row_id
-        if len(rows) < batch_size:
-            break
+    return iter_rows(
+        client,
+        message_scan(
+            guild_id=guild_id,
+            start_date=start_date,
+            end_date=end_date,
+            include_deleted=include_deleted,
+            batch_size=batch_size,
+        ),
+    )
 
 
 def parse_jsonish(value: Any, fallback: Any) -> Any:
@@ -259,13 +262,44 @@ def skip_reason(
     return None
 
 
-def write_jsonl(path: Path, rows: Iterable[Dict[str, Any]]) -> int:
-    count = 0
-    with path.open("w", encoding="utf-8") as f:
-        for row in rows:
-            f.write(json.dumps(row, ensure_ascii=False, sort_keys=True) + "\n")
-            count += 1
-    return count
+def dataset_parquet_schema(args: argparse.Namespace):
+    """Explicit Parquet schema for build_dataset_record output.
+
+    Inference from the first row group would type an all-empty column (e.g.
+    attachments) as null and reject later rows.
+    """
+    import pyarrow as pa
+
+    attachment_fields = [("filename", pa.string()), ("content_type", pa.string()), ("size", pa.int64())]
+    if args.include_attachment_urls:
+        attachment_fields += [("url", pa.string()), ("proxy_url", pa.string())]
+    fields = [
+        ("id", pa.string()),
+        ("text", pa.string()),
+        ("created_at", pa.string()),
+        ("edited_at", pa.string()),
+        ("channel", pa.struct([
+            ("id", pa.string()),
+            ("name", pa.string()),
+            ("category_id", pa.string()),
+            ("nsfw", pa.bool_()),
+        ])),
+        ("author", pa.struct([("id", pa.string())])),
+        ("thread_id", pa.string()),
+        ("reference_id", pa.string()),
+        ("reaction_count", pa.int64()),
+        ("reactor_count", pa.int64()),
+        ("attachment_count", pa.int64()),
+        ("attachments", pa.list_(pa.struct(attachment_fields))),
+    ]
+    if args.include_raw_ids:
+        fields.append(("raw", pa.struct([
+            (name, pa.int64())
+            for name in ("message_id", "guild_id", "channel_id", "thread_id", "author_id", "reference_id")
+        ])))
+    if args.include_jump_urls:
+        fields.append(("discord_url", pa.string()))
+    return pa.schema(fields)
 
 
 def write_dataset_card(path: Path, *, stats: Dict[str, Any], args: argparse.Namespace) -> None:
@@ -339,10 +373,16 @@ metadata such as filename, content type, and size.
     path.write_text(card, encoding="utf-8")
 
 
-def write_metadata(path: Path, *, stats: Dict[str, Any], args: argparse.Namespace) -> None:
+def write_metadata(
+    path: Path,
+    *,
+    stats: Dict[str, Any],
+    args: argparse.Namespace,
+    data_files: List[str],
+) -> None:
     metadata = {
         "generated_at": datetime.now(timezone.utc).isoformat(),
-        "data_files": ["train.jsonl"],
+        "data_files": data_files,
         "privacy_filter": {
             "excluded_member_column": "members.allow_content_sharing",
             "excluded_member_value": False,
@@ -359,6 +399,7 @@ def write_metadata(path: Path, *, stats: Dict[str, Any], args: argparse.Namespac
             "include_bots": args.include_bots,
             "include_empty": args.include_empty,
         },
+        "format": args.format,
         "stats": stats,
     }
     path.write_text(json.dumps(metadata, indent=2, sort_keys=True) + "\n", encoding="utf-8")
@@ -377,60 +418,73 @@ def export_dataset(args: argparse.Namespace) -> Dict[str, Any]:
     bot_ids = set() if args.include_bots else fetch_bot_author_ids(client, batch_size=args.batch_size)
     channels = fetch_channel_map(client, guild_id=args.guild_id, batch_size=args.batch_size)
 
-    stats = {
+    stats: Dict[str, Any] = {
         "exported_messages": 0,
         "skipped_opted_out_messages": 0,
         "skipped_bot_messages": 0,
         "skipped_empty_messages": 0,
-        "opted_out_authors": len(opted_out_ids),
-        "bot_authors": len(bot_ids),
     }
 
-    def records() -> Iterable[Dict[str, Any]]:
-        seen = 0
-        for row in iter_messages(
-            client,
+    def to_record(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        reason = skip_reason(
+            row,
+            opted_out_author_ids=opted_out_ids,
+            bot_author_ids=bot_ids,
+            include_empty=args.include_empty,
+        )
+        if reason == "opted_out":
+            stats["skipped_opted_out_messages"] += 1
+            return None
+        if reason == "bot":
+            stats["skipped_bot_messages"] += 1
+            return None
+        if reason == "empty":
+            stats["skipped_empty_messages"] += 1
+            return None
+
+        stats["exported_messages"] += 1
+        return build_dataset_record(
+            row,
+            channel=channels.get(as_int(row.get("channel_id"))),
+            salt=salt,
+            include_raw_ids=args.include_raw_ids,
+            include_attachment_urls=args.include_attachment_urls,
+            include_jump_urls=args.include_jump_urls,
+        )
+
+    checkpoint_path = out_dir / CHECKPOINT_FILENAME
+    if not args.resume and checkpoint_path.exists():
+        checkpoint_path.unlink()
+
+    suffix = "jsonl" if args.format == "jsonl" else "parquet"
+    result = export_scan(
+        client,
+        message_scan(
             guild_id=args.guild_id,
             start_date=args.start_date,
             end_date=args.end_date,
             include_deleted=args.include_deleted,
             batch_size=args.batch_size,
-        ):
-            seen += 1
-            reason = skip_reason(
-                row,
-                opted_out_author_ids=opted_out_ids,
-                bot_author_ids=bot_ids,
-                include_empty=args.include_empty,
-            )
-            if reason == "opted_out":
-                stats["skipped_opted_out_messages"] += 1
-                continue
-            if reason == "bot":
-                stats["skipped_bot_messages"] += 1
-                continue
-            if reason == "empty":
-                stats["skipped_empty_messages"] += 1
-                continue
-
-            stats["exported_messages"] += 1
-            yield build_dataset_record(
-                row,
-                channel=channels.get(as_int(row.get("channel_id"))),
-                salt=salt,
-                include_raw_ids=args.include_raw_ids,
-                include_attachment_urls=args.include_attachment_urls,
-                include_jump_urls=args.include_jump_urls,
-            )
-
-            if args.limit and stats["exported_messages"] >= args.limit:
-                break
-
-        stats["scanned_messages"] = seen
-
-    write_jsonl(out_dir / "train.jsonl", records())
+        ),
+        out_dir / f"train.{suffix}",
+        fmt=args.format,
+        transform=to_record,
+        limit=args.limit,
+        checkpoint_path=checkpoint_path,
+        state=stats,
+        parquet_schema=dataset_parquet_schema(args) if args.format == "parquet" else None,
+    )
+    stats["scanned_messages"] = result.rows_read
+    stats["opted_out_authors"] = len(opted_out_ids)
+    stats["bot_authors"] = len(bot_ids)
+
     write_dataset_card(out_dir / "README.md", stats=stats, args=args)
-    write_metadata(out_dir / "export_metadata.json", stats=stats, args=args)
+    write_metadata(
+        out_dir / "export_metadata.json",
+        stats=stats,
+        args=args,
+        data_files=[f.name for f in result.files],
+    )
     return stats
 
 
@@ -451,6 +505,12 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser.add_argument("--include-deleted", action="store_true", help="Include messages marked deleted")
     parser.add_argument("--include-bots", action="store_true", help="Include bot-authored messages")
     parser.add_argument("--include-empty", action="store_true", help="Include messages with empty text")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl", help="Output format (parquet needs pyarrow)")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=f"Continue an interrupted export from {CHECKPOINT_FILENAME} in the output directory",
+    )
     return parser.parse_args(argv)
 
 
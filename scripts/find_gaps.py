@@ -18,6 +18,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from supabase import create_client
+from src.common.bulk_export import KeysetScan, iter_rows
 from datetime import datetime, timedelta
 from collections import defaultdict
 import statistics
@@ -30,27 +31,19 @@ args = parser.parse_args()
 PARANOID_MODE = args.paranoid
 
 def fetch_all_messages():
-    """Fetch all message timestamps with pagination."""
+    """Stream all message timestamps, keyset-paginated on (created_at, message_id)."""
     supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
     
     print("Fetching all message timestamps (this may take a few minutes)...")
-    all_messages = []
-    offset = 0
-    batch_size = 1000
+    scan = KeysetScan('discord_messages', columns='created_at', key=('created_at', 'message_id'))
+    fetched = 0
+    for row in iter_rows(supabase, scan):
+        yield row
+        fetched += 1
+        if fetched % 100000 == 0:
+            print(f"  Fetched {fetched:,} messages...")
     
-    while True:
-        batch = supabase.table('discord_messages').select('created_at').order('created_at').range(offset, offset + batch_size - 1).execute()
-        if not batch.data:
-            break
-        all_messages.extend(batch.data)
-        offset += batch_size
-        if offset % 100000 == 0:
-            print(f"  Fetched {len(all_messages):,} messages...")
-        if len(batch.data) < batch_size:
-            break
-    
-    print(f"Total messages: {len(all_messages):,}\n")
-    return all_messages
+    print(f"Total messages: {fetched:,}\n")
 
 def analyze_hourly(messages):
     """Group messages by hour and analyze for gaps."""
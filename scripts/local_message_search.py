@@ -0,0 +1,254 @@
+"""
+SQLite FTS5 stand-in for the ``search_discord_messages`` RPC.
+
+``LocalMessageSearch`` implements the RPC contract of
+src/common/message_search.py offline, so the search path can be tested and
+benchmarked without Postgres (tests/test_message_search.py,
+scripts/bench_message_search.py).
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.message_search import (  # noqa: E402
+    _CURSOR_KEYS,
+    MAX_PAGE_SIZE,
+    SEARCH_RPC,
+    _json_array,
+    message_has_kind,
+)
+
+
+def _utc_iso(value: Any) -> Optional[str]:
+    """Normalise timestamps so SQLite can compare them as strings."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+
+_WEBSEARCH_TERM = re.compile(r'(-?)"([^"]*)"|(\S+)')
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def _fts5_query(raw: str) -> Optional[str]:
+    """Translate websearch_to_tsquery syntax (words, "phrases", -not, or) to FTS5."""
+    parts: List[str] = []
+    negated: List[str] = []
+    for negate, phrase, word in _WEBSEARCH_TERM.findall(raw):
+        if word and word.lower() == 'or':
+            if parts and parts[-1] != 'OR':
+                parts.append('OR')
+            continue
+        if word.startswith('-'):
+            negate, word = '-', word[1:]
+        tokens = _WORD.findall(phrase or word)
+        if not tokens:
+            continue
+        term = '"' + ' '.join(tokens) + '"'
+        if negate:
+            negated.append(term)
+        else:
+            parts.append(term)
+    while parts and parts[-1] == 'OR':
+        parts.pop()
+    if not parts:
+        return None
+    return ' '.join(parts) + ''.join(f' NOT {term}' for term in negated)
+
+
+class LocalMessageSearch:
+    """SQLite FTS5 stand-in for the ``search_discord_messages`` RPC.
+
+    A unicode61 FTS table plays the part of the tsvector index and a trigram
+    FTS table the pg_trgm index; ranks are on a different scale from Postgres
+    but ordering, filtering and cursor semantics match. Use it as the
+    ``client`` argument of ``search_messages``.
+    """
+
+    def __init__(self, path: str = ':memory:'):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.create_function('has_kind', 4, lambda c, a, e, k: int(message_has_kind(c, a, e, k)),
+                                   deterministic=True)
+        self._conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA recursive_triggers = ON;
+            CREATE TABLE IF NOT EXISTS discord_messages (
+                message_id INTEGER PRIMARY KEY,
+                guild_id INTEGER,
+                channel_id INTEGER,
+                thread_id INTEGER,
+                author_id INTEGER,
+                content TEXT NOT NULL DEFAULT '',
+                created_at TEXT NOT NULL,
+                attachments TEXT NOT NULL DEFAULT '[]',
+                embeds TEXT NOT NULL DEFAULT '[]',
+                reaction_count INTEGER NOT NULL DEFAULT 0,
+                reactors TEXT NOT NULL DEFAULT '[]',
+                reference_id INTEGER,
+                is_deleted INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_messages_guild_created
+                ON discord_messages (guild_id, created_at DESC, message_id DESC);
+            CREATE INDEX IF NOT EXISTS idx_messages_channel_created
+                ON discord_messages (channel_id, created_at DESC, message_id DESC);
+            CREATE INDEX IF NOT EXISTS idx_messages_reactions
+                ON discord_messages (reaction_count DESC, created_at DESC, message_id DESC);
+            CREATE TABLE IF NOT EXISTS discord_channels (
+                channel_id INTEGER PRIMARY KEY,
+                channel_name TEXT,
+                nsfw INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                content, content='discord_messages', content_rowid='message_id', tokenize='unicode61'
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_trgm USING fts5(
+                content, content='discord_messages', content_rowid='message_id', tokenize='trigram'
+            );
+            CREATE TRIGGER IF NOT EXISTS discord_messages_ai AFTER INSERT ON discord_messages BEGIN
+                INSERT INTO messages_fts(rowid, content) VALUES (new.message_id, new.content);
+                INSERT INTO messages_trgm(rowid, content) VALUES (new.message_id, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS discord_messages_ad AFTER DELETE ON discord_messages BEGIN
+                INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.message_id, old.content);
+                INSERT INTO messages_trgm(messages_trgm, rowid, content) VALUES ('delete', old.message_id, old.content);
+            END;
+        """)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def add_channels(self, channels: Iterable[Dict[str, Any]]) -> None:
+        rows = [(int(c['channel_id']), c.get('channel_name'), int(bool(c.get('nsfw')))) for c in channels]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO discord_channels (channel_id, channel_name, nsfw) VALUES (?, ?, ?)', rows,
+            )
+
+    def add_messages(self, messages: Iterable[Dict[str, Any]]) -> int:
+        rows = [(
+            int(m['message_id']), m.get('guild_id'), m.get('channel_id'), m.get('thread_id'), m.get('author_id'),
+            m.get('content') or '', _utc_iso(m['created_at']),
+            json.dumps(_json_array(m.get('attachments'))), json.dumps(_json_array(m.get('embeds'))),
+            int(m.get('reaction_count') or 0), json.dumps(m.get('reactors') or []),
+            m.get('reference_id'), int(bool(m.get('is_deleted'))),
+        ) for m in messages]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO discord_messages (message_id, guild_id, channel_id, thread_id, author_id, '
+                'content, created_at, attachments, embeds, reaction_count, reactors, reference_id, is_deleted) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows,
+            )
+        return len(rows)
+
+    def rpc(self, name: str, params: Dict[str, Any]) -> SimpleNamespace:
+        if name != SEARCH_RPC:
+            raise ValueError(f"LocalMessageSearch only implements {SEARCH_RPC}, not {name}")
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=self._search(params)))
+
+    def _search(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        raw = (params.get('p_query') or '').strip() or None
+        sort = params.get('p_sort') if params.get('p_sort') in ('date', 'reactions') else ('relevance' if raw else 'date')
+        args: Dict[str, Any] = {}
+        where = ['m.is_deleted = 0']
+
+        if raw:
+            # Each matching index contributes a score; a row's rank is their sum
+            # (FTS relevance plus a flat bonus for a literal substring hit).
+            scores = []
+            fts = _fts5_query(raw)
+            if fts:
+                scores.append('SELECT rowid AS id, -bm25(messages_fts) AS score FROM messages_fts '
+                              'WHERE messages_fts MATCH :fts')
+                args['fts'] = fts
+            if len(raw) >= 3:
+                scores.append('SELECT rowid AS id, 1.0 AS score FROM messages_trgm WHERE messages_trgm MATCH :trgm')
+                args['trgm'] = '"' + raw.replace('"', '""') + '"'
+            else:
+                scores.append("SELECT message_id AS id, 1.0 AS score FROM discord_messages "
+                              "WHERE content LIKE :like ESCAPE '\\'")
+                args['like'] = '%' + re.sub(r'([\\%_])', r'\\\1', raw) + '%'
+            source = (
+                'WITH scored(id, rank) AS MATERIALIZED (SELECT id, sum(score) FROM ('
+                + ' UNION ALL '.join(scores)
+                + ') GROUP BY id) '
+                'SELECT m.*, scored.rank AS rank FROM scored JOIN discord_messages m ON m.message_id = scored.id'
+            )
+        else:
+            source = 'SELECT m.*, 0.0 AS rank FROM discord_messages m'
+
+        if params.get('p_guild_id') is not None:
+            where.append('m.guild_id = :guild_id')
+            args['guild_id'] = int(params['p_guild_id'])
+        if params.get('p_channel_ids') is not None:
+            channel_ids = [int(c) for c in params['p_channel_ids']]
+            where.append(f"m.channel_id IN ({','.join(str(c) for c in channel_ids) or 'NULL'})")
+        if params.get('p_author_id') is not None:
+            where.append('m.author_id = :author_id')
+            args['author_id'] = int(params['p_author_id'])
+        if params.get('p_exclude_author_ids'):
+            excluded = ','.join(str(int(a)) for a in params['p_exclude_author_ids'])
+            where.append(f'm.author_id NOT IN ({excluded})')
+        if params.get('p_after'):
+            where.append('m.created_at >= :after')
+            args['after'] = _utc_iso(params['p_after'])
+        if params.get('p_before'):
+            where.append('m.created_at <= :before')
+            args['before'] = _utc_iso(params['p_before'])
+        if params.get('p_is_reply') is not None:
+            where.append('(m.reference_id IS NOT NULL) = :is_reply')
+            args['is_reply'] = int(bool(params['p_is_reply']))
+        if params.get('p_min_reactions'):
+            where.append('m.reaction_count >= :min_reactions')
+            args['min_reactions'] = int(params['p_min_reactions'])
+        if params.get('p_mentions_author_id') is not None:
+            where.append('instr(m.content, :mention) > 0')
+            args['mention'] = str(params['p_mentions_author_id'])
+        for index, kind in enumerate(params.get('p_has') or []):
+            where.append(f'has_kind(m.content, m.attachments, m.embeds, :kind{index}) = 1')
+            args[f'kind{index}'] = str(kind).lower()
+        if params.get('p_exclude_nsfw'):
+            where.append(
+                'NOT EXISTS (SELECT 1 FROM discord_channels c WHERE c.channel_id = m.channel_id '
+                "AND (c.nsfw = 1 OR lower(c.channel_name) LIKE '%nsfw%'))"
+            )
+
+        keys = _CURSOR_KEYS[sort]
+        outer_where = ''
+        cursor = params.get('p_cursor')
+        if cursor:
+            outer_where = 'WHERE (' + ', '.join(f'h.{k}' for k in keys) + ') < (' + ', '.join(f':c_{k}' for k in keys) + ')'
+            for key in keys:
+                args[f'c_{key}'] = _utc_iso(cursor[key]) if key == 'created_at' else cursor[key]
+        args['limit'] = max(1, min(int(params.get('p_limit') or 20), MAX_PAGE_SIZE + 1))
+
+        sql = (
+            f'SELECT * FROM ({source} WHERE {" AND ".join(where)}) h {outer_where} '
+            f'ORDER BY {", ".join(f"h.{k} DESC" for k in keys)} LIMIT :limit'
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        results = []
+        for row in rows:
+            item = dict(row)
+            item.pop('is_deleted', None)
+            for key in ('attachments', 'embeds', 'reactors'):
+                item[key] = json.loads(item[key]) if item[key] else []
+            results.append(item)
+        return results
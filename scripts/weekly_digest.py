@@ -43,6 +43,7 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
+from src.common.bulk_export import KeysetScan, iter_rows
 from src.common.urls import message_jump_url
 
 
@@ -237,18 +238,17 @@ MSG_SELECT = 'message_id, channel_id, thread_id, author_id, content, created_at,
 
 
 def get_messages_in_range(channel_id: int, days: int = 7) -> List[Dict]:
-    """Get messages from a channel within the last N days."""
+    """Get messages from a channel within the last N days (newest first, all pages)."""
     client = get_client()
     cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
 
-    q = client.table('discord_messages').select(MSG_SELECT) \
-        .eq('channel_id', channel_id).gte('created_at', cutoff) \
-        .order('created_at', desc=True)
+    filters = [('eq', 'channel_id', channel_id), ('gte', 'created_at', cutoff)]
     if get_active_guild_id():
-        q = q.eq('guild_id', get_active_guild_id())
-    result = q.execute()
+        filters.append(('eq', 'guild_id', get_active_guild_id()))
+    scan = KeysetScan('discord_messages', columns=MSG_SELECT, key=('created_at', 'message_id'),
+                      filters=tuple(filters), descending=True)
 
-    return _enrich_messages(result.data)
+    return _enrich_messages(list(iter_rows(client, scan)))
 
 
 def get_top_messages(channel_id: int, days: int = 7, min_reactions: int = 3, limit: int = 20) -> List[Dict]:
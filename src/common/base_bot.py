@@ -10,6 +10,9 @@ import aiohttp
 import discord
 from discord.ext import commands
 
+from src.common.db_executor import release_db_executor, retain_db_executor
+from src.common.loop_watchdog import release_loop_watchdog, start_loop_watchdog
+from src.common.metrics import instrument_task_loops
 from src.common.rate_limiter import RateLimiter
 
 class BaseDiscordBot(commands.Bot):
@@ -68,8 +71,24 @@ class BaseDiscordBot(commands.Bot):
         # For Summarizer Cog to track if we've run the immediate summary
         self.summarizer_ready = False
 
+        self._loop_watchdog = None
+        self._db_executor_retained = False
+
+    async def add_cog(self, cog, /, **kwargs):
+        """Add a cog and time its tasks.loop iterations in the metrics registry."""
+        await super().add_cog(cog, **kwargs)
+        try:
+            instrument_task_loops(cog)
+        except Exception as e:
+            self.logger.warning(f"Could not instrument task loops of {type(cog).__name__}: {e}")
+
     async def setup_hook(self):
         """Called when the bot is starting up."""
+        # Samples loop lag and captures the stacks of loop-blocking calls.
+        self._loop_watchdog = start_loop_watchdog()
+        # Other bots in this process may share the DB executor; close() releases our hold.
+        retain_db_executor()
+        self._db_executor_retained = True
         # Add the sync command
         @self.command()
         @commands.is_owner()
@@ -102,6 +121,17 @@ class BaseDiscordBot(commands.Bot):
                 await self.http._session.close()
 
             await super().close()
+            # The watchdog is process-wide; it stops once no other bot holds it.
+            if self._loop_watchdog is not None:
+                self._loop_watchdog = None
+                release_loop_watchdog()
+            storage_handler = getattr(getattr(self, "db_handler", None), "storage_handler", None)
+            if storage_handler is not None:
+                await storage_handler.close_http_sessions()
+            # Cogs are unloaded by super().close(); the executor stops once no other bot holds it.
+            if self._db_executor_retained:
+                self._db_executor_retained = False
+                release_db_executor(wait=False)
         except Exception as e:
             self.logger.error(f"Error during bot shutdown: {str(e)}")
             self.logger.debug(traceback.format_exc())
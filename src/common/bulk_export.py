@@ -0,0 +1,345 @@
+"""Keyset-paginated bulk reads and streaming exports.
+
+``iter_rows`` walks a Supabase table in key order, asking PostgREST for
+``key > last_seen`` on every page instead of an ever-growing OFFSET, so each
+page is an index range scan and the cost per page stays flat as the table
+grows. The key is either a unique column (e.g. message_id) or a tuple ending in
+one (e.g. ('created_at', 'message_id')) for time-ordered scans.
+
+``export_scan`` streams a scan into JSONL or Parquet with bounded memory and,
+given a checkpoint path, can resume an interrupted export exactly where the
+last committed page left off.
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger('DiscordBot')
+
+DEFAULT_PAGE_SIZE = 1000
+EXPORT_FORMATS = ('jsonl', 'parquet')
+CHECKPOINT_VERSION = 1
+
+# (operator, column, value); operator is a postgrest-py filter method name.
+Filter = Tuple[str, str, Any]
+
+
+@dataclass(frozen=True)
+class KeysetScan:
+    """One table read, paged on ``key``.
+
+    The last column of ``key`` must be unique (on its own or together with the
+    columns before it) or rows sharing a key value can be skipped between pages.
+    """
+
+    table: str
+    columns: str = '*'
+    key: Union[str, Tuple[str, ...]] = 'message_id'
+    filters: Tuple[Filter, ...] = ()
+    descending: bool = False
+    page_size: int = DEFAULT_PAGE_SIZE
+    limit: Optional[int] = None
+
+    @property
+    def key_columns(self) -> Tuple[str, ...]:
+        return (self.key,) if isinstance(self.key, str) else tuple(self.key)
+
+    def select_clause(self) -> str:
+        if self.columns.strip() == '*':
+            return '*'
+        columns = [c.strip() for c in self.columns.split(',') if c.strip()]
+        columns.extend(k for k in self.key_columns if k not in columns)  # needed for the cursor
+        return ', '.join(columns)
+
+    def cursor_of(self, row: Dict[str, Any]) -> List[Any]:
+        return [row.get(k) for k in self.key_columns]
+
+    def fingerprint(self) -> Dict[str, Any]:
+        """What must match for a checkpoint to be resumed against this scan."""
+        return json.loads(json.dumps({
+            'table': self.table,
+            'columns': self.select_clause(),
+            'key': list(self.key_columns),
+            'filters': [[op, col, value] for op, col, value in self.filters],
+            'descending': self.descending,
+        }, default=str))
+
+
+def _postgrest_value(value: Any) -> str:
+    """Quote a value for use inside a PostgREST or=(...) expression."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return str(value)
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _after_cursor(query, scan: KeysetScan, cursor: Sequence[Any]):
+    keys = scan.key_columns
+    op = 'lt' if scan.descending else 'gt'
+    if len(keys) == 1:
+        return getattr(query, op)(keys[0], cursor[0])
+    # (a, b, c) > (x, y, z)  ==  a > x  or  (a = x and b > y)  or  (a = x and b = y and c > z)
+    branches = []
+    for i, key in enumerate(keys):
+        terms = [f'{keys[j]}.eq.{_postgrest_value(cursor[j])}' for j in range(i)]
+        terms.append(f'{key}.{op}.{_postgrest_value(cursor[i])}')
+        branches.append(terms[0] if len(terms) == 1 else f'and({",".join(terms)})')
+    return query.or_(','.join(branches))
+
+
+def _build_page_query(client, scan: KeysetScan, cursor: Optional[Sequence[Any]], page_limit: int):
+    query = client.table(scan.table).select(scan.select_clause())
+    for op, column, value in scan.filters:
+        query = getattr(query, 'in_' if op == 'in' else op)(column, value)
+    if cursor is not None:
+        query = _after_cursor(query, scan, cursor)
+    for key in scan.key_columns:
+        query = query.order(key, desc=scan.descending)
+    return query.limit(page_limit)
+
+
+def iter_pages(client, scan: KeysetScan, *, after: Optional[Sequence[Any]] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Yield pages of ``scan`` (a sync Supabase client), starting after cursor ``after``."""
+    remaining = scan.limit
+    cursor = list(after) if after is not None else None
+    while remaining is None or remaining > 0:
+        page_limit = scan.page_size if remaining is None else min(scan.page_size, remaining)
+        rows = _build_page_query(client, scan, cursor, page_limit).execute().data or []
+        if not rows:
+            return
+        yield rows
+        if remaining is not None:
+            remaining -= len(rows)
+        # A short page is not the end: PostgREST max-rows may cap every page.
+        next_cursor = scan.cursor_of(rows[-1])
+        if any(value is None for value in next_cursor) or next_cursor == cursor:
+            logger.warning(f"Keyset scan of {scan.table} stopped: unusable cursor {next_cursor!r}")
+            return
+        cursor = next_cursor
+
+
+def iter_rows(client, scan: KeysetScan, *, after: Optional[Sequence[Any]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield the rows of ``scan`` one at a time; holds at most one page in memory."""
+    for page in iter_pages(client, scan, after=after):
+        yield from page
+
+
+class _JsonlSink:
+    """Appends one JSON object per line; every commit is a resumable point."""
+
+    def __init__(self, path: Path, resume: Optional[Dict[str, Any]]):
+        self.path = path
+        if resume:
+            # Drop anything written after the last checkpoint.
+            os.truncate(path, resume['bytes'])
+            self._file = path.open('ab')
+        else:
+            self._file = path.open('wb')
+
+    @property
+    def files(self) -> List[Path]:
+        return [self.path]
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, sort_keys=True) + '\n'
+        self._file.write(line.encode('utf-8'))
+
+    def commit(self) -> Optional[Dict[str, Any]]:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return {'bytes': self._file.tell()}
+
+    def close(self) -> Dict[str, Any]:
+        state = self.commit()
+        self._file.close()
+        return state
+
+
+class _ParquetSink:
+    """Writes ``<stem>-NNNNN.parquet`` part files in row groups.
+
+    A Parquet file is only readable once its footer is written, so the sink is
+    resumable at part boundaries: ``commit`` returns a state only after a part
+    reaching ``rows_per_file`` has been closed.
+    """
+
+    def __init__(self, path: Path, resume: Optional[Dict[str, Any]], *, schema=None,
+                 rows_per_file: int = 250_000, row_group_size: int = 10_000):
+        try:
+            import pyarrow  # noqa: F401
+            import pyarrow.parquet  # noqa: F401
+        except ImportError as e:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)") from e
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.path = path
+        self.schema = schema
+        self.rows_per_file = rows_per_file
+        self.row_group_size = row_group_size
+        self.parts: List[str] = list((resume or {}).get('parts', []))
+        # Remove parts written after the checkpoint was taken, or by an older run.
+        for stale in path.parent.glob(f'{path.stem}-*.parquet'):
+            if stale.name not in self.parts:
+                stale.unlink()
+        self._writer = None
+        self._current: Optional[str] = None
+        self._part_rows = 0
+        self._buffer: List[Dict[str, Any]] = []
+
+    @property
+    def files(self) -> List[Path]:
+        return [self.path.parent / name for name in self.parts]
+
+    def _flush_row_group(self) -> None:
+        if not self._buffer:
+            return
+        table = self._pa.Table.from_pylist(self._buffer, schema=self.schema)
+        if self._writer is None:
+            name = f'{self.path.stem}-{len(self.parts):05d}.parquet'
+            self.schema = table.schema
+            self._writer = self._pq.ParquetWriter(str(self.path.parent / name), self.schema)
+            self._current = name
+        self._writer.write_table(table)
+        self._part_rows += len(self._buffer)
+        self._buffer = []
+
+    def _close_part(self) -> None:
+        self._flush_row_group()
+        if self._writer is not None:
+            self._writer.close()
+            self.parts.append(self._current)
+            self._writer = None
+            self._part_rows = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._buffer.append(record)
+        if len(self._buffer) >= self.row_group_size:
+            self._flush_row_group()
+
+    def commit(self) -> Optional[Dict[str, Any]]:
+        if self._part_rows + len(self._buffer) < self.rows_per_file:
+            return None
+        self._close_part()
+        return {'parts': list(self.parts)}
+
+    def close(self) -> Dict[str, Any]:
+        self._close_part()
+        return {'parts': list(self.parts)}
+
+
+@dataclass
+class ExportResult:
+    rows_read: int = 0
+    rows_written: int = 0
+    files: List[Path] = field(default_factory=list)
+    resumed: bool = False
+
+
+def _load_checkpoint(path: Path, scan: KeysetScan, fmt: str) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    checkpoint = json.loads(path.read_text(encoding='utf-8'))
+    if checkpoint.get('version') != CHECKPOINT_VERSION or checkpoint.get('format') != fmt:
+        raise ValueError(f"Checkpoint {path} was written by a different export format or version")
+    if checkpoint.get('scan') != scan.fingerprint():
+        raise ValueError(f"Checkpoint {path} belongs to a different scan; delete it to start over")
+    return checkpoint
+
+
+def _save_checkpoint(path: Path, checkpoint: Dict[str, Any]) -> None:
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(json.dumps(checkpoint, sort_keys=True, default=str), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def export_scan(
+    client,
+    scan: KeysetScan,
+    path: Union[str, Path],
+    *,
+    fmt: str = 'jsonl',
+    transform: Optional[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = None,
+    limit: Optional[int] = None,
+    checkpoint_path: Optional[Union[str, Path]] = None,
+    state: Optional[Dict[str, Any]] = None,
+    parquet_schema=None,
+    rows_per_file: int = 250_000,
+) -> ExportResult:
+    """Stream ``scan`` into ``path`` as JSONL or Parquet parts.
+
+    ``transform`` maps each row to the record to write, or None to skip it;
+    ``limit`` caps the records written. With ``checkpoint_path`` the cursor,
+    output position and the caller's JSON-serialisable ``state`` dict (e.g.
+    running stats) are saved after every committed page, and an existing
+    checkpoint for the same scan resumes from there. ``parquet_schema`` is a
+    pyarrow schema; without one it is inferred from the first row group.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {EXPORT_FORMATS}")
+    path = Path(path)
+    checkpoint_file = Path(checkpoint_path) if checkpoint_path else None
+    checkpoint = _load_checkpoint(checkpoint_file, scan, fmt) if checkpoint_file else None
+    if checkpoint and state is not None:
+        state.clear()
+        state.update(checkpoint.get('state') or {})
+
+    resume = checkpoint['output'] if checkpoint else None
+    if fmt == 'jsonl':
+        sink = _JsonlSink(path, resume)
+    else:
+        sink = _ParquetSink(path, resume, schema=parquet_schema, rows_per_file=rows_per_file)
+
+    result = ExportResult(
+        rows_read=checkpoint['rows_read'] if checkpoint else 0,
+        rows_written=checkpoint['rows_written'] if checkpoint else 0,
+        resumed=checkpoint is not None,
+    )
+    cursor = checkpoint['cursor'] if checkpoint else None
+    done = bool(checkpoint and checkpoint.get('complete'))
+
+    def save(output_state: Dict[str, Any], complete: bool = False) -> None:
+        if checkpoint_file is None:
+            return
+        _save_checkpoint(checkpoint_file, {
+            'version': CHECKPOINT_VERSION,
+            'format': fmt,
+            'scan': scan.fingerprint(),
+            'cursor': cursor,
+            'rows_read': result.rows_read,
+            'rows_written': result.rows_written,
+            'output': output_state,
+            'state': state or {},
+            'complete': complete,
+        })
+
+    try:
+        if not done:
+            for page in iter_pages(client, scan, after=cursor):
+                for row in page:
+                    if limit is not None and result.rows_written >= limit:
+                        break
+                    result.rows_read += 1
+                    cursor = scan.cursor_of(row)
+                    record = transform(row) if transform else row
+                    if record is not None:
+                        sink.write(record)
+                        result.rows_written += 1
+                if limit is not None and result.rows_written >= limit:
+                    break
+                output_state = sink.commit()
+                if output_state is not None:
+                    save(output_state)
+    except BaseException:
+        # Leave the last good checkpoint in place; the next run resumes from it.
+        if fmt == 'jsonl':
+            sink.close()
+        raise
+    save(sink.close(), complete=True)
+    result.files = sink.files
+    return result
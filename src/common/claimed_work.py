@@ -0,0 +1,181 @@
+"""
+ClaimedWorkExecutor — the claim/dispatch/drain loop shared by claimed-row executors.
+
+PaymentEngine and PublicationDispatcher both claim due rows from a queue
+table and run each row as its own task. This base owns everything but the
+domain work:
+
+  - claiming: ``claim_available`` claims up to ``claim_limit`` rows, never
+    more than ``max_in_flight`` running at once. A full claim (or no room to
+    claim) marks a backlog, and every finished row claims again until it
+    clears;
+  - ``wake()`` claims now instead of on the caller's next tick. It is safe to
+    call from any thread, and calls made while a claim is pending coalesce;
+  - each running row's phase is counted in the subclass's ``in_flight_gauge``
+    (labelled by ``phase``); ``_enter_phase`` moves a row between phases;
+  - ``drain`` waits for running rows and pending claims, ``stop`` stops
+    claiming while claimed rows run to completion.
+
+Subclasses set ``log_name``, ``noun``, ``id_key``, ``task_prefix`` and
+``in_flight_gauge``, and implement ``_claim`` (fetch up to ``limit`` rows)
+and ``_execute`` (run one row). ``_order`` sorts a claimed batch before it
+starts and ``_finish`` runs after a row has left the in-flight set.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger('DiscordBot')
+
+
+class ClaimedWorkExecutor:
+    """Bounded, backlog-aware executor for rows claimed from a DB queue."""
+
+    log_name = 'ClaimedWorkExecutor'
+    noun = 'row'
+    id_key = 'id'
+    task_prefix = 'claimed'
+    initial_phase = 'waiting'
+    in_flight_gauge: Any = None
+
+    def __init__(self, db_handler, *, claim_limit: int, max_in_flight: int):
+        self.db_handler = db_handler
+        self.claim_limit = max(int(claim_limit), 1)
+        self.max_in_flight = max(int(max_in_flight), self.claim_limit)
+
+        self._claim_lock = asyncio.Lock()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._phases: Dict[str, str] = {}
+        self._wake_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._backlog = False
+        self.accepting = True
+
+    # ------------------------------------------------------------------
+    # Domain hooks
+    # ------------------------------------------------------------------
+
+    async def _claim(self, limit: int) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _order(self, claimed: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return claimed
+
+    def _can_claim(self) -> bool:
+        return self.accepting
+
+    async def _execute(self, item: Dict[str, Any]) -> Any:
+        raise NotImplementedError
+
+    async def _finish(self, item: Dict[str, Any], result: Any) -> None:
+        return None
+
+    # ------------------------------------------------------------------
+    # Claiming
+    # ------------------------------------------------------------------
+
+    def wake(self) -> None:
+        """Claim due work now instead of waiting for the next worker tick.
+
+        Safe to call from any thread; calls made while a claim is already
+        pending are coalesced.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self.wake)
+            return
+        self._loop = loop
+        if not self.accepting:
+            return
+        if self._wake_task is None or self._wake_task.done():
+            self._wake_task = loop.create_task(self._drain_backlog(), name=f'{self.task_prefix}-wake')
+
+    async def _drain_backlog(self) -> None:
+        try:
+            while await self.claim_available() and self._backlog:
+                pass
+        except Exception as exc:
+            logger.error(f"[{self.log_name}] Backlog claim failed: {exc}", exc_info=True)
+
+    async def claim_available(self) -> int:
+        """Claim as many due rows as there is in-flight capacity for and start them."""
+        if not self._can_claim():
+            return 0
+        self._loop = asyncio.get_running_loop()
+        async with self._claim_lock:
+            capacity = self.max_in_flight - len(self._tasks)
+            if capacity <= 0:
+                self._backlog = True
+                return 0
+            limit = min(self.claim_limit, capacity)
+            claimed = await self._claim(limit) or []
+            self._backlog = len(claimed) >= limit
+            started = sum(1 for item in self._order(claimed) if self._dispatch(item))
+        if started:
+            logger.info(f"[{self.log_name}] Claimed {started} {self.noun}(s); {len(self._tasks)} in flight.")
+        return started
+
+    def _dispatch(self, item: Dict[str, Any]) -> bool:
+        item_id = item.get(self.id_key)
+        if not item_id:
+            logger.warning(f"[{self.log_name}] Claimed {self.noun} without {self.id_key}; skipping.")
+            return False
+        if item_id in self._tasks:
+            return False
+        self._phases[item_id] = self.initial_phase
+        self.in_flight_gauge.inc(phase=self.initial_phase)
+        self._tasks[item_id] = asyncio.get_running_loop().create_task(
+            self._run(item), name=f'{self.task_prefix}-{item_id}',
+        )
+        return True
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    async def _run(self, item: Dict[str, Any]) -> None:
+        item_id = item[self.id_key]
+        result = None
+        try:
+            result = await self._execute(item)
+        finally:
+            self.in_flight_gauge.dec(phase=self._phases.pop(item_id))
+            self._tasks.pop(item_id, None)
+            if self._backlog:
+                self.wake()
+        await self._finish(item, result)
+
+    def _enter_phase(self, item_id: str, phase: str) -> None:
+        self.in_flight_gauge.dec(phase=self._phases[item_id])
+        self.in_flight_gauge.inc(phase=phase)
+        self._phases[item_id] = phase
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def drain(self) -> None:
+        """Wait until every claimed row (including backlog claims) has finished."""
+        while True:
+            pending: Set[asyncio.Task] = set(self._tasks.values())
+            if self._wake_task is not None and not self._wake_task.done():
+                pending.add(self._wake_task)
+            if not pending:
+                return
+            await asyncio.wait(pending)
+
+    def stop(self) -> None:
+        """Stop claiming; rows already claimed run to completion."""
+        self.accepting = False
+        if self._wake_task is not None:
+            self._wake_task.cancel()
+
+
+__all__ = ['ClaimedWorkExecutor']
@@ -0,0 +1,398 @@
+"""
+DatabaseExecutor — long-lived, bounded dispatch for DatabaseHandler work.
+
+DatabaseHandler exposes a synchronous API over async Supabase helpers. Every
+call used to spin up a throwaway ThreadPoolExecutor and a fresh asyncio.run()
+loop. This module keeps a single background event loop (for the coroutines)
+plus a bounded worker pool (for the blocking supabase-py calls those
+coroutines hand off via asyncio.to_thread), shared by the whole process.
+
+Two entry points:
+  - run(coro_or_fn, ...)        blocking, for sync DatabaseHandler methods
+  - await run_async(fn, ...)    awaitable, for cogs that must not block the
+                                Discord event loop
+
+Calls have no deadline unless the call site passes ``timeout=`` or
+DB_EXECUTOR_CALL_TIMEOUT_SECONDS sets a process-wide default; long archive
+and bulk RPC calls must not be cut off by a blanket limit.
+
+Long-lived owners (bots) pair retain_db_executor() with release_db_executor();
+the shared executor is only shut down when the last owner releases it.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from src.common.env import env_float, env_int
+from src.common.metrics import DB_CALL_SECONDS, DB_QUEUE_WAIT_SECONDS, REGISTRY
+
+logger = logging.getLogger('DiscordBot')
+
+DEFAULT_WORKERS = 8
+
+
+def _describe_deadline(deadline: Optional[float]) -> str:
+    return f"{deadline:.0f}s default deadline" if deadline else "no default deadline"
+
+
+def _call_name(fn: Any) -> str:
+    """Metric label for a DB call: the coroutine or function name."""
+    code = getattr(fn, 'cr_code', None)
+    if code is not None:
+        return getattr(fn, '__qualname__', None) or code.co_name
+    fn = getattr(fn, 'func', fn)  # functools.partial
+    return getattr(fn, '__qualname__', None) or getattr(fn, '__name__', None) or type(fn).__name__
+
+
+class _Ticket:
+    __slots__ = ('submitted_at', 'started', 'abandoned', 'name')
+
+    def __init__(self, submitted_at: float, name: str = 'unknown'):
+        self.submitted_at = submitted_at
+        self.started = False
+        self.abandoned = False
+        self.name = name
+
+
+class DatabaseExecutor:
+    """Shared event loop + bounded worker pools for database calls."""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        call_workers: Optional[int] = None,
+        default_timeout: Optional[float] = None,
+    ):
+        self.max_workers = max_workers or env_int('DB_EXECUTOR_WORKERS', DEFAULT_WORKERS)
+        self.call_workers = call_workers or env_int('DB_EXECUTOR_CALL_WORKERS', self.max_workers)
+        self.default_timeout = default_timeout or env_float('DB_EXECUTOR_CALL_TIMEOUT_SECONDS', None)
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        # Pool used by asyncio.to_thread inside coroutines on the shared loop.
+        self._io_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        # Pool used by run_async() for whole sync DatabaseHandler methods. Kept
+        # separate from _io_pool so a blocked caller can never starve the
+        # coroutine it is waiting on.
+        self._call_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        # Second long-lived loop for sync calls made from a coroutine already
+        # running on the shared loop (blocking that loop on itself deadlocks).
+        self._nested_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._nested_thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        # Metrics (guarded by _lock)
+        self._pending = 0
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_run = 0.0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None:
+            return self._loop
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("DatabaseExecutor has been shut down")
+            if self._loop is not None:
+                return self._loop
+            self._io_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix='db-io'
+            )
+            self._call_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.call_workers, thread_name_prefix='db-call'
+            )
+            loop, self._thread = self._start_loop_thread('db-executor-loop')
+            self._loop = loop
+            logger.debug(
+                f"[DBExecutor] Started with {self.max_workers} io workers, "
+                f"{self.call_workers} call workers, {_describe_deadline(self.default_timeout)}"
+            )
+            return loop
+
+    def _start_loop_thread(self, name: str):
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(self._io_pool)
+        ready = threading.Event()
+
+        def _run_loop():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        thread = threading.Thread(target=_run_loop, name=name, daemon=True)
+        thread.start()
+        ready.wait()
+        return loop, thread
+
+    def _ensure_nested_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("DatabaseExecutor has been shut down")
+            if self._nested_loop is None:
+                self._nested_loop, self._nested_thread = self._start_loop_thread('db-executor-nested-loop')
+            return self._nested_loop
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the shared loop and worker pools."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            loops = [(self._loop, self._thread), (self._nested_loop, self._nested_thread)]
+            io_pool, call_pool = self._io_pool, self._call_pool
+            self._loop = self._nested_loop = None
+        for loop, thread in loops:
+            if loop is None:
+                continue
+            loop.call_soon_threadsafe(loop.stop)
+            if thread is not None and wait:
+                thread.join(timeout=5)
+        for pool in (call_pool, io_pool):
+            if pool is not None:
+                pool.shutdown(wait=wait, cancel_futures=True)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def _on_submit(self, fn: Any = None) -> '_Ticket':
+        with self._lock:
+            self._pending += 1
+            self._submitted += 1
+        return _Ticket(time.monotonic(), _call_name(fn) if fn is not None else 'unknown')
+
+    def _on_start(self, ticket: '_Ticket') -> float:
+        started_at = time.monotonic()
+        wait = started_at - ticket.submitted_at
+        with self._lock:
+            if not ticket.abandoned:
+                self._pending -= 1
+            ticket.started = True
+            self._in_flight += 1
+            self._total_wait += wait
+            if wait > self._max_wait:
+                self._max_wait = wait
+        DB_QUEUE_WAIT_SECONDS.observe(wait)
+        return started_at
+
+    def _on_finish(self, started_at: float, failed: bool, ticket: Optional['_Ticket'] = None) -> None:
+        run = time.monotonic() - started_at
+        with self._lock:
+            self._in_flight -= 1
+            self._total_run += run
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+        DB_CALL_SECONDS.observe(
+            run, method=ticket.name if ticket else 'unknown', outcome='error' if failed else 'ok'
+        )
+
+    def _on_timeout(self, ticket: '_Ticket') -> None:
+        with self._lock:
+            self._timed_out += 1
+            if not ticket.started and not ticket.abandoned:
+                # Cancelled while still queued; it will never reach _on_start.
+                ticket.abandoned = True
+                self._pending -= 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, throughput and wait-time counters."""
+        with self._lock:
+            started = self._completed + self._failed + self._in_flight
+            finished = self._completed + self._failed
+            return {
+                'running': self._loop is not None,
+                'max_workers': self.max_workers,
+                'call_workers': self.call_workers,
+                'queue_depth': self._pending,
+                'in_flight': self._in_flight,
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'failed': self._failed,
+                'timed_out': self._timed_out,
+                'avg_wait_ms': round(self._total_wait / started * 1000, 2) if started else 0.0,
+                'max_wait_ms': round(self._max_wait * 1000, 2),
+                'avg_run_ms': round(self._total_run / finished * 1000, 2) if finished else 0.0,
+            }
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    async def _tracked(self, coro, ticket: '_Ticket'):
+        started_at = self._on_start(ticket)
+        failed = True
+        try:
+            result = await coro
+            failed = False
+            return result
+        finally:
+            self._on_finish(started_at, failed, ticket)
+
+    def _tracked_call(self, fn: Callable, ticket: '_Ticket', args, kwargs, deadline: Optional[float] = None):
+        started_at = self._on_start(ticket)
+        failed = True
+        try:
+            result = fn(*args, **kwargs)
+            if inspect.isawaitable(result):
+                # Async callables are executed on the shared loop, not this
+                # worker; the call is timed once, after the awaitable resolves.
+                result = self._wait(
+                    asyncio.run_coroutine_threadsafe(_resolve(result), self._ensure_started()), deadline,
+                )
+            failed = False
+            return result
+        finally:
+            self._on_finish(started_at, failed, ticket)
+
+    @staticmethod
+    def _wait(future: concurrent.futures.Future, deadline: Optional[float], ticket: Optional['_Ticket'] = None,
+              on_timeout: Optional[Callable[['_Ticket'], None]] = None) -> Any:
+        try:
+            return future.result(timeout=deadline)
+        except concurrent.futures.TimeoutError:
+            if future.done():
+                raise  # an inner call's deadline, not ours (TimeoutError is the same class)
+            future.cancel()
+            if ticket is not None and on_timeout is not None:
+                on_timeout(ticket)
+            raise TimeoutError(f"Database call exceeded {deadline:.1f}s deadline")
+
+    def run(self, coro, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the shared loop and block until it finishes.
+
+        Non-awaitables are returned unchanged. Raises TimeoutError when a
+        deadline (``timeout`` or the executor default) elapses; the underlying
+        task is cancelled.
+        """
+        if not inspect.isawaitable(coro):
+            return coro
+        deadline = timeout or self.default_timeout
+        loop = self._ensure_started()
+
+        current = threading.current_thread()
+        if current is self._nested_thread:
+            # Two levels of sync-inside-async; rare enough for a one-off loop.
+            # The pool is not used as a context manager: its exit would join
+            # the worker and block past the deadline.
+            logger.debug("[DBExecutor] Doubly re-entrant call; using one-off loop")
+            ticket = self._on_submit(coro)
+            one_off = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-one-off')
+            try:
+                future = one_off.submit(asyncio.run, self._tracked(coro, ticket))
+            finally:
+                one_off.shutdown(wait=False)
+            return self._wait(future, deadline, ticket, self._on_timeout)
+        if current is self._thread:
+            # Re-entrant call from a coroutine already on the shared loop;
+            # blocking here would deadlock, so use the long-lived nested loop.
+            loop = self._ensure_nested_loop()
+
+        ticket = self._on_submit(coro)
+        future = asyncio.run_coroutine_threadsafe(self._tracked(coro, ticket), loop)
+        return self._wait(future, deadline, ticket, self._on_timeout)
+
+    async def run_async(self, fn: Callable, *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """Await a blocking DB callable (or coroutine) without blocking the caller's loop."""
+        deadline = timeout or self.default_timeout
+        self._ensure_started()
+
+        ticket = self._on_submit(fn)
+        if inspect.isawaitable(fn):
+            future = asyncio.run_coroutine_threadsafe(self._tracked(fn, ticket), self._loop)
+        else:
+            future = self._call_pool.submit(
+                functools.partial(self._tracked_call, fn, ticket, args, kwargs, deadline)
+            )
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=deadline)
+        except asyncio.TimeoutError:
+            future.cancel()
+            self._on_timeout(ticket)
+            raise TimeoutError(f"Database call exceeded {deadline:.1f}s deadline")
+
+
+async def _resolve(awaitable: Any) -> Any:
+    return await awaitable
+
+
+_shared_executor: Optional[DatabaseExecutor] = None
+_shared_lock = threading.Lock()
+_owners = 0
+
+
+def _shared_metric(key: str):
+    executor = _shared_executor
+    return executor.get_metrics()[key] if executor is not None else None
+
+
+REGISTRY.gauge('bot_db_queue_depth', 'DB calls waiting for a shared DB executor worker.').set_function(
+    lambda: _shared_metric('queue_depth')
+)
+REGISTRY.gauge('bot_db_in_flight', 'DB calls currently running on the shared DB executor.').set_function(
+    lambda: _shared_metric('in_flight')
+)
+
+
+def get_db_executor() -> DatabaseExecutor:
+    """Return the process-wide DatabaseExecutor, creating it on first use."""
+    global _shared_executor
+    if _shared_executor is None:
+        with _shared_lock:
+            if _shared_executor is None:
+                _shared_executor = DatabaseExecutor()
+    return _shared_executor
+
+
+def retain_db_executor() -> DatabaseExecutor:
+    """Register a long-lived owner of the process-wide executor."""
+    global _owners
+    executor = get_db_executor()
+    with _shared_lock:
+        _owners += 1
+    return executor
+
+
+def release_db_executor(wait: bool = True) -> None:
+    """Drop one owner; the executor is shut down when the last owner releases it."""
+    global _owners
+    with _shared_lock:
+        _owners = max(_owners - 1, 0)
+        last = _owners == 0
+    if last:
+        shutdown_db_executor(wait=wait)
+
+
+def shutdown_db_executor(wait: bool = True) -> None:
+    """Shut down the process-wide executor (a later call creates a fresh one)."""
+    global _shared_executor, _owners
+    with _shared_lock:
+        executor, _shared_executor = _shared_executor, None
+        _owners = 0
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+async def run_db_call(fn: Callable, *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+    """Await a DatabaseHandler call on the shared executor.
+
+    Drop-in replacement for ``await asyncio.to_thread(db.method, ...)``.
+    """
+    return await get_db_executor().run_async(fn, *args, timeout=timeout, **kwargs)
@@ -1,14 +1,24 @@
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List, Dict, Any, Tuple
-import asyncio
+from typing import Optional, List, Dict, Any, Set, Tuple
 import inspect
 
+from .db_executor import get_db_executor, run_db_call
+from .guild_resolver import GuildIdResolver
 from .redaction import redact_wallet as _redact_wallet
 
 logger = logging.getLogger('DiscordBot')
 
 
+def _is_missing_rpc(exc: BaseException, name: str) -> bool:
+    """True when PostgREST/Postgres reports RPC ``name`` as not deployed (PGRST202 / 42883)."""
+    code = str(getattr(exc, 'code', '') or '')
+    if code in ('PGRST202', '42883'):
+        return True
+    text = str(exc)
+    return name in text and ('Could not find the function' in text or 'does not exist' in text)
+
+
 class WalletUpdateBlockedError(Exception):
     """Raised when a wallet change is attempted while a payment flow is still active."""
 
@@ -51,26 +61,29 @@ class DatabaseHandler:
             logger.error(f"Database initialization error: {e}")
             raise
     
-    def _run_async_in_thread(self, coro):
-        """Helper to run async operations from sync context."""
+    def _run_async_in_thread(self, coro, timeout: Optional[float] = None):
+        """Helper to run async operations from sync context.
+
+        Dispatches through the process-wide DatabaseExecutor, so every call
+        shares one background loop and a bounded worker pool instead of
+        creating a thread and event loop per call.
+        """
         if not inspect.isawaitable(coro):
             return coro
         try:
-            # Check if we're already in an async context
-            try:
-                asyncio.get_running_loop()
-                # We're in an async context - need to run in a separate thread
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, coro)
-                    return future.result(timeout=30)
-            except RuntimeError:
-                # Not in an async context, safe to use asyncio.run
-                return asyncio.run(coro)
+            return get_db_executor().run(coro, timeout=timeout)
         except Exception as e:
             logger.error(f"Error running async operation: {e}", exc_info=True)
             raise
 
+    async def call_async(self, method, *args, timeout: Optional[float] = None, **kwargs):
+        """Await a sync DatabaseHandler method without blocking the event loop."""
+        return await run_db_call(method, *args, timeout=timeout, **kwargs)
+
+    def get_executor_metrics(self) -> Dict[str, Any]:
+        """Queue depth / wait-time metrics for the shared DB executor."""
+        return get_db_executor().get_metrics()
+
     def close(self):
         """Close the database connection (no-op for Supabase)."""
         pass
@@ -110,6 +123,7 @@ class DatabaseHandler:
             ]
             if messages:
                 await self.storage_handler.store_messages_to_supabase(messages)
+                self.guild_resolver.seed_messages(messages)
 
     def get_last_message_id(self, channel_id: int) -> Optional[int]:
         """Get the most recent message ID for a channel."""
@@ -514,13 +528,15 @@ class DatabaseHandler:
         before: Optional[str] = None,
         is_reply: Optional[bool] = None,
         limit: int = 20,
+        cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Search discord_messages archive with Discord-style filters.
 
-        Returns {"messages": [...], "truncated": bool}.
+        Returns {"messages": [...], "truncated": bool, "next_cursor": str | None};
+        pass ``next_cursor`` back as ``cursor`` for the next page.
         """
         if not self.storage_handler:
-            return {"messages": [], "truncated": False}
+            return {"messages": [], "truncated": False, "next_cursor": None}
         return self._run_async_in_thread(
             self.storage_handler.search_messages_unified(
                 scope=scope,
@@ -535,6 +551,7 @@ class DatabaseHandler:
                 before=before,
                 is_reply=is_reply,
                 limit=limit,
+                cursor=cursor,
             )
         )
 
@@ -1205,13 +1222,9 @@ class DatabaseHandler:
     def get_all_message_ids(self, channel_id: int) -> List[int]:
         """Get all message IDs for a channel."""
         try:
-            result = self._run_async_in_thread(
-                self.query_handler.execute_raw_sql(
-                    "SELECT message_id FROM discord_messages WHERE channel_id = ?",
-                    (channel_id,)
-                )
+            return self._run_async_in_thread(
+                self.query_handler.get_all_message_ids(channel_id)
             )
-            return [row.get('message_id') for row in result if row.get('message_id')]
         except Exception as e:
             logger.error(f"Supabase query failed for get_all_message_ids: {e}")
             return []
@@ -1229,13 +1242,9 @@ class DatabaseHandler:
     def get_message_dates(self, channel_id: int) -> List[str]:
         """Get distinct message dates for a channel."""
         try:
-            result = self._run_async_in_thread(
-                self.query_handler.execute_raw_sql(
-                    "SELECT DISTINCT DATE(created_at) as date FROM discord_messages WHERE channel_id = ? ORDER BY date",
-                    (channel_id,)
-                )
+            return self._run_async_in_thread(
+                self.query_handler.get_message_dates(channel_id)
             )
-            return [row.get('date') for row in result if row.get('date')]
         except Exception as e:
             logger.error(f"Supabase query failed for get_message_dates: {e}")
             return []
@@ -1260,6 +1269,18 @@ class DatabaseHandler:
             logger.error(f"Supabase query failed: {e}")
             raise
 
+    def get_existing_message_ids(self, message_ids: List[int]) -> Set[int]:
+        """Return which of message_ids are already archived (one id-only query per 100)."""
+        if not message_ids:
+            return set()
+        try:
+            return self._run_async_in_thread(
+                self.query_handler.get_existing_message_ids(message_ids)
+            )
+        except Exception as e:
+            logger.error(f"Supabase query failed: {e}")
+            raise
+
     def update_message(self, message: Dict) -> bool:
         """Update a message in Supabase."""
         guild_id = message.get('guild_id')
@@ -1345,6 +1366,51 @@ class DatabaseHandler:
                 return False
         return False
 
+    def bulk_upsert_members(self, members: List[Dict[str, Any]], guild_id: Optional[int] = None) -> int:
+        """Upsert many member rows at once, plus their guild_members rows.
+
+        Rows use the members-table shape (member_id, username, server_nick,
+        guild_join_date, role_ids, ...). Like create_or_update_member, the
+        permission fields are left out unless explicitly set. Like
+        store_messages, a failed or partial write raises so the caller's
+        batch is not counted as stored.
+        """
+        if not members or not self._gate_check(guild_id) or not self.storage_handler:
+            return 0
+        try:
+            stored = self._run_async_in_thread(
+                self.storage_handler.store_members_to_supabase(members)
+            )
+            if stored < len(members):
+                raise RuntimeError(f"stored only {stored} of {len(members)} members")
+        except Exception as e:
+            logger.error(f"Error bulk storing {len(members)} members to Supabase: {e}", exc_info=True)
+            raise
+        if guild_id and stored > 0 and self.storage_handler.supabase_client:
+            import json as _json
+            now = datetime.now().isoformat()
+            rows = []
+            for member in members:
+                role_ids = member.get('role_ids')
+                if isinstance(role_ids, str):
+                    try:
+                        role_ids = _json.loads(role_ids)
+                    except (ValueError, TypeError):
+                        role_ids = None
+                rows.append({
+                    'guild_id': guild_id,
+                    'member_id': member['member_id'],
+                    'server_nick': member.get('server_nick'),
+                    'guild_join_date': member.get('guild_join_date'),
+                    'role_ids': role_ids,
+                    'updated_at': now,
+                })
+            try:
+                self.storage_handler.supabase_client.table('guild_members').upsert(rows).execute()
+            except Exception as e:
+                logger.debug(f"Error bulk upserting {len(rows)} guild_members for guild {guild_id}: {e}")
+        return stored
+
     def _upsert_guild_member(self, guild_id: int, member_id: int,
                              server_nick: Optional[str] = None,
                              guild_join_date: Optional[str] = None,
@@ -1483,41 +1549,59 @@ class DatabaseHandler:
 
     # ========== Helpers ==========
 
-    def _resolve_message_guild_id(self, message_id: int) -> Optional[int]:
-        """Look up the guild_id for a message. Returns None if not found."""
+    @property
+    def guild_resolver(self) -> GuildIdResolver:
+        """Memoizing message/channel → guild_id resolver (created on first use)."""
+        resolver = self.__dict__.get('_guild_resolver')
+        if resolver is None:
+            resolver = GuildIdResolver(
+                message_loader=self._fetch_message_guild_ids,
+                channel_loader=self._fetch_channel_guild_ids,
+            )
+            self._guild_resolver = resolver
+        return resolver
+
+    def _fetch_guild_ids(self, table: str, key: str, ids: List[int]) -> Dict[int, Optional[int]]:
         if not self.storage_handler or not self.storage_handler.supabase_client:
-            return None
-        try:
+            return {}
+        found: Dict[int, Optional[int]] = {}
+        for i in range(0, len(ids), 100):
             result = (
-                self.storage_handler.supabase_client.table('discord_messages')
-                .select('guild_id')
-                .eq('message_id', message_id)
-                .limit(1)
+                self.storage_handler.supabase_client.table(table)
+                .select(f'{key}, guild_id')
+                .in_(key, ids[i:i + 100])
                 .execute()
             )
-            if result.data:
-                return result.data[0].get('guild_id')
-        except Exception:
-            pass
-        return None
+            for row in (result.data or []):
+                found[int(row[key])] = row.get('guild_id')
+        return found
+
+    def _fetch_message_guild_ids(self, message_ids: List[int]) -> Dict[int, Optional[int]]:
+        return self._fetch_guild_ids('discord_messages', 'message_id', message_ids)
+
+    def _fetch_channel_guild_ids(self, channel_ids: List[int]) -> Dict[int, Optional[int]]:
+        # Channels with effective config are already known to ServerConfig.
+        found: Dict[int, Optional[int]] = {}
+        get_known = getattr(self.server_config, 'get_channel_guild_ids', None)
+        if get_known:
+            known = get_known()
+            found = {cid: known[cid] for cid in channel_ids if known.get(cid) is not None}
+        remaining = [cid for cid in channel_ids if cid not in found]
+        if remaining:
+            found.update(self._fetch_guild_ids('discord_channels', 'channel_id', remaining))
+        return found
+
+    def _resolve_message_guild_id(self, message_id: int) -> Optional[int]:
+        """Look up the guild_id for a message. Returns None if not found."""
+        return self.guild_resolver.resolve_message(message_id)
 
     def _resolve_channel_guild_id(self, channel_id: int) -> Optional[int]:
         """Look up the guild_id for a channel/thread. Returns None if not found."""
-        if not self.storage_handler or not self.storage_handler.supabase_client:
-            return None
-        try:
-            result = (
-                self.storage_handler.supabase_client.table('discord_channels')
-                .select('guild_id')
-                .eq('channel_id', channel_id)
-                .limit(1)
-                .execute()
-            )
-            if result.data:
-                return result.data[0].get('guild_id')
-        except Exception:
-            pass
-        return None
+        return self.guild_resolver.resolve_channel(channel_id)
+
+    def prefetch_message_guild_ids(self, message_ids: List[int]) -> Dict[int, Optional[int]]:
+        """Resolve guild_ids for a batch of messages in one round trip for the misses."""
+        return self.guild_resolver.prefetch_messages(message_ids)
 
     def _gate_check(self, guild_id: Optional[int]) -> bool:
         """Return True if write is allowed for this guild_id.
@@ -1657,6 +1741,98 @@ class DatabaseHandler:
             logger.error(f"Error logging reaction event for message {message_id}: {e}")
             return False
 
+    def _writable_reaction_rows(self, rows: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Pair each row with a guild-resolved copy, skipping guilds that fail the write gate."""
+        unresolved = [row['message_id'] for row in rows if row.get('guild_id') is None]
+        resolved = self.prefetch_message_guild_ids(unresolved) if unresolved else {}
+        allowed: Dict[Optional[int], bool] = {}
+        pairs = []
+        for row in rows:
+            guild_id = row.get('guild_id')
+            if guild_id is None:
+                guild_id = resolved.get(row['message_id'])
+            if guild_id not in allowed:
+                allowed[guild_id] = self._gate_check(guild_id)
+            if allowed[guild_id]:
+                pairs.append((row, dict(row, guild_id=guild_id)))
+        return pairs
+
+    @staticmethod
+    def _write_in_chunks(pairs, write_chunk, label: str, chunk_size: int = 500) -> List[Dict[str, Any]]:
+        """Write (original, writable) pairs in chunks, retrying a failed chunk row by row.
+
+        Returns the original rows that still failed on their own, so callers
+        can retry or drop exactly those instead of the whole batch.
+        """
+        failed = []
+        for i in range(0, len(pairs), chunk_size):
+            chunk = pairs[i:i + chunk_size]
+            try:
+                write_chunk([row for _, row in chunk])
+                continue
+            except Exception as e:
+                if len(chunk) == 1:
+                    logger.error(f"Error writing {label} row: {e}")
+                    failed.append(chunk[0][0])
+                    continue
+                logger.warning(f"Error writing {len(chunk)} {label} rows, retrying individually: {e}")
+            for original, row in chunk:
+                try:
+                    write_chunk([row])
+                except Exception as e:
+                    logger.error(f"Error writing {label} row for message {original.get('message_id')}: {e}")
+                    failed.append(original)
+        return failed
+
+    def apply_reaction_states(self, state_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Write coalesced discord_reactions state; returns the rows that failed.
+
+        Rows with removed_at None are upserted as active reactions. Removals
+        only soft-delete an existing active row (UPDATE ... WHERE removed_at
+        IS NULL), so removing a reaction that was never stored writes nothing.
+        Rows for guilds that fail the write gate are skipped, and rows
+        without a guild_id are resolved from the message.
+        """
+        if not self.storage_handler or not self.storage_handler.supabase_client:
+            logger.error("Supabase client not initialized for apply_reaction_states")
+            return list(state_rows)
+
+        sb = self.storage_handler.supabase_client
+        pairs = self._writable_reaction_rows(state_rows)
+        adds = [(original, row) for original, row in pairs if row.get('removed_at') is None]
+        removes = [(original, row) for original, row in pairs if row.get('removed_at') is not None]
+
+        def _upsert(rows):
+            sb.table('discord_reactions').upsert(rows).execute()
+
+        def _soft_delete(rows):
+            by_time: Dict[str, List[Tuple[int, int, str]]] = {}
+            for row in rows:
+                by_time.setdefault(row['removed_at'], []).append((row['message_id'], row['user_id'], row['emoji']))
+            for removed_at, keys in by_time.items():
+                self._soft_delete_reactions(sb, keys, removed_at=removed_at)
+
+        failed = self._write_in_chunks(adds, _upsert, 'discord_reactions')
+        failed += self._write_in_chunks(removes, _soft_delete, 'discord_reactions removal')
+        return failed
+
+    def append_reaction_log(self, log_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Append reaction events to discord_reaction_log; returns the rows that failed.
+
+        Written separately from apply_reaction_states so that a failed state
+        write never causes already-inserted log rows to be inserted again.
+        """
+        if not self.storage_handler or not self.storage_handler.supabase_client:
+            logger.error("Supabase client not initialized for append_reaction_log")
+            return list(log_rows)
+
+        sb = self.storage_handler.supabase_client
+
+        def _insert(rows):
+            sb.table('discord_reaction_log').insert(rows).execute()
+
+        return self._write_in_chunks(self._writable_reaction_rows(log_rows), _insert, 'discord_reaction_log')
+
     def record_moderation_decision(
         self,
         *,
@@ -1750,57 +1926,19 @@ class DatabaseHandler:
         """
         if guild_id is None:
             guild_id = self._resolve_message_guild_id(message_id)
-        if not self._gate_check(guild_id):
-            return False
-        if not self.storage_handler or not self.storage_handler.supabase_client:
-            logger.error("Supabase client not initialized for upsert_reactions_batch")
-            return False
-
-        sb = self.storage_handler.supabase_client
-        try:
-            # Upsert current reactions (mark as active), include guild_id if available
-            for i in range(0, len(rows), 100):
-                batch = [dict(r, removed_at=None) for r in rows[i:i + 100]]
-                if guild_id is not None:
-                    batch = [dict(r, guild_id=guild_id) for r in batch]
-                sb.table('discord_reactions').upsert(batch).execute()
-
-            # Soft-delete any active rows for this message not in the current set
-            current_keys = {(r['user_id'], r['emoji']) for r in rows}
-            existing = sb.table('discord_reactions') \
-                .select('user_id, emoji') \
-                .eq('message_id', message_id) \
-                .is_('removed_at', 'null') \
-                .execute()
-
-            now = datetime.now(timezone.utc).isoformat()
-            for row in (existing.data or []):
-                if (row['user_id'], row['emoji']) not in current_keys:
-                    sb.table('discord_reactions') \
-                        .update({'removed_at': now}) \
-                        .eq('message_id', message_id) \
-                        .eq('user_id', row['user_id']) \
-                        .eq('emoji', row['emoji']) \
-                        .execute()
-
-            return True
-        except Exception as e:
-            logger.error(f"Error upserting reaction batch for message {message_id}: {e}")
-            return False
+        return self.bulk_upsert_reactions([message_id], rows, guild_id=guild_id)
 
     def bulk_upsert_reactions(self, message_ids: list, rows: list,
                              guild_id: Optional[int] = None) -> bool:
         """Bulk-sync reactions for multiple messages at once.
 
-        Upserts all current rows (clearing removed_at), then soft-deletes
-        any active rows for those messages that are no longer present.
-        More efficient than per-message upsert for backfill scenarios.
+        Reads the active rows for all messages (one query per 100 ids), then
+        upserts only rows that are new, reactivated or missing guild_id, and
+        soft-deletes everything else in set-based updates. Cost scales with
+        pages of messages rather than individual reactions.
         """
         if guild_id is None:
-            resolved_guild_ids = {
-                self._resolve_message_guild_id(message_id)
-                for message_id in message_ids
-            }
+            resolved_guild_ids = set(self.prefetch_message_guild_ids(message_ids).values())
             resolved_guild_ids.discard(None)
             if len(resolved_guild_ids) == 1:
                 guild_id = next(iter(resolved_guild_ids))
@@ -1812,41 +1950,90 @@ class DatabaseHandler:
 
         sb = self.storage_handler.supabase_client
         try:
-            # Upsert all current reactions (mark as active)
-            for i in range(0, len(rows), 500):
-                batch = [dict(r, removed_at=None) for r in rows[i:i + 500]]
-                if guild_id is not None:
-                    batch = [dict(r, guild_id=guild_id) for r in batch]
-                sb.table('discord_reactions').upsert(batch).execute()
-
-            # Soft-delete stale rows: fetch active rows for these messages,
-            # then mark any not in the current set
-            current_keys = {(r['message_id'], r['user_id'], r['emoji']) for r in rows}
-            now = datetime.now(timezone.utc).isoformat()
-
+            # One read per 100 messages: which reactions are currently active?
+            active: Dict[Tuple[int, int, str], Optional[int]] = {}
+            message_ids = list(dict.fromkeys(message_ids))
             for i in range(0, len(message_ids), 100):
                 batch_ids = message_ids[i:i + 100]
                 existing = sb.table('discord_reactions') \
-                    .select('message_id, user_id, emoji') \
+                    .select('message_id, user_id, emoji, guild_id') \
                     .in_('message_id', batch_ids) \
                     .is_('removed_at', 'null') \
                     .execute()
-
                 for row in (existing.data or []):
-                    key = (row['message_id'], row['user_id'], row['emoji'])
-                    if key not in current_keys:
-                        sb.table('discord_reactions') \
-                            .update({'removed_at': now}) \
-                            .eq('message_id', row['message_id']) \
-                            .eq('user_id', row['user_id']) \
-                            .eq('emoji', row['emoji']) \
-                            .execute()
+                    active[(row['message_id'], row['user_id'], row['emoji'])] = row.get('guild_id')
+
+            current: Dict[Tuple[int, int, str], dict] = {}
+            for r in rows:
+                current[(r['message_id'], r['user_id'], r['emoji'])] = r
+            to_upsert = [
+                r for key, r in current.items()
+                if key not in active or (guild_id is not None and active[key] is None)
+            ]
+            stale = [key for key in active if key not in current]
 
+            for i in range(0, len(to_upsert), 500):
+                batch = [dict(r, removed_at=None) for r in to_upsert[i:i + 500]]
+                if guild_id is not None:
+                    batch = [dict(r, guild_id=guild_id) for r in batch]
+                sb.table('discord_reactions').upsert(batch).execute()
+
+            if stale:
+                self._soft_delete_reactions(sb, stale)
             return True
         except Exception as e:
             logger.error(f"Error in bulk_upsert_reactions: {e}")
             return False
 
+    def _soft_delete_reactions(self, sb, keys: List[Tuple[int, int, str]],
+                               removed_at: Optional[str] = None) -> None:
+        """Mark active (message_id, user_id, emoji) rows removed with as few statements as possible.
+
+        Prefers the soft_delete_reactions RPC (one UPDATE for the whole set);
+        falls back to in_()-filtered updates grouped by whichever of
+        (message, emoji) or (user, emoji) yields fewer statements.
+        """
+        now = removed_at or datetime.now(timezone.utc).isoformat()
+        if getattr(self, '_soft_delete_rpc_available', True):
+            try:
+                for i in range(0, len(keys), 1000):
+                    sb.rpc('soft_delete_reactions', {
+                        'p_keys': [
+                            {'message_id': m, 'user_id': u, 'emoji': e}
+                            for m, u, e in keys[i:i + 1000]
+                        ],
+                        'p_removed_at': now,
+                    }).execute()
+                return
+            except Exception as e:
+                if _is_missing_rpc(e, 'soft_delete_reactions'):
+                    # Pre-migration: remember and use the filtered-update fallback.
+                    logger.info("soft_delete_reactions RPC is not deployed; using grouped updates")
+                    self._soft_delete_rpc_available = False
+                else:
+                    # Transient failure: fall back for this call only.
+                    logger.warning(f"soft_delete_reactions RPC failed, using grouped updates: {e}")
+
+        by_message: Dict[Tuple[int, str], List[int]] = {}
+        by_user: Dict[Tuple[int, str], List[int]] = {}
+        for message_id, user_id, emoji in keys:
+            by_message.setdefault((message_id, emoji), []).append(user_id)
+            by_user.setdefault((user_id, emoji), []).append(message_id)
+
+        if len(by_message) <= len(by_user):
+            groups = [('message_id', m, 'user_id', users, e) for (m, e), users in by_message.items()]
+        else:
+            groups = [('user_id', u, 'message_id', messages, e) for (u, e), messages in by_user.items()]
+        for fixed_col, fixed_val, in_col, values, emoji in groups:
+            for i in range(0, len(values), 100):
+                sb.table('discord_reactions') \
+                    .update({'removed_at': now}) \
+                    .eq(fixed_col, fixed_val) \
+                    .eq('emoji', emoji) \
+                    .in_(in_col, values[i:i + 100]) \
+                    .is_('removed_at', 'null') \
+                    .execute()
+
     # ========== Message Content / Edit History ==========
 
     def update_message_content(self, message_id: int, new_content: Optional[str],
@@ -4364,6 +4551,29 @@ class DatabaseHandler:
                 return False
         return False
 
+    def bulk_upsert_channels(self, channels: List[Dict[str, Any]], guild_id: Optional[int] = None) -> int:
+        """Upsert many channel rows in one call; guild_id is applied to rows missing it.
+
+        A failed or partial write raises, like bulk_upsert_members.
+        """
+        if not channels or not self._gate_check(guild_id) or not self.storage_handler:
+            return 0
+        if guild_id is not None:
+            channels = [
+                channel if channel.get('guild_id') is not None else {**channel, 'guild_id': guild_id}
+                for channel in channels
+            ]
+        try:
+            stored = self._run_async_in_thread(
+                self.storage_handler.store_channels_to_supabase(channels)
+            )
+            if stored < len(channels):
+                raise RuntimeError(f"stored only {stored} of {len(channels)} channels")
+        except Exception as e:
+            logger.error(f"Error bulk storing {len(channels)} channels to Supabase: {e}", exc_info=True)
+            raise
+        return stored
+
     def get_messages_after(self, date: datetime, guild_id: Optional[int] = None) -> List[Dict]:
         """Get messages after a certain date."""
         try:
@@ -4762,6 +4972,58 @@ class DatabaseHandler:
             logger.error(f"Error hydrating asset {asset_id} for approval request: {e}", exc_info=True)
             return None
 
+    def _fetch_rows_in(self, table: str, column: str, values: List[Any], select: str = '*') -> List[Dict]:
+        """Rows of ``table`` whose ``column`` is in ``values``, 100 values per request."""
+        unique = list(dict.fromkeys(v for v in values if v is not None))
+        if not unique or not self.storage_handler or not self.storage_handler.supabase_client:
+            return []
+        rows: List[Dict] = []
+        for i in range(0, len(unique), 100):
+            result = (
+                self.storage_handler.supabase_client.table(table)
+                .select(select)
+                .in_(column, unique[i:i + 100])
+                .execute()
+            )
+            rows.extend(result.data or [])
+        return rows
+
+    def _hydrate_approval_rows(self, rows: List[Dict]) -> None:
+        """Attach ``media`` / ``asset`` embed data to approval rows with one query per table."""
+        try:
+            assets = {
+                row['id']: row for row in self._fetch_rows_in(
+                    'assets', 'id', [r.get('attached_resource_id') for r in rows],
+                    'id,type,name,description,primary_media_id,download_link,slug,status,admin_status',
+                )
+            }
+            media_ids = [r.get('attached_media_id') for r in rows]
+            media_ids += [a.get('primary_media_id') for a in assets.values()]
+            media = {
+                row['id']: row for row in self._fetch_rows_in(
+                    'media', 'id', media_ids,
+                    'id,title,url,type,cloudflare_thumbnail_url,backup_thumbnail_url,cloudflare_playback_hls_url,thumbnail_placeholder,admin_status',
+                )
+            }
+        except Exception as e:
+            logger.error(f"Error hydrating media/assets for {len(rows)} approval requests: {e}", exc_info=True)
+            assets, media = {}, {}
+        for item in media.values():
+            item['preview_url'] = self._media_preview_url(item)
+            item['profile_url'] = f"https://banodoco.ai/art/{item['id']}"
+        for asset in assets.values():
+            primary_media = media.get(asset.get('primary_media_id'))
+            if primary_media:
+                asset['primary_media'] = primary_media
+                asset['preview_url'] = self._media_preview_url(primary_media)
+            if asset.get('slug'):
+                asset['profile_url'] = f"https://banodoco.ai/resources/{asset['slug']}"
+            elif asset.get('id'):
+                asset['profile_url'] = f"https://banodoco.ai/resources/{asset['id']}"
+        for row in rows:
+            row['media'] = media.get(row.get('attached_media_id'))
+            row['asset'] = assets.get(row.get('attached_resource_id'))
+
     def claim_pending_approval_requests(self, limit: int = 25) -> List[Dict]:
         """Return pending approval requests that still need intro posts."""
         if not self.storage_handler or not self.storage_handler.supabase_client:
@@ -4773,9 +5035,7 @@ class DatabaseHandler:
                 .execute()
             )
             rows = result.data or []
-            for row in rows:
-                row['media'] = self._get_media_for_embed(row.get('attached_media_id'))
-                row['asset'] = self._get_asset_for_embed(row.get('attached_resource_id'))
+            self._hydrate_approval_rows(rows)
             return rows
         except Exception as e:
             logger.error(f"Error claiming pending approval requests: {e}", exc_info=True)
@@ -4848,6 +5108,125 @@ class DatabaseHandler:
             logger.error(f"Error fetching pending intro for approval request {approval_request_id}: {e}", exc_info=True)
             return None
 
+    # Batch variants used by GatingCog's poll/reconcile ticks: a whole batch
+    # costs a fixed number of round trips instead of a few per row. Lookups
+    # raise on error so the caller skips the tick rather than acting on a
+    # partial view (e.g. re-posting an intro that already exists).
+
+    def get_pending_intros_by_approval_requests(self, approval_request_ids: List[str]) -> Dict[str, Dict]:
+        """Pending intros bridged to any of ``approval_request_ids``, keyed by approval request id."""
+        try:
+            rows = self._fetch_rows_in('pending_intros', 'approval_request_id', approval_request_ids)
+        except Exception as e:
+            logger.error(f"Error fetching pending intros for {len(approval_request_ids)} approval requests: {e}", exc_info=True)
+            raise
+        return {str(row['approval_request_id']): row for row in rows}
+
+    def get_members_for_approval(self, member_ids: List[int]) -> Dict[int, Dict]:
+        """Members rows for a batch of approval requests, keyed by member_id."""
+        try:
+            rows = self._fetch_rows_in('members', 'member_id', [int(m) for m in member_ids])
+        except Exception as e:
+            logger.error(f"Error fetching {len(member_ids)} members for approval requests: {e}", exc_info=True)
+            raise
+        return {int(row['member_id']): row for row in rows}
+
+    def get_approval_requests(self, approval_request_ids: List[str]) -> Dict[str, Dict]:
+        """Approval requests by id."""
+        try:
+            rows = self._fetch_rows_in('approval_requests', 'id', approval_request_ids)
+        except Exception as e:
+            logger.error(f"Error fetching {len(approval_request_ids)} approval requests: {e}", exc_info=True)
+            raise
+        return {str(row['id']): row for row in rows}
+
+    def create_pending_intros(self, intros: List[Dict]) -> Dict[str, Optional[Dict]]:
+        """Insert bridged pending intros in one statement, keyed by approval_request_id.
+
+        Each item carries the create_pending_intro arguments. A None value
+        means the row was not written because of a unique violation (another
+        writer won) or the guild gate, like create_pending_intro's None. If the
+        batch insert fails it falls back to row-by-row inserts, so a conflict
+        or one bad row does not sink the rest; rows that still fail for any
+        other reason are left out of the result. If every row fails the batch
+        error propagates.
+        """
+        results: Dict[str, Optional[Dict]] = {}
+        rows = []
+        for intro in intros:
+            if self._gate_check(intro.get('guild_id')):
+                rows.append({k: v for k, v in intro.items() if v is not None})
+            else:
+                results[str(intro['approval_request_id'])] = None
+        if not rows or not self.storage_handler or not self.storage_handler.supabase_client:
+            results.update({str(row['approval_request_id']): None for row in rows})
+            return results
+        try:
+            result = self.storage_handler.supabase_client.table('pending_intros').insert(rows).execute()
+        except Exception as e:
+            if not self._is_unique_violation(e):
+                logger.warning(f"Batch insert of {len(rows)} pending intros failed, inserting row by row: {e}")
+            failed = 0
+            for row in rows:
+                try:
+                    results[str(row['approval_request_id'])] = self.create_pending_intro(**row)
+                except Exception:
+                    failed += 1  # already logged by create_pending_intro
+            if failed == len(rows):
+                raise
+            return results
+        inserted = {str(row.get('approval_request_id')): row for row in (result.data or [])}
+        for row in rows:
+            key = str(row['approval_request_id'])
+            results[key] = inserted.get(key, row)
+        return results
+
+    def mark_approval_requests_posted(self, stamps: Dict[str, int]) -> Set[str]:
+        """Stamp posted_message_id on many approval requests; returns the ids that were stamped.
+
+        Prefers the mark_approval_requests_posted RPC (one UPDATE for the
+        batch); falls back to per-row updates before that migration is applied.
+        """
+        if not stamps or not self.storage_handler or not self.storage_handler.supabase_client:
+            return set()
+        if getattr(self, '_stamp_posted_rpc_available', True):
+            try:
+                result = self.storage_handler.supabase_client.rpc('mark_approval_requests_posted', {
+                    'p_stamps': [
+                        {'id': ar_id, 'message_id': message_id} for ar_id, message_id in stamps.items()
+                    ],
+                }).execute()
+                return {str(row['id'] if isinstance(row, dict) else row) for row in (result.data or [])}
+            except Exception as e:
+                if _is_missing_rpc(e, 'mark_approval_requests_posted'):
+                    logger.debug(f"mark_approval_requests_posted RPC not deployed, stamping per row: {e}")
+                    self._stamp_posted_rpc_available = False
+                else:
+                    logger.warning(f"mark_approval_requests_posted RPC failed, stamping per row: {e}")
+        return {
+            ar_id for ar_id, message_id in stamps.items()
+            if self.mark_approval_request_posted(ar_id, message_id)
+        }
+
+    def mark_embeds_updated(self, approval_request_ids: List[str]) -> bool:
+        """Batch form of mark_embed_updated for freshly posted approval embeds."""
+        ids = list(dict.fromkeys(approval_request_ids))
+        if not ids or not self.storage_handler or not self.storage_handler.supabase_client:
+            return False
+        try:
+            now_iso = datetime.now(timezone.utc).isoformat()
+            for i in range(0, len(ids), 100):
+                (
+                    self.storage_handler.supabase_client.table('approval_requests')
+                    .update({'embed_dirty': False, 'embed_updated_at': now_iso})
+                    .in_('id', ids[i:i + 100])
+                    .execute()
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Error marking embeds updated for {len(ids)} approval requests: {e}", exc_info=True)
+            return False
+
     def claim_dirty_intro_edits(self, limit: int = 25) -> List[Dict]:
         """Return up to `limit` approval_requests rows whose Discord embed needs re-rendering.
 
@@ -59,7 +59,7 @@ async def safe_send_message(
             coroutine_factory = lambda: channel.send(
                 content=content, embed=embed, file=file, files=files, reference=reference, view=view
             )
-            return await rate_limiter.execute(channel.id, coroutine_factory)
+            return await rate_limiter.execute(channel.id, coroutine_factory, route='discord.send')
         else:
             # Fallback if no rate limiter is provided (though generally expected)
             logger.warning(f"Sending message to {getattr(channel, 'name', channel.id)} without a rate limiter.")
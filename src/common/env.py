@@ -0,0 +1,54 @@
+"""
+Numeric environment tunables.
+
+Every module reads its knobs (pool sizes, intervals, budgets) through these
+helpers so a malformed value falls back to the default with a warning instead
+of crashing the import or silently becoming zero.
+"""
+
+import logging
+import os
+from typing import Optional, TypeVar
+
+logger = logging.getLogger('DiscordBot')
+
+T = TypeVar('T')
+
+
+def _raw(name: str) -> Optional[str]:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return None
+    return raw.strip()
+
+
+def env_int(name: str, default: T, *, minimum: int = 1) -> T:
+    """Integer env var ``name``; ``default`` when unset, malformed or below ``minimum``."""
+    raw = _raw(name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        logger.warning(f"Ignoring {name}={raw!r}: not an integer; using {default}")
+        return default
+    if value < minimum:
+        logger.warning(f"Ignoring {name}={value}: must be at least {minimum}; using {default}")
+        return default
+    return value
+
+
+def env_float(name: str, default: T, *, allow_zero: bool = False) -> T:
+    """Positive float env var ``name`` (or non-negative with ``allow_zero``); ``default`` otherwise."""
+    raw = _raw(name)
+    if raw is None:
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        logger.warning(f"Ignoring {name}={raw!r}: not a number; using {default}")
+        return default
+    if value < 0 or (value == 0 and not allow_zero):
+        logger.warning(f"Ignoring {name}={value}: must be {'>= 0' if allow_zero else '> 0'}; using {default}")
+        return default
+    return value
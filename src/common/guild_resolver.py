@@ -0,0 +1,171 @@
+"""
+GuildIdResolver — bounded LRU/TTL cache for message/channel → guild_id lookups.
+
+A message or channel never moves between guilds, so positive entries are
+long-lived; unknown ids are negatively cached for a short TTL because they
+usually become known once the archive catches up.
+
+The resolver does no I/O itself: DatabaseHandler passes bulk loaders that map
+a list of ids to {id: guild_id}, which keeps all Supabase access in
+db_handler.py. The channel loader consults ServerConfig's channel rows before
+the database; archived messages are fed in via seed_messages().
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger('DiscordBot')
+
+BulkLoader = Callable[[List[int]], Dict[int, Optional[int]]]
+
+_MISSING = object()
+
+
+class _TTLCache:
+    """Thread-safe LRU map whose values expire after a per-entry TTL."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: 'OrderedDict[int, Tuple[Optional[int], float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: int):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: int, value: Optional[int], ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class GuildIdResolver:
+    """Memoizes guild_id resolution for messages and channels."""
+
+    def __init__(
+        self,
+        message_loader: BulkLoader,
+        channel_loader: BulkLoader,
+        max_messages: int = 50_000,
+        max_channels: int = 10_000,
+        ttl_seconds: float = 6 * 3600,
+        negative_ttl_seconds: float = 60,
+    ):
+        self._loaders = {'message': message_loader, 'channel': channel_loader}
+        self._caches = {'message': _TTLCache(max_messages), 'channel': _TTLCache(max_channels)}
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._stats_lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'negative_hits': 0, 'loads': 0, 'load_errors': 0}
+
+    # ------------------------------------------------------------------
+    # Seeding
+    # ------------------------------------------------------------------
+
+    def _remember(self, kind: str, key: Optional[int], guild_id: Optional[int]) -> None:
+        if key is None:
+            return
+        if guild_id is None:
+            self._caches[kind].put(int(key), None, self.negative_ttl_seconds)
+        else:
+            self._caches[kind].put(int(key), int(guild_id), self.ttl_seconds)
+
+    def remember_message(self, message_id: Optional[int], guild_id: Optional[int]) -> None:
+        if guild_id is not None:
+            self._remember('message', message_id, guild_id)
+
+    def remember_channel(self, channel_id: Optional[int], guild_id: Optional[int]) -> None:
+        if guild_id is not None:
+            self._remember('channel', channel_id, guild_id)
+
+    def seed_messages(self, messages: Iterable[Mapping]) -> None:
+        """Seed from archived message dicts (message_id/id, channel_id, thread_id, guild_id)."""
+        for msg in messages:
+            guild_id = msg.get('guild_id')
+            if guild_id is None:
+                continue
+            self.remember_message(msg.get('message_id') or msg.get('id'), guild_id)
+            self.remember_channel(msg.get('channel_id'), guild_id)
+            self.remember_channel(msg.get('thread_id'), guild_id)
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _resolve_many(self, kind: str, ids: Iterable[int]) -> Dict[int, Optional[int]]:
+        cache = self._caches[kind]
+        resolved: Dict[int, Optional[int]] = {}
+        missing: List[int] = []
+        seen = set()
+        for raw_id in ids:
+            if raw_id is None:
+                continue
+            key = int(raw_id)
+            if key in seen:
+                continue
+            seen.add(key)
+            value = cache.get(key)
+            if value is _MISSING:
+                missing.append(key)
+                continue
+            resolved[key] = value
+            self._count('hits' if value is not None else 'negative_hits')
+
+        if missing:
+            self._count('misses', len(missing))
+            self._count('loads')
+            try:
+                loaded = self._loaders[kind](missing) or {}
+            except Exception as e:
+                # Don't negatively cache on errors; the next call retries.
+                self._count('load_errors')
+                logger.debug(f"GuildIdResolver: {kind} load failed for {len(missing)} ids: {e}")
+                for key in missing:
+                    resolved[key] = None
+                return resolved
+            for key in missing:
+                guild_id = loaded.get(key)
+                self._remember(kind, key, guild_id)
+                resolved[key] = int(guild_id) if guild_id is not None else None
+        return resolved
+
+    def resolve_message(self, message_id: int) -> Optional[int]:
+        return self._resolve_many('message', [message_id]).get(int(message_id))
+
+    def resolve_channel(self, channel_id: int) -> Optional[int]:
+        return self._resolve_many('channel', [channel_id]).get(int(channel_id))
+
+    def prefetch_messages(self, message_ids: Iterable[int]) -> Dict[int, Optional[int]]:
+        """Resolve a batch of message ids with at most one bulk load for the misses."""
+        return self._resolve_many('message', message_ids)
+
+    def prefetch_channels(self, channel_ids: Iterable[int]) -> Dict[int, Optional[int]]:
+        """Resolve a batch of channel ids with at most one bulk load for the misses."""
+        return self._resolve_many('channel', channel_ids)
+
+    def get_metrics(self) -> Dict[str, int]:
+        with self._stats_lock:
+            metrics = dict(self.stats)
+        metrics['cached_messages'] = len(self._caches['message'])
+        metrics['cached_channels'] = len(self._caches['channel'])
+        return metrics
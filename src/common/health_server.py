@@ -1,14 +1,23 @@
 """
 Lightweight HTTP health check server for Railway deployment monitoring.
 Runs on a separate thread to not block the Discord bot.
+
+/metrics serves every metric in src/common/metrics.py in Prometheus text format.
 """
 import threading
 import logging
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import json
 from datetime import datetime
 import os
 
+from src.common.loop_watchdog import get_loop_watchdog
+from src.common.metrics import REGISTRY, render_metrics
+
+MESSAGES_LOGGED = REGISTRY.counter('bot_messages_logged_total', 'Messages logged by the bot.')
+MESSAGES_ARCHIVED = REGISTRY.counter('bot_messages_archived_total', 'Messages archived to the database.')
+ERRORS_LOGGED = REGISTRY.counter('bot_errors_logged_total', 'Errors logged by the bot.')
+
 class HealthCheckHandler(BaseHTTPRequestHandler):
     """Handler for health check HTTP requests"""
     
@@ -19,11 +28,6 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
     deployment_id = os.getenv('RAILWAY_DEPLOYMENT_ID', 'unknown')
     service_id = os.getenv('RAILWAY_SERVICE_ID', 'unknown')
     
-    # Message counters
-    messages_logged = 0
-    messages_archived = 0
-    errors_logged = 0
-    
     def do_GET(self):
         """Handle GET requests"""
         if self.path == '/health':
@@ -32,6 +36,10 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
             self.handle_ready()
         elif self.path == '/status':
             self.handle_status()
+        elif self.path == '/metrics':
+            self.handle_metrics()
+        elif self.path == '/blocking':
+            self.handle_blocking()
         else:
             self.send_error(404, "Not Found")
     
@@ -88,14 +96,33 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
             'uptime_seconds': uptime,
             'last_heartbeat': self.last_heartbeat.isoformat() if self.last_heartbeat else None,
             'metrics': {
-                'messages_logged': self.messages_logged,
-                'messages_archived': self.messages_archived,
-                'errors_logged': self.errors_logged
+                'messages_logged': int(MESSAGES_LOGGED.value()),
+                'messages_archived': int(MESSAGES_ARCHIVED.value()),
+                'errors_logged': int(ERRORS_LOGGED.value())
             },
             'timestamp': datetime.utcnow().isoformat()
         }
         self.wfile.write(json.dumps(response).encode())
     
+    def handle_metrics(self):
+        """Prometheus scrape endpoint"""
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header('Content-type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def handle_blocking(self):
+        """Call sites that blocked the event loop, ranked by total blocked time"""
+        watchdog = get_loop_watchdog()
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        response = watchdog.snapshot() if watchdog else {'running': False, 'offenders': []}
+        response['timestamp'] = datetime.utcnow().isoformat()
+        self.wfile.write(json.dumps(response).encode())
+    
     def log_message(self, format, *args):
         """Suppress default HTTP server logging"""
         pass
@@ -117,14 +144,16 @@ class HealthServer:
             return
         
         try:
-            self.server = HTTPServer(('0.0.0.0', self.port), HealthCheckHandler)
+            self.server = ThreadingHTTPServer(('0.0.0.0', self.port), HealthCheckHandler)
             self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
             self.thread.start()
             self._started = True
             self.logger.info(f"Health check server started on port {self.port}")
-            self.logger.info(f"  - /health  : Basic liveness probe")
-            self.logger.info(f"  - /ready   : Readiness probe (200 when bot ready)")
-            self.logger.info(f"  - /status  : Detailed status with metrics")
+            self.logger.info("  - /health  : Basic liveness probe")
+            self.logger.info("  - /ready   : Readiness probe (200 when bot ready)")
+            self.logger.info("  - /status  : Detailed status with metrics")
+            self.logger.info("  - /metrics : Prometheus metrics")
+            self.logger.info("  - /blocking: Ranked event-loop blocking call sites")
         except Exception as e:
             self.logger.error(f"Failed to start health check server: {e}")
     
@@ -140,15 +169,15 @@ class HealthServer:
     
     def increment_messages_logged(self, count=1):
         """Increment the messages logged counter"""
-        HealthCheckHandler.messages_logged += count
+        MESSAGES_LOGGED.inc(count)
     
     def increment_messages_archived(self, count=1):
         """Increment the messages archived counter"""
-        HealthCheckHandler.messages_archived += count
+        MESSAGES_ARCHIVED.inc(count)
     
     def increment_errors_logged(self, count=1):
         """Increment the errors logged counter"""
-        HealthCheckHandler.errors_logged += count
+        ERRORS_LOGGED.inc(count)
     
     def stop(self):
         """Stop the health check server"""
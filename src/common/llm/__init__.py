@@ -13,6 +13,9 @@ from .deepseek_client import DeepSeekClient
 # Import BaseLLMClient from its own file for type hinting if needed
 from .base_client import BaseLLMClient
 from .gemini_client import GeminiClient  # Import the new client
+from .prompt_cache import PromptAssembler, PromptCacheStats, stable_json
+from .client_registry import LLMClientRegistry
+from src.common.rate_limiter import RATE_LIMITS
 
 logger = logging.getLogger(__name__)
 
@@ -24,14 +27,29 @@ SUPPORTED_CLIENTS: Dict[str, Type[BaseLLMClient]] = {
     "gemini": GeminiClient,
 }
 
+# One pooled client per provider for the whole process (see client_registry.py),
+# drawing on the process-wide rate-limit budgets.
+client_registry = LLMClientRegistry(SUPPORTED_CLIENTS, scheduler=RATE_LIMITS)
+
 __all__ = [
     "BaseLLMClient",
     "OpenAIClient",
     "ClaudeClient",
     "DeepSeekClient",
     "GeminiClient",  # Add the new client to __all__
+    "PromptAssembler",
+    "PromptCacheStats",
+    "stable_json",
+    "client_registry",
+    "get_llm_metrics",
 ]
 
+
+def get_llm_metrics() -> Dict[str, Dict[str, Any]]:
+    """Per provider/model call counts, retries, latency and token usage since startup."""
+    return client_registry.get_metrics()
+
+
 async def get_llm_response(client_name: str, model: str, system_prompt: str, 
                              # Use updated typing
                              messages: List[Dict[str, Union[str, List[Dict[str, Any]]]]], 
@@ -39,6 +57,10 @@ async def get_llm_response(client_name: str, model: str, system_prompt: str,
     """
     Gets a response from the specified LLM provider and model asynchronously.
 
+    Calls go through the process-wide client registry: the provider client is
+    reused across calls, concurrency is capped per provider, and transient
+    failures (429/5xx/connection errors) are retried honouring Retry-After.
+
     Args:
         client_name: The name of the client (e.g., 'claude', 'openai'). Case-insensitive.
         model: The specific model name (e.g., 'claude-sonnet-4-5-20250929', 'gpt-4o').
@@ -56,15 +78,14 @@ async def get_llm_response(client_name: str, model: str, system_prompt: str,
         Exception: Can re-raise exceptions from the underlying client's API call.
     """
     client_key = client_name.lower()
-    client_class = SUPPORTED_CLIENTS.get(client_key)
 
     # Simpler check now - if client name is bad, it won't be in the dict
-    if not client_class:
+    if client_key not in SUPPORTED_CLIENTS:
         raise ValueError(f"Unsupported LLM client: '{client_name}'. Supported: {list(SUPPORTED_CLIENTS.keys())}")
 
     try:
-        # Instantiate the client (API keys handled within client __init__)
-        client_instance = client_class()
+        # Reuse the pooled client (API keys handled within client __init__ on first use)
+        client_registry.get_client(client_key)
     except Exception as e:
         logger.error(f"Failed to initialize LLM client '{client_name}': {e}", exc_info=True)
         # Re-raise initialization error clearly
@@ -73,7 +94,8 @@ async def get_llm_response(client_name: str, model: str, system_prompt: str,
     try:
         # Call the standardized method - now awaited
         logger.info(f"Making LLM call to {client_name} with model {model}")
-        response = await client_instance.generate_chat_completion(
+        response = await client_registry.generate(
+            client_key,
             model=model,
             system_prompt=system_prompt,
             messages=messages,
@@ -9,6 +9,8 @@ from dotenv import load_dotenv
 
 # Import from base_client.py
 from .base_client import BaseLLMClient
+from .prompt_cache import PromptAssembler
+from .client_registry import RetryableLLMError, report_usage, retry_delay
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +40,7 @@ class ClaudeClient(BaseLLMClient):
         max_tokens: int = 4096,
         max_retries: int = 3,
         retry_delay_seconds: int = 5,
+        prompt_cache: bool = False,
         **kwargs: Any
     ) -> str:
         """
@@ -55,7 +58,10 @@ class ClaudeClient(BaseLLMClient):
                       ]}]. For text-only, it's [{'role': 'user', 'content': 'Plain text'}].
             max_tokens: The maximum number of tokens to generate.
             max_retries: Maximum number of retries on API errors.
-            retry_delay_seconds: Delay between retries.
+            retry_delay_seconds: Base delay for exponential backoff between retries;
+                                 a Retry-After header from the API takes precedence.
+            prompt_cache: Mark the system prompt and last message as Anthropic
+                          prompt-cache breakpoints (see prompt_cache.py).
             **kwargs: Catches extra arguments passed from the dispatcher (e.g., temperature).
 
         Returns:
@@ -85,7 +91,16 @@ class ClaudeClient(BaseLLMClient):
             "system": system_prompt,
              **kwargs
         }
+        if prompt_cache:
+            prompt = PromptAssembler(system_prompt)
+            system = prompt.system()
+            if system is None:
+                api_kwargs.pop("system", None)
+            else:
+                api_kwargs["system"] = system
+            api_kwargs["messages"] = prompt.messages(messages)
 
+        last_error = None
         for attempt in range(max_retries):
             try:
                 logger.debug(f"Attempt {attempt + 1}/{max_retries}: Calling Claude model {model} with {len(messages)} messages. Multimodal: {any(isinstance(m.get('content'), list) for m in messages)}")
@@ -95,18 +110,24 @@ class ClaudeClient(BaseLLMClient):
                 # Assuming the response is primarily text even for multimodal input
                 if response.content and isinstance(response.content, list) and len(response.content) > 0 and hasattr(response.content[0], 'text') and response.content[0].text:
                     generated_text = response.content[0].text.strip()
+                    usage = getattr(response, "usage", None)
+                    report_usage(getattr(usage, "input_tokens", 0), getattr(usage, "output_tokens", 0))
                     logger.debug(f"Claude call successful. Response length: {len(generated_text)}")
                     return generated_text
                 else:
                     # Log the actual response structure if it's unexpected
                     logger.warning(f"Claude response content is empty or unexpected structure for model {model}. Response type: {type(response.content)}, Response: {response.content}. Attempt {attempt + 1}/{max_retries}")
+                    last_error = None
                     # Continue to retry logic
 
             except anthropic.APIConnectionError as e:
                 logger.warning(f"Claude API connection error (Attempt {attempt + 1}/{max_retries}): {e}")
+                last_error = e
             except anthropic.RateLimitError as e:
                 logger.warning(f"Claude rate limit exceeded (Attempt {attempt + 1}/{max_retries}): {e}. Retrying...")
+                last_error = e
             except anthropic.APIStatusError as e:
+                last_error = e
                 logger.error(f"Claude API status error (Attempt {attempt + 1}/{max_retries}): {e.status_code} - {e.response}")
                 if e.status_code < 500: # Don't retry on client errors (4xx) like BadRequestError
                     raise RuntimeError(f"Claude API client error: {e.status_code}") from e
@@ -120,15 +141,18 @@ class ClaudeClient(BaseLLMClient):
             except Exception as e:
                 logger.error(f"An unexpected error occurred while calling Claude (Attempt {attempt + 1}/{max_retries}): {e}", exc_info=True)
                 # Could be network issues, unexpected API changes, etc.
+                last_error = e
 
             # Retry logic
             if attempt < max_retries - 1:
-                wait_time = retry_delay_seconds * (2 ** attempt) # Exponential backoff
-                logger.info(f"Retrying Claude call in {wait_time} seconds...")
+                wait_time = retry_delay(last_error, attempt, base=retry_delay_seconds) if last_error else retry_delay_seconds * (2 ** attempt)
+                logger.info(f"Retrying Claude call in {wait_time:.1f} seconds...")
                 await asyncio.sleep(wait_time)
             else:
                 logger.error(f"Claude call failed after {max_retries} attempts for model {model}.")
-                raise RuntimeError(f"Claude call failed after {max_retries} attempts.")
+                if last_error is None:
+                    raise RetryableLLMError(f"Claude call failed after {max_retries} attempts (empty response).")
+                raise RuntimeError(f"Claude call failed after {max_retries} attempts.") from last_error
 
         # Should not be reached if loop completes, but added for safety
         raise RuntimeError("Claude generation failed unexpectedly after retries.") 
\ No newline at end of file
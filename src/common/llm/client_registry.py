@@ -0,0 +1,301 @@
+"""
+Process-wide registry of pooled LLM provider clients.
+
+``get_llm_response`` used to build a fresh provider client (and with it a new
+HTTP connection pool and TLS handshake) on every call. The registry keeps one
+client per provider per event loop, so every model on that provider reuses
+the SDK's persistent connection pool. The SDK clients are model-agnostic, so
+pooling is per provider, while concurrency and metrics are tracked per
+provider and per (provider, model).
+
+Around each call the registry adds:
+- a per-provider concurrency semaphore (LLM_MAX_CONCURRENCY, overridable with
+  LLM_MAX_CONCURRENCY_<PROVIDER>);
+- one retry policy for every provider. It retries 408/409/429/5xx,
+  connection and timeout errors, and honours Retry-After / retry-after-ms
+  headers before falling back to jittered exponential backoff
+  (LLM_MAX_ATTEMPTS, LLM_RETRY_BASE_SECONDS, LLM_RETRY_MAX_SECONDS);
+- per-call latency and token metrics. ``calls`` and ``errors`` count logical
+  generate() calls; ``attempts`` and ``retries`` count the tries behind them,
+  and latency is observed per attempt. Clients report token usage through
+  report_usage();
+- when given a RateLimitScheduler, a shared request/token budget per provider
+  (route ``llm.<provider>``): each attempt takes a request token first, token
+  usage is charged afterwards, and rate-limit headers on errors tighten the
+  budget for every caller (LLM_RPM_<PROVIDER>, LLM_TPM_<PROVIDER>).
+"""
+import asyncio
+import logging
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.common.env import env_float, env_int
+from src.common.metrics import LLM_CALL_SECONDS, LLM_RETRIES, LLM_TOKENS
+from src.common.rate_limiter import RateLimitScheduler
+
+logger = logging.getLogger('DiscordBot')
+
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000)
+
+_RETRYABLE_STATUS = {408, 409, 429}
+_call_usage: ContextVar[Optional[Dict[str, int]]] = ContextVar("llm_call_usage", default=None)
+
+
+class RetryableLLMError(RuntimeError):
+    """Raised by clients for transient failures without an HTTP status (e.g. empty completions)."""
+
+
+def report_usage(input_tokens: Any = 0, output_tokens: Any = 0) -> None:
+    """Record token usage for the call currently running in this task."""
+    try:
+        _call_usage.set({"input_tokens": int(input_tokens or 0), "output_tokens": int(output_tokens or 0)})
+    except (TypeError, ValueError):
+        pass
+
+
+def _error_chain(exc: BaseException):
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        exc = exc.__cause__ or exc.__context__
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    for err in _error_chain(exc):
+        if isinstance(err, (RetryableLLMError, asyncio.TimeoutError, ConnectionError)):
+            return True
+        status = _status_code(err)
+        if status is not None:
+            return status in _RETRYABLE_STATUS or status >= 500
+        name = type(err).__name__
+        if "Connection" in name or "Timeout" in name:
+            return True
+    return False
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Server-requested delay from Retry-After / retry-after-ms, if any."""
+    for err in _error_chain(exc):
+        headers = getattr(getattr(err, "response", None), "headers", None)
+        if not headers:
+            continue
+        try:
+            millis = headers.get("retry-after-ms")
+            if millis is not None:
+                return max(0.0, float(millis) / 1000.0)
+            value = headers.get("retry-after")
+            if value is None:
+                continue
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError, AttributeError):
+            continue
+    return None
+
+
+def retry_delay(exc: BaseException, attempt: int, base: float = 2.0, cap: float = 60.0) -> float:
+    """Delay before retry number ``attempt`` (0-based): Retry-After, else jittered backoff."""
+    requested = retry_after_seconds(exc)
+    if requested is not None:
+        return min(requested, cap)
+    backoff = min(cap, base * (2 ** attempt))
+    return backoff * (0.5 + random.random() / 2)
+
+
+@dataclass
+class CallStats:
+    calls: int = 0
+    errors: int = 0
+    attempts: int = 0
+    retries: int = 0
+    latency_ms_total: float = 0.0
+    latency_ms_max: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency_buckets: Dict[str, int] = field(
+        default_factory=lambda: {**{str(b): 0 for b in LATENCY_BUCKETS_MS}, "inf": 0}
+    )
+
+    def observe(self, latency_ms: float) -> None:
+        self.latency_ms_total += latency_ms
+        self.latency_ms_max = max(self.latency_ms_max, latency_ms)
+        for bound in LATENCY_BUCKETS_MS:
+            if latency_ms <= bound:
+                self.latency_buckets[str(bound)] += 1
+                return
+        self.latency_buckets["inf"] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "avg_latency_ms": round(self.latency_ms_total / self.attempts, 1) if self.attempts else None,
+            "max_latency_ms": round(self.latency_ms_max, 1),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "latency_buckets_ms": dict(self.latency_buckets),
+        }
+
+
+class LLMClientRegistry:
+    """Pooled provider clients plus shared concurrency, retry and metrics."""
+
+    def __init__(
+        self,
+        factories: Dict[str, Callable[[], Any]],
+        *,
+        sleep: Callable[[float], Any] = asyncio.sleep,
+        scheduler: Optional[RateLimitScheduler] = None,
+    ):
+        self._factories = factories
+        self._sleep = sleep
+        self._scheduler = scheduler
+        self._budgeted: set = set()
+        self._clients: Dict[Tuple[str, int], Tuple[asyncio.AbstractEventLoop, Any]] = {}
+        self._semaphores: Dict[Tuple[str, int], asyncio.Semaphore] = {}
+        self._stats: Dict[Tuple[str, str], CallStats] = {}
+
+    def get_client(self, client_name: str) -> Any:
+        """Return this loop's pooled client for ``client_name``, creating it on first use.
+
+        SDK HTTP pools are bound to the event loop they first ran on, so clients
+        are cached per loop; entries for closed loops are dropped.
+        """
+        loop = asyncio.get_running_loop()
+        key = (client_name, id(loop))
+        cached = self._clients.get(key)
+        if cached is not None and cached[0] is loop:
+            return cached[1]
+        self._purge_closed_loops()
+        client = self._factories[client_name]()
+        self._clients[key] = (loop, client)
+        return client
+
+    def _purge_closed_loops(self) -> None:
+        for key, (loop, _client) in list(self._clients.items()):
+            if loop.is_closed():
+                self._clients.pop(key, None)
+                self._semaphores.pop(key, None)
+
+    def _semaphore(self, client_name: str) -> asyncio.Semaphore:
+        key = (client_name, id(asyncio.get_running_loop()))
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            limit = env_int(f"LLM_MAX_CONCURRENCY_{client_name.upper()}", env_int("LLM_MAX_CONCURRENCY", 8))
+            semaphore = self._semaphores[key] = asyncio.Semaphore(max(1, limit))
+        return semaphore
+
+    def _budget_route(self, client_name: str) -> Optional[str]:
+        """The scheduler route for ``client_name``, configuring its env budgets on first use."""
+        if self._scheduler is None:
+            return None
+        route = f"llm.{client_name}"
+        if client_name not in self._budgeted:
+            self._budgeted.add(client_name)
+            rpm = env_float(f"LLM_RPM_{client_name.upper()}", 0.0, allow_zero=True)
+            tpm = env_float(f"LLM_TPM_{client_name.upper()}", 0.0, allow_zero=True)
+            if rpm > 0:
+                self._scheduler.configure(route, rpm / 60.0, rpm)
+            if tpm > 0:
+                self._scheduler.configure(f"{route}#tokens", tpm / 60.0, tpm)
+        return route
+
+    def _stats_for(self, client_name: str, model: str) -> CallStats:
+        key = (client_name, model)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = CallStats()
+        return stats
+
+    async def generate(self, client_name: str, model: str, system_prompt: str, messages: Any, **kwargs: Any) -> Any:
+        """Call ``generate_chat_completion`` on the pooled client with retries and metrics.
+
+        Client construction errors propagate unchanged so callers can report them.
+        """
+        client = self.get_client(client_name)
+        stats = self._stats_for(client_name, model)
+        max_attempts = max(1, env_int("LLM_MAX_ATTEMPTS", 3))
+        base = env_float("LLM_RETRY_BASE_SECONDS", 2.0)
+        cap = env_float("LLM_RETRY_MAX_SECONDS", 60.0)
+        if client_name == "claude":
+            # ClaudeClient has its own retry loop; let the registry own retries.
+            kwargs.setdefault("max_retries", 1)
+
+        route = self._budget_route(client_name)
+        stats.calls += 1
+        for attempt in range(max_attempts):
+            token = _call_usage.set(None)
+            started = time.monotonic()
+            try:
+                if route is not None:
+                    await self._scheduler.acquire(route)
+                async with self._semaphore(client_name):
+                    started = time.monotonic()
+                    result = await client.generate_chat_completion(
+                        model=model, system_prompt=system_prompt, messages=messages, **kwargs
+                    )
+            except Exception as exc:
+                elapsed = time.monotonic() - started
+                stats.attempts += 1
+                stats.observe(elapsed * 1000)
+                LLM_CALL_SECONDS.observe(elapsed, provider=client_name, model=model, outcome='error')
+                if route is not None:
+                    for err in _error_chain(exc):
+                        self._scheduler.observe_headers(route, getattr(getattr(err, "response", None), "headers", None))
+                if attempt + 1 >= max_attempts or not is_retryable(exc):
+                    stats.errors += 1
+                    raise
+                delay = retry_delay(exc, attempt, base=base, cap=cap)
+                stats.retries += 1
+                LLM_RETRIES.inc(provider=client_name, model=model)
+                logger.warning(
+                    f"LLM call to {client_name}/{model} failed (attempt {attempt + 1}/{max_attempts}): {exc}. "
+                    f"Retrying in {delay:.1f}s"
+                )
+                await self._sleep(delay)
+                continue
+            finally:
+                usage = _call_usage.get()
+                _call_usage.reset(token)
+            elapsed = time.monotonic() - started
+            stats.attempts += 1
+            stats.observe(elapsed * 1000)
+            LLM_CALL_SECONDS.observe(elapsed, provider=client_name, model=model, outcome='ok')
+            if usage:
+                stats.input_tokens += usage["input_tokens"]
+                stats.output_tokens += usage["output_tokens"]
+                LLM_TOKENS.inc(usage["input_tokens"], provider=client_name, model=model, direction='input')
+                LLM_TOKENS.inc(usage["output_tokens"], provider=client_name, model=model, direction='output')
+                if route is not None:
+                    self._scheduler.charge(route, usage["input_tokens"] + usage["output_tokens"])
+            return result
+        raise RuntimeError(f"LLM call to {client_name}/{model} failed after {max_attempts} attempts")
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per ``provider/model`` call, error, retry, latency and token counters."""
+        return {f"{provider}/{model}": stats.as_dict() for (provider, model), stats in sorted(self._stats.items())}
+
+    def reset(self) -> None:
+        self._clients.clear()
+        self._semaphores.clear()
+        self._budgeted.clear()
+        self._stats.clear()
@@ -11,6 +11,7 @@ from typing import Any, Dict, List, Sequence, Union
 from openai import AsyncOpenAI
 
 from .base_client import BaseLLMClient
+from .client_registry import report_usage
 
 logger = logging.getLogger(__name__)
 
@@ -62,6 +63,8 @@ class DeepSeekClient(BaseLLMClient):
             params["extra_body"] = {"thinking": {"type": "enabled"}}
 
         response = await self.client.chat.completions.create(**params)
+        usage = getattr(response, "usage", None)
+        report_usage(getattr(usage, "prompt_tokens", 0), getattr(usage, "completion_tokens", 0))
         if tools:
             return self._to_anthropic_like_response(response)
         message = response.choices[0].message if response.choices else None
@@ -13,6 +13,7 @@ from google.generativeai import types
 # from google.generativeai.types import Part, GenerationConfig # Remove these imports
 
 from .base_client import BaseLLMClient
+from .client_registry import report_usage
 
 logger = logging.getLogger(__name__)
 
@@ -165,6 +166,8 @@ class GeminiClient(BaseLLMClient):
                     config=generation_config,
                 )
             )
+            usage = getattr(response, "usage_metadata", None)
+            report_usage(getattr(usage, "prompt_token_count", 0), getattr(usage, "candidates_token_count", 0))
 
             # Extract text (assuming response structure is similar)
             generated_text = ""
@@ -9,6 +9,7 @@ from typing import List, Dict, Any, Union
 from openai import AsyncOpenAI
 
 from .base_client import BaseLLMClient
+from .client_registry import report_usage
 
 logger = logging.getLogger(__name__)
 
@@ -108,6 +109,8 @@ class OpenAIClient(BaseLLMClient):
         try:
             # Use the new API call structure
             response = await self.client.chat.completions.create(**params)
+            usage = getattr(response, "usage", None)
+            report_usage(getattr(usage, "prompt_tokens", 0), getattr(usage, "completion_tokens", 0))
             
             # Access response differently
             if response.choices and response.choices[0].message and response.choices[0].message.content:
@@ -0,0 +1,163 @@
+"""
+Prompt assembly for multi-turn Anthropic agent loops with prompt caching.
+
+Anthropic caches a request prefix in the order tools -> system -> messages, and
+only when that prefix is byte-identical to a previous request. Long agent loops
+(TopicEditor, AdminChatAgent) resend the same tools, system prompt and a growing
+transcript every turn, so keeping those bytes stable and marking breakpoints
+lets every turn after the first read the shared prefix from cache.
+
+- ``stable_json`` serialises payloads deterministically (sorted keys, fixed
+  separators) so the same data always renders to the same bytes.
+- ``PromptAssembler`` freezes the system prompt and tools for a run and builds
+  request kwargs with a breakpoint on the system block (covering tools too) and
+  on the last transcript block. Breakpoints are applied to copies, so the
+  caller's transcript never accumulates stale ``cache_control`` markers.
+- ``PromptCacheStats`` records cached vs. uncached input tokens per turn from
+  the response ``usage``.
+
+Set ``LLM_PROMPT_CACHE_ENABLED=false`` to send requests without breakpoints.
+"""
+import copy
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def prompt_cache_enabled() -> bool:
+    return os.getenv("LLM_PROMPT_CACHE_ENABLED", "true").lower() not in ("false", "0", "no")
+
+
+def stable_json(value: Any) -> str:
+    """Deterministic JSON: sorted keys, compact separators, non-JSON types via str()."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _with_breakpoint(content: Union[str, List[Any]]) -> Union[str, List[Any]]:
+    """Return a copy of message content with cache_control on its last block."""
+    if isinstance(content, str):
+        return [{"type": "text", "text": content, "cache_control": dict(CACHE_CONTROL)}]
+    if not content:
+        return content
+    blocks = list(content)
+    last = blocks[-1]
+    if isinstance(last, dict):
+        blocks[-1] = {**last, "cache_control": dict(CACHE_CONTROL)}
+    else:
+        # SDK content objects (e.g. an assistant turn echoed back verbatim).
+        dumped = last.model_dump(exclude_none=True) if hasattr(last, "model_dump") else None
+        if not isinstance(dumped, dict):
+            return content
+        blocks[-1] = {**dumped, "cache_control": dict(CACHE_CONTROL)}
+    return blocks
+
+
+class PromptAssembler:
+    """Builds byte-stable ``messages.create`` kwargs for one agent run."""
+
+    def __init__(self, system_prompt: str, tools: Optional[Sequence[Dict[str, Any]]] = None, *, enabled: Optional[bool] = None):
+        self.system_prompt = system_prompt
+        self.tools = list(tools) if tools is not None else None
+        self.enabled = prompt_cache_enabled() if enabled is None else enabled
+
+    @property
+    def prefix_fingerprint(self) -> str:
+        """sha256 over the cached prefix (tools + system); changes break the cache."""
+        payload = stable_json({"system": self.system_prompt, "tools": self.tools})
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def system(self) -> Optional[Union[str, List[Dict[str, Any]]]]:
+        """The ``system`` argument, or None when there is no system prompt.
+
+        The API rejects empty text blocks, so callers omit ``system`` entirely
+        rather than sending an empty cached block.
+        """
+        if not self.system_prompt:
+            return None
+        if not self.enabled:
+            return self.system_prompt
+        return [{"type": "text", "text": self.system_prompt, "cache_control": dict(CACHE_CONTROL)}]
+
+    def messages(self, transcript: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Copy of ``transcript`` with a breakpoint on the final content block."""
+        out = list(transcript)
+        if not self.enabled or not out:
+            return out
+        last = dict(out[-1])
+        last["content"] = _with_breakpoint(last.get("content"))
+        out[-1] = last
+        return out
+
+    def request_kwargs(self, transcript: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {"messages": self.messages(transcript)}
+        system = self.system()
+        if system is not None:
+            kwargs["system"] = system
+        if self.tools is not None:
+            kwargs["tools"] = self.tools
+        return kwargs
+
+
+def cache_usage(response: Any) -> Dict[str, int]:
+    """Input token split from an Anthropic response's ``usage``.
+
+    ``input_tokens`` as reported by the API excludes cache reads and writes;
+    ``total_input_tokens`` adds them back so budgets see the full prompt size.
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None and isinstance(response, dict):
+        usage = response.get("usage")
+    if not usage:
+        return {}
+
+    def _get(name: str) -> int:
+        value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, 0)
+        try:
+            return int(value or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    uncached = _get("input_tokens")
+    read = _get("cache_read_input_tokens")
+    created = _get("cache_creation_input_tokens")
+    return {
+        "input_tokens": uncached,
+        "output_tokens": _get("output_tokens"),
+        "cache_read_input_tokens": read,
+        "cache_creation_input_tokens": created,
+        "total_input_tokens": uncached + read + created,
+    }
+
+
+class PromptCacheStats:
+    """Per-turn cached vs. uncached input token accounting for one run."""
+
+    def __init__(self):
+        self.turns: List[Dict[str, int]] = []
+
+    def record(self, response: Any) -> Dict[str, int]:
+        usage = cache_usage(response)
+        if usage:
+            self.turns.append({
+                "turn": len(self.turns) + 1,
+                "uncached_input_tokens": usage["input_tokens"],
+                "cache_read_input_tokens": usage["cache_read_input_tokens"],
+                "cache_creation_input_tokens": usage["cache_creation_input_tokens"],
+            })
+        return usage
+
+    def summary(self) -> Dict[str, Any]:
+        uncached = sum(t["uncached_input_tokens"] for t in self.turns)
+        read = sum(t["cache_read_input_tokens"] for t in self.turns)
+        created = sum(t["cache_creation_input_tokens"] for t in self.turns)
+        total = uncached + read + created
+        return {
+            "turns": copy.deepcopy(self.turns),
+            "uncached_input_tokens": uncached,
+            "cache_read_input_tokens": read,
+            "cache_creation_input_tokens": created,
+            "cache_hit_ratio": round(read / total, 4) if total else None,
+        }
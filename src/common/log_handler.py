@@ -1,12 +1,14 @@
+import json
 import logging
 from logging.handlers import RotatingFileHandler
 import os
 import socket
 import threading
+import time
 import traceback
 from datetime import datetime
 from queue import Queue, Empty
-from typing import Optional, List, Dict, Any
+from typing import Optional, Dict, Any
 
 # Supabase imports - optional
 try:
@@ -215,20 +217,56 @@ class LogHandler:
 
 class SupabaseLogHandler(logging.Handler):
     """
-    A logging handler that writes logs to Supabase in batches.
-    
-    Logs are buffered and sent in batches to reduce API calls.
-    Uses a background thread for non-blocking writes.
+    A logging handler that ships logs to Supabase in batches.
+
+    emit() only snapshots the record: the formatted message, level, timestamp
+    and other primitives, with any ``extra`` value that is not a str, number,
+    bool or None replaced by its repr(), so later mutation cannot change what
+    ships. A background thread serializes queued snapshots to JSON lines,
+    appends them to a local spool file and ships batches from it. A committed byte offset (stored next to the spool) marks
+    what Supabase has accepted, so logs written during an outage or before a
+    restart are replayed on the next run.
+
+    The default spool is per process, under data/tmp/ (SUPABASE_LOG_SPOOL_DIR).
+    On start, spools left by processes that are no longer running are adopted
+    and replayed. SUPABASE_LOG_SPOOL_PATH pins an explicit path instead.
+
+    - Batch size grows with the backlog, from batch_size up to max_batch_size.
+    - A failed insert is retried with capped exponential backoff. Transient
+      failures (network, 5xx) retry until Supabase is back.
+    - A batch Supabase rejects (Postgres data, constraint or schema error,
+      a PostgREST request error, or another 4xx) is retried max_attempts
+      times, then re-sent one record at a time. A record rejected max_attempts times on its own is dropped.
+    - Records are also dropped (and counted) when the unshipped backlog would
+      exceed max_spool_bytes, or when a spooled line is corrupt. Shipped bytes
+      are compacted out of the spool once they reach half the cap.
     """
-    
+
+    SPOOL_PREFIX = 'supabase_log_spool.'
+    SPOOL_SUFFIX = '.jsonl'
+
+    STANDARD_ATTRS = frozenset({
+        'name', 'msg', 'args', 'created', 'filename', 'funcName',
+        'levelname', 'levelno', 'lineno', 'module', 'msecs',
+        'pathname', 'process', 'processName', 'relativeCreated',
+        'stack_info', 'exc_info', 'exc_text', 'thread', 'threadName',
+        'message', 'asctime', 'taskName',
+    })
+
     def __init__(
         self, 
-        supabase_url: str, 
-        supabase_key: str,
+        supabase_url: Optional[str] = None,
+        supabase_key: Optional[str] = None,
         table_name: str = 'system_logs',
         batch_size: int = 50,
         flush_interval: float = 5.0,
-        level: int = logging.INFO
+        level: int = logging.INFO,
+        spool_path: Optional[str] = None,
+        max_batch_size: int = 500,
+        max_spool_bytes: Optional[int] = None,
+        max_attempts: int = 5,
+        max_backoff: float = 60.0,
+        client: Optional[Any] = None,
     ):
         """
         Initialize the Supabase log handler.
@@ -237,25 +275,55 @@ class SupabaseLogHandler(logging.Handler):
             supabase_url: Supabase project URL
             supabase_key: Supabase service key
             table_name: Name of the logs table
-            batch_size: Number of logs to batch before sending
+            batch_size: Smallest batch shipped per insert
             flush_interval: Seconds between automatic flushes
             level: Minimum log level to capture
+            spool_path: Local spool file (defaults to SUPABASE_LOG_SPOOL_PATH, else a
+                per-process file under SUPABASE_LOG_SPOOL_DIR)
+            max_batch_size: Largest batch shipped when a backlog builds up
+            max_spool_bytes: Spool size cap (defaults to SUPABASE_LOG_SPOOL_MAX_BYTES)
+            max_attempts: Insert attempts per batch before it is split/dropped
+            max_backoff: Upper bound for retry backoff, in seconds
+            client: Pre-built Supabase client (skips create_client)
         """
         super().__init__(level)
         
-        if not SUPABASE_AVAILABLE:
-            raise ImportError("Supabase client not available. Install with: pip install supabase")
+        if client is None:
+            if not SUPABASE_AVAILABLE:
+                raise ImportError("Supabase client not available. Install with: pip install supabase")
+            client = create_client(supabase_url, supabase_key)
         
-        self.supabase: Client = create_client(supabase_url, supabase_key)
+        self.supabase: Client = client
         self.table_name = table_name
-        self.batch_size = batch_size
+        self.batch_size = max(1, batch_size)
+        self.max_batch_size = max(self.batch_size, max_batch_size)
         self.flush_interval = flush_interval
+        self.max_attempts = max(1, max_attempts)
+        self.max_backoff = max_backoff
         self.hostname = socket.gethostname()
+        self.spool_path = spool_path or os.getenv('SUPABASE_LOG_SPOOL_PATH') or self._default_spool_path()
+        self._adopt_orphans = not (spool_path or os.getenv('SUPABASE_LOG_SPOOL_PATH'))
+        self.offset_path = self.spool_path + '.offset'
+        self.max_spool_bytes = max_spool_bytes or int(os.getenv('SUPABASE_LOG_SPOOL_MAX_BYTES', str(64 * 1024 * 1024)))
         
-        # Thread-safe queue for log records
+        # Thread-safe queue of record snapshots; everything after it runs on the
+        # flush thread (or a caller of flush()) under _lock.
         self._queue: Queue = Queue()
-        self._buffer: List[Dict[str, Any]] = []
         self._lock = threading.Lock()
+        self._failures = 0
+        self._retry_at = 0.0
+        self._isolate_until = 0
+        self._metrics: Dict[str, Any] = {
+            'shipped': 0,
+            'dropped_overflow': 0,
+            'dropped_failed': 0,
+            'dropped_corrupt': 0,
+            'failed_batches': 0,
+            'replayed_on_start': 0,
+            'adopted_spools': 0,
+            'last_batch_size': 0,
+        }
+        self._open_spool()
         
         # Background thread for flushing logs
         self._shutdown = threading.Event()
@@ -263,116 +331,311 @@ class SupabaseLogHandler(logging.Handler):
         self._flush_thread.start()
     
     def emit(self, record: logging.LogRecord):
-        """Add a log record to the queue for batching."""
+        """Snapshot a log record and queue it; serializing and spooling happen off this thread."""
         try:
-            log_entry = self._format_record(record)
-            self._queue.put(log_entry)
+            exception_text = None
+            if record.exc_info:
+                exception_text = ''.join(traceback.format_exception(*record.exc_info))
+            extra = {
+                k: v if v is None or isinstance(v, (str, int, float, bool)) else repr(v)
+                for k, v in record.__dict__.items()
+                if k not in self.STANDARD_ATTRS
+            }
+            self._queue.put({
+                'timestamp': datetime.utcfromtimestamp(record.created).isoformat(),
+                'level': record.levelname,
+                'logger_name': record.name,
+                'message': record.getMessage(),
+                'module': record.module,
+                'function_name': record.funcName,
+                'line_number': record.lineno,
+                'exception': exception_text,
+                'extra': extra,
+                'hostname': self.hostname
+            })
         except Exception:
             self.handleError(record)
     
-    def _format_record(self, record: logging.LogRecord) -> Dict[str, Any]:
-        """Format a log record for Supabase insertion."""
-        # Get exception info if present
-        exception_text = None
-        if record.exc_info:
-            exception_text = ''.join(traceback.format_exception(*record.exc_info))
-        
-        # Extract extra fields (anything added via extra= parameter)
-        extra = {}
-        standard_attrs = {
-            'name', 'msg', 'args', 'created', 'filename', 'funcName', 
-            'levelname', 'levelno', 'lineno', 'module', 'msecs',
-            'pathname', 'process', 'processName', 'relativeCreated',
-            'stack_info', 'exc_info', 'exc_text', 'thread', 'threadName',
-            'message', 'asctime'
-        }
-        for key, value in record.__dict__.items():
-            if key not in standard_attrs:
+    @staticmethod
+    def _serialize(entry: Dict[str, Any]) -> bytes:
+        """One compact, key-sorted JSON line for a snapshot from emit(); runs on the flush thread."""
+        return json.dumps(entry, separators=(',', ':'), sort_keys=True, default=str).encode('utf-8') + b'\n'
+
+    # ------------------------------------------------------------------
+    # Spool
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _default_spool_path(cls) -> str:
+        spool_dir = os.getenv('SUPABASE_LOG_SPOOL_DIR', os.path.join('data', 'tmp'))
+        return os.path.join(spool_dir, f'{cls.SPOOL_PREFIX}{os.getpid()}{cls.SPOOL_SUFFIX}')
+
+    @staticmethod
+    def _pid_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except (PermissionError, OSError):
+            return True
+        return True
+
+    def _adopt_orphaned_spools(self):
+        """Append the unshipped tail of spools left by dead processes to ours."""
+        spool_dir = os.path.dirname(self.spool_path) or '.'
+        for name in sorted(os.listdir(spool_dir)):
+            if not (name.startswith(self.SPOOL_PREFIX) and name.endswith(self.SPOOL_SUFFIX)):
+                continue
+            pid_text = name[len(self.SPOOL_PREFIX):-len(self.SPOOL_SUFFIX)]
+            if not pid_text.isdigit() or int(pid_text) == os.getpid() or self._pid_alive(int(pid_text)):
+                continue
+            path = os.path.join(spool_dir, name)
+            claimed = f'{path}.adopting.{os.getpid()}'
+            try:
+                os.rename(path, claimed)  # atomic: only one new process adopts a spool
+            except OSError:
+                continue
+            offset = 0
+            try:
+                with open(path + '.offset', 'r') as f:
+                    offset = int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                offset = 0
+            with open(claimed, 'rb') as src:
+                if offset > os.fstat(src.fileno()).st_size:
+                    offset = 0
+                src.seek(offset)
+                tail = src.read()
+            if tail and not tail.endswith(b'\n'):
+                tail = tail[:tail.rfind(b'\n') + 1]  # drop a torn final line
+            if tail:
+                self._spool.write(tail)
+                self._spool.flush()
+                self._spool_size += len(tail)
+            self._metrics['adopted_spools'] += 1
+            for leftover in (claimed, path + '.offset'):
                 try:
-                    # Only include JSON-serializable values
-                    import json
-                    json.dumps(value)
-                    extra[key] = value
-                except (TypeError, ValueError):
-                    extra[key] = str(value)
-        
-        return {
-            'timestamp': datetime.utcfromtimestamp(record.created).isoformat(),
-            'level': record.levelname,
-            'logger_name': record.name,
-            'message': record.getMessage(),
-            'module': record.module,
-            'function_name': record.funcName,
-            'line_number': record.lineno,
-            'exception': exception_text,
-            'extra': extra if extra else {},
-            'hostname': self.hostname
-        }
-    
+                    os.unlink(leftover)
+                except OSError:
+                    pass
+
+    def _open_spool(self):
+        spool_dir = os.path.dirname(self.spool_path)
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+        self._spool = open(self.spool_path, 'ab')
+        self._spool_size = self._spool.tell()
+        if self._spool_size:
+            with open(self.spool_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn_tail = f.read(1) != b'\n'
+            if torn_tail:
+                # Terminate a line cut short by a crash so new records start cleanly.
+                self._spool.write(b'\n')
+                self._spool.flush()
+                self._spool_size += 1
+        self._offset = 0
+        try:
+            with open(self.offset_path, 'r') as f:
+                self._offset = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            self._offset = 0
+        if self._offset > self._spool_size:
+            self._offset = 0
+        if self._adopt_orphans:
+            self._adopt_orphaned_spools()
+        self._pending = self._count_lines(self._offset)
+        self._metrics['replayed_on_start'] = self._pending
+
+    def _count_lines(self, offset: int) -> int:
+        count = 0
+        with open(self.spool_path, 'rb') as f:
+            f.seek(offset)
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                count += chunk.count(b'\n')
+        return count
+
+    def _drain_queue_to_spool(self):
+        lines = []
+        size = 0
+        backlog = self._spool_size - self._offset
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except Empty:
+                break
+            line = self._serialize(entry)
+            if backlog + size + len(line) > self.max_spool_bytes:
+                self._metrics['dropped_overflow'] += 1
+                continue
+            lines.append(line)
+            size += len(line)
+        if lines:
+            self._spool.write(b''.join(lines))
+            self._spool.flush()
+            self._spool_size += size
+            self._pending += len(lines)
+
+    def _read_batch(self, limit: int):
+        """Up to ``limit`` complete spooled lines after the committed offset."""
+        rows, end = [], self._offset
+        with open(self.spool_path, 'rb') as f:
+            f.seek(self._offset)
+            while len(rows) < limit:
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    break  # nothing more, or a partially written tail
+                end += len(line)
+                try:
+                    rows.append((json.loads(line), end))
+                except ValueError:
+                    rows.append((None, end))
+        return rows
+
+    def _commit(self, offset: int, records: int):
+        self._offset = offset
+        self._pending = max(0, self._pending - records)
+        if self._offset >= self._spool_size:
+            # Everything shipped: start a fresh spool rather than growing forever.
+            self._spool.truncate(0)
+            self._spool.seek(0)
+            self._spool_size = 0
+            self._offset = 0
+            self._pending = 0
+        elif self._offset >= self.max_spool_bytes // 2:
+            self._compact_spool()
+            return
+        self._write_offset(self._offset)
+
+    def _write_offset(self, offset: int):
+        tmp_path = self.offset_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(str(offset))
+        os.replace(tmp_path, self.offset_path)
+
+    def _compact_spool(self):
+        """Rewrite the spool without its shipped prefix so the file stays bounded."""
+        with open(self.spool_path, 'rb') as f:
+            f.seek(self._offset)
+            tail = f.read()
+        tmp_path = self.spool_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(tail)
+        # Reset the offset first: a crash in between replays shipped lines
+        # rather than skipping unshipped ones.
+        self._write_offset(0)
+        self._spool.close()
+        os.replace(tmp_path, self.spool_path)
+        self._spool = open(self.spool_path, 'ab')
+        self._spool_size = len(tail)
+        self._offset = 0
+
+    # ------------------------------------------------------------------
+    # Shipping
+    # ------------------------------------------------------------------
+
+    def _next_batch_size(self) -> int:
+        """Grow batches with the backlog so a large replay drains in few inserts."""
+        return max(self.batch_size, min(self.max_batch_size, self._pending // 4))
+
+    def _ship_pending(self, force: bool = False):
+        """Ship spooled records until the spool is empty or an insert fails."""
+        while self._pending > 0:
+            if not force and time.monotonic() < self._retry_at:
+                return
+            limit = 1 if self._offset < self._isolate_until else self._next_batch_size()
+            rows = self._read_batch(limit)
+            if not rows:
+                return
+            records = [row for row, _end in rows if row is not None]
+            self._metrics['dropped_corrupt'] += len(rows) - len(records)
+            end = rows[-1][1]
+            try:
+                if records:
+                    self.supabase.table(self.table_name).insert(records).execute()
+            except Exception as e:
+                self._failures += 1
+                self._metrics['failed_batches'] += 1
+                if self._is_rejection(e) and self._failures >= self.max_attempts:
+                    self._failures = 0
+                    if len(rows) > 1:
+                        # Re-send this range one record at a time to find the bad one(s).
+                        self._isolate_until = end
+                        continue
+                    print(f"Dropping log record rejected by Supabase {self.max_attempts} times: {e}")
+                    self._metrics['dropped_failed'] += 1
+                    self._commit(end, 1)
+                    continue
+                delay = min(self.max_backoff, 2 ** min(self._failures - 1, 16))
+                self._retry_at = time.monotonic() + delay
+                print(f"Failed to send {len(records)} logs to Supabase (attempt {self._failures}), retrying in {delay:.0f}s: {e}")
+                return
+            self._failures = 0
+            self._retry_at = 0.0
+            self._metrics['shipped'] += len(records)
+            self._metrics['last_batch_size'] = len(rows)
+            self._commit(end, len(rows))
+
+    # 4xx statuses that mean "try again later" rather than "bad request".
+    TRANSIENT_STATUSES = frozenset({408, 425, 429})
+
+    @classmethod
+    def _is_rejection(cls, error: Exception) -> bool:
+        """True when Supabase refused the rows, so resending them as-is can never succeed.
+
+        Covers Postgres data/constraint/schema errors (SQLSTATE class 22/23/42),
+        PostgREST request errors (PGRST1xx and up; PGRST0xx are connection
+        failures) and 4xx responses other than timeouts and rate limits.
+        """
+        code = getattr(error, 'code', None)
+        if isinstance(code, str):
+            if code[:2] in ('22', '23', '42'):
+                return True
+            if code.startswith('PGRST') and not code.startswith('PGRST0'):
+                return True
+        status = getattr(error, 'status_code', None)
+        if status is None:
+            status = getattr(getattr(error, 'response', None), 'status_code', None)
+        return isinstance(status, int) and 400 <= status < 500 and status not in cls.TRANSIENT_STATUSES
+
     def _flush_loop(self):
-        """Background loop that flushes logs periodically."""
+        """Background loop that spools and ships logs periodically."""
         while not self._shutdown.is_set():
             try:
-                # Collect logs from queue
-                while True:
-                    try:
-                        log_entry = self._queue.get_nowait()
-                        with self._lock:
-                            self._buffer.append(log_entry)
-                    except Empty:
-                        break
-                
-                # Flush if buffer is full or interval elapsed
                 with self._lock:
-                    if len(self._buffer) >= self.batch_size:
-                        self._flush_buffer()
-                
-                # Wait for flush interval
-                self._shutdown.wait(self.flush_interval)
-                
-                # Flush any remaining logs
-                with self._lock:
-                    if self._buffer:
-                        self._flush_buffer()
-                        
+                    self._drain_queue_to_spool()
+                    self._ship_pending()
             except Exception as e:
                 print(f"Error in Supabase log flush loop: {e}")
-    
-    def _flush_buffer(self):
-        """Flush buffered logs to Supabase."""
-        if not self._buffer:
-            return
-        
-        logs_to_send = self._buffer.copy()
-        self._buffer.clear()
-        
-        try:
-            self.supabase.table(self.table_name).insert(logs_to_send).execute()
-        except Exception as e:
-            # Don't lose logs - print to stderr as fallback
-            print(f"Failed to send {len(logs_to_send)} logs to Supabase: {e}")
-            # Could optionally re-queue logs here, but risk infinite loop
+            self._shutdown.wait(self.flush_interval)
     
     def flush(self):
-        """Force flush all buffered logs."""
-        # Drain queue first
-        while True:
-            try:
-                log_entry = self._queue.get_nowait()
-                with self._lock:
-                    self._buffer.append(log_entry)
-            except Empty:
-                break
-        
-        # Then flush buffer
+        """Spool everything queued so far and try to ship it now."""
         with self._lock:
-            self._flush_buffer()
+            try:
+                self._drain_queue_to_spool()
+                self._ship_pending(force=True)
+            except Exception as e:
+                print(f"Error flushing Supabase logs: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Backlog depth, shipped/dropped counts and retry state."""
+        return {
+            **self._metrics,
+            'queued': self._queue.qsize(),
+            'backlog_records': self._pending,
+            'spool_bytes': self._spool_size - self._offset,
+            'consecutive_failures': self._failures,
+            'next_batch_size': self._next_batch_size(),
+        }
     
     def close(self):
         """Clean up handler resources."""
         self._shutdown.set()
-        self.flush()
         self._flush_thread.join(timeout=5.0)
+        self.flush()
+        with self._lock:
+            self._spool.close()
         super().close()
 
 
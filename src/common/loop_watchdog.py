@@ -0,0 +1,335 @@
+"""
+LoopWatchdog — finds the code that blocks the Discord event loop.
+
+A heartbeat coroutine on the watched loop stamps the time every ``interval``.
+A daemon thread checks the stamp; once it is older than ``threshold`` the
+loop is stuck inside some synchronous call, so the thread grabs that loop
+thread's current stack with ``sys._current_frames()``. When the heartbeat runs
+again it knows how long the stall lasted and charges it to the call site: the
+innermost frame in this repo's code (e.g. the line calling ``.execute()`` or
+``requests.get``), plus the library frame it was actually blocked in.
+
+Offenders are aggregated per call site and ranked by total blocked time. They
+are logged as they happen (rate-limited per site), summarised periodically,
+exported as metrics, and served by HealthServer at ``/blocking``.
+
+Tunables (env): LOOP_WATCHDOG_ENABLED, LOOP_WATCHDOG_THRESHOLD_MS,
+LOOP_WATCHDOG_INTERVAL_MS, LOOP_WATCHDOG_REPORT_SECONDS, LOOP_WATCHDOG_METRIC_SITES
+(distinct ``site`` labels on the blocked-time counters; later sites are
+counted under ``other``).
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.common.env import env_float, env_int
+from src.common.metrics import EVENT_LOOP_LAG_CURRENT, EVENT_LOOP_LAG_SECONDS, REGISTRY
+
+logger = logging.getLogger('DiscordBot')
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+UNATTRIBUTED = '<unattributed>'
+MAX_STACK_FRAMES = 12
+OTHER_SITE = 'other'
+
+BLOCKED_SECONDS = REGISTRY.counter(
+    'bot_event_loop_blocked_seconds_total', 'Event loop time lost to blocking calls, by call site.', ('site',),
+)
+BLOCKED_STALLS = REGISTRY.counter(
+    'bot_event_loop_blocked_total', 'Event loop stalls longer than the watchdog threshold, by call site.', ('site',),
+)
+
+
+METRIC_SITE_LIMIT = env_int('LOOP_WATCHDOG_METRIC_SITES', 50)
+_metric_sites: set = set()
+_metric_sites_lock = threading.Lock()
+
+
+def _metric_site(site: str) -> str:
+    """Label for ``site`` on the BLOCKED_* counters, capped at METRIC_SITE_LIMIT.
+
+    Counters never forget a label, so once the cap is reached every new call
+    site is charged to ``other`` instead of growing the series set forever.
+    """
+    with _metric_sites_lock:
+        if site in _metric_sites:
+            return site
+        if len(_metric_sites) < METRIC_SITE_LIMIT:
+            _metric_sites.add(site)
+            return site
+    return OTHER_SITE
+
+
+def _is_project_file(filename: str) -> bool:
+    try:
+        path = Path(filename).resolve()
+    except (OSError, ValueError):
+        return False
+    if 'site-packages' in path.parts or 'dist-packages' in path.parts:
+        return False
+    return PROJECT_ROOT in path.parents and path != Path(__file__).resolve()
+
+
+def _relative(filename: str) -> str:
+    try:
+        return str(Path(filename).resolve().relative_to(PROJECT_ROOT))
+    except ValueError:
+        return Path(filename).name
+
+
+@dataclass
+class _Capture:
+    beat: float
+    site: str
+    blocked_in: str
+    stack: List[str]
+
+
+@dataclass
+class BlockingSite:
+    """Aggregated stalls charged to one call site."""
+
+    site: str
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    last_seen: float = 0.0
+    blocked_in: str = ''
+    stack: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'site': self.site,
+            'count': self.count,
+            'total_ms': round(self.total_seconds * 1000, 1),
+            'max_ms': round(self.max_seconds * 1000, 1),
+            'avg_ms': round(self.total_seconds / self.count * 1000, 1) if self.count else 0.0,
+            'blocked_in': self.blocked_in,
+            'last_seen_seconds_ago': round(time.monotonic() - self.last_seen, 1),
+            'stack': list(self.stack),
+        }
+
+
+def describe_stack(frame) -> Tuple[str, str, List[str]]:
+    """(call site, innermost frame, formatted stack) for a blocked loop thread's frame."""
+    summary = traceback.extract_stack(frame)
+    if not summary:
+        return UNATTRIBUTED, '', []
+    innermost = summary[-1]
+    blocked_in = f'{_relative(innermost.filename)}:{innermost.lineno} in {innermost.name}'
+    site = UNATTRIBUTED
+    for entry in reversed(summary):
+        if _is_project_file(entry.filename):
+            site = f'{_relative(entry.filename)}:{entry.lineno} in {entry.name}'
+            break
+    stack = [
+        f'{_relative(entry.filename)}:{entry.lineno} in {entry.name}'
+        for entry in summary[-MAX_STACK_FRAMES:]
+    ]
+    return site, blocked_in, stack
+
+
+class LoopWatchdog:
+    """Detects event loop stalls and attributes them to call sites."""
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        interval: Optional[float] = None,
+        report_interval: Optional[float] = None,
+        log_cooldown: float = 60.0,
+        max_sites: int = 200,
+        name: str = 'discord',
+    ):
+        self.threshold = threshold or env_float('LOOP_WATCHDOG_THRESHOLD_MS', 250.0) / 1000
+        self.interval = interval or env_float('LOOP_WATCHDOG_INTERVAL_MS', 100.0) / 1000
+        self.report_interval = report_interval or env_float('LOOP_WATCHDOG_REPORT_SECONDS', 600.0)
+        self.log_cooldown = log_cooldown
+        self.max_sites = max_sites
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._sites: Dict[str, BlockingSite] = {}
+        self._last_logged: Dict[str, float] = {}
+        self._last_beat = time.monotonic()
+        self._captured_beat: Optional[float] = None
+        self._pending: Optional[_Capture] = None
+        self._loop_thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stalls_since_report = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> asyncio.Task:
+        """Start watching the running loop; must be called from that loop."""
+        if self._task is not None and not self._task.done():
+            return self._task
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._thread.start()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat(), name='loop-watchdog-heartbeat')
+        logger.info(
+            f"[LoopWatchdog] Watching event loop '{self.name}' "
+            f"(threshold {self.threshold * 1000:.0f}ms, heartbeat {self.interval * 1000:.0f}ms)"
+        )
+        return self._task
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+
+    # ------------------------------------------------------------------
+    # Detection
+    # ------------------------------------------------------------------
+
+    def _watch(self) -> None:
+        check_every = max(min(self.threshold / 4, self.interval), 0.005)
+        while not self._stop.wait(check_every):
+            beat = self._last_beat
+            if time.monotonic() - beat - self.interval < self.threshold or self._captured_beat == beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            try:
+                site, blocked_in, stack = describe_stack(frame)
+            finally:
+                del frame
+            with self._lock:
+                if self._last_beat == beat:
+                    self._pending = _Capture(beat, site, blocked_in, stack)
+                    self._captured_beat = beat
+
+    async def _heartbeat(self) -> None:
+        last_report = time.monotonic()
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - expected, 0.0)
+            with self._lock:
+                capture = self._pending if self._pending and self._pending.beat == self._last_beat else None
+                self._pending = None
+                self._last_beat = now
+            EVENT_LOOP_LAG_SECONDS.observe(lag, loop=self.name)
+            EVENT_LOOP_LAG_CURRENT.set(lag, loop=self.name)
+            if lag >= self.threshold:
+                self.record_stall(lag, capture)
+            if now - last_report >= self.report_interval:
+                last_report = now
+                self._report()
+
+    def record_stall(self, seconds: float, capture: Optional[_Capture] = None) -> None:
+        """Charge a ``seconds``-long stall to the captured call site."""
+        site = capture.site if capture else UNATTRIBUTED
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sites.get(site)
+            if entry is None:
+                if len(self._sites) >= self.max_sites:
+                    smallest = min(self._sites.values(), key=lambda s: s.total_seconds)
+                    del self._sites[smallest.site]
+                entry = self._sites[site] = BlockingSite(site)
+            entry.count += 1
+            entry.total_seconds += seconds
+            entry.max_seconds = max(entry.max_seconds, seconds)
+            entry.last_seen = now
+            if capture:
+                entry.blocked_in = capture.blocked_in
+                entry.stack = capture.stack
+            self._stalls_since_report += 1
+            should_log = now - self._last_logged.get(site, float('-inf')) >= self.log_cooldown
+            if should_log:
+                self._last_logged[site] = now
+        label = _metric_site(site)
+        BLOCKED_STALLS.inc(site=label)
+        BLOCKED_SECONDS.inc(seconds, site=label)
+        if should_log:
+            detail = f" (blocked in {capture.blocked_in})" if capture and capture.blocked_in else ''
+            stack = ('\n    ' + '\n    '.join(capture.stack)) if capture and capture.stack else ''
+            logger.warning(f"[LoopWatchdog] Event loop blocked {seconds * 1000:.0f}ms at {site}{detail}{stack}")
+
+    def _report(self) -> None:
+        with self._lock:
+            if not self._stalls_since_report:
+                return
+            self._stalls_since_report = 0
+        top = self.get_offenders(limit=5)
+        ranked = '; '.join(
+            f"{o['site']} {o['total_ms']:.0f}ms/{o['count']}x (max {o['max_ms']:.0f}ms)" for o in top
+        )
+        logger.info(f"[LoopWatchdog] Top event loop blockers: {ranked}")
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def get_offenders(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Call sites ranked by total blocked time."""
+        with self._lock:
+            ranked = sorted(self._sites.values(), key=lambda s: s.total_seconds, reverse=True)[:limit]
+            return [site.as_dict() for site in ranked]
+
+    def snapshot(self, limit: int = 20) -> Dict[str, Any]:
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'threshold_ms': round(self.threshold * 1000, 1),
+            'offenders': self.get_offenders(limit),
+        }
+
+
+_watchdog: Optional[LoopWatchdog] = None
+_watchdog_lock = threading.Lock()
+_owners = 0
+
+
+def get_loop_watchdog() -> Optional[LoopWatchdog]:
+    """The process-wide watchdog, if one has been started."""
+    return _watchdog
+
+
+def start_loop_watchdog(**kwargs: Any) -> Optional[LoopWatchdog]:
+    """Start (once) the process-wide watchdog on the running loop.
+
+    Each successful call takes a reference that the caller must hand back with
+    ``release_loop_watchdog()``; the watchdog only stops when the last owner
+    (e.g. the last bot sharing the process) releases it.
+    Returns None when disabled with LOOP_WATCHDOG_ENABLED=false.
+    """
+    global _watchdog, _owners
+    if os.getenv('LOOP_WATCHDOG_ENABLED', 'true').strip().lower() in ('0', 'false', 'no', 'off'):
+        return None
+    with _watchdog_lock:
+        if _watchdog is None:
+            _watchdog = LoopWatchdog(**kwargs)
+        _owners += 1
+        watchdog = _watchdog
+    watchdog.start()
+    return watchdog
+
+
+def release_loop_watchdog() -> None:
+    """Drop one reference taken by ``start_loop_watchdog``; stop on the last."""
+    global _owners
+    with _watchdog_lock:
+        _owners = max(_owners - 1, 0)
+        watchdog = _watchdog if _owners == 0 else None
+    if watchdog is not None:
+        watchdog.stop()
@@ -0,0 +1,180 @@
+"""Indexed discord_messages search.
+
+Searches go through the ``search_discord_messages`` RPC
+(.migrations_staging/20261016140000_search_discord_messages_rpc.sql): full-text
+matching on an expression-indexed tsvector plus pg_trgm substring matching, with
+every filter applied server-side and keyset pagination on the active sort key.
+Callers page with the opaque ``next_cursor`` returned by ``search_messages``.
+
+An SQLite FTS5 stand-in for the RPC, used by the tests and
+scripts/bench_message_search.py, lives in scripts/local_message_search.py.
+"""
+
+import base64
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('DiscordBot')
+
+SEARCH_RPC = 'search_discord_messages'
+SEARCH_SORTS = ('relevance', 'date', 'reactions')
+HAS_KINDS = ('image', 'video', 'audio', 'link', 'embed', 'file')
+MAX_PAGE_SIZE = 500
+
+_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+_VIDEO_EXTENSIONS = ('.mp4', '.mov', '.webm', '.mkv')
+_AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.ogg', '.flac')
+
+# Cursor fields per sort, in ORDER BY order (all descending).
+_CURSOR_KEYS = {
+    'date': ('created_at', 'message_id'),
+    'reactions': ('reaction_count', 'created_at', 'message_id'),
+    'relevance': ('rank', 'created_at', 'message_id'),
+}
+
+
+@dataclass(frozen=True)
+class MessageSearch:
+    """One page of a discord_messages search.
+
+    ``channel_ids=None`` means any channel; an empty tuple matches nothing
+    (e.g. a caller with no visible channels). ``sort`` falls back to 'date'
+    when there is no query to rank by.
+    """
+
+    query: Optional[str] = None
+    guild_id: Optional[int] = None
+    channel_ids: Optional[Tuple[int, ...]] = None
+    author_id: Optional[int] = None
+    exclude_author_ids: Tuple[int, ...] = ()
+    after: Optional[str] = None     # ISO timestamp, inclusive
+    before: Optional[str] = None    # ISO timestamp, inclusive
+    is_reply: Optional[bool] = None
+    has: Tuple[str, ...] = ()
+    min_reactions: Optional[int] = None
+    mentions_author_id: Optional[int] = None
+    exclude_nsfw: bool = False
+    sort: str = 'relevance'
+    limit: int = 20
+    cursor: Optional[str] = None
+
+    @property
+    def effective_sort(self) -> str:
+        if self.sort in ('date', 'reactions'):
+            return self.sort
+        return 'relevance' if (self.query or '').strip() else 'date'
+
+    @property
+    def page_size(self) -> int:
+        return max(1, min(int(self.limit or 20), MAX_PAGE_SIZE))
+
+    def rpc_params(self) -> Dict[str, Any]:
+        kinds = [str(kind).lower() for kind in self.has if kind]
+        unknown = sorted(set(kinds) - set(HAS_KINDS))
+        if unknown:
+            raise ValueError(f"Unknown has: kind(s) {unknown}; expected {list(HAS_KINDS)}")
+        return {
+            'p_query': (self.query or '').strip() or None,
+            'p_guild_id': self.guild_id,
+            'p_channel_ids': None if self.channel_ids is None else [int(c) for c in self.channel_ids],
+            'p_author_id': self.author_id,
+            'p_exclude_author_ids': [int(a) for a in self.exclude_author_ids] or None,
+            'p_after': self.after,
+            'p_before': self.before,
+            'p_is_reply': self.is_reply,
+            'p_has': kinds or None,
+            'p_min_reactions': self.min_reactions or None,
+            'p_mentions_author_id': self.mentions_author_id,
+            'p_exclude_nsfw': bool(self.exclude_nsfw),
+            'p_sort': self.effective_sort,
+            'p_cursor': decode_cursor(self.cursor, self.effective_sort),
+            # One extra row tells us whether another page exists.
+            'p_limit': self.page_size + 1,
+        }
+
+
+def encode_cursor(row: Dict[str, Any], sort: str) -> str:
+    """Opaque cursor positioned after ``row`` for the given sort."""
+    payload = {'sort': sort}
+    for key in _CURSOR_KEYS[sort]:
+        payload[key] = row.get(key)
+    raw = json.dumps(payload, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str], sort: str) -> Optional[Dict[str, Any]]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid search cursor: {cursor!r}") from e
+    if not isinstance(payload, dict) or payload.get('sort') != sort:
+        raise ValueError(f"Search cursor was issued for a different sort than '{sort}'")
+    if any(payload.get(key) is None for key in _CURSOR_KEYS[sort]):
+        raise ValueError(f"Invalid search cursor: {cursor!r}")
+    return {key: payload[key] for key in _CURSOR_KEYS[sort]}
+
+
+def search_messages(client: Any, search: MessageSearch) -> Dict[str, Any]:
+    """Run one page of ``search`` against ``client`` (a sync Supabase client).
+
+    Returns ``{"messages", "has_more", "next_cursor"}``; pass ``next_cursor``
+    back as ``MessageSearch.cursor`` for the following page.
+    """
+    response = client.rpc(SEARCH_RPC, search.rpc_params()).execute()
+    rows = list(response.data or [])
+    has_more = len(rows) > search.page_size
+    rows = rows[:search.page_size]
+    next_cursor = encode_cursor(rows[-1], search.effective_sort) if has_more and rows else None
+    return {'messages': rows, 'has_more': has_more, 'next_cursor': next_cursor}
+
+
+def is_missing_search_rpc(exc: BaseException) -> bool:
+    """True when the database has not had the search migration applied yet."""
+    code = str(getattr(exc, 'code', '') or '')
+    if code in ('PGRST202', '42883'):
+        return True
+    text = str(exc)
+    return SEARCH_RPC in text and ('Could not find the function' in text or 'does not exist' in text)
+
+
+def _json_array(value: Any) -> List[Any]:
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            return []
+        return parsed if isinstance(parsed, list) else []
+    return []
+
+
+def message_has_kind(content: Any, attachments: Any, embeds: Any, kind: str) -> bool:
+    """Discord-style ``has:`` check, shared by the RPC stand-in and legacy search."""
+    attachments = _json_array(attachments)
+    embeds = _json_array(embeds)
+    if kind == 'embed':
+        return bool(embeds)
+    if kind == 'link':
+        text = str(content or '').lower()
+        return 'http://' in text or 'https://' in text or bool(embeds)
+    if kind == 'file':
+        return bool(attachments)
+    prefixes = {'image': ('image/', _IMAGE_EXTENSIONS), 'video': ('video/', _VIDEO_EXTENSIONS),
+                'audio': ('audio/', _AUDIO_EXTENSIONS)}
+    if kind not in prefixes:
+        return False
+    content_prefix, extensions = prefixes[kind]
+    for attachment in attachments:
+        if not isinstance(attachment, dict):
+            continue
+        content_type = str(attachment.get('content_type') or '').lower()
+        filename = str(attachment.get('filename') or '').lower()
+        if content_type.startswith(content_prefix) or filename.endswith(extensions):
+            return True
+    return False
@@ -0,0 +1,350 @@
+"""
+Process-wide metrics: thread-safe counters, gauges and latency histograms.
+
+Metrics are registered once at import time on the shared ``REGISTRY`` and
+updated from any thread (Discord loop, DB executor workers, archive workers).
+HealthServer renders them at ``/metrics`` in the Prometheus text exposition
+format, so a scraper or a plain ``curl`` shows where time is going.
+
+Instrumentation hooks live here too:
+  - instrument_loop / instrument_task_loops  time discord.ext.tasks iterations
+DatabaseExecutor, the LLM client registry, ArchiveTask, the rate-limit
+scheduler and LoopWatchdog (event loop lag) record into the metrics defined
+in this module.
+"""
+
+import asyncio
+import functools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger('DiscordBot')
+
+# Seconds; spans a fast PostgREST call up to a slow LLM completion.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if math.isnan(value):
+        return 'NaN'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape_label(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape_label(extra[1])}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(sorted(labels))}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}' for key, v in items
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be read from a callback at scrape time."""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], object]] = None
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], object]) -> None:
+        """Read the gauge from ``fn`` at scrape time.
+
+        ``fn`` returns a number (unlabelled gauge), a {label tuple: number}
+        dict, or None to emit no samples.
+        """
+        self._function = fn
+
+    def value(self, **labels: object) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[Tuple[LabelValues, float]]:
+        if self._function is None:
+            with self._lock:
+                return sorted(self._values.items())
+        try:
+            result = self._function()
+        except Exception as e:
+            logger.debug(f"[Metrics] Gauge callback for {self.name} failed: {e}")
+            return []
+        if result is None:
+            return []
+        if isinstance(result, dict):
+            return sorted((tuple(str(v) for v in k), float(v)) for k, v in result.items())
+        return [((), float(result))]
+
+    def render(self) -> List[str]:
+        return self._header() + [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}' for key, v in self._samples()
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket distribution of observed values (seconds by convention)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: object) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = self._header()
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+                lines.append(f'{self.name}_bucket{labels} {_format_value(cumulative)}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(series[-1])}')
+            lines.append(f'{self.name}_count{labels} {_format_value(cumulative)}')
+        return lines
+
+
+class MetricsRegistry:
+    """Named set of metrics; registering an existing name returns the original."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if not isinstance(existing, cls) or existing.labelnames != tuple(labelnames):
+                    raise ValueError(f"Metric {name} is already registered with a different type or labels")
+                return existing
+            metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# ---------------------------------------------------------------------------
+# Shared metric definitions
+# ---------------------------------------------------------------------------
+
+DB_CALL_SECONDS = REGISTRY.histogram(
+    'bot_db_call_duration_seconds', 'DatabaseHandler call run time on the shared DB executor.',
+    ('method', 'outcome'),
+)
+DB_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    'bot_db_queue_wait_seconds', 'Time DB calls waited for a DB executor worker.', (),
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    'bot_llm_call_duration_seconds', 'LLM provider call latency per attempt.',
+    ('provider', 'model', 'outcome'),
+)
+LLM_RETRIES = REGISTRY.counter('bot_llm_retries_total', 'LLM call attempts that were retried.', ('provider', 'model'))
+LLM_TOKENS = REGISTRY.counter(
+    'bot_llm_tokens_total', 'LLM tokens reported by providers.', ('provider', 'model', 'direction'),
+)
+ARCHIVE_STAGE_SECONDS = REGISTRY.histogram(
+    'bot_archive_stage_duration_seconds', 'Busy time per archive pipeline stage operation.', ('stage', 'outcome'),
+)
+ARCHIVE_STAGE_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    'bot_archive_stage_queue_wait_seconds', 'Time archive DB operations waited in their worker queue.', ('stage',),
+)
+ARCHIVE_STAGE_ITEMS = REGISTRY.counter('bot_archive_stage_items_total', 'Items handled per archive stage.', ('stage',))
+ARCHIVE_BACKPRESSURE = REGISTRY.counter(
+    'bot_archive_backpressure_waits_total', 'Times an archive stage waited on a full DB queue.', ('stage',),
+)
+TASK_LOOP_SECONDS = REGISTRY.histogram(
+    'bot_task_loop_iteration_seconds', 'Duration of discord.ext.tasks loop iterations.', ('loop', 'outcome'),
+)
+EVENT_LOOP_LAG_SECONDS = REGISTRY.histogram(
+    'bot_event_loop_lag_seconds', 'How late the event loop ran a scheduled callback.', ('loop',), buckets=LAG_BUCKETS,
+)
+EVENT_LOOP_LAG_CURRENT = REGISTRY.gauge(
+    'bot_event_loop_lag_current_seconds', 'Most recent event loop lag sample.', ('loop',),
+)
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.histogram(
+    'bot_rate_limit_wait_seconds', 'Time callers waited for a rate-limit token, by limiting bucket.',
+    ('bucket', 'priority'),
+)
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation hooks
+# ---------------------------------------------------------------------------
+
+
+def instrument_loop(loop, name: Optional[str] = None):
+    """Time every iteration of a discord.ext.tasks ``Loop``; idempotent."""
+    original = loop.coro
+    if getattr(original, '_metrics_instrumented', False):
+        return loop
+    label = name or original.__name__
+
+    @functools.wraps(original)
+    async def timed(*args, **kwargs):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = await original(*args, **kwargs)
+            outcome = 'ok'
+            return result
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            raise
+        finally:
+            TASK_LOOP_SECONDS.observe(time.perf_counter() - started, loop=label, outcome=outcome)
+
+    timed._metrics_instrumented = True
+    loop.coro = timed
+    return loop
+
+
+def instrument_task_loops(cog) -> int:
+    """Instrument every tasks.Loop defined on ``cog``'s class; returns how many."""
+    from discord.ext import tasks
+
+    count = 0
+    for klass in type(cog).__mro__:
+        for attr, value in vars(klass).items():
+            if not isinstance(value, tasks.Loop):
+                continue
+            # Loop is a descriptor: attribute access returns (and caches) the
+            # per-instance copy that actually runs.
+            instrument_loop(getattr(cog, attr), f'{type(cog).__name__}.{attr}')
+            count += 1
+    return count
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
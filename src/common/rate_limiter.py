@@ -1,21 +1,487 @@
+"""
+Rate limiting: a shared token-bucket scheduler plus the retrying RateLimiter.
+
+RateLimiter used to react only after a failure (per-key exponential backoff),
+so bursts ran into 429s before anything throttled them, and other throttles
+(ArchiveTask, LLM retries) did not share any budget. ``RateLimitScheduler``
+hands out tokens *before* a call is made:
+
+  - buckets are hierarchical and named by dotted route: a call on route
+    ``discord.send`` for key ``<channel_id>`` needs a token from ``discord``
+    (the global budget), ``discord.send`` (the route) and, when the route has
+    a per-key limit, ``discord.send:<channel_id>``. Unconfigured levels are
+    skipped. A ``<route>#tokens`` bucket meters usage that is only known after
+    the call (LLM tokens per minute) — see ``charge``;
+  - rate-limit response headers (Discord ``X-RateLimit-*``, OpenAI
+    ``x-ratelimit-*``, Anthropic ``anthropic-ratelimit-*``, ``Retry-After``)
+    tighten the matching bucket, so once a provider says the window is spent
+    every caller waits for the reset instead of collecting its own 429;
+  - waiters are queued per priority class and admitted by weighted round
+    robin (interactive 4 : background 1), so a background job such as an
+    archive backfill cannot starve interactive commands, nor be starved by them.
+    Code declares its class with ``rate_limit_priority(BACKGROUND)``;
+  - the wait is recorded per limiting bucket in bot_rate_limit_wait_seconds.
+
+``RATE_LIMITS`` is the process-wide scheduler. Tunables (env):
+DISCORD_GLOBAL_RATE_PER_SECOND, DISCORD_CHANNEL_SEND_BURST,
+DISCORD_CHANNEL_SEND_PER_SECOND.
+"""
+
 import discord
 import asyncio
 import random
 import logging
+import threading
 import time
 import traceback
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from src.common.env import env_float
+from src.common.metrics import RATE_LIMIT_WAIT_SECONDS
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+PRIORITY_WEIGHTS = {INTERACTIVE: 4, BACKGROUND: 1}
+MAX_KEY_BUCKETS = 1024
+
+_priority: ContextVar[str] = ContextVar('rate_limit_priority', default=INTERACTIVE)
+
+
+@contextmanager
+def rate_limit_priority(priority: str) -> Iterator[None]:
+    """Run the enclosed code (and tasks it starts) in the given priority class."""
+    if priority not in PRIORITY_WEIGHTS:
+        raise ValueError(f"Unknown rate limit priority: {priority}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class TokenBucket:
+    """Continuously refilling token bucket; headers can cut it short until a reset."""
+
+    def __init__(self, name: str, rate: float, capacity: Optional[float] = None, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError(f"Bucket {name} needs a positive rate")
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        self.tokens = self.capacity
+        self.blocked_until = 0.0
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self, now: float) -> None:
+        if self.blocked_until and now >= self.blocked_until:
+            # The server-side window has reset.
+            self.blocked_until = 0.0
+            self.tokens = max(self.tokens, self.capacity)
+        if now > self._updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def delay(self, cost: float = 1.0, now: Optional[float] = None) -> float:
+        """Seconds until ``cost`` tokens are available (0 when they are now)."""
+        now = self._clock() if now is None else now
+        self._refill(now)
+        wait = max(self.blocked_until - now, 0.0)
+        need = min(cost, self.capacity)
+        if self.tokens < need:
+            wait = max(wait, (need - self.tokens) / self.rate)
+        return wait
+
+    def take(self, cost: float = 1.0) -> None:
+        self._refill(self._clock())
+        self.tokens -= cost
+
+    def limit(self, remaining: float, reset_after: Optional[float]) -> None:
+        """Apply a server-reported budget: never more than ``remaining`` left until the reset."""
+        now = self._clock()
+        self._refill(now)
+        self.tokens = min(self.tokens, float(remaining))
+        if remaining <= 0 and reset_after:
+            self.blocked_until = max(self.blocked_until, now + reset_after)
+
+
+class _Waiter:
+    __slots__ = ('future', 'chain', 'priority', 'blocked_by')
+
+    def __init__(self, future: asyncio.Future, chain: List[Tuple[TokenBucket, float, float]], priority: str):
+        self.future = future
+        self.chain = chain  # (bucket, tokens taken on admission, tokens needed to admit)
+        self.priority = priority
+        self.blocked_by: Optional[str] = None
+
+
+def _parse_duration(value: Any) -> Optional[float]:
+    """Seconds from '1.5', '6m0s', '20ms' or an RFC 3339 reset timestamp."""
+    if value is None:
+        return None
+    text = str(value).strip()
+    try:
+        return max(float(text), 0.0)
+    except ValueError:
+        pass
+    if 'T' in text:
+        try:
+            reset_at = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        return max(reset_at.timestamp() - time.time(), 0.0)
+    total, number = 0.0, ''
+    units = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 0.001}
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char.isdigit() or char == '.':
+            number += char
+            i += 1
+            continue
+        unit = 'ms' if text.startswith('ms', i) else char
+        if unit not in units or not number:
+            return None
+        total += float(number) * units[unit]
+        number = ''
+        i += len(unit)
+    return total if not number else None
+
+
+def parse_rate_limit_headers(headers: Mapping[str, Any]) -> Dict[str, Tuple[Optional[float], float, Optional[float]]]:
+    """Budgets reported by a response, as ``{'requests'|'tokens'|'global': (limit, remaining, reset_after)}``."""
+    lowered = {str(k).lower(): v for k, v in headers.items()}
+
+    def number(name: str) -> Optional[float]:
+        try:
+            return float(lowered[name]) if name in lowered else None
+        except (TypeError, ValueError):
+            return None
+
+    budgets: Dict[str, Tuple[Optional[float], float, Optional[float]]] = {}
+    retry_after = _parse_duration(lowered.get('retry-after'))
+    if str(lowered.get('x-ratelimit-global', '')).lower() == 'true':
+        budgets['global'] = (None, 0.0, retry_after)
+    remaining = number('x-ratelimit-remaining')
+    if remaining is not None:
+        budgets['requests'] = (
+            number('x-ratelimit-limit'), remaining, _parse_duration(lowered.get('x-ratelimit-reset-after')),
+        )
+    for kind in ('requests', 'tokens'):
+        for prefix, reset_name in (
+            ('x-ratelimit-{}-' + kind, 'x-ratelimit-reset-' + kind),
+            ('anthropic-ratelimit-' + kind + '-{}', 'anthropic-ratelimit-' + kind + '-reset'),
+        ):
+            remaining = number(prefix.format('remaining'))
+            if remaining is not None:
+                budgets[kind] = (number(prefix.format('limit')), remaining, _parse_duration(lowered.get(reset_name)))
+    if retry_after is not None and 'global' not in budgets:
+        limit, _remaining, reset_after = budgets.get('requests', (None, 0.0, None))
+        budgets['requests'] = (limit, 0.0, max(retry_after, reset_after or 0.0))
+    return budgets
+
+
+class RateLimitScheduler:
+    """Hierarchical token buckets with fair, priority-weighted admission.
+
+    One scheduler is shared by every bot (and event loop) in the process, so
+    buckets, queues and the wakeup timer are only touched under ``_lock``;
+    waiters are woken on their own loop via ``call_soon_threadsafe``.
+    """
+
+    def __init__(self, clock=time.monotonic, weights: Optional[Dict[str, int]] = None):
+        self._clock = clock
+        self._weights = dict(weights or PRIORITY_WEIGHTS)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._key_limits: Dict[str, Tuple[float, float]] = {}
+        self._queues: Dict[str, Deque[_Waiter]] = {priority: deque() for priority in self._weights}
+        self._current = {priority: 0 for priority in self._weights}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger('DiscordBot')
+
+    # ------------------------------------------------------------------
+    # Configuration
+    # ------------------------------------------------------------------
+
+    def configure(
+        self,
+        name: str,
+        rate: Optional[float] = None,
+        capacity: Optional[float] = None,
+        *,
+        per_key_rate: Optional[float] = None,
+        per_key_capacity: Optional[float] = None,
+    ) -> None:
+        """Set the budget for bucket ``name`` and optionally for each key under it (tokens per second)."""
+        with self._lock:
+            if rate:
+                self._buckets[name] = TokenBucket(name, rate, capacity, clock=self._clock)
+            if per_key_rate:
+                self._key_limits[name] = (per_key_rate, per_key_capacity or per_key_rate)
+                for bucket_name in [n for n in self._buckets if n.startswith(f'{name}:')]:
+                    del self._buckets[bucket_name]
+
+    def bucket(self, name: str) -> Optional[TokenBucket]:
+        return self._buckets.get(name)
+
+    def _key_bucket(self, route: str, key: Any) -> Optional[TokenBucket]:
+        limits = self._key_limits.get(route)
+        if limits is None or key is None:
+            return None
+        name = f'{route}:{key}'
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            if len(self._buckets) > MAX_KEY_BUCKETS:
+                self._evict_idle_key_buckets()
+            bucket = self._buckets[name] = TokenBucket(name, limits[0], limits[1], clock=self._clock)
+        return bucket
+
+    def _evict_idle_key_buckets(self) -> None:
+        now = self._clock()
+        for name, bucket in list(self._buckets.items()):
+            if ':' in name and bucket.delay(bucket.capacity, now) == 0:
+                del self._buckets[name]
+
+    def _chain(self, route: str, key: Any, cost: float) -> List[Tuple[TokenBucket, float, float]]:
+        parts = route.split('.')
+        chain = []
+        for depth in range(1, len(parts) + 1):
+            name = '.'.join(parts[:depth])
+            bucket = self._buckets.get(name)
+            if bucket is not None:
+                chain.append((bucket, cost, cost))
+            metered = self._buckets.get(f'{name}#tokens')
+            if metered is not None:
+                chain.append((metered, 0.0, 1.0))  # charged after the call
+        key_bucket = self._key_bucket(route, key)
+        if key_bucket is not None:
+            chain.append((key_bucket, cost, cost))
+        return chain
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+
+    async def acquire(self, route: str, key: Any = None, *, priority: Optional[str] = None, cost: float = 1.0) -> float:
+        """Wait for a token on every bucket along ``route`` (and ``key``); returns seconds waited."""
+        priority = priority or current_priority()
+        if priority not in self._queues:
+            raise ValueError(f"Unknown rate limit priority: {priority}")
+        future = asyncio.get_running_loop().create_future()
+        with self._lock:
+            chain = self._chain(route, key, cost)
+            if not chain:
+                return 0.0
+            started = self._clock()
+            waiter = _Waiter(future, chain, priority)
+            self._queues[priority].append(waiter)
+            self._pump()
+        admitted_at_once = future.done()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                with self._lock:
+                    self._refund(waiter)  # admitted just as we were cancelled
+            raise
+        waited = 0.0 if admitted_at_once else self._clock() - started
+        RATE_LIMIT_WAIT_SECONDS.observe(waited, bucket=waiter.blocked_by or chain[0][0].name, priority=priority)
+        return waited
+
+    def charge(self, route: str, tokens: float) -> None:
+        """Debit usage known only after a call (e.g. LLM tokens) from ``<route>#tokens``."""
+        with self._lock:
+            bucket = self._buckets.get(f'{route}#tokens')
+            if bucket is not None and tokens > 0:
+                bucket.take(tokens)
+
+    def _first_ready(self, queue: Deque[_Waiter], now: float) -> Tuple[Optional[_Waiter], Optional[float]]:
+        soonest: Optional[float] = None
+        for waiter in list(queue):
+            if waiter.future.done() or waiter.future.get_loop().is_closed():
+                queue.remove(waiter)
+                continue
+            wait, blocked_by = 0.0, None
+            for bucket, _taken, needed in waiter.chain:
+                bucket_wait = bucket.delay(needed, now)
+                if bucket_wait > wait:
+                    wait, blocked_by = bucket_wait, bucket.name
+            if wait <= 0:
+                return waiter, None
+            waiter.blocked_by = blocked_by
+            soonest = wait if soonest is None else min(soonest, wait)
+        return None, soonest
+
+    def _pick(self, candidates: Dict[str, _Waiter]) -> str:
+        # Smooth weighted round robin between the priority classes that can go now.
+        total = sum(self._weights[priority] for priority in candidates)
+        for priority in candidates:
+            self._current[priority] += self._weights[priority]
+        chosen = max(candidates, key=lambda priority: self._current[priority])
+        self._current[chosen] -= total
+        return chosen
+
+    def _pump(self) -> None:
+        # Caller holds _lock.
+        while True:
+            now = self._clock()
+            candidates: Dict[str, _Waiter] = {}
+            soonest: Optional[float] = None
+            for priority, queue in self._queues.items():
+                waiter, wait = self._first_ready(queue, now)
+                if waiter is not None:
+                    candidates[priority] = waiter
+                elif wait is not None:
+                    soonest = wait if soonest is None else min(soonest, wait)
+            if not candidates:
+                break
+            chosen = self._pick(candidates)
+            waiter = candidates[chosen]
+            self._queues[chosen].remove(waiter)
+            for bucket, taken, _needed in waiter.chain:
+                bucket.take(taken)
+            self._admit(waiter)
+        if soonest is not None:
+            self._arm(soonest)
+
+    def _admit(self, waiter: _Waiter) -> None:
+        # The scheduler is shared by every bot in the process, so the pump may
+        # run on a different loop than the one the waiter's future belongs to;
+        # futures are not thread-safe, so wake it up on its own loop.
+        loop = waiter.future.get_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is running:
+            waiter.future.set_result(None)
+            return
+        try:
+            loop.call_soon_threadsafe(self._resolve, waiter)
+        except RuntimeError:  # waiter's loop closed after we took its tokens
+            self._refund(waiter)
+
+    def _resolve(self, waiter: _Waiter) -> None:
+        if waiter.future.done():
+            with self._lock:
+                self._refund(waiter)  # cancelled before the admission reached its loop
+        else:
+            waiter.future.set_result(None)
+
+    @staticmethod
+    def _refund(waiter: _Waiter) -> None:
+        for bucket, taken, _needed in waiter.chain:
+            bucket.tokens += taken
+
+    def _arm(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        if self._timer is not None and self._timer_loop is loop and not loop.is_closed():
+            if self._timer.when() <= loop.time() + delay:
+                return
+            self._timer.cancel()
+        self._timer_loop = loop
+        self._timer = loop.call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+            self._pump()
+
+    # ------------------------------------------------------------------
+    # Server feedback
+    # ------------------------------------------------------------------
+
+    def observe_headers(self, route: str, headers: Optional[Mapping[str, Any]], key: Any = None) -> None:
+        """Tighten the buckets for ``route`` from a response's rate-limit headers."""
+        if not headers:
+            return
+        budgets = parse_rate_limit_headers(headers)
+        with self._lock:
+            self._apply_budgets(route, key, budgets)
+
+    def _apply_budgets(self, route: str, key: Any, budgets) -> None:
+        # Caller holds _lock.
+        for kind, (limit, remaining, reset_after) in budgets.items():
+            if kind == 'global':
+                name = route.split('.')[0]
+            elif kind == 'tokens':
+                name = f'{route}#tokens'
+            else:
+                key_bucket = self._key_bucket(route, key)
+                name = key_bucket.name if key_bucket is not None else route
+            bucket = self._buckets.get(name)
+            if bucket is None:
+                if not limit and not reset_after:
+                    continue
+                capacity = limit or max(remaining, 1.0)
+                bucket = self._buckets[name] = TokenBucket(
+                    name, capacity / max(reset_after or 1.0, 1.0), capacity, clock=self._clock,
+                )
+            bucket.limit(remaining, reset_after)
+            if remaining <= 0:
+                self.logger.info(
+                    f"[RateLimiter] Bucket {name} exhausted; holding callers for {reset_after or 0:.1f}s."
+                )
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            now = self._clock()
+            result = {}
+            for name, bucket in sorted(self._buckets.items()):
+                bucket._refill(now)
+                result[name] = {
+                    'tokens': round(bucket.tokens, 3),
+                    'capacity': bucket.capacity,
+                    'rate_per_second': bucket.rate,
+                    'blocked_for_seconds': round(max(bucket.blocked_until - now, 0.0), 3),
+                }
+            result['_waiting'] = {priority: float(len(queue)) for priority, queue in self._queues.items()}
+            return result
+
+
+def _default_scheduler() -> RateLimitScheduler:
+    scheduler = RateLimitScheduler()
+    # Discord allows 50 requests/second per bot across all routes, and about
+    # 5 messages per 5 seconds per channel.
+    global_rate = env_float('DISCORD_GLOBAL_RATE_PER_SECOND', 50.0)
+    scheduler.configure('discord', global_rate, global_rate)
+    scheduler.configure(
+        'discord.send',
+        per_key_rate=env_float('DISCORD_CHANNEL_SEND_PER_SECOND', 1.0),
+        per_key_capacity=env_float('DISCORD_CHANNEL_SEND_BURST', 5.0),
+    )
+    return scheduler
+
+
+RATE_LIMITS = _default_scheduler()
+
 
 class RateLimiter:
-    """Manages rate limiting for Discord API calls with exponential backoff."""
+    """Manages rate limiting for Discord API calls with exponential backoff.
+
+    Every attempt first takes a token from the shared scheduler (``RATE_LIMITS``
+    unless one is given), so retries and first attempts share one budget.
+    """
 
-    def __init__(self):
+    def __init__(self, scheduler: Optional[RateLimitScheduler] = None):
         self.backoff_times = {}  # Store backoff times per channel (used as global cooldown hint)
         self.base_delay = 1.0    # Base delay in seconds
         self.max_delay = 64.0    # Maximum delay in seconds
         self.jitter = 0.1        # Random jitter factor
+        self.scheduler = scheduler or RATE_LIMITS
         self.logger = logging.getLogger('DiscordBot')
 
-    async def execute(self, key, coroutine_or_factory):
+    async def execute(self, key, coroutine_or_factory, *, route='discord', priority=None):
         """
         Executes a coroutine or coroutine factory with rate limit handling.
 
@@ -26,6 +492,10 @@ class RateLimiter:
         Args:
             key: Identifier for the rate limit (e.g., channel_id)
             coroutine_or_factory: The coroutine or factory function to execute
+            route: Scheduler route whose buckets each attempt draws from
+                (e.g. 'discord.send' for per-channel message sends)
+            priority: INTERACTIVE or BACKGROUND; defaults to the caller's
+                ``rate_limit_priority`` context
 
         Returns:
             The result of the coroutine execution
@@ -64,6 +534,8 @@ class RateLimiter:
                     self.logger.error("RateLimiter.execute expects a callable coroutine factory.")
                     raise TypeError("coroutine_or_factory must be a callable that returns a coroutine")
 
+                await self.scheduler.acquire(route, key, priority=priority)
+
                 # Get a new coroutine object from the factory for each attempt
                 current_coro = coroutine_or_factory()
                 if not asyncio.iscoroutine(current_coro):
@@ -79,6 +551,7 @@ class RateLimiter:
 
             except discord.HTTPException as e:
                 attempt += 1
+                self.scheduler.observe_headers(route, getattr(getattr(e, 'response', None), 'headers', None), key=key)
 
                 if e.status == 429:  # Rate limit hit
                     retry_after = e.retry_after if hasattr(e, 'retry_after') else None
@@ -3,12 +3,28 @@ ServerConfig — per-server settings sourced from the database.
 
 Loads from server_config / channel_effective_config tables. Runtime write access
 and feature enablement are driven by DB state, not env flags.
+
+Readers always see an immutable ConfigSnapshot. Periodic refreshes triggered
+from an event loop run on a background thread and swap a new snapshot in
+atomically, so hot paths like is_feature_enabled never wait on I/O. Parent
+lookups for threads missing from config are likewise resolved off the loop
+(``warm_parent_channels`` / a background lookup on a cache miss). Refresh
+counters and staleness are exported as the ``bot_server_config_refresh``
+gauge.
 """
 
+import asyncio
 import logging
 import os
+import threading
 import time
-from typing import Dict, List, Optional
+import weakref
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from src.common.db_executor import run_db_call
+from src.common.metrics import REGISTRY
 
 logger = logging.getLogger('DiscordBot')
 
@@ -23,6 +39,51 @@ def _int_or_none(val) -> Optional[int]:
         return None
 
 
+_EMPTY: Mapping = MappingProxyType({})
+
+# Parent lookups for threads not covered by channel_effective_config.
+PARENT_CACHE_TTL_SECONDS = 6 * 3600
+PARENT_NEGATIVE_TTL_SECONDS = 120
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """One consistent, read-only view of server and channel config."""
+
+    servers: Mapping[int, dict] = field(default_factory=lambda: _EMPTY)          # guild_id -> row
+    channel_config: Mapping[int, dict] = field(default_factory=lambda: _EMPTY)   # channel_id -> row
+    loaded_at: float = 0.0              # time.monotonic() of the load
+    full_loaded_at: float = 0.0         # last full (non-delta) load
+    servers_updated_at: Optional[str] = None
+    channels_updated_at: Optional[str] = None
+    version: int = 0                    # bumped only when content changes
+
+
+# The most recently constructed ServerConfig feeds the refresh gauge.
+_metrics_source: Optional['weakref.ReferenceType[ServerConfig]'] = None
+
+
+def _refresh_metric_samples() -> Optional[Dict[Tuple[str], float]]:
+    server_config = _metrics_source() if _metrics_source is not None else None
+    if server_config is None:
+        return None
+    return {
+        (key,): float(value)
+        for key, value in server_config.get_refresh_metrics().items()
+        if isinstance(value, (int, float))
+    }
+
+
+REGISTRY.gauge(
+    'bot_server_config_refresh', 'ServerConfig refresh counters, latency (ms) and snapshot staleness.', ('stat',),
+).set_function(_refresh_metric_samples)
+
+
+def _max_updated_at(rows: Iterable[dict]) -> Optional[str]:
+    stamps = [row.get('updated_at') for row in rows if row.get('updated_at')]
+    return max(stamps) if stamps else None
+
+
 class ServerConfig:
     """Per-server configuration with DB-backed enablement and write gating."""
 
@@ -30,15 +91,52 @@ class ServerConfig:
         self._supabase = supabase_client
         self._bndc_guild_id = _int_or_none(os.getenv('GUILD_ID'))
 
-        # Caches (populated by refresh())
-        self._servers: Dict[int, dict] = {}          # guild_id -> server_config row
-        self._channel_config: Dict[int, dict] = {}   # channel_id -> effective config row
-        self._last_refresh_monotonic = 0.0
+        # Snapshot (populated by refresh())
+        self._snapshot = ConfigSnapshot()
         self._auto_refresh_seconds = max(int(os.getenv('SERVER_CONFIG_REFRESH_SECONDS', '60')), 0)
+        # Delta refreshes can't see deleted rows, so periodically reload everything.
+        self._full_refresh_seconds = max(int(os.getenv('SERVER_CONFIG_FULL_REFRESH_SECONDS', '600')), 0)
+        self._refresh_lock = threading.Lock()
+        # Stats are bumped from refresh threads and read from the loop.
+        self._stats_lock = threading.Lock()
+        self._refresh_stats = {
+            'refreshes': 0,
+            'delta_refreshes': 0,
+            'background_refreshes': 0,
+            'failures': 0,
+            'last_refresh_ms': None,
+        }
+
+        # channel_id -> (parent_id or None, expires_at monotonic)
+        self._parent_cache: Dict[int, Tuple[Optional[int], float]] = {}
+        # Parent lookups started in the background from the event loop.
+        self._parent_lookups: Set[int] = set()
+        self._parent_lookup_tasks: Set[asyncio.Task] = set()
+        self._parent_lock = threading.Lock()
+
+        global _metrics_source
+        _metrics_source = weakref.ref(self)
 
         # Try initial load
         self.refresh()
 
+    @property
+    def _servers(self) -> Mapping[int, dict]:
+        return self._snapshot.servers
+
+    @property
+    def _channel_config(self) -> Mapping[int, dict]:
+        return self._snapshot.channel_config
+
+    @property
+    def _last_refresh_monotonic(self) -> float:
+        return self._snapshot.loaded_at
+
+    @property
+    def version(self) -> int:
+        """Monotonic counter that changes whenever loaded config content changes."""
+        return self._snapshot.version
+
     # ------------------------------------------------------------------
     # Safety gate
     # ------------------------------------------------------------------
@@ -156,29 +254,128 @@ class ServerConfig:
             return bool(val)
         return False
 
+    def get_channel_guild_ids(self) -> Dict[int, Optional[int]]:
+        """Return channel_id -> guild_id for every channel with effective config."""
+        self._maybe_refresh()
+        return {
+            channel_id: _int_or_none(cfg.get('guild_id'))
+            for channel_id, cfg in self._channel_config.items()
+        }
+
     def resolve_parent_channel(self, channel_id: int) -> Optional[int]:
-        """Return parent_id for a channel. Checks cache first, then queries DB."""
+        """Return parent_id for a channel from config or the parent cache.
+
+        On a cache miss inside an event loop the DB lookup is started in the
+        background (through the shared DB executor) and None is returned for
+        now; callers that must know the parent first await
+        ``warm_parent_channels``. Outside a loop (scripts) the lookup runs
+        inline.
+        """
         self._maybe_refresh()
-        # Check in-memory cache
         cfg = self._channel_config.get(channel_id)
         if cfg:
             return cfg.get('parent_id')
+        cached = self._parent_cache.get(channel_id)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self.prefetch_parent_channels([channel_id]).get(channel_id)
+        self._lookup_parents_in_background(loop, [channel_id])
+        return None
 
-        # Query DB for channels not in config (first-seen threads)
-        if self._supabase:
+    def _uncached_parents(self, channel_ids: Iterable[int]) -> List[int]:
+        now = time.monotonic()
+        missing = []
+        for channel_id in dict.fromkeys(channel_ids):
+            if channel_id is None or self._channel_config.get(channel_id):
+                continue
+            cached = self._parent_cache.get(channel_id)
+            if not cached or cached[1] <= now:
+                missing.append(channel_id)
+        return missing
+
+    def _lookup_parents_in_background(self, loop: asyncio.AbstractEventLoop, channel_ids: List[int]) -> None:
+        if not self._supabase:
+            return
+        with self._parent_lock:
+            pending = [channel_id for channel_id in channel_ids if channel_id not in self._parent_lookups]
+            self._parent_lookups.update(pending)
+        if not pending:
+            return
+
+        async def lookup():
             try:
-                result = (
-                    self._supabase.table('discord_channels')
-                    .select('parent_id')
-                    .eq('channel_id', channel_id)
-                    .limit(1)
-                    .execute()
-                )
-                if result.data and result.data[0].get('parent_id'):
-                    return result.data[0]['parent_id']
+                await run_db_call(self.prefetch_parent_channels, pending)
+            except Exception as e:
+                logger.debug(f"ServerConfig: background parent lookup for {pending} failed: {e}")
+            finally:
+                with self._parent_lock:
+                    self._parent_lookups.difference_update(pending)
+
+        task = loop.create_task(lookup(), name='server-config-parent-lookup')
+        self._parent_lookup_tasks.add(task)
+        task.add_done_callback(self._parent_lookup_tasks.discard)
+
+    async def warm_parent_channels(self, channel_ids: Iterable[int]) -> None:
+        """Resolve uncached parents for ``channel_ids`` off the event loop.
+
+        Message and archive paths await this before feature checks so a
+        first-seen thread inherits its parent channel's config.
+        """
+        missing = self._uncached_parents(channel_ids)
+        if not missing or not self._supabase:
+            return
+        try:
+            await run_db_call(self.prefetch_parent_channels, missing)
+        except Exception as e:
+            logger.debug(f"ServerConfig: parent lookup for {missing} failed: {e}")
+
+    def prefetch_parent_channels(self, channel_ids: Iterable[int]) -> Dict[int, Optional[int]]:
+        """Resolve parent_ids for channels not in config with one batched query.
+
+        Blocking; from an event loop call it through ``warm_parent_channels``.
+        Results (including "no parent") are cached, so repeated lookups for
+        the same thread don't hit the database.
+        """
+        now = time.monotonic()
+        resolved: Dict[int, Optional[int]] = {}
+        missing: List[int] = []
+        for channel_id in dict.fromkeys(channel_ids):
+            if channel_id is None:
+                continue
+            cfg = self._channel_config.get(channel_id)
+            if cfg:
+                resolved[channel_id] = cfg.get('parent_id')
+                continue
+            cached = self._parent_cache.get(channel_id)
+            if cached and cached[1] > now:
+                resolved[channel_id] = cached[0]
+            else:
+                missing.append(channel_id)
+
+        if missing and self._supabase:
+            try:
+                query = self._supabase.table('discord_channels').select('channel_id, parent_id')
+                if len(missing) == 1:
+                    query = query.eq('channel_id', missing[0]).limit(1)
+                else:
+                    query = query.in_('channel_id', missing)
+                result = query.execute()
+                found = {
+                    row.get('channel_id'): row.get('parent_id')
+                    for row in (result.data or [])
+                }
             except Exception:
-                pass
-        return None
+                # Transient failure: don't cache, let the next call retry.
+                return resolved
+            for channel_id in missing:
+                parent_id = found.get(channel_id) or None
+                ttl = PARENT_CACHE_TTL_SECONDS if parent_id else PARENT_NEGATIVE_TTL_SECONDS
+                self._parent_cache[channel_id] = (parent_id, now + ttl)
+                resolved[channel_id] = parent_id
+        return resolved
 
     def resolve_social_route(
         self,
@@ -450,34 +647,150 @@ class ServerConfig:
     # Refresh from DB
     # ------------------------------------------------------------------
 
-    def refresh(self):
-        """Reload server_config and channel_effective_config from DB."""
+    def refresh(self, force_full: bool = False):
+        """Reload server_config and channel_effective_config from DB and swap in a new snapshot.
+
+        Blocks the calling thread. Reloads only rows changed since the last
+        load when the tables expose updated_at, with a periodic full reload.
+        """
         if not self._supabase:
             logger.debug("ServerConfig.refresh(): no supabase client, skipping")
             return
 
+        with self._refresh_lock:
+            self._refresh_locked(force_full)
+
+    def _refresh_locked(self, force_full: bool = False):
+        """Body of refresh(); the caller holds _refresh_lock."""
+        started = time.monotonic()
+        previous = self._snapshot
+        full = (
+            force_full
+            or previous.full_loaded_at == 0.0
+            or (started - previous.full_loaded_at) >= self._full_refresh_seconds
+        )
+
+        servers, servers_updated_at, servers_delta, servers_ok = self._load_table(
+            'server_config', 'guild_id', previous.servers, previous.servers_updated_at, full,
+        )
+        # View may not exist yet (pre-migration); failures are logged at debug level.
+        channels, channels_updated_at, channels_delta, channels_ok = self._load_table(
+            'channel_effective_config', 'channel_id', previous.channel_config,
+            previous.channels_updated_at, full, quiet=True,
+        )
+        # Only a complete, successful full load resets the full-refresh clock;
+        # after a failed one the next refresh tries the full load again.
+        fully_loaded = not (servers_delta or channels_delta) and servers_ok and channels_ok
+
+        changed = servers != previous.servers or channels != previous.channel_config
+        self._snapshot = ConfigSnapshot(
+            servers=MappingProxyType(servers),
+            channel_config=MappingProxyType(channels),
+            loaded_at=time.monotonic(),
+            full_loaded_at=time.monotonic() if fully_loaded else previous.full_loaded_at,
+            servers_updated_at=servers_updated_at,
+            channels_updated_at=channels_updated_at,
+            version=previous.version + 1 if changed else previous.version,
+        )
+
+        elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+        with self._stats_lock:
+            self._refresh_stats['refreshes'] += 1
+            if servers_delta or channels_delta:
+                self._refresh_stats['delta_refreshes'] += 1
+            self._refresh_stats['last_refresh_ms'] = elapsed_ms
+        logger.debug(
+            f"ServerConfig: loaded {len(servers)} server configs, {len(channels)} channel configs "
+            f"in {elapsed_ms}ms"
+        )
+
+    def _load_table(
+        self,
+        table: str,
+        key: str,
+        previous: Mapping[int, dict],
+        since: Optional[str],
+        full: bool,
+        quiet: bool = False,
+    ) -> Tuple[Dict[int, dict], Optional[str], bool, bool]:
+        """Return (rows by key, max updated_at, whether this was a delta load, whether it succeeded)."""
+        if not full and since:
+            try:
+                result = self._supabase.table(table).select('*').gt('updated_at', since).execute()
+                rows = dict(previous)
+                changed = result.data or []
+                for row in changed:
+                    rows[row[key]] = row
+                return rows, _max_updated_at(changed) or since, True, True
+            except Exception as e:
+                logger.debug(f"ServerConfig: delta load of {table} failed, reloading fully: {e}")
+
         try:
-            # Load server configs
-            result = self._supabase.table('server_config').select('*').execute()
-            self._servers = {row['guild_id']: row for row in (result.data or [])}
-            logger.debug(f"ServerConfig: loaded {len(self._servers)} server configs")
+            result = self._supabase.table(table).select('*').execute()
+            data = result.data or []
+            return {row[key]: row for row in data}, _max_updated_at(data), False, True
         except Exception as e:
-            logger.warning(f"ServerConfig: failed to load server_config: {e}")
+            self._bump_stat('failures')
+            log = logger.debug if quiet else logger.warning
+            log(f"ServerConfig: failed to load {table}: {e}")
+            return dict(previous), since, False, False
 
+    def _bump_stat(self, key: str) -> None:
+        with self._stats_lock:
+            self._refresh_stats[key] += 1
+
+    def _refresh_in_background(self):
+        """Thread target for _maybe_refresh; owns the already-acquired _refresh_lock."""
         try:
-            # Load channel effective configs
-            result = self._supabase.table('channel_effective_config').select('*').execute()
-            self._channel_config = {row['channel_id']: row for row in (result.data or [])}
-            logger.debug(f"ServerConfig: loaded {len(self._channel_config)} channel configs")
+            self._refresh_locked()
         except Exception as e:
-            # View may not exist yet (pre-migration)
-            logger.debug(f"ServerConfig: failed to load channel_effective_config: {e}")
-
-        self._last_refresh_monotonic = time.monotonic()
+            self._bump_stat('failures')
+            logger.warning(f"ServerConfig: background refresh failed: {e}")
+        finally:
+            self._refresh_lock.release()
 
     def _maybe_refresh(self):
-        """Refresh cached config periodically so DB changes apply without restart."""
+        """Refresh cached config periodically so DB changes apply without restart.
+
+        From inside an event loop the refresh runs on a background thread and
+        callers keep reading the current snapshot; elsewhere (scripts) it runs
+        inline as before. The refresh lock is taken here, without blocking, and
+        handed to whichever refresh runs, so only one can be in flight.
+        """
         if not self._supabase or self._auto_refresh_seconds <= 0:
             return
-        if (time.monotonic() - self._last_refresh_monotonic) >= self._auto_refresh_seconds:
-            self.refresh()
+        if (time.monotonic() - self._snapshot.loaded_at) < self._auto_refresh_seconds:
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return  # a refresh is already in flight
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            try:
+                self._refresh_locked()
+            finally:
+                self._refresh_lock.release()
+            return
+        self._bump_stat('background_refreshes')
+        try:
+            threading.Thread(
+                target=self._refresh_in_background, name='server-config-refresh', daemon=True
+            ).start()
+        except Exception:
+            self._refresh_lock.release()
+            raise
+
+    def get_refresh_metrics(self) -> Dict[str, object]:
+        """Refresh latency and staleness of the current snapshot."""
+        snapshot = self._snapshot
+        with self._stats_lock:
+            stats = dict(self._refresh_stats)
+        return {
+            **stats,
+            'version': snapshot.version,
+            'staleness_seconds': round(time.monotonic() - snapshot.loaded_at, 1) if snapshot.loaded_at else None,
+            'refresh_in_progress': self._refresh_lock.locked(),
+            'servers': len(snapshot.servers),
+            'channels': len(snapshot.channel_config),
+            'cached_thread_parents': len(self._parent_cache),
+        }
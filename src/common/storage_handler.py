@@ -4,10 +4,13 @@ This provides a single interface for storing messages.
 """
 
 import asyncio
+import hashlib
 import json
 import logging
 import os
 import mimetypes
+import tempfile
+import threading
 import uuid
 from datetime import datetime, timedelta
 from typing import Any, List, Dict, Optional
@@ -23,6 +26,8 @@ sys.path.insert(0, str(project_root))
 from supabase import create_client, Client
 from supabase.lib.client_options import ClientOptions
 
+from src.common.message_search import MessageSearch, is_missing_search_rpc, message_has_kind, search_messages
+
 logger = logging.getLogger('DiscordBot')
 
 class StorageHandler:
@@ -1758,6 +1763,32 @@ class StorageHandler:
             logger.warning("Could not search live-update messages: %s", e, exc_info=True)
             return []
 
+    # Set to False once PostgREST reports the search RPC missing, so an
+    # unmigrated database pays for one failed call, not one per search.
+    _search_rpc_available = True
+
+    @staticmethod
+    def _parse_search_time_bound(value: Optional[str]) -> Optional[str]:
+        """Accept ISO timestamps or relative bounds like '24h', '7d', '30m'."""
+        if not value:
+            return None
+        raw = str(value).strip()
+        if not raw:
+            return None
+        unit = raw[-1].lower()
+        number = raw[:-1]
+        try:
+            amount = float(number)
+        except ValueError:
+            return raw
+        if unit == "h":
+            return (datetime.utcnow() - timedelta(hours=amount)).isoformat()
+        if unit == "d":
+            return (datetime.utcnow() - timedelta(days=amount)).isoformat()
+        if unit == "m":
+            return (datetime.utcnow() - timedelta(minutes=amount)).isoformat()
+        return raw
+
     async def search_messages_unified(
         self,
         *,
@@ -1773,61 +1804,87 @@ class StorageHandler:
         before: Optional[str] = None,
         is_reply: Optional[bool] = None,
         limit: int = 20,
+        cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Search archived Discord messages with Discord-style filters."""
+        """Search archived Discord messages with Discord-style filters.
+
+        Runs on the indexed search_discord_messages RPC (see message_search.py):
+        results are ranked when there is a query, all filters are applied in
+        the database, and ``next_cursor`` fetches the following page.
+        Databases without the RPC fall back to a bounded ILIKE scan.
+        """
         if not self.supabase_client:
-            return {"messages": [], "truncated": False}
+            return {"messages": [], "truncated": False, "next_cursor": None}
 
         safe_limit = max(1, min(int(limit or 20), 50))
-        fetch_limit = min(max(safe_limit * 5, 50), 250)
-        select_columns = (
-            'message_id,guild_id,channel_id,author_id,content,created_at,'
-            'attachments,embeds,reaction_count,thread_id,reference_id'
-        )
+        parsed_after = self._parse_search_time_bound(after)
+        parsed_before = self._parse_search_time_bound(before)
 
-        def parse_time_bound(value: Optional[str]) -> Optional[str]:
-            if not value:
-                return None
-            raw = str(value).strip()
-            if not raw:
-                return None
-            unit = raw[-1].lower()
-            number = raw[:-1]
+        if self._search_rpc_available:
+            search = MessageSearch(
+                query=str(query)[:120] if query else None,
+                guild_id=guild_id,
+                channel_ids=(int(in_channel_id),) if in_channel_id is not None else None,
+                author_id=from_author_id,
+                after=parsed_after,
+                before=parsed_before,
+                is_reply=is_reply,
+                has=tuple(has or ()),
+                mentions_author_id=mentions_author_id,
+                exclude_nsfw=True,
+                limit=safe_limit,
+                cursor=cursor,
+            )
             try:
-                amount = float(number)
-            except ValueError:
-                return raw
-            if unit == "h":
-                return (datetime.utcnow() - timedelta(hours=amount)).isoformat()
-            if unit == "d":
-                return (datetime.utcnow() - timedelta(days=amount)).isoformat()
-            if unit == "m":
-                return (datetime.utcnow() - timedelta(minutes=amount)).isoformat()
-            return raw
+                page = await asyncio.to_thread(search_messages, self.supabase_client, search)
+                rows = await self._attach_channel_context_and_filter_nsfw(page["messages"])
+                return {
+                    "messages": self._compact_live_context_messages(rows),
+                    "truncated": page["has_more"],
+                    "next_cursor": page["next_cursor"],
+                }
+            except ValueError as e:
+                return {"messages": [], "truncated": False, "next_cursor": None, "error": str(e)}
+            except Exception as e:
+                if not is_missing_search_rpc(e):
+                    logger.warning("Could not search archived messages: %s", e, exc_info=True)
+                    return {"messages": [], "truncated": False, "next_cursor": None}
+                logger.warning("search_discord_messages RPC is not deployed; using ILIKE message search")
+                self._search_rpc_available = False
 
-        def attachment_kind(row: Dict[str, Any], wanted: str) -> bool:
-            content = str(row.get('content') or '').lower()
-            attachments = self._as_json_array(row.get('attachments'))
-            embeds = self._as_json_array(row.get('embeds'))
-            if wanted == "embed":
-                return bool(embeds)
-            if wanted == "link":
-                return "http://" in content or "https://" in content or bool(embeds)
-            if wanted == "file":
-                return bool(attachments)
-            for attachment in attachments:
-                if not isinstance(attachment, dict):
-                    continue
-                content_type = str(attachment.get('content_type') or '').lower()
-                filename = str(attachment.get('filename') or '').lower()
-                if wanted == "image" and (content_type.startswith("image/") or filename.endswith((".png", ".jpg", ".jpeg", ".gif", ".webp"))):
-                    return True
-                if wanted == "video" and (content_type.startswith("video/") or filename.endswith((".mp4", ".mov", ".webm", ".mkv"))):
-                    return True
-                if wanted == "audio" and (content_type.startswith("audio/") or filename.endswith((".mp3", ".wav", ".m4a", ".ogg", ".flac"))):
-                    return True
-            return False
+        return await self._search_messages_ilike(
+            guild_id=guild_id,
+            query=query,
+            from_author_id=from_author_id,
+            in_channel_id=in_channel_id,
+            mentions_author_id=mentions_author_id,
+            has=has,
+            after=parsed_after,
+            before=parsed_before,
+            is_reply=is_reply,
+            limit=safe_limit,
+        )
 
+    async def _search_messages_ilike(
+        self,
+        *,
+        guild_id: Optional[int],
+        query: Optional[str],
+        from_author_id: Optional[int],
+        in_channel_id: Optional[int],
+        mentions_author_id: Optional[int],
+        has: Optional[List[str]],
+        after: Optional[str],
+        before: Optional[str],
+        is_reply: Optional[bool],
+        limit: int,
+    ) -> Dict[str, Any]:
+        """Pre-RPC search: newest-first ILIKE scan post-filtered in Python (no paging)."""
+        fetch_limit = min(max(limit * 5, 50), 250)
+        select_columns = (
+            'message_id,guild_id,channel_id,author_id,content,created_at,'
+            'attachments,embeds,reaction_count,thread_id,reference_id'
+        )
         try:
             builder = (
                 self.supabase_client.table('discord_messages')
@@ -1842,12 +1899,10 @@ class StorageHandler:
                 builder = builder.eq('author_id', from_author_id)
             if in_channel_id is not None:
                 builder = builder.eq('channel_id', in_channel_id)
-            parsed_after = parse_time_bound(after)
-            if parsed_after:
-                builder = builder.gte('created_at', parsed_after)
-            parsed_before = parse_time_bound(before)
-            if parsed_before:
-                builder = builder.lte('created_at', parsed_before)
+            if after:
+                builder = builder.gte('created_at', after)
+            if before:
+                builder = builder.lte('created_at', before)
             if query:
                 builder = builder.ilike('content', f"%{str(query)[:120]}%")
             result = await asyncio.to_thread(builder.execute)
@@ -1868,15 +1923,18 @@ class StorageHandler:
                     if any(variant in str(row.get('content') or '') for variant in mention_variants)
                 ]
             for wanted in wanted_kinds:
-                rows = [row for row in rows if attachment_kind(row, wanted)]
+                rows = [
+                    row for row in rows
+                    if message_has_kind(row.get('content'), row.get('attachments'), row.get('embeds'), wanted)
+                ]
 
-            truncated = len(rows) > safe_limit
-            rows = rows[:safe_limit]
+            truncated = len(rows) > limit
+            rows = rows[:limit]
             rows = await self._attach_channel_context_and_filter_nsfw(rows)
-            return {"messages": self._compact_live_context_messages(rows), "truncated": truncated}
+            return {"messages": self._compact_live_context_messages(rows), "truncated": truncated, "next_cursor": None}
         except Exception as e:
             logger.warning("Could not search archived messages: %s", e, exc_info=True)
-            return {"messages": [], "truncated": False}
+            return {"messages": [], "truncated": False, "next_cursor": None}
 
     async def get_live_update_context_for_message_ids(
         self,
@@ -2817,6 +2875,18 @@ class StorageHandler:
     MAX_UPLOAD_ATTEMPTS = 3
     BASE_RETRY_DELAY = 1.0
 
+    # Streaming HTTP path: one pooled aiohttp session per event loop, chunked
+    # reads hashed as they arrive, and large bodies spooled to a temp file so a
+    # big video never sits in memory whole.
+    HTTP_CHUNK_SIZE = 1024 * 1024
+    DOWNLOAD_SPILL_THRESHOLD = int(os.getenv('STORAGE_DOWNLOAD_SPILL_BYTES', str(16 * 1024 * 1024)))
+    HTTP_LIMIT = int(os.getenv('STORAGE_HTTP_MAX_CONNECTIONS', '32'))
+    HTTP_LIMIT_PER_HOST = int(os.getenv('STORAGE_HTTP_MAX_PER_HOST', '4'))
+    HTTP_TIMEOUT_SECONDS = 120
+    # Downloads run on the bot loop and on the db-executor loop, so sessions
+    # are registered per loop under a lock and closed on their own loop.
+    _HTTP_SESSIONS_LOCK = threading.Lock()
+
     async def upload_bytes_to_storage(
         self,
         file_bytes: bytes,
@@ -2836,21 +2906,58 @@ class StorageHandler:
         Returns:
             Public URL of the uploaded file, or None on failure
         """
+        return await self._upload_to_storage(
+            lambda: file_bytes, len(file_bytes), storage_path, content_type, bucket_name
+        )
+
+    async def upload_file_to_storage(
+        self,
+        file_path: str,
+        storage_path: str,
+        content_type: str,
+        bucket_name: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Upload a local file to Supabase Storage, streaming it from disk.
+
+        Returns:
+            Public URL of the uploaded file, or None on failure
+        """
+        return await self._upload_to_storage(
+            lambda: open(file_path, 'rb'), os.path.getsize(file_path), storage_path, content_type, bucket_name
+        )
+
+    async def _upload_to_storage(
+        self,
+        open_body,
+        size: int,
+        storage_path: str,
+        content_type: str,
+        bucket_name: Optional[str] = None
+    ) -> Optional[str]:
+        """Shared retry loop; ``open_body`` returns fresh bytes or file object per attempt."""
         if not self.supabase_client:
             logger.error("Supabase client not initialized for storage upload")
             return None
         
         bucket = bucket_name or self.SUMMARY_MEDIA_BUCKET
-        
-        for attempt in range(self.MAX_UPLOAD_ATTEMPTS):
+
+        def upload_once():
+            body = open_body()
             try:
-                await asyncio.to_thread(
-                    self.supabase_client.storage.from_(bucket).upload,
+                self.supabase_client.storage.from_(bucket).upload(
                     path=storage_path,
-                    file=file_bytes,
+                    file=body,
                     file_options={"content-type": content_type, "upsert": "true"}
                 )
-                logger.debug(f"Uploaded {len(file_bytes)} bytes to {bucket}/{storage_path}")
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+        
+        for attempt in range(self.MAX_UPLOAD_ATTEMPTS):
+            try:
+                await asyncio.to_thread(upload_once)
+                logger.debug(f"Uploaded {size} bytes to {bucket}/{storage_path}")
                 
                 # Get public URL
                 public_url = await asyncio.to_thread(
@@ -2873,49 +2980,132 @@ class StorageHandler:
         
         return None
 
-    async def download_file(self, source_url: str) -> Optional[Dict[str, any]]:
+    def _http_session(self) -> aiohttp.ClientSession:
+        """Shared session for the running loop; sessions on closed loops are dropped."""
+        loop = asyncio.get_running_loop()
+        with self._HTTP_SESSIONS_LOCK:
+            sessions = self._http_session_registry()
+            session = sessions.get(loop)
+            if session is not None and not session.closed:
+                return session
+            for other_loop in [l for l in sessions if l.is_closed()]:
+                sessions.pop(other_loop, None)
+            connector = aiohttp.TCPConnector(
+                limit=self.HTTP_LIMIT,
+                limit_per_host=self.HTTP_LIMIT_PER_HOST,
+                ttl_dns_cache=300,
+            )
+            session = sessions[loop] = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.HTTP_TIMEOUT_SECONDS),
+            )
+        return session
+
+    def _http_session_registry(self) -> Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession]:
+        """(loop, session) pairs; call with ``_HTTP_SESSIONS_LOCK`` held."""
+        sessions = getattr(self, '_http_sessions', None)
+        if sessions is None:
+            sessions = self._http_sessions = {}
+        return sessions
+
+    async def close_http_sessions(self, timeout: float = 10.0) -> None:
+        """Close every shared download session, each on the loop that owns it."""
+        with self._HTTP_SESSIONS_LOCK:
+            registry = self._http_session_registry()
+            sessions = list(registry.items())
+            registry.clear()
+        current = asyncio.get_running_loop()
+        for loop, session in sessions:
+            if session.closed:
+                continue
+            if loop is current:
+                await session.close()
+            elif loop.is_running():
+                future = asyncio.run_coroutine_threadsafe(session.close(), loop)
+                try:
+                    await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+                except Exception as e:
+                    logger.warning(f"Failed to close download session on another loop: {e}")
+            else:
+                # The owning loop has stopped; its connections go with it.
+                logger.debug("Dropping download session whose event loop is no longer running")
+
+    async def _stream_download(self, source_url: str, spill_threshold: Optional[int]) -> Optional[Dict[str, Any]]:
         """
-        Download a file from a URL.
-        
-        Args:
-            source_url: URL to download from (e.g., Discord CDN URL)
-            
-        Returns:
-            Dict with 'bytes', 'content_type', 'filename' or None on failure
+        Download ``source_url`` in chunks, hashing as it goes.
+
+        Bodies above ``spill_threshold`` bytes are written to a temp file and
+        returned as 'path' (caller deletes it); smaller ones come back as
+        'bytes'. ``spill_threshold=None`` always keeps the body in memory.
         """
+        spool = None
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(source_url, timeout=aiohttp.ClientTimeout(total=120)) as response:
-                    if response.status != 200:
-                        logger.warning(f"Failed to download {source_url}: HTTP {response.status}")
-                        return None
-                    
-                    file_bytes = await response.read()
-                    
-                    # Determine content type from response or URL
-                    content_type = response.content_type
-                    if not content_type or content_type == 'application/octet-stream':
-                        guessed_type, _ = mimetypes.guess_type(source_url.split('?')[0])
-                        content_type = guessed_type or 'application/octet-stream'
-                    
-                    # Extract filename from URL
-                    url_path = source_url.split('?')[0]
-                    filename = url_path.split('/')[-1] if '/' in url_path else 'file'
-                    
-                    logger.debug(f"Downloaded {len(file_bytes)} bytes ({content_type}) from {source_url[:80]}...")
-                    
-                    return {
-                        'bytes': file_bytes,
-                        'content_type': content_type,
-                        'filename': filename
-                    }
-                    
+            async with self._http_session().get(source_url) as response:
+                if response.status != 200:
+                    logger.warning(f"Failed to download {source_url}: HTTP {response.status}")
+                    return None
+
+                digest = hashlib.sha256()
+                chunks: List[bytes] = []
+                size = 0
+                async for chunk in response.content.iter_chunked(self.HTTP_CHUNK_SIZE):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    if spool is not None:
+                        await asyncio.to_thread(spool.write, chunk)
+                        continue
+                    chunks.append(chunk)
+                    if spill_threshold is not None and size > spill_threshold:
+                        spool = tempfile.NamedTemporaryFile(prefix='storage-dl-', delete=False)
+                        await asyncio.to_thread(spool.writelines, chunks)
+                        chunks = []
+
+                # Determine content type from response or URL
+                content_type = response.content_type
+                if not content_type or content_type == 'application/octet-stream':
+                    guessed_type, _ = mimetypes.guess_type(source_url.split('?')[0])
+                    content_type = guessed_type or 'application/octet-stream'
+
+            # Extract filename from URL
+            url_path = source_url.split('?')[0]
+            filename = url_path.split('/')[-1] if '/' in url_path else 'file'
+            result = {
+                'content_type': content_type,
+                'filename': filename,
+                'size': size,
+                'sha256': digest.hexdigest(),
+            }
+            if spool is not None:
+                spool.close()
+                result['path'] = spool.name
+                spool = None
+            else:
+                result['bytes'] = b''.join(chunks)
+            logger.debug(f"Downloaded {size} bytes ({content_type}) from {source_url[:80]}...")
+            return result
+
         except asyncio.TimeoutError:
             logger.warning(f"Timeout downloading {source_url}")
             return None
         except Exception as e:
             logger.error(f"Error downloading {source_url}: {e}", exc_info=True)
             return None
+        finally:
+            if spool is not None:
+                spool.close()
+                os.unlink(spool.name)
+
+    async def download_file(self, source_url: str) -> Optional[Dict[str, any]]:
+        """
+        Download a file from a URL.
+        
+        Args:
+            source_url: URL to download from (e.g., Discord CDN URL)
+            
+        Returns:
+            Dict with 'bytes', 'content_type', 'filename', 'size', 'sha256' or None on failure
+        """
+        return await self._stream_download(source_url, spill_threshold=None)
 
     async def download_and_upload_url(
         self,
@@ -2925,6 +3115,9 @@ class StorageHandler:
     ) -> Optional[str]:
         """
         Download a file from a URL and upload to Supabase Storage.
+
+        Large files are spooled to a temp file and uploaded from disk, so
+        memory stays bounded by DOWNLOAD_SPILL_THRESHOLD plus one chunk.
         
         Args:
             source_url: URL to download from (e.g., Discord CDN URL)
@@ -2934,13 +3127,20 @@ class StorageHandler:
         Returns:
             Public URL of the uploaded file, or None on failure
         """
-        file_data = await self.download_file(source_url)
+        file_data = await self._stream_download(source_url, spill_threshold=self.DOWNLOAD_SPILL_THRESHOLD)
         if not file_data:
             return None
 
-        return await self.upload_bytes_to_storage(
-            file_data['bytes'], storage_path, file_data['content_type'], bucket_name
-        )
+        if 'path' not in file_data:
+            return await self.upload_bytes_to_storage(
+                file_data['bytes'], storage_path, file_data['content_type'], bucket_name
+            )
+        try:
+            return await self.upload_file_to_storage(
+                file_data['path'], storage_path, file_data['content_type'], bucket_name
+            )
+        finally:
+            os.unlink(file_data['path'])
 
     # ---------- message_media_understandings ----------------------
 
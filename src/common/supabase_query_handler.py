@@ -6,8 +6,9 @@ Executes queries via Supabase client.
 import asyncio
 import logging
 import os
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Optional, Set, Tuple
 from pathlib import Path
 import sys
 
@@ -19,6 +20,40 @@ from supabase.lib.client_options import ClientOptions
 
 logger = logging.getLogger('DiscordBot')
 
+MESSAGE_PAGE_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class MessageQuery:
+    """Typed discord_messages read pushed down to PostgREST.
+
+    Pages are keyset-paginated on message_id (Discord snowflakes sort the same
+    way as created_at), so each page is an index range scan instead of an
+    ever-growing OFFSET, and only ``columns`` / ``limit`` rows are transferred.
+    """
+
+    columns: Tuple[str, ...] = ('*',)
+    channel_ids: Tuple[int, ...] = ()
+    guild_id: Optional[int] = None
+    author_ids: Tuple[int, ...] = ()
+    exclude_author_ids: Tuple[int, ...] = ()
+    created_from: Optional[str] = None    # ISO timestamp, inclusive
+    created_after: Optional[str] = None   # ISO timestamp, exclusive
+    created_until: Optional[str] = None   # ISO timestamp, inclusive
+    exclude_deleted: bool = False
+    descending: bool = False
+    limit: Optional[int] = None
+    page_size: int = MESSAGE_PAGE_SIZE
+
+    def select_clause(self) -> str:
+        if '*' in self.columns:
+            return '*'
+        columns = list(self.columns)
+        if 'message_id' not in columns:
+            columns.append('message_id')  # needed as the keyset cursor
+        return ', '.join(columns)
+
+
 class SupabaseQueryHandler:
     """Handles read queries from Supabase PostgreSQL database."""
     
@@ -204,6 +239,22 @@ class SupabaseQueryHandler:
         except Exception as e:
             logger.error(f"Error checking message existence in Supabase: {e}", exc_info=True)
             raise
+
+    async def get_existing_message_ids(self, message_ids: List[int]) -> Set[int]:
+        """Return the subset of message_ids already stored, selecting only the id column."""
+        existing: Set[int] = set()
+        unique_ids = list(dict.fromkeys(message_ids))
+        batch_size = 100
+        for i in range(0, len(unique_ids), batch_size):
+            batch_ids = unique_ids[i:i + batch_size]
+            result = await asyncio.to_thread(
+                self.supabase.table('discord_messages')
+                .select('message_id')
+                .in_('message_id', batch_ids)
+                .execute
+            )
+            existing.update(int(row['message_id']) for row in (result.data or []))
+        return existing
     
     async def get_summary_thread_id(self, channel_id: int) -> Optional[int]:
         """Get the summary thread ID for a channel."""
@@ -221,32 +272,70 @@ class SupabaseQueryHandler:
             logger.error(f"Error getting summary thread ID from Supabase: {e}", exc_info=True)
             raise
     
+    def _build_message_query(self, spec: MessageQuery, cursor: Optional[int], page_limit: int):
+        query = self.supabase.table('discord_messages').select(spec.select_clause())
+        if spec.guild_id is not None:
+            query = query.eq('guild_id', spec.guild_id)
+        if len(spec.channel_ids) == 1:
+            query = query.eq('channel_id', spec.channel_ids[0])
+        elif spec.channel_ids:
+            query = query.in_('channel_id', list(spec.channel_ids))
+        if spec.author_ids:
+            query = query.in_('author_id', list(spec.author_ids))
+        for author_id in spec.exclude_author_ids:
+            query = query.neq('author_id', author_id)
+        if spec.created_from:
+            query = query.gte('created_at', spec.created_from)
+        if spec.created_after:
+            query = query.gt('created_at', spec.created_after)
+        if spec.created_until:
+            query = query.lte('created_at', spec.created_until)
+        if spec.exclude_deleted:
+            query = query.eq('is_deleted', False)
+        if cursor is not None:
+            query = query.lt('message_id', cursor) if spec.descending else query.gt('message_id', cursor)
+        return query.order('message_id', desc=spec.descending).limit(page_limit)
+
+    async def iter_message_pages(self, spec: MessageQuery) -> AsyncIterator[List[Dict]]:
+        """Yield pages of discord_messages rows matching ``spec``.
+
+        Stops as soon as ``spec.limit`` rows have been produced, so callers that
+        only need the newest N rows never pull the rest of the channel. A short
+        page is not the end: PostgREST's max-rows can cap every page below
+        ``page_size``, so paging ends only on an empty page or a stuck cursor.
+        """
+        remaining = spec.limit
+        cursor: Optional[int] = None
+        while remaining is None or remaining > 0:
+            page_limit = spec.page_size if remaining is None else min(spec.page_size, remaining)
+            result = await asyncio.to_thread(
+                self._build_message_query(spec, cursor, page_limit).execute
+            )
+            rows = result.data or []
+            if not rows:
+                return
+            yield rows
+            if remaining is not None:
+                remaining -= len(rows)
+            next_cursor = rows[-1]['message_id']
+            if next_cursor == cursor:
+                return
+            cursor = next_cursor
+
+    async def fetch_messages(self, spec: MessageQuery) -> List[Dict]:
+        """Collect every row produced by iter_message_pages(spec)."""
+        rows: List[Dict] = []
+        async for page in self.iter_message_pages(spec):
+            rows.extend(page)
+        return rows
+
     async def get_all_message_ids(self, channel_id: int) -> List[int]:
         """Get all message IDs for a channel."""
         try:
-            all_ids = []
-            offset = 0
-            batch_size = 1000
-            
-            while True:
-                result = await asyncio.to_thread(
-                    self.supabase.table('discord_messages')
-                    .select('message_id')
-                    .eq('channel_id', channel_id)
-                    .range(offset, offset + batch_size - 1)
-                    .execute
-                )
-                
-                if not result.data:
-                    break
-                
-                all_ids.extend([row['message_id'] for row in result.data])
-                
-                if len(result.data) < batch_size:
-                    break
-                    
-                offset += batch_size
-            
+            spec = MessageQuery(columns=('message_id',), channel_ids=(channel_id,))
+            all_ids: List[int] = []
+            async for page in self.iter_message_pages(spec):
+                all_ids.extend(row['message_id'] for row in page)
             return all_ids
         except Exception as e:
             logger.error(f"Error getting all message IDs from Supabase: {e}", exc_info=True)
@@ -291,30 +380,8 @@ class SupabaseQueryHandler:
     async def get_messages_after(self, date: datetime, guild_id: Optional[int] = None) -> List[Dict]:
         """Get messages after a specific date with member info."""
         try:
-            all_messages = []
-            offset = 0
-            batch_size = 1000
-
-            while True:
-                query = (self.supabase.table('discord_messages')
-                    .select('*')
-                    .gt('created_at', date.isoformat()))
-                if guild_id:
-                    query = query.eq('guild_id', guild_id)
-                result = await asyncio.to_thread(
-                    query.range(offset, offset + batch_size - 1)
-                    .execute
-                )
-
-                if not result.data:
-                    break
-
-                all_messages.extend(result.data)
-
-                if len(result.data) < batch_size:
-                    break
-
-                offset += batch_size
+            spec = MessageQuery(created_after=date.isoformat(), guild_id=guild_id or None)
+            all_messages = await self.fetch_messages(spec)
 
             # Fetch member info for all unique authors (guild-aware)
             if all_messages:
@@ -333,42 +400,17 @@ class SupabaseQueryHandler:
                                    guild_id: Optional[int] = None) -> List[Dict]:
         """Get messages within a date range with member info."""
         try:
-            all_messages = []
-            offset = 0
-            batch_size = 1000
-
-            # Fetch messages
-            while True:
-                query = (self.supabase.table('discord_messages')
-                        .select('*')
-                        .gte('created_at', start_date.isoformat())
-                        .lte('created_at', end_date.isoformat())
-                        .eq('is_deleted', False))
-
-                # Exclude bot authors
-                bot_user_id = os.getenv('BOT_USER_ID')
-                if bot_user_id:
-                    query = query.neq('author_id', int(bot_user_id))
-
-                if guild_id:
-                    query = query.eq('guild_id', guild_id)
-
-                if channel_id:
-                    query = query.eq('channel_id', channel_id)
-                
-                result = await asyncio.to_thread(
-                    query.range(offset, offset + batch_size - 1).execute
-                )
-                
-                if not result.data:
-                    break
-                
-                all_messages.extend(result.data)
-                
-                if len(result.data) < batch_size:
-                    break
-                    
-                offset += batch_size
+            # Exclude bot authors
+            bot_user_id = os.getenv('BOT_USER_ID')
+            spec = MessageQuery(
+                channel_ids=(channel_id,) if channel_id else (),
+                guild_id=guild_id or None,
+                exclude_author_ids=(int(bot_user_id),) if bot_user_id else (),
+                created_from=start_date.isoformat(),
+                created_until=end_date.isoformat(),
+                exclude_deleted=True,
+            )
+            all_messages = await self.fetch_messages(spec)
             
             # Fetch member info for all unique authors (guild-aware)
             if all_messages:
@@ -387,33 +429,13 @@ class SupabaseQueryHandler:
                                               end_date: datetime, guild_id: Optional[int] = None) -> List[Dict]:
         """Get messages by specific authors within a date range."""
         try:
-            all_messages = []
-            offset = 0
-            batch_size = 1000
-
-            # Fetch messages
-            while True:
-                query = (self.supabase.table('discord_messages')
-                    .select('*')
-                    .in_('author_id', author_ids)
-                    .gte('created_at', start_date.isoformat())
-                    .lte('created_at', end_date.isoformat()))
-                if guild_id:
-                    query = query.eq('guild_id', guild_id)
-                result = await asyncio.to_thread(
-                    query.range(offset, offset + batch_size - 1)
-                    .execute
-                )
-                
-                if not result.data:
-                    break
-                
-                all_messages.extend(result.data)
-                
-                if len(result.data) < batch_size:
-                    break
-                    
-                offset += batch_size
+            spec = MessageQuery(
+                author_ids=tuple(author_ids),
+                guild_id=guild_id or None,
+                created_from=start_date.isoformat(),
+                created_until=end_date.isoformat(),
+            )
+            all_messages = await self.fetch_messages(spec)
             
             # Fetch member info for all authors (guild-aware)
             if all_messages and author_ids:
@@ -477,37 +499,41 @@ class SupabaseQueryHandler:
             raise
     
     async def get_message_dates(self, channel_id: int) -> List[str]:
-        """Get distinct dates that have messages in a channel."""
+        """Get distinct dates that have messages in a channel.
+
+        Aggregates server-side via the get_channel_message_dates RPC, paged
+        with .range() because PostgREST caps every response at max-rows.
+        Paging stops on an empty page rather than a short one, so a server
+        max-rows below MESSAGE_PAGE_SIZE cannot truncate the result. Falls
+        back to streaming only created_at when the RPC is not deployed.
+        """
         try:
-            # Use RPC for date aggregation (more efficient)
-            # For now, fetch all and aggregate in Python
-            offset = 0
-            batch_size = 1000
-            dates_set = set()
-            
-            while True:
-                result = await asyncio.to_thread(
-                    self.supabase.table('discord_messages')
-                    .select('created_at')
-                    .eq('channel_id', channel_id)
-                    .range(offset, offset + batch_size - 1)
-                    .execute
+            try:
+                dates = []
+                offset = 0
+                while True:
+                    result = await asyncio.to_thread(
+                        self.supabase.rpc('get_channel_message_dates', {'p_channel_id': channel_id})
+                        .range(offset, offset + MESSAGE_PAGE_SIZE - 1)
+                        .execute
+                    )
+                    rows = result.data or []
+                    if not rows:
+                        break
+                    dates.extend(str(row['message_date'])[:10] for row in rows if row.get('message_date'))
+                    offset += len(rows)
+                return sorted(set(dates))
+            except Exception as rpc_error:
+                logger.warning(
+                    f"get_channel_message_dates RPC unavailable, aggregating client-side: {rpc_error}"
                 )
-                
-                if not result.data:
-                    break
-                
-                for msg in result.data:
-                    # Extract date portion
-                    date_str = msg['created_at'][:10]  # YYYY-MM-DD
-                    dates_set.add(date_str)
-                
-                if len(result.data) < batch_size:
-                    break
-                    
-                offset += batch_size
-            
-            return sorted(list(dates_set))
+
+            dates_set = set()
+            spec = MessageQuery(columns=('created_at',), channel_ids=(channel_id,))
+            async for page in self.iter_message_pages(spec):
+                for msg in page:
+                    dates_set.add(msg['created_at'][:10])  # YYYY-MM-DD
+            return sorted(dates_set)
         except Exception as e:
             logger.error(f"Error getting message dates from Supabase: {e}", exc_info=True)
             raise
@@ -12,6 +12,8 @@ from typing import List, Dict, Any, Optional
 import anthropic
 from dotenv import load_dotenv
 
+from src.common.llm.prompt_cache import PromptAssembler, PromptCacheStats
+
 from .tools import TOOLS, execute_tool
 
 # Tools that already post user-visible output directly to a Discord channel.
@@ -65,7 +67,7 @@ END EVERY TURN with either reply or end_turn.
 ## Tools
 
 **Finding things:**
-- find_messages — search/browse messages. Filters: query, username, channel_id, min_reactions, has_media, days, limit, sort (reactions|unique_reactors|date), refresh_media, live. Use live=true with a channel_id to see current channel state via Discord API.
+- find_messages — search/browse messages. Filters: query, username, channel_id, min_reactions, has_media, days, limit, sort (reactions|unique_reactors|date|relevance), refresh_media, live. Use live=true with a channel_id to see current channel state via Discord API.
 - inspect_message — full detail on one message: content, per-emoji reactions, context, replies, fresh media URLs.
 - query_table — query any DB table with filters. Tables: competitions, competition_entries, discord_reactions, discord_messages, members, discord_channels, events, invite_codes, grant_applications, daily_summaries (legacy history only), shared_posts, social_publications, social_channel_routes, pending_intros, intro_votes, timed_mutes, topic_editor_runs, topics, topic_sources, topic_aliases, topic_transitions, editorial_observations, topic_editor_checkpoints, live_update_editor_runs (legacy rollback only), live_update_candidates (legacy rollback only), live_update_decisions (legacy rollback only), live_update_feed_items (legacy rollback only), live_update_editorial_memory (legacy rollback only), live_update_watchlist (legacy rollback only), live_update_duplicate_state (legacy rollback only), live_update_checkpoints (legacy rollback only), live_top_creation_runs, live_top_creation_posts, live_top_creation_checkpoints. Filter operators: gt., gte., lt., lte., neq., like., ilike., in., is.null, not.null. Cheatsheet: discord_messages => author_id, created_at, reaction_count; topics => state, publication_status, headline; topic_transitions => action, run_id, topic_id; topic_editor_runs => status, started_at, failed_publish_count; social_publications => publication_id, status, platform, action, provider_ref, provider_url, last_error, scheduled_at.
 - get_active_channels, get_live_update_status, get_daily_summaries (legacy daily_summaries history), get_member_info, get_bot_status, search_logs
@@ -325,6 +327,34 @@ class AdminChatAgent:
         self._abort_requested[user_id] = False
 
         try:
+            # Render the system prompt once per chat: its inputs don't change
+            # between iterations, and a byte-stable prefix is what lets every
+            # iteration after the first hit the prompt cache.
+            bot_user_id = self.bot.user.id if self.bot and self.bot.user else "unknown"
+            sc = getattr(getattr(self.bot, 'db_handler', None), 'server_config', None) if self.bot else None
+            guild_id = (
+                channel_context.get('guild_id')
+                if channel_context and channel_context.get('guild_id')
+                else (sc.get_default_guild_id(require_write=True) if sc else 'unknown')
+            )
+            # Use community_name from server_config if available
+            community_name = "Banodoco"
+            prompt_template = SYSTEM_PROMPT
+            if sc and guild_id != 'unknown':
+                _server = sc.get_server(int(guild_id))
+                community_name = (_server.get('community_name') if _server else None) or community_name
+                prompt_template = sc.get_content(int(guild_id), 'prompt_admin_chat_system') or SYSTEM_PROMPT
+            system = _render_prompt_template(
+                prompt_template,
+                bot_user_id=bot_user_id,
+                guild_id=guild_id,
+                community_name=community_name,
+                bot_voice=BOT_VOICE,
+            )
+            system += _POM_ADDENDUM
+            prompt = PromptAssembler(system, available_tools)
+            cache_stats = PromptCacheStats()
+
             for iteration in range(max_iterations):
                 # Check for abort between iterations
                 if self._abort_requested.get(user_id):
@@ -335,49 +365,21 @@ class AdminChatAgent:
 
                 logger.debug(f"[AdminChat] Iteration {iteration + 1}")
                 
-                # Call Claude
-                # Inject runtime values into system prompt
-                bot_user_id = self.bot.user.id if self.bot and self.bot.user else "unknown"
-                sc = getattr(getattr(self.bot, 'db_handler', None), 'server_config', None) if self.bot else None
-                guild_id = (
-                    channel_context.get('guild_id')
-                    if channel_context and channel_context.get('guild_id')
-                    else (sc.get_default_guild_id(require_write=True) if sc else 'unknown')
-                )
-                # Use community_name from server_config if available
-                community_name = "Banodoco"
-                prompt_template = SYSTEM_PROMPT
-                if sc and guild_id != 'unknown':
-                    _server = sc.get_server(int(guild_id))
-                    community_name = (_server.get('community_name') if _server else None) or community_name
-                    prompt_template = sc.get_content(int(guild_id), 'prompt_admin_chat_system') or SYSTEM_PROMPT
-                system = _render_prompt_template(
-                    prompt_template,
-                    bot_user_id=bot_user_id,
-                    guild_id=guild_id,
-                    community_name=community_name,
-                    bot_voice=BOT_VOICE,
-                )
-                system += _POM_ADDENDUM
-
                 # Show "is typing..." during API call, stops when call completes
                 if channel:
                     async with channel.typing():
                         response = await self.client.messages.create(
                             model=self.model,
                             max_tokens=4096,
-                            system=system,
-                            tools=available_tools,
-                            messages=messages
+                            **prompt.request_kwargs(messages)
                         )
                 else:
                     response = await self.client.messages.create(
                         model=self.model,
                         max_tokens=4096,
-                        system=system,
-                        tools=available_tools,
-                        messages=messages
+                        **prompt.request_kwargs(messages)
                     )
+                cache_stats.record(response)
                 
                 logger.debug(f"[AdminChat] Response stop_reason: {response.stop_reason}")
                 
@@ -484,7 +486,13 @@ class AdminChatAgent:
                     break
             
             # Log completion
-            logger.info(f"[AdminChat] Completed: {len(actions)} actions, replies={len(final_replies)}")
+            cache_summary = cache_stats.summary()
+            logger.info(
+                f"[AdminChat] Completed: {len(actions)} actions, replies={len(final_replies)}, "
+                f"prompt_cache read={cache_summary['cache_read_input_tokens']} "
+                f"write={cache_summary['cache_creation_input_tokens']} "
+                f"uncached={cache_summary['uncached_input_tokens']}"
+            )
 
             persisted_messages = list(conversation) + [persisted_user_msg] + messages[len(conversation) + 1 :]
             _conversations[user_id] = persisted_messages
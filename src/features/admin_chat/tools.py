@@ -161,8 +161,8 @@ TOOLS = [
                 },
                 "sort": {
                     "type": "string",
-                    "enum": ["reactions", "unique_reactors", "date"],
-                    "description": "Sort order (default: date, most recent first). reactions = most reacted. unique_reactors = most distinct reactors."
+                    "enum": ["reactions", "unique_reactors", "date", "relevance"],
+                    "description": "Sort order (default: date, most recent first). reactions = most reacted. unique_reactors = most distinct reactors. relevance = best text match for query."
                 },
                 "refresh_media": {
                     "type": "boolean",
@@ -2911,6 +2911,9 @@ async def execute_retry_payment(bot, db_handler, params: Dict[str, Any]) -> Dict
         success = db_handler.requeue_payment(payment_id, guild_id=guild_id)
         if not success:
             return {"success": False, "error": "Payment is not in a retryable failed state"}
+        notify_queued = getattr(payment_service, 'notify_payment_queued', None)
+        if callable(notify_queued):
+            notify_queued()
         row = db_handler.get_payment_request(payment_id, guild_id=guild_id)
         return {"success": True, "payment": _redact_payment_row(row or {"payment_id": payment_id})}
     except Exception as e:
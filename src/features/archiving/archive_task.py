@@ -33,7 +33,14 @@ import discord
 from dotenv import load_dotenv
 
 from src.common.discord_utils import emoji_to_str
-from src.common.rate_limiter import RateLimiter
+from src.common.env import env_int
+from src.common.metrics import (
+    ARCHIVE_BACKPRESSURE,
+    ARCHIVE_STAGE_ITEMS,
+    ARCHIVE_STAGE_QUEUE_WAIT_SECONDS,
+    ARCHIVE_STAGE_SECONDS,
+)
+from src.common.rate_limiter import BACKGROUND, RateLimiter
 
 
 # ---------------------------------------------------------------------------
@@ -41,7 +48,8 @@ from src.common.rate_limiter import RateLimiter
 # ---------------------------------------------------------------------------
 
 DISCORD_EPOCH_MS = 1420070400000
-_thread_local = threading.local()
+_shared_db = None
+_shared_db_lock = threading.Lock()
 
 
 def snowflake_to_datetime(snowflake_id: int) -> datetime:
@@ -59,12 +67,85 @@ def to_aware_utc(dt_str: str) -> datetime:
 
 
 def _get_db():
-    """Get thread-local database connection (used by _db_worker thread)."""
-    if not hasattr(_thread_local, "db"):
-        from src.common.db_handler import DatabaseHandler
+    """Process-wide DatabaseHandler for archive runs outside the bot.
 
-        _thread_local.db = DatabaseHandler()
-    return _thread_local.db
+    One handler (and Supabase client) is shared by every DB worker thread;
+    ArchiveTask prefers the bot's own handler when it has one.
+    """
+    global _shared_db
+    if _shared_db is None:
+        with _shared_db_lock:
+            if _shared_db is None:
+                from src.common.db_handler import DatabaseHandler
+
+                _shared_db = DatabaseHandler()
+    return _shared_db
+
+
+# ---------------------------------------------------------------------------
+# Per-stage metrics
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class StageStats:
+    """Counters for one archive pipeline stage (process, db_read, db_write)."""
+
+    ops: int = 0
+    items: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    queue_wait_seconds: float = 0.0
+    backpressure_waits: int = 0
+
+    def as_dict(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            "ops": self.ops,
+            "items": self.items,
+            "errors": self.errors,
+            "items_per_second": round(self.items / elapsed, 2) if elapsed > 0 else 0.0,
+            "avg_op_ms": round(self.busy_seconds / self.ops * 1000, 1) if self.ops else 0.0,
+            "avg_queue_wait_ms": (
+                round(self.queue_wait_seconds / self.ops * 1000, 1) if self.ops else 0.0
+            ),
+            "backpressure_waits": self.backpressure_waits,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Batch-scoped entity collector
+# ---------------------------------------------------------------------------
+
+
+class PageEntities:
+    """Members and channels seen while processing one batch of messages.
+
+    Keyed by id so an author who posted fifty messages in a page, or a
+    channel every message belongs to, is upserted once per page.
+    """
+
+    def __init__(self) -> None:
+        self.members: Dict[int, Dict[str, Any]] = {}
+        self.channels: Dict[int, Dict[str, Any]] = {}
+
+    def add_member(self, row: Dict[str, Any]) -> None:
+        self.members[row["member_id"]] = row
+
+    def add_channel(self, row: Dict[str, Any]) -> None:
+        self.channels[row["channel_id"]] = row
+
+    def __bool__(self) -> bool:
+        return bool(self.members or self.channels)
+
+
+class ArchiveWriteError(RuntimeError):
+    """Queued DB writes failed; ``failures`` maps channel_id to the first error."""
+
+    def __init__(self, failures: Dict[int, str]):
+        self.failures = failures
+        super().__init__(
+            "; ".join(f"channel {cid}: {err}" for cid, err in failures.items())
+        )
 
 
 # ---------------------------------------------------------------------------
@@ -131,8 +212,31 @@ class ArchiveTask:
         # --- logger ---
         self.logger: logging.Logger = logger or logging.getLogger("DiscordBot")
 
-        # --- database queue + worker thread (preserved from original design, LD-4) ---
-        self.db_queue: queue.Queue = queue.Queue()
+        # --- database queues + worker pool (LD-4 thread + queue pattern, N workers) ---
+        # Reads and page writes both go to the least-loaded worker, so one
+        # channel's backfill keeps every worker busy. Queues are bounded so a
+        # slow DB pushes back on the history fetcher instead of buffering
+        # unboundedly.
+        self.db_worker_count: int = env_int("ARCHIVE_DB_WORKERS", 4)
+        self.db_queues: List[queue.Queue] = [
+            queue.Queue(maxsize=env_int("ARCHIVE_DB_QUEUE_SIZE", 16))
+            for _ in range(self.db_worker_count)
+        ]
+        self.db_queue: queue.Queue = self.db_queues[0]
+        self._pending_writes: Dict[int, set] = {}
+        # channel_id -> first write error. Set on the worker thread as soon as
+        # a write fails, so that channel's writes still waiting in a queue are
+        # skipped and the channel is reported as failed.
+        self._failed_writes: Dict[int, str] = {}
+
+        # --- per-stage metrics ---
+        self._stage_lock = threading.Lock()
+        self.stage_stats: Dict[str, StageStats] = {
+            "process": StageStats(),
+            "db_read": StageStats(),
+            "db_write": StageStats(),
+        }
+        self._metrics_started: float = time.monotonic()
 
         # --- rate limiter ---
         self.rate_limiter: RateLimiter = RateLimiter()
@@ -141,6 +245,9 @@ class ArchiveTask:
         self.member_update_cache: Dict[str, float] = {}
         self.member_update_cache_timeout: int = 300  # 5 minutes
 
+        # --- members/channels collected for the batch being processed ---
+        self._page_entities: PageEntities = PageEntities()
+
         # --- summary thread cache ---
         self._summary_thread_ids: set[int] = set()
 
@@ -272,14 +379,6 @@ class ArchiveTask:
                 "skipping member updates and reactions"
             )
 
-        # ------------------------------------------------------------------
-        # Rate limiting tracking
-        # ------------------------------------------------------------------
-        self.last_api_call: datetime = datetime.now()
-        self.api_call_count: int = 0
-        self.rate_limit_reset: datetime = datetime.now()
-        self.rate_limit_remaining: int = 50
-
         # ------------------------------------------------------------------
         # Total days in range (for progress reporting)
         # ------------------------------------------------------------------
@@ -290,12 +389,20 @@ class ArchiveTask:
                 self.total_days_in_range = 1
 
         # ------------------------------------------------------------------
-        # Start database worker thread
+        # Start database worker threads
         # ------------------------------------------------------------------
-        self.db_thread: threading.Thread = threading.Thread(
-            target=self._db_worker, daemon=True
-        )
-        self.db_thread.start()
+        self.db_threads: List[threading.Thread] = [
+            threading.Thread(
+                target=self._db_worker,
+                args=(index,),
+                name=f"archive-db-{index}",
+                daemon=True,
+            )
+            for index in range(self.db_worker_count)
+        ]
+        for thread in self.db_threads:
+            thread.start()
+        self.db_thread: threading.Thread = self.db_threads[0]
 
         # ------------------------------------------------------------------
         # Connection history (preserved from original for shutdown safety)
@@ -303,50 +410,65 @@ class ArchiveTask:
         self._connection_history: list = []
 
     # ------------------------------------------------------------------
-    # DB Worker Thread (LD-4: preserved background thread + queue pattern)
+    # DB Worker Threads (LD-4: background thread + queue pattern, pooled)
     # ------------------------------------------------------------------
 
-    def _db_worker(self) -> None:
+    def _db_worker(self, index: int = 0) -> None:
         """Worker thread for database operations.
 
-        Runs on a background daemon thread.  Uses ``self.bot.loop`` (NOT
-        ``self.loop``) for ``call_soon_threadsafe`` because this class is NOT a
-        ``discord.Client`` subclass — the event loop belongs to the bot.
+        Runs on a background daemon thread, one per entry in ``db_queues``.
+        Uses ``self.bot.loop`` (NOT ``self.loop``) for ``call_soon_threadsafe``
+        because this class is NOT a ``discord.Client`` subclass — the event
+        loop belongs to the bot.
 
-        Shutdown protocol: caller pushes ``None`` onto ``db_queue``, then calls
-        ``thread.join(timeout=30)``.  A logged warning is emitted on timeout.
+        Shutdown protocol: caller pushes ``None`` onto each queue, then joins
+        the threads with a shared 30 s timeout.  A logged warning is emitted
+        on timeout.
         """
-        db = _get_db()
+        db = self._database()
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
+        db_queue = self.db_queues[index]
 
         while True:
             try:
-                operation = self.db_queue.get()
+                operation = db_queue.get()
                 if operation is None:  # sentinel — graceful shutdown
                     break
 
-                func, args, kwargs, future = operation
+                func, args, kwargs, future, stage, items, enqueued_at = operation
+                started = time.monotonic()
+                failed = False
                 try:
                     result = func(db, *args, **kwargs)
                     if asyncio.iscoroutine(result):
                         result = loop.run_until_complete(result)
 
+                    # Bind the future as a default: the callback runs on the bot
+                    # loop after this thread may have moved on to the next op.
                     if not future.done():
-                        def _set_result(r=result):
-                            if not future.done():
-                                future.set_result(r)
+                        def _set_result(r=result, f=future):
+                            if not f.done():
+                                f.set_result(r)
 
                         self.bot.loop.call_soon_threadsafe(_set_result)
                 except Exception as exception:
+                    failed = True
                     if not future.done():
-                        def _set_exception(e=exception):
-                            if not future.done():
-                                future.set_exception(e)
+                        def _set_exception(e=exception, f=future):
+                            if not f.done():
+                                f.set_exception(e)
 
                         self.bot.loop.call_soon_threadsafe(_set_exception)
 
-                self.db_queue.task_done()
+                self._record_stage(
+                    stage,
+                    items=items,
+                    busy=time.monotonic() - started,
+                    queue_wait=started - enqueued_at,
+                    failed=failed,
+                )
+                db_queue.task_done()
             except Exception:
                 self.logger.error("Error in database worker", exc_info=True)
                 continue
@@ -358,39 +480,221 @@ class ArchiveTask:
     # ------------------------------------------------------------------
 
     def _shutdown_db_worker(self) -> None:
-        """Signal the DB worker to stop and join with a 30 s timeout."""
-        self.db_queue.put(None)  # sentinel
-        self.db_thread.join(timeout=30)
-        if self.db_thread.is_alive():
+        """Signal the DB workers to stop and join with a shared 30 s timeout."""
+        for db_queue in self.db_queues:
+            try:
+                db_queue.put(None, timeout=5)  # sentinel
+            except queue.Full:
+                self.logger.warning("DB queue still full at shutdown — worker may not stop")
+        deadline = time.monotonic() + 30
+        for thread in self.db_threads:
+            thread.join(timeout=max(deadline - time.monotonic(), 0))
+        if any(thread.is_alive() for thread in self.db_threads):
             self.logger.warning(
-                "DB worker thread did not exit within 30 s — proceeding anyway"
+                "DB worker threads did not exit within 30 s — proceeding anyway"
             )
+        self._log_stage_metrics()
 
     # ------------------------------------------------------------------
-    # DB operation helper (schedules work on the background thread)
+    # Stage metrics
     # ------------------------------------------------------------------
 
-    async def _db_operation(self, func, *args, **kwargs) -> Any:
-        """Execute a database operation in the worker thread."""
+    def _record_stage(
+        self,
+        stage: str,
+        *,
+        items: int = 1,
+        busy: float = 0.0,
+        queue_wait: float = 0.0,
+        failed: bool = False,
+        backpressure: bool = False,
+    ) -> None:
+        with self._stage_lock:
+            stats = self.stage_stats[stage]
+            if backpressure:
+                stats.backpressure_waits += 1
+            else:
+                stats.ops += 1
+                stats.items += items
+                stats.busy_seconds += busy
+                stats.queue_wait_seconds += queue_wait
+                if failed:
+                    stats.errors += 1
+        if backpressure:
+            ARCHIVE_BACKPRESSURE.inc(stage=stage)
+            return
+        ARCHIVE_STAGE_SECONDS.observe(busy, stage=stage, outcome='error' if failed else 'ok')
+        ARCHIVE_STAGE_ITEMS.inc(items, stage=stage)
+        if stage != 'process':
+            ARCHIVE_STAGE_QUEUE_WAIT_SECONDS.observe(queue_wait, stage=stage)
+
+    def get_stage_metrics(self) -> Dict[str, Any]:
+        """Per-stage throughput plus current DB queue depths."""
+        elapsed = time.monotonic() - self._metrics_started
+        with self._stage_lock:
+            metrics: Dict[str, Any] = {
+                name: stats.as_dict(elapsed) for name, stats in self.stage_stats.items()
+            }
+        metrics["db_queue_depths"] = [q.qsize() for q in self.db_queues]
+        metrics["pending_writes"] = sum(len(f) for f in self._pending_writes.values())
+        return metrics
+
+    def _log_stage_metrics(self) -> None:
+        metrics = self.get_stage_metrics()
+        for name in self.stage_stats:
+            stage = metrics[name]
+            self.logger.info(
+                "Archive stage %s: %d ops, %d items (%.1f/s), avg %.1fms, "
+                "avg queue wait %.1fms, %d errors, %d back-pressure waits",
+                name,
+                stage["ops"],
+                stage["items"],
+                stage["items_per_second"],
+                stage["avg_op_ms"],
+                stage["avg_queue_wait_ms"],
+                stage["errors"],
+                stage["backpressure_waits"],
+            )
+
+    # ------------------------------------------------------------------
+    # DB operation helpers (schedule work on the background threads)
+    # ------------------------------------------------------------------
+
+    async def _enqueue_db(
+        self,
+        func,
+        args,
+        kwargs,
+        *,
+        stage: str,
+        items: int = 1,
+    ) -> asyncio.Future:
         if not self.bot.loop or self.bot.loop.is_closed():
             self.logger.error("Bot event loop is closed or None — cannot schedule DB op")
             raise RuntimeError("Bot event loop unavailable")
 
+        # ``unfinished_tasks`` counts the op a worker is running as well as
+        # the queued ones, so an idle worker wins over a busy one.
+        db_queue = min(self.db_queues, key=lambda q: q.unfinished_tasks)
+
         future = self.bot.loop.create_future()
-        self.db_queue.put((func, args, kwargs, future))
+        item = (func, args, kwargs, future, stage, items, time.monotonic())
+        waited = False
+        while True:
+            try:
+                db_queue.put_nowait(item)
+                break
+            except queue.Full:
+                # Never block the bot loop on a full queue; yield until a worker catches up.
+                if not waited:
+                    self._record_stage(stage, backpressure=True)
+                    waited = True
+                await asyncio.sleep(0.05)
+        return future
+
+    async def _db_operation(self, func, *args, **kwargs) -> Any:
+        """Execute a database operation in a worker thread and wait for the result."""
+        future = await self._enqueue_db(func, args, kwargs, stage="db_read")
         try:
             return await future
         except Exception:
             self.logger.error("Error in database operation", exc_info=True)
             raise
 
+    def _database(self):
+        """The bot's DatabaseHandler, shared with every DB worker thread."""
+        return getattr(self.bot, "db_handler", None) or _get_db()
+
+    async def _db_write(
+        self, func, *, channel_id: int, items: int = 1, new_messages: int = 0
+    ) -> asyncio.Future:
+        """Queue a write for ``channel_id`` without waiting for it to finish.
+
+        Writes go to the least-loaded worker, so a channel's pages are
+        applied concurrently and in no particular order.  Once one fails,
+        the channel's writes that have not started yet are skipped.
+        Returns once the write is queued; ``_drain_db_writes`` waits for
+        completion and raises ``ArchiveWriteError`` for failed channels.
+        ``new_messages`` is added to ``total_messages_archived`` only after
+        the write succeeds.
+        """
+
+        async def _guarded(db):
+            if channel_id in self._failed_writes:
+                raise RuntimeError(
+                    f"skipped after an earlier write for channel {channel_id} failed"
+                )
+            try:
+                result = func(db)
+                if asyncio.iscoroutine(result):
+                    result = await result
+                return result
+            except Exception as exc:
+                self._failed_writes.setdefault(channel_id, str(exc))
+                raise
+
+        future = await self._enqueue_db(
+            _guarded, (), {}, stage="db_write", items=items
+        )
+        pending = self._pending_writes.setdefault(channel_id, set())
+        pending.add(future)
+
+        def _done(fut: asyncio.Future) -> None:
+            pending.discard(fut)
+            if fut.cancelled():
+                return
+            exc = fut.exception()
+            if exc is not None:
+                self.logger.error(
+                    "Queued DB write for channel %d failed: %s", channel_id, exc
+                )
+            else:
+                self.total_messages_archived += new_messages
+
+        future.add_done_callback(_done)
+        return future
+
+    async def _drain_db_writes(self, channel_id: Optional[int] = None) -> None:
+        """Wait for queued writes (for one channel, or all channels) to finish.
+
+        Raises ``ArchiveWriteError`` naming every drained channel that had a
+        failed write; the failure is cleared so a later pass can retry.
+        """
+        channel_ids = (
+            list(self._pending_writes) if channel_id is None else [channel_id]
+        )
+        futures = [
+            f for cid in channel_ids for f in self._pending_writes.get(cid, ())
+        ]
+        if futures:
+            await asyncio.gather(*futures, return_exceptions=True)
+        for cid in channel_ids:
+            if not self._pending_writes.get(cid, True):
+                del self._pending_writes[cid]
+        if channel_id is None:
+            channel_ids = list(self._failed_writes)
+        failures = {
+            cid: self._failed_writes.pop(cid)
+            for cid in channel_ids
+            if cid in self._failed_writes
+        }
+        if failures:
+            raise ArchiveWriteError(failures)
+
     # ------------------------------------------------------------------
     # Archiving feature flag check
     # ------------------------------------------------------------------
 
+    async def _warm_parent_channels(self, channel_ids: List[int]) -> None:
+        """Resolve parents of channels missing from config in one off-loop query."""
+        sc = getattr(self._database(), "server_config", None)
+        warm = getattr(sc, "warm_parent_channels", None)
+        if warm is not None and channel_ids:
+            await warm(channel_ids)
+
     def _is_archiving_enabled(self, channel_id: int) -> bool:
         """Check if archiving is enabled for this channel via server_config."""
-        db = _get_db()
+        db = self._database()
         sc = getattr(db, "server_config", None)
         if sc is None:
             return True
@@ -415,30 +719,6 @@ class ArchiveTask:
             return True
         return False
 
-    # ------------------------------------------------------------------
-    # Rate-limit wait helper
-    # ------------------------------------------------------------------
-
-    async def _wait_for_rate_limit(self) -> None:
-        """Handles rate limiting for Discord API calls."""
-        now = datetime.now()
-        self.api_call_count += 1
-
-        time_since_last = (now - self.last_api_call).total_seconds()
-
-        # Basic throttling — ensure at least 0.1 s between calls
-        if time_since_last < 0.1:
-            await asyncio.sleep(0.1 - time_since_last)
-
-        # Only enforce rate limits if we're approaching them
-        if self.api_call_count >= 45:  # conservative buffer before hitting 50
-            await asyncio.sleep(1.0)
-            self.api_call_count = 0
-            self.rate_limit_reset = datetime.now() + timedelta(seconds=60)
-            self.rate_limit_remaining = 50
-
-        self.last_api_call = now
-
     # ------------------------------------------------------------------
     # Fetch archived threads (with retry)
     # ------------------------------------------------------------------
@@ -526,44 +806,184 @@ class ArchiveTask:
     # ------------------------------------------------------------------
 
     async def _store_messages_and_reactions(
-        self, processed_messages: List[Dict[str, Any]]
+        self, processed_messages: List[Dict[str, Any]], new_count: int = 0
     ) -> None:
-        """Store messages and their granular reaction data.
-
-        Calls ``db.store_messages`` in a single batch, then iterates over
-        each message to extract and upsert per-emoji reaction rows via
-        ``db.upsert_reactions_batch``.
+        """Queue a batch of messages and their granular reaction data for storage.
+
+        The batch is written by a DB worker as one ordered unit: the page's
+        collected channels and members (one bulk upsert each), then
+        ``db.store_messages``, then one ``db.bulk_upsert_reactions`` call that
+        syncs reactions for every message in the batch that has any.
+        Batches are spread across the DB workers; this coroutine returns once the batch is queued so the history fetcher can
+        keep paging (``_drain_db_writes`` waits for completion).  ``new_count``
+        messages are counted as archived once the batch is written.
         """
-        await self._db_operation(
-            lambda db: db.store_messages(processed_messages)
-        )
-
-        # Yield control between batch store and per-message reaction
-        # iteration (starvation insurance).
-        await asyncio.sleep(0)
-
+        if not processed_messages:
+            return
+        reaction_message_ids: List[int] = []
+        reaction_rows: List[Dict[str, Any]] = []
         for msg in processed_messages:
             rows: List[Dict[str, Any]] = msg.pop("_reaction_rows", [])
             if rows:
-                msg_id: int = msg["message_id"]
-                await self._db_operation(
-                    lambda db, mid=msg_id, r=rows, gid=self.guild_id: (
-                        db.upsert_reactions_batch(mid, r, guild_id=gid)
-                    )
+                reaction_message_ids.append(msg["message_id"])
+                reaction_rows.extend(rows)
+
+        guild_id = self.guild_id
+        entities, self._page_entities = self._page_entities, PageEntities()
+
+        if reaction_message_ids:
+            # Live reaction events still buffered by LoggerCog must land before
+            # this sync, or a late flush would undo it.
+            logger_cog = self.bot.get_cog("LoggerCog") if hasattr(self.bot, "get_cog") else None
+            if logger_cog is not None and hasattr(logger_cog, "settle_reactions"):
+                await logger_cog.settle_reactions(reaction_message_ids)
+
+        async def _write(db) -> None:
+            self._write_entities(db, entities, guild_id)
+            await db.store_messages(processed_messages)
+            if reaction_rows:
+                db.bulk_upsert_reactions(
+                    reaction_message_ids, reaction_rows, guild_id=guild_id
                 )
 
+        await self._db_write(
+            _write,
+            channel_id=processed_messages[0]["channel_id"],
+            items=len(processed_messages),
+            new_messages=new_count,
+        )
+
+    @staticmethod
+    def _write_entities(db, entities: PageEntities, guild_id: int) -> None:
+        if entities.channels:
+            db.bulk_upsert_channels(list(entities.channels.values()), guild_id=guild_id)
+        if entities.members:
+            db.bulk_upsert_members(list(entities.members.values()), guild_id=guild_id)
+
+    async def _flush_page_entities(self, channel_id: int) -> None:
+        """Queue entities collected for messages that were never stored."""
+        if not self._page_entities:
+            return
+        entities, self._page_entities = self._page_entities, PageEntities()
+        guild_id = self.guild_id
+        await self._db_write(
+            lambda db: self._write_entities(db, entities, guild_id),
+            channel_id=channel_id,
+        )
+
+    # ------------------------------------------------------------------
+    # Batch processor: one existence query + entity dedupe per page
+    # ------------------------------------------------------------------
+
+    async def _process_batch(
+        self,
+        batch: List[discord.Message],
+        channel_id: int,
+        *,
+        skip_existing: Optional[bool] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Process a page of messages with a single existence query.
+
+        ``skip_existing`` drops messages already in the DB; by default that
+        happens in fast-fill mode, or unless in-depth / reaction refetching
+        was requested.  Returns ``(processed_messages, new_count)``.
+        """
+        if not batch:
+            return [], 0
+        if skip_existing is None:
+            skip_existing = self.fast_fill or not (self.in_depth or self.fetch_reactions)
+
+        batch_ids = [msg.id for msg in batch]
+        existing_ids: set = await self._db_operation(
+            lambda db: db.get_existing_message_ids(batch_ids)
+        )
+
+        processed_messages: List[Dict[str, Any]] = []
+        for msg in batch:
+            exists = msg.id in existing_ids
+            if exists and skip_existing:
+                continue
+            processed_msg = await self._process_message(
+                msg, channel_id, message_exists=exists
+            )
+            if processed_msg:
+                processed_messages.append(processed_msg)
+
+        new_count = sum(
+            1 for msg in processed_messages if msg["message_id"] not in existing_ids
+        )
+        return processed_messages, new_count
+
     # ------------------------------------------------------------------
     # Single-message processor (ported from scripts/archive_discord.py)
     # ------------------------------------------------------------------
 
     async def _process_message(
-        self, message: discord.Message, channel_id: int
+        self,
+        message: discord.Message,
+        channel_id: int,
+        message_exists: Optional[bool] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Process a single Discord message, recording ``process`` stage metrics."""
+        started = time.monotonic()
+        processed = await self._process_message_inner(message, channel_id, message_exists)
+        self._record_stage(
+            "process", busy=time.monotonic() - started, failed=processed is None
+        )
+        return processed
+
+    def _member_row(
+        self, user: Any, guild: Optional[discord.Guild]
+    ) -> Optional[Dict[str, Any]]:
+        """Build a member upsert row, or None if it was upserted recently."""
+        cache_key = f"{user.id}_{user.name}"
+        current_time = time.time()
+        if (
+            current_time - self.member_update_cache.get(cache_key, 0)
+            <= self.member_update_cache_timeout
+        ):
+            return None
+        self.member_update_cache[cache_key] = current_time
+
+        member = guild.get_member(user.id) if guild else None
+        return {
+            "member_id": user.id,
+            "username": user.name,
+            "server_nick": getattr(user, "display_name", None),
+            "global_name": getattr(user, "global_name", None),
+            "avatar_url": str(user.avatar.url) if user.avatar else None,
+            "discriminator": getattr(user, "discriminator", None),
+            "bot": getattr(user, "bot", False),
+            "system": getattr(user, "system", False),
+            "accent_color": getattr(user, "accent_color", None),
+            "banner_url": (
+                str(user.banner.url) if getattr(user, "banner", None) else None
+            ),
+            "discord_created_at": (
+                user.created_at.isoformat() if hasattr(user, "created_at") else None
+            ),
+            "guild_join_date": (
+                member.joined_at.isoformat() if member and member.joined_at else None
+            ),
+            "role_ids": (
+                json.dumps([r.id for r in member.roles])
+                if member and member.roles
+                else None
+            ),
+        }
+
+    async def _process_message_inner(
+        self,
+        message: discord.Message,
+        channel_id: int,
+        message_exists: Optional[bool] = None,
     ) -> Optional[Dict[str, Any]]:
         """Process a single Discord message into a Supabase-ready dict.
 
-        Handles reaction fetching, member upserts, channel creation,
-        and thread-parent resolution.  Returns ``None`` on failure so
-        callers can safely skip.
+        Handles reaction fetching and thread-parent resolution; members and
+        channels are collected into ``self._page_entities`` and upserted in
+        bulk with the batch.  Returns ``None`` on failure so callers can
+        safely skip.
         """
         try:
             # ---- reaction counting -------------------------------------------
@@ -580,9 +1000,10 @@ class ArchiveTask:
             elif reaction_count > 0 and message.reactions:
                 reactor_ids: set[int] = set()
                 try:
-                    message_exists: bool = await self._db_operation(
-                        lambda db: db.message_exists(message.id)
-                    )
+                    if message_exists is None:
+                        message_exists = await self._db_operation(
+                            lambda db: db.message_exists(message.id)
+                        )
                     if self.in_depth or self.fetch_reactions or not message_exists:
                         self.logger.debug(
                             "Processing reactions for message %d: %d types, %d total",
@@ -605,100 +1026,15 @@ class ArchiveTask:
                                             "user_id": user.id,
                                             "emoji": emoji_str_val,
                                         })
-                                        # Check cache before upserting member
-                                        cache_key = f"{user.id}_{user.name}"
-                                        cache_time = self.member_update_cache.get(
-                                            cache_key, 0
-                                        )
-                                        current_time = time.time()
-
-                                        if (
-                                            current_time - cache_time
-                                            > self.member_update_cache_timeout
-                                        ):
-                                            member = (
-                                                guild.get_member(user.id)
-                                                if guild
-                                                else None
-                                            )
-                                            role_ids = (
-                                                json.dumps(
-                                                    [r.id for r in member.roles]
-                                                )
-                                                if member and member.roles
-                                                else None
-                                            )
-                                            guild_join_date = (
-                                                member.joined_at.isoformat()
-                                                if member and member.joined_at
-                                                else None
-                                            )
-
-                                            await self._db_operation(
-                                                lambda db,
-                                                gid=self.guild_id: (
-                                                    db.create_or_update_member(
-                                                        user.id,
-                                                        user.name,
-                                                        getattr(
-                                                            user,
-                                                            "display_name",
-                                                            None,
-                                                        ),
-                                                        getattr(
-                                                            user,
-                                                            "global_name",
-                                                            None,
-                                                        ),
-                                                        (
-                                                            str(user.avatar.url)
-                                                            if user.avatar
-                                                            else None
-                                                        ),
-                                                        getattr(
-                                                            user,
-                                                            "discriminator",
-                                                            None,
-                                                        ),
-                                                        getattr(
-                                                            user, "bot", False
-                                                        ),
-                                                        getattr(
-                                                            user, "system", False
-                                                        ),
-                                                        getattr(
-                                                            user,
-                                                            "accent_color",
-                                                            None,
-                                                        ),
-                                                        (
-                                                            str(user.banner.url)
-                                                            if getattr(
-                                                                user,
-                                                                "banner",
-                                                                None,
-                                                            )
-                                                            else None
-                                                        ),
-                                                        (
-                                                            user.created_at.isoformat()
-                                                            if hasattr(
-                                                                user, "created_at"
-                                                            )
-                                                            else None
-                                                        ),
-                                                        guild_join_date,
-                                                        role_ids,
-                                                        guild_id=gid,
-                                                    )
-                                                )
-                                            )
-                                            self.member_update_cache[
-                                                cache_key
-                                            ] = current_time
+                                        row = self._member_row(user, guild)
+                                        if row:
+                                            self._page_entities.add_member(row)
 
                                 await self.rate_limiter.execute(
-                                    f"reaction_{message.id}_{reaction}", fetch_users
+                                    f"reaction_{message.id}_{reaction}",
+                                    fetch_users,
+                                    route="discord.reactions",
+                                    priority=BACKGROUND,
                                 )
 
                             except Exception as exc:
@@ -722,57 +1058,10 @@ class ArchiveTask:
 
             # ---- message author (skip in fast-fill) --------------------------
             if not self.fast_fill and hasattr(message.author, "id"):
-                cache_key = f"{message.author.id}_{message.author.name}"
-                cache_time = self.member_update_cache.get(cache_key, 0)
-                current_time = time.time()
-
-                if current_time - cache_time > self.member_update_cache_timeout:
-                    guild = await self._resolve_guild(self.guild_id)
-                    member = (
-                        guild.get_member(message.author.id) if guild else None
-                    )
-                    role_ids = (
-                        json.dumps([r.id for r in member.roles])
-                        if member and member.roles
-                        else None
-                    )
-                    guild_join_date = (
-                        member.joined_at.isoformat()
-                        if member and member.joined_at
-                        else None
-                    )
-
-                    await self._db_operation(
-                        lambda db, gid=self.guild_id: db.create_or_update_member(
-                            message.author.id,
-                            message.author.name,
-                            getattr(message.author, "display_name", None),
-                            getattr(message.author, "global_name", None),
-                            (
-                                str(message.author.avatar.url)
-                                if message.author.avatar
-                                else None
-                            ),
-                            getattr(message.author, "discriminator", None),
-                            getattr(message.author, "bot", False),
-                            getattr(message.author, "system", False),
-                            getattr(message.author, "accent_color", None),
-                            (
-                                str(message.author.banner.url)
-                                if getattr(message.author, "banner", None)
-                                else None
-                            ),
-                            (
-                                message.author.created_at.isoformat()
-                                if hasattr(message.author, "created_at")
-                                else None
-                            ),
-                            guild_join_date,
-                            role_ids,
-                            guild_id=gid,
-                        )
-                    )
-                    self.member_update_cache[cache_key] = current_time
+                guild = await self._resolve_guild(self.guild_id)
+                row = self._member_row(message.author, guild)
+                if row:
+                    self._page_entities.add_member(row)
 
             # ---- thread parent resolution ------------------------------------
             # Threads (regular text threads and forum posts) are stored against
@@ -813,20 +1102,14 @@ class ArchiveTask:
                 ):
                     parent_id = actual_channel.parent.id
 
-                await self._db_operation(
-                    lambda db,
-                    gid=self.guild_id,
-                    ct=ch_type,
-                    pid=parent_id: db.create_or_update_channel(
-                        channel_id=actual_channel.id,
-                        channel_name=actual_channel.name,
-                        nsfw=getattr(actual_channel, "nsfw", False),
-                        category_id=category_id,
-                        guild_id=gid,
-                        channel_type=ct,
-                        parent_id=pid,
-                    )
-                )
+                self._page_entities.add_channel({
+                    "channel_id": actual_channel.id,
+                    "channel_name": actual_channel.name,
+                    "nsfw": getattr(actual_channel, "nsfw", False),
+                    "category_id": category_id,
+                    "channel_type": ch_type,
+                    "parent_id": parent_id,
+                })
 
             # ---- build processed message dict --------------------------------
             processed_message: Dict[str, Any] = {
@@ -971,6 +1254,7 @@ class ArchiveTask:
                 for c in guild.text_channels
                 if c.id not in self.skip_channels
             ]
+            await self._warm_parent_channels([c.id for c in all_text_channels])
             for channel in all_text_channels:
                 if not self._is_archiving_enabled(channel.id):
                     continue
@@ -989,6 +1273,7 @@ class ArchiveTask:
                 if isinstance(f, discord.ForumChannel)
                 and f.id not in self.skip_channels
             ]
+            await self._warm_parent_channels([f.id for f in all_forums])
             for forum in all_forums:
                 if not self._is_archiving_enabled(forum.id):
                     continue
@@ -1125,7 +1410,10 @@ class ArchiveTask:
                 exc,
             )
         finally:
-            pass
+            await self._flush_page_entities(channel_id)
+            # The stored date range is this channel's checkpoint: later passes
+            # read it back, so every page write must land (or fail) first.
+            await self._drain_db_writes(channel_id)
 
     # ------------------------------------------------------------------
     # Date-range archive
@@ -1272,87 +1560,21 @@ class ArchiveTask:
                     )
                     last_progress_log_time = current_time_epoch
 
-            # Message selection
-            if self.fast_fill:
-                current_batch.append(message)
-            else:
-                process_this_message = False
-                if self.in_depth or self.fetch_reactions:
-                    process_this_message = True
-                else:
-                    message_exists = await self._db_operation(
-                        lambda db: db.message_exists(message.id)
-                    )
-                    if not message_exists:
-                        process_this_message = True
-
-                if process_this_message:
-                    current_batch.append(message)
+            # Message selection: existence is checked once per batch in
+            # _process_batch rather than per message.
+            current_batch.append(message)
 
             # Store batch when it reaches the threshold
             if len(current_batch) >= 100:
                 try:
-                    if self.fast_fill:
-                        batch_ids = [msg.id for msg in current_batch]
-                        existing_in_db = await self._db_operation(
-                            lambda db: db.get_messages_by_ids(batch_ids)
+                    processed_messages, batch_new = await self._process_batch(
+                        current_batch, channel_id
+                    )
+                    if processed_messages:
+                        new_message_count += batch_new
+                        await self._store_messages_and_reactions(
+                            processed_messages, new_count=batch_new
                         )
-                        existing_ids = {
-                            msg["message_id"] for msg in existing_in_db
-                        }
-                        messages_to_process = [
-                            msg
-                            for msg in current_batch
-                            if msg.id not in existing_ids
-                        ]
-
-                        if messages_to_process:
-                            processed_messages = []
-                            for msg in messages_to_process:
-                                processed_msg = (
-                                    await self._process_message(
-                                        msg, channel_id
-                                    )
-                                )
-                                if processed_msg:
-                                    processed_messages.append(processed_msg)
-                            if processed_messages:
-                                new_message_count += len(processed_messages)
-                                await self._store_messages_and_reactions(
-                                    processed_messages
-                                )
-                    else:
-                        processed_messages = []
-                        for msg in current_batch:
-                            processed_msg = await self._process_message(
-                                msg, channel_id
-                            )
-                            if processed_msg:
-                                processed_messages.append(processed_msg)
-                        if processed_messages:
-                            pre_existing_ids: set = set()
-                            if not self.in_depth:
-                                existing_in_db = await self._db_operation(
-                                    lambda db: db.get_messages_by_ids(
-                                        [
-                                            msg["message_id"]
-                                            for msg in processed_messages
-                                        ]
-                                    )
-                                )
-                                pre_existing_ids = {
-                                    msg["message_id"]
-                                    for msg in existing_in_db
-                                }
-                            new_messages = [
-                                msg
-                                for msg in processed_messages
-                                if msg["message_id"] not in pre_existing_ids
-                            ]
-                            new_message_count += len(new_messages)
-                            await self._store_messages_and_reactions(
-                                processed_messages
-                            )
                     current_batch = []
                     await asyncio.sleep(0.1)
                 except Exception as exc:
@@ -1382,65 +1604,14 @@ class ArchiveTask:
         # Process any remaining messages
         if current_batch:
             try:
-                if self.fast_fill:
-                    batch_ids = [msg.id for msg in current_batch]
-                    existing_in_db = await self._db_operation(
-                        lambda db: db.get_messages_by_ids(batch_ids)
+                processed_messages, batch_new = await self._process_batch(
+                    current_batch, channel_id
+                )
+                if processed_messages:
+                    new_message_count += batch_new
+                    await self._store_messages_and_reactions(
+                        processed_messages, new_count=batch_new
                     )
-                    existing_ids = {
-                        msg["message_id"] for msg in existing_in_db
-                    }
-                    messages_to_process = [
-                        msg
-                        for msg in current_batch
-                        if msg.id not in existing_ids
-                    ]
-
-                    if messages_to_process:
-                        processed_messages = []
-                        for msg in messages_to_process:
-                            processed_msg = await self._process_message(
-                                msg, channel_id
-                            )
-                            if processed_msg:
-                                processed_messages.append(processed_msg)
-                        if processed_messages:
-                            new_message_count += len(processed_messages)
-                            await self._store_messages_and_reactions(
-                                processed_messages
-                            )
-                else:
-                    processed_messages = []
-                    for msg in current_batch:
-                        processed_msg = await self._process_message(
-                            msg, channel_id
-                        )
-                        if processed_msg:
-                            processed_messages.append(processed_msg)
-                    if processed_messages:
-                        pre_existing_ids = set()
-                        if not self.in_depth:
-                            existing_in_db = await self._db_operation(
-                                lambda db: db.get_messages_by_ids(
-                                    [
-                                        msg["message_id"]
-                                        for msg in processed_messages
-                                    ]
-                                )
-                            )
-                            pre_existing_ids = {
-                                msg["message_id"]
-                                for msg in existing_in_db
-                            }
-                        new_messages = [
-                            msg
-                            for msg in processed_messages
-                            if msg["message_id"] not in pre_existing_ids
-                        ]
-                        new_message_count += len(new_messages)
-                        await self._store_messages_and_reactions(
-                            processed_messages
-                        )
             except Exception as exc:
                 self.logger.error(
                     "Failed to store final date range batch: %s", exc
@@ -1448,12 +1619,11 @@ class ArchiveTask:
 
         self.logger.info(
             "Date range archive complete for #%s - Processed %d messages, "
-            "saved %d new to Supabase",
+            "queued %d new for Supabase",
             channel_name,
             message_counter,
             new_message_count,
         )
-        self.total_messages_archived += new_message_count
 
         if self.total_days_in_range > 0:
             self.logger.info(
@@ -1592,64 +1762,28 @@ class ArchiveTask:
                                 ):
                                     continue
 
-                                message_exists = await self._db_operation(
-                                    lambda db: db.message_exists(message.id)
-                                )
-                                if (
-                                    self.in_depth
-                                    or self.fetch_reactions
-                                    or not message_exists
-                                ):
-                                    current_batch.append(message)
+                                # Existence is checked once per batch in _process_batch.
+                                current_batch.append(message)
 
                                 if len(current_batch) >= 100:
                                     try:
-                                        processed_messages = []
-                                        for msg in current_batch:
-                                            processed_msg = (
-                                                await self._process_message(
-                                                    msg, channel_id
-                                                )
-                                            )
-                                            if processed_msg:
-                                                processed_messages.append(
-                                                    processed_msg
-                                                )
+                                        processed_messages, batch_new = await self._process_batch(
+                                            current_batch, channel_id
+                                        )
 
                                         if processed_messages:
-                                            pre_existing = set(
-                                                msg["message_id"]
-                                                for msg in await self._db_operation(
-                                                    lambda db: db.get_messages_by_ids(
-                                                        [
-                                                            msg[
-                                                                "message_id"
-                                                            ]
-                                                            for msg in processed_messages
-                                                        ]
-                                                    )
-                                                )
-                                            )
-                                            new_messages = [
-                                                msg
-                                                for msg in processed_messages
-                                                if msg["message_id"]
-                                                not in pre_existing
-                                            ]
-                                            new_message_count += len(
-                                                new_messages
-                                            )
+                                            new_message_count += batch_new
 
                                             self.logger.info(
                                                 "Storing batch of %d messages "
                                                 "from #%s (%d new, %d existing)",
                                                 len(processed_messages),
                                                 channel_name,
-                                                len(new_messages),
-                                                len(pre_existing),
+                                                batch_new,
+                                                len(processed_messages) - batch_new,
                                             )
                                             await self._store_messages_and_reactions(
-                                                processed_messages
+                                                processed_messages, new_count=batch_new
                                             )
 
                                         current_batch = []
@@ -1682,44 +1816,22 @@ class ArchiveTask:
                     # Process remaining messages
                     if current_batch:
                         try:
-                            processed_messages = []
-                            for msg in current_batch:
-                                processed_msg = (
-                                    await self._process_message(
-                                        msg, channel_id
-                                    )
-                                )
-                                if processed_msg:
-                                    processed_messages.append(processed_msg)
+                            processed_messages, batch_new = await self._process_batch(
+                                current_batch, channel_id
+                            )
 
                             if processed_messages:
-                                pre_existing = set(
-                                    msg["message_id"]
-                                    for msg in await self._db_operation(
-                                        lambda db: db.get_messages_by_ids(
-                                            [
-                                                msg["message_id"]
-                                                for msg in processed_messages
-                                            ]
-                                        )
-                                    )
-                                )
-                                new_messages = [
-                                    msg
-                                    for msg in processed_messages
-                                    if msg["message_id"] not in pre_existing
-                                ]
-                                new_message_count += len(new_messages)
+                                new_message_count += batch_new
 
                                 self.logger.debug(
                                     "Storing final batch of %d messages "
                                     "from #%s (%d new)",
                                     len(processed_messages),
                                     channel_name,
-                                    len(new_messages),
+                                    batch_new,
                                 )
                                 await self._store_messages_and_reactions(
-                                    processed_messages
+                                    processed_messages, new_count=batch_new
                                 )
                         except Exception as exc:
                             self.logger.error(
@@ -1789,43 +1901,23 @@ class ArchiveTask:
 
                 if len(current_batch) >= 100:
                     try:
-                        processed_messages = []
-                        for msg in current_batch:
-                            processed_msg = await self._process_message(
-                                msg, channel_id
-                            )
-                            if processed_msg:
-                                processed_messages.append(processed_msg)
+                        processed_messages, batch_new = await self._process_batch(
+                            current_batch, channel_id, skip_existing=False
+                        )
 
                         if processed_messages:
-                            pre_existing = set(
-                                msg["message_id"]
-                                for msg in await self._db_operation(
-                                    lambda db: db.get_messages_by_ids(
-                                        [
-                                            msg["message_id"]
-                                            for msg in processed_messages
-                                        ]
-                                    )
-                                )
-                            )
-                            new_messages = [
-                                msg
-                                for msg in processed_messages
-                                if msg["message_id"] not in pre_existing
-                            ]
-                            new_message_count += len(new_messages)
+                            new_message_count += batch_new
 
                             self.logger.info(
                                 "Storing batch of %d messages from #%s "
                                 "(%d new, %d existing)",
                                 len(processed_messages),
                                 channel_name,
-                                len(new_messages),
-                                len(pre_existing),
+                                batch_new,
+                                len(processed_messages) - batch_new,
                             )
                             await self._store_messages_and_reactions(
-                                processed_messages
+                                processed_messages, new_count=batch_new
                             )
                         current_batch = []
                         await asyncio.sleep(0.1)
@@ -1836,43 +1928,23 @@ class ArchiveTask:
 
             if current_batch:
                 try:
-                    processed_messages = []
-                    for msg in current_batch:
-                        processed_msg = await self._process_message(
-                            msg, channel_id
-                        )
-                        if processed_msg:
-                            processed_messages.append(processed_msg)
+                    processed_messages, batch_new = await self._process_batch(
+                        current_batch, channel_id, skip_existing=False
+                    )
 
                     if processed_messages:
-                        pre_existing = set(
-                            msg["message_id"]
-                            for msg in await self._db_operation(
-                                lambda db: db.get_messages_by_ids(
-                                    [
-                                        msg["message_id"]
-                                        for msg in processed_messages
-                                    ]
-                                )
-                            )
-                        )
-                        new_messages = [
-                            msg
-                            for msg in processed_messages
-                            if msg["message_id"] not in pre_existing
-                        ]
-                        new_message_count += len(new_messages)
+                        new_message_count += batch_new
 
                         self.logger.info(
                             "Storing batch of %d messages from #%s "
                             "(%d new, %d existing)",
                             len(processed_messages),
                             channel_name,
-                            len(new_messages),
-                            len(pre_existing),
+                            batch_new,
+                            len(processed_messages) - batch_new,
                         )
                         await self._store_messages_and_reactions(
-                            processed_messages
+                            processed_messages, new_count=batch_new
                         )
                 except Exception as exc:
                     self.logger.error(
@@ -1911,43 +1983,23 @@ class ArchiveTask:
 
                 if len(current_batch) >= 100:
                     try:
-                        processed_messages = []
-                        for msg in current_batch:
-                            processed_msg = await self._process_message(
-                                msg, channel_id
-                            )
-                            if processed_msg:
-                                processed_messages.append(processed_msg)
+                        processed_messages, batch_new = await self._process_batch(
+                            current_batch, channel_id, skip_existing=False
+                        )
 
                         if processed_messages:
-                            pre_existing = set(
-                                msg["message_id"]
-                                for msg in await self._db_operation(
-                                    lambda db: db.get_messages_by_ids(
-                                        [
-                                            msg["message_id"]
-                                            for msg in processed_messages
-                                        ]
-                                    )
-                                )
-                            )
-                            new_messages = [
-                                msg
-                                for msg in processed_messages
-                                if msg["message_id"] not in pre_existing
-                            ]
-                            new_message_count += len(new_messages)
+                            new_message_count += batch_new
 
                             self.logger.info(
                                 "Storing batch of %d messages from #%s "
                                 "(%d new, %d existing)",
                                 len(processed_messages),
                                 channel_name,
-                                len(new_messages),
-                                len(pre_existing),
+                                batch_new,
+                                len(processed_messages) - batch_new,
                             )
                             await self._store_messages_and_reactions(
-                                processed_messages
+                                processed_messages, new_count=batch_new
                             )
                         current_batch = []
                         await asyncio.sleep(0.1)
@@ -1958,41 +2010,21 @@ class ArchiveTask:
 
             if current_batch:
                 try:
-                    processed_messages = []
-                    for msg in current_batch:
-                        processed_msg = await self._process_message(
-                            msg, channel_id
-                        )
-                        if processed_msg:
-                            processed_messages.append(processed_msg)
+                    processed_messages, batch_new = await self._process_batch(
+                        current_batch, channel_id, skip_existing=False
+                    )
 
                     if processed_messages:
-                        pre_existing = set(
-                            msg["message_id"]
-                            for msg in await self._db_operation(
-                                lambda db: db.get_messages_by_ids(
-                                    [
-                                        msg["message_id"]
-                                        for msg in processed_messages
-                                    ]
-                                )
-                            )
-                        )
-                        new_messages = [
-                            msg
-                            for msg in processed_messages
-                            if msg["message_id"] not in pre_existing
-                        ]
-                        new_message_count += len(new_messages)
+                        new_message_count += batch_new
 
                         self.logger.debug(
                             "Storing batch of %d messages from #%s (%d new)",
                             len(processed_messages),
                             channel_name,
-                            len(new_messages),
+                            batch_new,
                         )
                         await self._store_messages_and_reactions(
-                            processed_messages
+                            processed_messages, new_count=batch_new
                         )
                 except Exception as exc:
                     self.logger.error(
@@ -2059,47 +2091,22 @@ class ArchiveTask:
 
                         if len(current_batch) >= 100:
                             try:
-                                processed_messages = []
-                                for msg in current_batch:
-                                    processed_msg = (
-                                        await self._process_message(
-                                            msg, channel_id
-                                        )
-                                    )
-                                    if processed_msg:
-                                        processed_messages.append(
-                                            processed_msg
-                                        )
+                                processed_messages, batch_new = await self._process_batch(
+                                    current_batch, channel_id, skip_existing=False
+                                )
 
                                 if processed_messages:
-                                    pre_existing = set(
-                                        msg["message_id"]
-                                        for msg in await self._db_operation(
-                                            lambda db: db.get_messages_by_ids(
-                                                [
-                                                    msg["message_id"]
-                                                    for msg in processed_messages
-                                                ]
-                                            )
-                                        )
-                                    )
-                                    new_messages = [
-                                        msg
-                                        for msg in processed_messages
-                                        if msg["message_id"]
-                                        not in pre_existing
-                                    ]
-                                    new_message_count += len(new_messages)
+                                    new_message_count += batch_new
 
                                     self.logger.debug(
                                         "Storing batch of %d messages from "
                                         "gap in #%s (%d new)",
                                         len(processed_messages),
                                         channel_name,
-                                        len(new_messages),
+                                        batch_new,
                                     )
                                     await self._store_messages_and_reactions(
-                                        processed_messages
+                                        processed_messages, new_count=batch_new
                                     )
                                     if gap_message_count % 100 == 0:
                                         self.logger.debug(
@@ -2118,44 +2125,22 @@ class ArchiveTask:
 
                     if current_batch:
                         try:
-                            processed_messages = []
-                            for msg in current_batch:
-                                processed_msg = (
-                                    await self._process_message(
-                                        msg, channel_id
-                                    )
-                                )
-                                if processed_msg:
-                                    processed_messages.append(processed_msg)
+                            processed_messages, batch_new = await self._process_batch(
+                                current_batch, channel_id, skip_existing=False
+                            )
 
                             if processed_messages:
-                                pre_existing = set(
-                                    msg["message_id"]
-                                    for msg in await self._db_operation(
-                                        lambda db: db.get_messages_by_ids(
-                                            [
-                                                msg["message_id"]
-                                                for msg in processed_messages
-                                            ]
-                                        )
-                                    )
-                                )
-                                new_messages = [
-                                    msg
-                                    for msg in processed_messages
-                                    if msg["message_id"] not in pre_existing
-                                ]
-                                new_message_count += len(new_messages)
+                                new_message_count += batch_new
 
                                 self.logger.debug(
                                     "Storing final gap batch of %d messages "
                                     "from #%s (%d new)",
                                     len(processed_messages),
                                     channel_name,
-                                    len(new_messages),
+                                    batch_new,
                                 )
                                 await self._store_messages_and_reactions(
-                                    processed_messages
+                                    processed_messages, new_count=batch_new
                                 )
                         except Exception as exc:
                             self.logger.error(
@@ -2174,11 +2159,10 @@ class ArchiveTask:
             channel_name,
         )
         self.logger.info(
-            "Archive complete for #%s - %d new messages saved to Supabase",
+            "Archive complete for #%s - %d new messages queued for Supabase",
             channel_name,
             new_message_count,
         )
-        self.total_messages_archived += new_message_count
 
         channel_duration = (
             datetime.now(timezone.utc) - channel_start_time
@@ -2296,7 +2280,12 @@ class ArchiveTask:
                 self.total_messages_archived,
             )
 
-        # Shut down the DB worker
+        # Flush queued writes, then shut down the DB workers
+        try:
+            await self._drain_db_writes()
+        except ArchiveWriteError as exc:
+            for failed_id, error in exc.failures.items():
+                per_channel_errors.setdefault(failed_id, error)
         self._shutdown_db_worker()
 
         duration = time.monotonic() - start_mono
@@ -23,6 +23,8 @@ from typing import Optional
 
 from discord.ext import commands, tasks
 
+from src.common.db_executor import run_db_call
+
 logger = logging.getLogger('DiscordBot')
 
 VIDEO_EXTENSIONS = ('.mp4', '.mov', '.webm')
@@ -158,7 +160,7 @@ class CompetitionCog(commands.Cog):
             return
 
         # Restore voting state if the bot restarted mid-vote
-        active = await asyncio.to_thread(self.db.get_active_competitions)
+        active = await run_db_call(self.db.get_active_competitions)
         for comp in active:
             ends_at = self._parse_dt(comp.get('voting_end'))
             if not ends_at:
@@ -174,7 +176,7 @@ class CompetitionCog(commands.Cog):
             questions_thread_id = comp.get('questions_thread_id')
 
             # Restore next entry number from max existing entry
-            entries = await asyncio.to_thread(self.db.get_competition_entries, comp['id'], guild_id)
+            entries = await run_db_call(self.db.get_competition_entries, comp['id'], guild_id)
             max_num = max((e.get('entry_number', 0) or 0 for e in entries), default=0)
             next_entry_number = max_num + 1
             self._register_active_competition(
@@ -268,7 +270,7 @@ class CompetitionCog(commands.Cog):
 
             # Record in DB
             if self.db:
-                await asyncio.to_thread(self.db.upsert_competition_entry, {
+                await run_db_call(self.db.upsert_competition_entry, {
                     'competition_id': state['competition_id'],
                     'entry_type': 'community',
                     'message_id': message.id,
@@ -321,7 +323,7 @@ class CompetitionCog(commands.Cog):
             return
 
         try:
-            scheduled = await asyncio.to_thread(self.db.get_scheduled_competitions)
+            scheduled = await run_db_call(self.db.get_scheduled_competitions)
             for comp in scheduled:
                 starts_at = self._parse_dt(comp.get('voting_start'))
                 if not starts_at:
@@ -360,7 +362,7 @@ class CompetitionCog(commands.Cog):
         competition_id = comp['id']
         guild_id = self._resolve_guild_id(comp=comp)
         try:
-            entry_rows = await asyncio.to_thread(self.db.get_competition_entries, competition_id, guild_id)
+            entry_rows = await run_db_call(self.db.get_competition_entries, competition_id, guild_id)
             if not entry_rows:
                 logger.warning(f"Scheduled voting for {slug} but no entries — skipping")
                 return
@@ -406,9 +408,9 @@ class CompetitionCog(commands.Cog):
             # Persist entry numbers
             for e in refreshed:
                 if e.get('entry_number'):
-                    await asyncio.to_thread(self.db.upsert_competition_entry, e, guild_id=guild_id)
+                    await run_db_call(self.db.upsert_competition_entry, e, guild_id=guild_id)
 
-            await asyncio.to_thread(self.db.update_competition, slug, {
+            await run_db_call(self.db.update_competition, slug, {
                 'status': 'voting',
                 'voting_started_at': datetime.now(timezone.utc).isoformat(),
                 'voting_end': voting_end.isoformat(),
@@ -515,7 +517,7 @@ class CompetitionCog(commands.Cog):
         if not await self.bot.is_owner(ctx.author):
             return
         guild_id = getattr(getattr(ctx, 'guild', None), 'id', None) or self._default_guild_id()
-        comp = await asyncio.to_thread(self.db.get_competition, slug, guild_id)
+        comp = await run_db_call(self.db.get_competition, slug, guild_id)
         if not comp:
             await ctx.send(f"No competition found with slug `{slug}`")
             return
@@ -526,7 +528,7 @@ class CompetitionCog(commands.Cog):
 
         await ctx.send(f"Posting test voting for `{slug}` to <#{channel_id}>...")
 
-        entry_rows = await asyncio.to_thread(self.db.get_competition_entries, comp['id'], guild_id)
+        entry_rows = await run_db_call(self.db.get_competition_entries, comp['id'], guild_id)
         if not entry_rows:
             await ctx.send("No entries found.")
             return
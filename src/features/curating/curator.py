@@ -4,11 +4,49 @@ import os
 import logging
 import traceback
 import json
+import re
+import time
+from collections import OrderedDict
 from src.common.db_handler import DatabaseHandler
+from src.common.db_executor import run_db_call
+from src.common.env import env_float, env_int
 from src.common.base_bot import BaseDiscordBot
 from src.common.error_handler import handle_errors
 from src.common import discord_utils
 
+# Link hosts whose URLs embed a video on Discord (natively or via a mirror).
+ALLOWED_EMBED_DOMAINS = (
+    'youtube.com', 'youtu.be',    # YouTube
+    'vimeo.com',                  # Vimeo
+    'tiktok.com',                 # TikTok
+    'streamable.com',             # Streamable
+    'twitch.tv',                  # Twitch
+    'fixupx.com',                 # FixupX
+    'fxtwitter.com',              # Twitter Embed Fixes
+    'vxtwitter.com',
+    'twittpr.com',
+    'ddinstagram.com',            # Instagram Embed Fix
+    'rxddit.com'                  # Reddit Embed Fix
+)
+
+# One alternation compiled at import instead of a per-link scan of the list.
+# Matches anywhere in the link, as the original substring check did.
+_ALLOWED_DOMAIN_RE = re.compile(
+    '|'.join(re.escape(domain) for domain in ALLOWED_EMBED_DOMAINS), re.IGNORECASE
+)
+
+MEMBER_CACHE_TTL_SECONDS = env_float('CURATOR_MEMBER_CACHE_TTL_SECONDS', 600.0)
+MEMBER_CACHE_MAX_ENTRIES = env_int('CURATOR_MEMBER_CACHE_MAX_ENTRIES', 1024)
+
+
+def classify_links(content):
+    """Return (links, all_links_allowed, has_valid_link) for a message body."""
+    links = [word for word in content.split()
+             if 'http://' in word or 'https://' in word]
+    allowed = [bool(_ALLOWED_DOMAIN_RE.search(link)) for link in links]
+    return links, all(allowed), any(allowed)
+
+
 class ArtCurator(BaseDiscordBot):
     def __init__(self, logger=None, dev_mode=False, bot_ref=None):
         intents = discord.Intents.default()
@@ -47,6 +85,11 @@ class ArtCurator(BaseDiscordBot):
         
         # Dictionary to track messages waiting for reactions
         self._pending_reactions = {}
+
+        # Members fetched over REST, keyed by (guild_id, member_id) -> (member, expires_at)
+        self._member_cache = OrderedDict()
+        # Only used when there is no parent bot to share a handler with
+        self._own_db_handler = None
         
         # Register event handlers
         self.setup_events()
@@ -66,6 +109,7 @@ class ArtCurator(BaseDiscordBot):
         # Clear tracking dictionaries
         self._pending_reactions.clear()
         self._active_rejections.clear()
+        self._member_cache.clear()
         
         # Close the session
         if hasattr(self, 'http'):
@@ -108,6 +152,37 @@ class ArtCurator(BaseDiscordBot):
         self.logger.info(f"Using {'dev' if value else 'prod'} art channel: {self.art_channel_id}")
         self.logger.info(f"Using {'dev' if value else 'prod'} curator IDs: {self.curator_ids}")
         
+    @property
+    def db_handler(self):
+        """The parent bot's DatabaseHandler, so curation reuses its Supabase client."""
+        shared = getattr(self._bot_ref, 'db_handler', None)
+        if shared is not None:
+            return shared
+        if self._own_db_handler is None:
+            self._own_db_handler = DatabaseHandler(dev_mode=self.dev_mode)
+        return self._own_db_handler
+
+    async def resolve_member(self, guild, member_id):
+        """Return the guild member, preferring the gateway cache, then a TTL cache, then REST."""
+        member = guild.get_member(member_id)
+        if member is not None:
+            return member
+
+        key = (guild.id, member_id)
+        cached = self._member_cache.get(key)
+        if cached is not None:
+            member, expires_at = cached
+            if expires_at > time.monotonic():
+                self._member_cache.move_to_end(key)
+                return member
+            del self._member_cache[key]
+
+        member = await guild.fetch_member(member_id)
+        self._member_cache[key] = (member, time.monotonic() + MEMBER_CACHE_TTL_SECONDS)
+        while len(self._member_cache) > MEMBER_CACHE_MAX_ENTRIES:
+            self._member_cache.popitem(last=False)
+        return member
+
     def setup_events(self):
         @self.event
         async def on_ready():
@@ -130,20 +205,6 @@ class ArtCurator(BaseDiscordBot):
             # Check if message is in the art channel
             if message.channel.id == self.art_channel_id:
                 self.logger.info(f"Processing message in art channel from {message.author}")
-                allowed_domains = [
-                    'youtube.com', 'youtu.be',    # YouTube
-                    'vimeo.com',                  # Vimeo
-                    'tiktok.com',                 # TikTok
-                    'streamable.com',             # Streamable
-                    'twitch.tv',                  # Twitch
-                    'fixupx.com',                 # FixupX
-                    'fxtwitter.com',              # Twitter Embed Fixes
-                    'vxtwitter.com',
-                    'twittpr.com',
-                    'ddinstagram.com',            # Instagram Embed Fix
-                    'rxddit.com'                  # Reddit Embed Fix
-                ]
-
                 # Check if attachments are valid media files
                 has_valid_attachment = any(
                     (attachment.content_type and (
@@ -162,25 +223,12 @@ class ArtCurator(BaseDiscordBot):
                 if self.dev_mode:
                     self.logger.debug(f"Message has valid attachment: {has_valid_attachment}")
 
-                # Check for any links in the message
-                links = [word for word in message.content.split() 
-                        if 'http://' in word or 'https://' in word]
-                
+                # Check for any links in the message, and whether they come
+                # from allowed domains (all: keep embeds, any: track for reaction)
+                links, all_links_allowed, has_valid_link = classify_links(message.content)
+
                 if self.dev_mode:
                     self.logger.debug(f"Found links in message: {links}")
-                
-                # Check if all links are from allowed domains
-                all_links_allowed = all(
-                    any(domain in link.lower() for domain in allowed_domains)
-                    for link in links
-                ) if links else True  # True if no links present
-
-                # Check if any of the links are from allowed domains (for reaction purposes)
-                has_valid_link = any(
-                    domain in link.lower() 
-                    for domain in allowed_domains 
-                    for link in links
-                )
 
                 if self.dev_mode:
                     self.logger.debug(f"Message has valid link: {has_valid_link}")
@@ -194,17 +242,18 @@ class ArtCurator(BaseDiscordBot):
                         
                         # Check if user has already received the notification
                         try:
-                            member = await message.guild.fetch_member(message.author.id)
+                            member = await self.resolve_member(message.guild, message.author.id)
                             if member:
                                 # Get member's notifications from database
-                                db = DatabaseHandler(dev_mode=self.dev_mode)
-                                member_data = db.get_member(member.id)
+                                db = self.db_handler
+                                member_data = await run_db_call(db.get_member, member.id)
                                 
                                 # Create member if they don't exist
                                 if not member_data:
                                     role_ids = json.dumps([role.id for role in member.roles]) if member.roles else None
                                     guild_join_date = member.joined_at.isoformat() if member.joined_at else None
-                                    db.create_or_update_member(
+                                    await run_db_call(
+                                        db.create_or_update_member,
                                         member.id,
                                         member.name,
                                         member.display_name,
@@ -220,7 +269,7 @@ class ArtCurator(BaseDiscordBot):
                                         role_ids,
                                         guild_id=member.guild.id if member.guild else None,
                                     )
-                                    member_data = db.get_member(member.id)
+                                    member_data = await run_db_call(db.get_member, member.id)
                                 
                                 notifications = json.loads(member_data.get('notifications', '[]')) if member_data else []
                                 
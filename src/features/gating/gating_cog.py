@@ -7,6 +7,7 @@ from datetime import datetime, timedelta, timezone
 
 import discord
 from discord.ext import commands, tasks
+from src.common.db_executor import run_db_call
 from src.common.llm import get_llm_response
 from src.common.soul import BOT_VOICE
 from src.features.gating.intro_embed import build_application_embed, extract_approval_request_marker
@@ -505,15 +506,21 @@ class GatingCog(commands.Cog):
                 return guild, channel, cfg
         return None
 
-    def _stamp_with_retry(self, ar_id: str, msg_id: int) -> bool:
+    async def _stamp_with_retry(self, stamps: dict[str, int]) -> set[str]:
+        """Stamp posted_message_id for a batch off the loop; returns the ids that stuck."""
+        pending = dict(stamps)
+        stamped: set[str] = set()
         for attempt in range(STAMP_INLINE_RETRIES + 1):
-            if self.db.mark_approval_request_posted(ar_id, msg_id):
-                return True
-            if attempt < STAMP_INLINE_RETRIES:
+            if not pending:
+                break
+            done = await run_db_call(self.db.mark_approval_requests_posted, pending)
+            stamped |= done
+            pending = {ar_id: msg_id for ar_id, msg_id in pending.items() if ar_id not in done}
+            if pending and attempt < STAMP_INLINE_RETRIES:
                 logger.warning(
-                    f"GatingCog: retrying posted_message_id stamp for approval request {ar_id}"
+                    f"GatingCog: retrying posted_message_id stamp for approval requests {sorted(pending)}"
                 )
-        return False
+        return stamped
 
     async def _delete_reconciled_duplicate(self, msg: discord.Message, reason: str):
         try:
@@ -533,12 +540,14 @@ class GatingCog(commands.Cog):
             return
 
         try:
-            for row in self.db.list_unstamped_intros():
-                approval_request_id = row.get('approval_request_id')
-                message_id = row.get('message_id')
-                if not approval_request_id or not message_id:
-                    continue
-                self.db.mark_approval_request_posted(approval_request_id, int(message_id))
+            unstamped = await run_db_call(self.db.list_unstamped_intros)
+            stamps = {
+                row['approval_request_id']: int(row['message_id'])
+                for row in unstamped
+                if row.get('approval_request_id') and row.get('message_id')
+            }
+            if stamps:
+                await run_db_call(self.db.mark_approval_requests_posted, stamps)
         except Exception as e:
             logger.exception(f"GatingCog: failed DB-only approval intro reconciliation: {e}")
 
@@ -548,12 +557,13 @@ class GatingCog(commands.Cog):
                 return
             guild, intro_channel, _cfg = target
             cutoff = datetime.now(timezone.utc) - timedelta(hours=RECONCILE_HISTORY_HOURS)
-            seen_markers: set[str] = set()
             bot_user_id = getattr(getattr(self.bot, 'user', None), 'id', None)
             if bot_user_id is None:
                 logger.warning("GatingCog: skipping approval embed reconciliation; bot user unavailable")
                 return
 
+            # Newest marked embed per approval request; older duplicates go.
+            candidates: dict[str, discord.Message] = {}
             async for msg in intro_channel.history(
                 limit=RECONCILE_HISTORY_LIMIT,
                 after=cutoff,
@@ -564,44 +574,182 @@ class GatingCog(commands.Cog):
                 marker = extract_approval_request_marker(msg)
                 if not marker:
                     continue
-                if marker in seen_markers:
+                if marker in candidates:
                     await self._delete_reconciled_duplicate(msg, "older duplicate marker")
                     continue
-                seen_markers.add(marker)
+                candidates[marker] = msg
+            if not candidates:
+                return
+
+            markers = list(candidates)
+            approval_requests = await run_db_call(self.db.get_approval_requests, markers)
+            existing_intros = await run_db_call(self.db.get_pending_intros_by_approval_requests, markers)
 
-                ar = self.db.get_approval_request(marker)
+            stamps: dict[str, int] = {}
+            to_create: list[dict] = []
+            for marker, msg in candidates.items():
+                ar = approval_requests.get(marker)
                 if not ar or ar.get('status') != 'pending':
                     continue
 
-                existing_pi = self.db.get_pending_intro_by_approval_request(marker)
+                existing_pi = existing_intros.get(marker)
                 if existing_pi:
                     existing_message_id = existing_pi.get('message_id')
                     if existing_message_id and int(existing_message_id) == msg.id:
                         if ar.get('posted_message_id') is None:
-                            self.db.mark_approval_request_posted(marker, msg.id)
+                            stamps[marker] = msg.id
                         self._pending_messages[msg.id] = int(existing_pi['member_id'])
                     else:
                         await self._delete_reconciled_duplicate(msg, "stale orphan marker")
                     continue
 
-                intro = self.db.create_pending_intro(
-                    member_id=int(ar['member_id']),
-                    message_id=msg.id,
-                    channel_id=intro_channel.id,
-                    guild_id=guild.id,
-                    approval_request_id=marker,
-                )
-                if intro:
-                    self._pending_messages[msg.id] = int(ar['member_id'])
-                    self.db.mark_approval_request_posted(marker, msg.id)
-                    continue
-
-                winner = self.db.get_pending_intro_by_approval_request(marker)
-                if winner and winner.get('message_id'):
-                    self._pending_messages[int(winner['message_id'])] = int(winner['member_id'])
+                to_create.append({
+                    'member_id': int(ar['member_id']),
+                    'message_id': msg.id,
+                    'channel_id': intro_channel.id,
+                    'guild_id': guild.id,
+                    'approval_request_id': marker,
+                })
+
+            created = await run_db_call(self.db.create_pending_intros, to_create) if to_create else {}
+            lost = []
+            for row in to_create:
+                marker = row['approval_request_id']
+                if marker not in created:
+                    continue  # insert failed; the next reconcile pass retries it
+                if created[marker]:
+                    self._pending_messages[row['message_id']] = row['member_id']
+                    stamps[marker] = row['message_id']
+                else:
+                    lost.append(marker)
+            if lost:
+                winners = await run_db_call(self.db.get_pending_intros_by_approval_requests, lost)
+                for winner in winners.values():
+                    if winner.get('message_id'):
+                        self._pending_messages[int(winner['message_id'])] = int(winner['member_id'])
+            if stamps:
+                await run_db_call(self.db.mark_approval_requests_posted, stamps)
         except Exception as e:
             logger.exception(f"GatingCog: failed Discord approval embed reconciliation: {e}")
 
+    async def _post_approval_requests(self, guild: discord.Guild, intro_channel: discord.abc.Messageable):
+        """Post one claimed batch of web approval requests.
+
+        DB work is batched and runs off the event loop: one lookup each for
+        existing pending intros and members, one insert for the new intros,
+        one stamp and one embed-updated write, however many rows were claimed.
+        """
+        rows = await run_db_call(self.db.claim_pending_approval_requests, limit=APPROVAL_POLL_BATCH)
+        rows = [row for row in rows or [] if row.get('id')]
+        if not rows:
+            return
+        existing_intros = await run_db_call(
+            self.db.get_pending_intros_by_approval_requests, [row['id'] for row in rows],
+        )
+        members = await run_db_call(
+            self.db.get_members_for_approval, [int(row['member_id']) for row in rows if row.get('member_id') is not None],
+        )
+
+        # If a previous tick sent and inserted but failed to stamp, re-stamp
+        # from pending_intros and skip channel.send so no second visible
+        # embed appears in #introductions.
+        stamps: dict[str, int] = {}
+        posted: list[tuple[dict, dict, discord.Message]] = []
+        for row in rows:
+            ar_id = row['id']
+            try:
+                existing = existing_intros.get(ar_id)
+                if existing and existing.get('message_id'):
+                    stamps[ar_id] = int(existing['message_id'])
+                    continue
+
+                member_row = members.get(int(row['member_id']))
+                if not member_row:
+                    logger.warning(
+                        f"GatingCog: no members row for approval request {ar_id} "
+                        f"member {row.get('member_id')}"
+                    )
+                    continue
+
+                art = row.get('media') or row.get('asset')
+                embed = build_application_embed(member_row, row, art)
+                try:
+                    msg = await intro_channel.send(embed=embed)
+                except Exception as e:
+                    logger.error(
+                        f"GatingCog: failed to post approval request {ar_id}: {e}",
+                        exc_info=True,
+                    )
+                    continue
+                posted.append((row, member_row, msg))
+            except Exception as e:
+                logger.exception(
+                    f"GatingCog: failed while processing approval request row {ar_id}: {e}"
+                )
+
+        fresh: dict[str, int] = {}
+        if posted:
+            try:
+                created = await run_db_call(self.db.create_pending_intros, [
+                    {
+                        'member_id': int(member_row['member_id']),
+                        'message_id': msg.id,
+                        'channel_id': intro_channel.id,
+                        'guild_id': guild.id,
+                        'approval_request_id': row['id'],
+                    }
+                    for row, member_row, msg in posted
+                ])
+            except Exception as e:
+                # Embeds stay up; reconciliation stitches them to pending_intros.
+                logger.error(
+                    f"GatingCog: failed to create pending intros for approval requests "
+                    f"{[row['id'] for row, _m, _msg in posted]}: {e}",
+                    exc_info=True,
+                )
+                created = None
+
+            lost = []
+            if created is not None:
+                for row, member_row, msg in posted:
+                    if row['id'] not in created:
+                        continue  # insert failed; embed stays up for reconciliation
+                    if created[row['id']] is None:
+                        lost.append((row['id'], msg))
+                        continue
+                    self._pending_messages[msg.id] = int(member_row['member_id'])
+                    fresh[row['id']] = msg.id
+
+            if lost:
+                # Another writer won the insert: keep its message, drop ours.
+                winners = await run_db_call(
+                    self.db.get_pending_intros_by_approval_requests, [ar_id for ar_id, _msg in lost],
+                )
+                for ar_id, msg in lost:
+                    winner = winners.get(ar_id)
+                    if winner and winner.get('message_id'):
+                        stamps[ar_id] = int(winner['message_id'])
+                    try:
+                        await msg.delete()
+                    except Exception as e:
+                        logger.error(
+                            f"GatingCog: failed to delete duplicate approval embed {msg.id}: {e}",
+                            exc_info=True,
+                        )
+
+        stamped = await self._stamp_with_retry({**stamps, **fresh})
+        for ar_id, msg_id in fresh.items():
+            if ar_id not in stamped:
+                logger.warning(
+                    f"GatingCog: approval request {ar_id} posted as {msg_id} "
+                    "but posted_message_id could not be stamped"
+                )
+        if fresh:
+            # Fresh posts already reflect the latest bio/art, so clear any
+            # leftover embed_dirty flag (e.g. set when the previous message
+            # was deleted-then-edited and we re-posted on this tick).
+            await run_db_call(self.db.mark_embeds_updated, list(fresh))
+
     # Single-replica only. brain-of-bndc must run as a single process.
     # Multiple replicas would break _pending_messages, poll loop ordering, and
     # Discord event delivery semantics. To scale: implement AutoShardedBot and
@@ -617,84 +765,10 @@ class GatingCog(commands.Cog):
             if not target:
                 return
             guild, intro_channel, _cfg = target
-            rows = self.db.claim_pending_approval_requests(limit=APPROVAL_POLL_BATCH)
-
-            for row in rows or []:
-                try:
-                    ar_id = row.get('id')
-                    if not ar_id:
-                        continue
-
-                    # If a previous tick sent and inserted but failed to stamp,
-                    # re-stamp from pending_intros and skip channel.send so no
-                    # second visible embed appears in #introductions.
-                    existing = self.db.get_pending_intro_by_approval_request(ar_id)
-                    if existing and existing.get('message_id'):
-                        self._stamp_with_retry(ar_id, int(existing['message_id']))
-                        continue
-
-                    member_row = self.db.get_member_for_approval(int(row['member_id']))
-                    if not member_row:
-                        logger.warning(
-                            f"GatingCog: no members row for approval request {ar_id} "
-                            f"member {row.get('member_id')}"
-                        )
-                        continue
-
-                    art = row.get('media') or row.get('asset')
-                    embed = build_application_embed(member_row, row, art)
-
-                    try:
-                        msg = await intro_channel.send(embed=embed)
-                    except Exception as e:
-                        logger.error(
-                            f"GatingCog: failed to post approval request {ar_id}: {e}",
-                            exc_info=True,
-                        )
-                        continue
-
-                    try:
-                        intro = self.db.create_pending_intro(
-                            member_id=int(member_row['member_id']),
-                            message_id=msg.id,
-                            channel_id=intro_channel.id,
-                            guild_id=guild.id,
-                            approval_request_id=ar_id,
-                        )
-                    except Exception as e:
-                        logger.error(
-                            f"GatingCog: failed to create pending intro for approval request {ar_id}: {e}",
-                            exc_info=True,
-                        )
-                        continue
-
-                    if intro is None:
-                        existing = self.db.get_pending_intro_by_approval_request(ar_id)
-                        if existing and existing.get('message_id'):
-                            self._stamp_with_retry(ar_id, int(existing['message_id']))
-                        try:
-                            await msg.delete()
-                        except Exception as e:
-                            logger.error(
-                                f"GatingCog: failed to delete duplicate approval embed {msg.id}: {e}",
-                                exc_info=True,
-                            )
-                        continue
-
-                    self._pending_messages[msg.id] = int(member_row['member_id'])
-                    if not self._stamp_with_retry(ar_id, msg.id):
-                        logger.warning(
-                            f"GatingCog: approval request {ar_id} posted as {msg.id} "
-                            "but posted_message_id could not be stamped"
-                        )
-                    # Fresh post already reflects the latest bio/art, so clear any
-                    # leftover embed_dirty flag (e.g. set when the previous message
-                    # was deleted-then-edited and we re-posted on this tick).
-                    self.db.mark_embed_updated(ar_id)
-                except Exception as e:
-                    logger.exception(
-                        f"GatingCog: failed while processing approval request row {row.get('id')}: {e}"
-                    )
+            try:
+                await self._post_approval_requests(guild, intro_channel)
+            except Exception as e:
+                logger.exception(f"GatingCog: approval request post batch failed: {e}")
 
             # ── Refresh embeds for already-posted approval requests whose
             # bio / attached media / attached asset was edited on the web.
@@ -3,6 +3,7 @@
 from discord.ext import commands
 from src.common.db_handler import DatabaseHandler
 from src.common.discord_utils import emoji_to_str
+from src.features.logging.reaction_buffer import ReactionWriteBuffer
 import discord
 import os
 
@@ -27,6 +28,8 @@ class LoggerCog(commands.Cog):
             self.bot_user_id = None
         # Cache of thread IDs known to be summary threads
         self._summary_thread_ids: set[int] = set()
+        # Reaction add/remove events are coalesced and written in batches
+        self.reaction_buffer = ReactionWriteBuffer(self.db)
 
     @property
     def server_config(self):
@@ -39,10 +42,20 @@ class LoggerCog(commands.Cog):
             return True
         return sc.is_feature_enabled(guild_id, channel_id, feature)
 
+    async def _warm_parent_channel(self, channel_id):
+        """Resolve a first-seen thread's parent off the loop so feature checks inherit its config."""
+        warm = getattr(self.server_config, 'warm_parent_channels', None)
+        if warm is not None and channel_id:
+            await warm([channel_id])
+
     async def cog_load(self):
+        self.reaction_buffer.start()
         if self.dev_mode:
             self.logger.debug("Logger cog loaded")
-        pass
+
+    async def cog_unload(self):
+        # Flush buffered reaction events before shutdown
+        await self.reaction_buffer.close()
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -53,10 +66,11 @@ class LoggerCog(commands.Cog):
             self.logger.debug(f"Guild reaction events enabled: {self.bot.intents.guild_reactions}")
 
     async def _update_reaction(self, reaction, user, action: str):
-        """Write reaction add/remove to discord_reactions table.
+        """Queue a reaction add/remove for the discord_reactions table.
 
-        A Postgres trigger (sync_message_reactors) automatically keeps
-        discord_messages.reactors and reaction_count in sync.
+        Events are written behind by ReactionWriteBuffer. A Postgres trigger
+        (sync_message_reactors) automatically keeps discord_messages.reactors
+        and reaction_count in sync.
         """
         if user.bot:
             return
@@ -66,17 +80,15 @@ class LoggerCog(commands.Cog):
             channel_id = reaction.message.channel.id
 
             # Feature guard: reactions_enabled
+            await self._warm_parent_channel(channel_id)
             if not self._is_feature_enabled(guild_id, channel_id, 'reactions'):
                 return
 
             emoji_str = emoji_to_str(reaction.emoji)
-            if action == 'add':
-                self.db.add_reaction(reaction.message.id, user.id, emoji_str, guild_id=guild_id)
-            elif action == 'remove':
-                self.db.remove_reaction(reaction.message.id, user.id, emoji_str, guild_id=guild_id)
-
-            # Append to reaction log (tracks every add/remove event)
-            self.db.log_reaction_event(reaction.message.id, user.id, emoji_str, action, guild_id=guild_id)
+            if action not in ('add', 'remove'):
+                return
+            # Updates discord_reactions and appends to the reaction log (every event)
+            await self.reaction_buffer.submit(reaction.message.id, user.id, emoji_str, action, guild_id=guild_id)
 
             if self.dev_mode:
                 self.logger.debug(f"[LoggerCog] Reaction {action}: msg={reaction.message.id} user={user.id} emoji={emoji_str}")
@@ -85,6 +97,10 @@ class LoggerCog(commands.Cog):
             self.logger.error(f"[LoggerCog] Error in _update_reaction (action: {action}): {e}", exc_info=True)
 
     # --- Public methods for ReactorCog to call ---
+    async def settle_reactions(self, message_ids) -> None:
+        """Flush buffered reaction events for these messages before a direct reaction write."""
+        await self.reaction_buffer.settle(message_ids)
+
     async def log_reaction_add(self, reaction, user):
         """Public method to be called by ReactorCog to log reaction additions."""
         await self._update_reaction(reaction, user, 'add')
@@ -109,6 +125,7 @@ class LoggerCog(commands.Cog):
                 return
 
             # Feature guard: logging_enabled
+            await self._warm_parent_channel(payload.channel_id)
             if not self._is_feature_enabled(payload.guild_id, payload.channel_id, 'logging'):
                 return
 
@@ -144,9 +161,11 @@ class LoggerCog(commands.Cog):
                 return
 
             # Feature guard: logging_enabled
+            await self._warm_parent_channel(payload.channel_id)
             if not self._is_feature_enabled(payload.guild_id, payload.channel_id, 'logging'):
                 return
 
+            await self.settle_reactions([payload.message_id])
             deleted = self.db.soft_delete_message(payload.message_id, guild_id=payload.guild_id)
 
             if deleted and self.dev_mode:
@@ -191,6 +210,7 @@ class LoggerCog(commands.Cog):
                 return
 
             # Feature guard: logging_enabled
+            await self._warm_parent_channel(message.channel.id)
             if not self._is_feature_enabled(message.guild.id, message.channel.id, 'logging'):
                 return
 
@@ -198,6 +218,7 @@ class LoggerCog(commands.Cog):
             reaction_rows = message_data.pop('_reaction_rows', [])
             await self.db.store_messages([message_data])
             if reaction_rows:
+                await self.settle_reactions([message.id])
                 self.db.upsert_reactions_batch(message.id, reaction_rows,
                                                 guild_id=message_data.get('guild_id'))
 
@@ -0,0 +1,279 @@
+"""Write-behind buffer for live reaction add/remove events.
+
+LoggerCog used to issue an upsert/update plus a log insert per reaction event,
+synchronously on the event loop. This buffer coalesces events per
+(message, user, emoji) and flushes them in batches on the shared DB executor:
+state through DatabaseHandler.apply_reaction_states and history through
+DatabaseHandler.append_reaction_log.
+
+Coalescing rules for discord_reactions (current-state table):
+  - only the last action per key matters;
+  - if the first and last action in a window differ (add→remove or
+    remove→add), the pair cancels out and nothing is written.
+Every event is still appended to discord_reaction_log, which is pure history.
+
+State rows and log rows are separate retry units, and the DB layer reports
+failures per row: only rows that failed are retried, so a successful log
+insert is never repeated and one bad row cannot hold back its batch. A row
+that fails REACTION_WRITE_MAX_ATTEMPTS times is dropped and logged.
+
+Code that writes discord_reactions directly (message snapshots, archive
+syncs) calls settle() first, so a buffered event cannot land afterwards and
+undo the direct write.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.common.db_executor import run_db_call
+from src.common.env import env_int
+
+logger = logging.getLogger('DiscordBot')
+
+ReactionKey = Tuple[int, int, str]
+
+
+class ReactionWriteBuffer:
+    """Coalescing, periodically flushed buffer of reaction events."""
+
+    def __init__(
+        self,
+        db_handler,
+        flush_interval_ms: Optional[int] = None,
+        max_batch: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        self.db = db_handler
+        self.flush_interval = (flush_interval_ms or env_int('REACTION_FLUSH_INTERVAL_MS', 500)) / 1000
+        self.max_batch = max_batch or env_int('REACTION_FLUSH_MAX_EVENTS', 200)
+        self.max_pending = max(max_pending or env_int('REACTION_BUFFER_MAX_PENDING', 5000), self.max_batch)
+        self.max_attempts = max_attempts or env_int('REACTION_WRITE_MAX_ATTEMPTS', 5)
+
+        # key -> {'first': action, 'last': action, 'guild_id': ..., 'at': iso, 'attempts': n}
+        self._state: Dict[ReactionKey, Dict[str, Any]] = {}
+        # (log row, failed attempts so far)
+        self._log: List[Tuple[Dict[str, Any], int]] = []
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self.stats = {
+            'events': 0,
+            'cancelled_pairs': 0,
+            'flushes': 0,
+            'rows_written': 0,
+            'log_rows_written': 0,
+            'failed_flushes': 0,
+            'dropped': 0,
+            'dead_lettered': 0,
+            'superseded': 0,
+            'backpressure_waits': 0,
+        }
+
+    @property
+    def pending(self) -> int:
+        return max(len(self._log), len(self._state))
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._closed = False
+            self._task = asyncio.create_task(self._run(), name='reaction-write-buffer')
+
+    async def close(self) -> None:
+        """Stop the periodic flusher and flush whatever is still buffered."""
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[ReactionWriteBuffer] Flush loop error: {e}", exc_info=True)
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    async def submit(self, message_id: int, user_id: int, emoji: str, action: str,
+                     guild_id: Optional[int] = None) -> None:
+        """Buffer one reaction event. Applies back-pressure when the buffer is full."""
+        if self.pending >= self.max_pending:
+            self.stats['backpressure_waits'] += 1
+            await self.flush()
+            if self.pending >= self.max_pending:
+                # Flush failed and the retained backlog is still full.
+                self.stats['dropped'] += 1
+                logger.error(
+                    f"[ReactionWriteBuffer] Dropping reaction {action} for message {message_id}: "
+                    f"{self.pending} events pending"
+                )
+                return
+
+        now = datetime.now(timezone.utc).isoformat()
+        key = (message_id, user_id, emoji)
+        entry = self._state.get(key)
+        if entry is None:
+            self._state[key] = {'first': action, 'last': action, 'guild_id': guild_id, 'at': now, 'attempts': 0}
+        else:
+            entry['last'] = action
+            entry['at'] = now
+            if guild_id is not None:
+                entry['guild_id'] = guild_id
+        self._log.append(({
+            'message_id': message_id,
+            'user_id': user_id,
+            'emoji': emoji,
+            'action': action,
+            'guild_id': guild_id,
+        }, 0))
+        self.stats['events'] += 1
+
+        if len(self._log) >= self.max_batch:
+            self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Flush
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _state_rows(state: Dict[ReactionKey, Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        rows = []
+        cancelled = 0
+        for (message_id, user_id, emoji), entry in state.items():
+            if entry['first'] != entry['last']:
+                cancelled += 1
+                continue
+            rows.append({
+                'message_id': message_id,
+                'user_id': user_id,
+                'emoji': emoji,
+                'guild_id': entry['guild_id'],
+                'removed_at': None if entry['last'] == 'add' else entry['at'],
+            })
+        return rows, cancelled
+
+    async def _write(self, method, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run one DB write on the executor; returns the rows that failed."""
+        if not rows:
+            return []
+        try:
+            return list(await run_db_call(method, rows) or [])
+        except Exception as e:
+            logger.error(f"[ReactionWriteBuffer] Batched reaction write failed: {e}", exc_info=True)
+            return rows
+
+    async def flush(self) -> bool:
+        """Write everything buffered so far; returns False if any row failed."""
+        async with self._flush_lock:
+            if not self._log and not self._state:
+                return True
+            state, log_entries = self._state, self._log
+            self._state, self._log = {}, []
+
+            rows, cancelled = self._state_rows(state)
+            log_rows = [row for row, _ in log_entries]
+            started = time.monotonic()
+            failed_rows = await self._write(self.db.apply_reaction_states, rows)
+            failed_log = await self._write(self.db.append_reaction_log, log_rows)
+
+            failed_keys = {(row['message_id'], row['user_id'], row['emoji']) for row in failed_rows}
+            failed_log_ids = {id(row) for row in failed_log}
+            self._requeue(
+                {key: state[key] for key in failed_keys if key in state},
+                [entry for entry in log_entries if id(entry[0]) in failed_log_ids],
+            )
+
+            self.stats['cancelled_pairs'] += cancelled
+            self.stats['rows_written'] += len(rows) - len(failed_rows)
+            self.stats['log_rows_written'] += len(log_rows) - len(failed_log)
+            if failed_rows or failed_log:
+                self.stats['failed_flushes'] += 1
+                return False
+
+            self.stats['flushes'] += 1
+            logger.debug(
+                f"[ReactionWriteBuffer] Flushed {len(log_rows)} events as {len(rows)} state rows "
+                f"({cancelled} cancelled pairs) in {(time.monotonic() - started) * 1000:.0f}ms"
+            )
+            return True
+
+    async def settle(self, message_ids: Iterable[int]) -> None:
+        """Flush buffered state for ``message_ids`` ahead of a direct discord_reactions write.
+
+        Whatever still cannot be written is discarded: the direct write is
+        the newer truth and a late retry would otherwise undo it.
+        """
+        ids = set(message_ids)
+        if not any(key[0] in ids for key in self._state):
+            return
+        await self.flush()
+        stale = [key for key in self._state if key[0] in ids]
+        for key in stale:
+            del self._state[key]
+        if stale:
+            self.stats['superseded'] += len(stale)
+            logger.warning(
+                f"[ReactionWriteBuffer] Discarded {len(stale)} unwritten reaction states superseded by a direct write"
+            )
+
+    def _requeue(self, state: Dict[ReactionKey, Dict[str, Any]],
+                 log_entries: List[Tuple[Dict[str, Any], int]]) -> None:
+        """Put failed rows back ahead of newer events; rows out of attempts are dropped."""
+        for key, entry in state.items():
+            entry['attempts'] += 1
+            if entry['attempts'] >= self.max_attempts:
+                self._dead_letter('state', key, entry)
+                continue
+            newer = self._state.get(key)
+            if newer is None:
+                self._state[key] = entry
+            else:
+                newer['first'] = entry['first']
+                newer['attempts'] = max(newer['attempts'], entry['attempts'])
+                if newer.get('guild_id') is None:
+                    newer['guild_id'] = entry['guild_id']
+
+        retry = []
+        for row, attempts in log_entries:
+            if attempts + 1 >= self.max_attempts:
+                self._dead_letter('log', (row['message_id'], row['user_id'], row['emoji']), row)
+            else:
+                retry.append((row, attempts + 1))
+        merged = retry + self._log
+        overflow = len(merged) - self.max_pending
+        if overflow > 0:
+            self.stats['dropped'] += overflow
+            logger.error(f"[ReactionWriteBuffer] Dropping {overflow} oldest reaction log events after failed flush")
+            merged = merged[overflow:]
+        self._log = merged
+
+    def _dead_letter(self, kind: str, key: ReactionKey, row: Dict[str, Any]) -> None:
+        self.stats['dead_lettered'] += 1
+        logger.error(
+            f"[ReactionWriteBuffer] Dropping reaction {kind} row for message {key[0]} user {key[1]} "
+            f"emoji {key[2]} after {self.max_attempts} failed attempts: {row}"
+        )
@@ -0,0 +1,195 @@
+"""
+PaymentEngine — claims due payment requests and executes them concurrently.
+
+PaymentWorkerCog used to claim a batch every 30 seconds and run each payment
+to completion (send + confirmation wait) one after another, so one slow
+confirmation held up the whole batch and new requests waited for the next
+tick. The engine splits that into:
+
+  - claiming: on the worker tick *and* whenever ``wake()`` is called (the
+    PaymentService fires it when a payment becomes due), bounded by the number
+    of payments already in flight;
+  - submission: at most ``max_concurrency`` sends run at once; payments to
+    the same recipient wallet are serialized, so a wallet never has two
+    unconfirmed transfers outstanding;
+  - confirmation: once a payment is submitted its send slot is released and
+    the confirmation wait runs on its own, so a slow confirmation only delays
+    later payments to that one wallet.
+
+Terminal rows are handed to ``on_terminal`` (the cog's notify/handoff path).
+Claiming, backlog refills and draining come from ``ClaimedWorkExecutor``;
+payments still in flight at shutdown are picked up by restart recovery.
+
+Tunables (env): PAYMENT_MAX_CONCURRENCY, PAYMENT_MAX_IN_FLIGHT.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.common.claimed_work import ClaimedWorkExecutor
+from src.common.db_executor import run_db_call
+from src.common.env import env_int
+from src.common.metrics import REGISTRY
+
+logger = logging.getLogger('DiscordBot')
+
+TERMINAL_STATUSES = frozenset({'confirmed', 'failed', 'manual_hold', 'cancelled'})
+
+PAYMENT_PHASE_SECONDS = REGISTRY.histogram(
+    'bot_payment_phase_duration_seconds', 'Payment submission and confirmation latency.', ('phase', 'outcome'),
+)
+PAYMENTS_IN_FLIGHT = REGISTRY.gauge('bot_payments_in_flight', 'Claimed payments by execution phase.', ('phase',))
+
+
+class PaymentEngine(ClaimedWorkExecutor):
+    """Concurrent, wallet-serialized executor for claimed payment requests."""
+
+    log_name = 'PaymentEngine'
+    noun = 'payment request'
+    id_key = 'payment_id'
+    task_prefix = 'payment'
+    in_flight_gauge = PAYMENTS_IN_FLIGHT
+
+    def __init__(
+        self,
+        db_handler,
+        payment_service,
+        on_terminal: Callable[[Dict[str, Any]], Awaitable[None]],
+        *,
+        claim_limit: int = 10,
+        max_concurrency: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+    ):
+        super().__init__(
+            db_handler,
+            claim_limit=claim_limit,
+            max_in_flight=max_in_flight or env_int('PAYMENT_MAX_IN_FLIGHT', 20),
+        )
+        self.payment_service = payment_service
+        self.on_terminal = on_terminal
+        self.max_concurrency = max_concurrency or env_int('PAYMENT_MAX_CONCURRENCY', 4)
+
+        self._send_slots = asyncio.Semaphore(self.max_concurrency)
+        self._wallet_locks: Dict[str, asyncio.Lock] = {}
+        self._wallet_users: Dict[str, int] = {}
+        self.accepting = False
+
+    def open(self) -> None:
+        """Start accepting work (after restart recovery) and claim immediately."""
+        self.accepting = True
+        self.wake()
+
+    # ------------------------------------------------------------------
+    # Claimed-work hooks
+    # ------------------------------------------------------------------
+
+    def _can_claim(self) -> bool:
+        return bool(self.payment_service) and self.accepting
+
+    async def _claim(self, limit: int) -> List[Dict[str, Any]]:
+        return await run_db_call(self.db_handler.claim_due_payment_requests, limit=limit)
+
+    async def _execute(self, payment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        payment_id = payment['payment_id']
+        wallet = str(payment.get('recipient_wallet') or '').strip() or payment_id
+        try:
+            async with self._wallet(wallet):
+                async with self._send_slots:
+                    self._enter_phase(payment_id, 'submit')
+                    result = await self._timed('submit', self.payment_service.submit_payment(
+                        payment_id, guild_id=payment.get('guild_id'),
+                    ))
+                if result and result.get('status') == 'submitted':
+                    self._enter_phase(payment_id, 'confirm')
+                    result = await self._timed('confirm', self.payment_service.confirm_submitted_payment(result))
+            return result
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error(
+                "[PaymentEngine] Unexpected error while executing payment %s: %s",
+                payment_id,
+                exc,
+                exc_info=True,
+            )
+            return self._hold_after_error(payment)
+
+    async def _finish(self, payment: Dict[str, Any], result: Optional[Dict[str, Any]]) -> None:
+        if not result or result.get('status') not in TERMINAL_STATUSES:
+            return
+        try:
+            await self.on_terminal(result)
+        except Exception as exc:
+            logger.error(
+                "[PaymentEngine] Terminal handling failed for payment %s: %s",
+                payment['payment_id'],
+                exc,
+                exc_info=True,
+            )
+
+    # ------------------------------------------------------------------
+    # Execution helpers
+    # ------------------------------------------------------------------
+
+    def _wallet(self, wallet: str) -> '_WalletLease':
+        return _WalletLease(self, wallet)
+
+    @staticmethod
+    async def _timed(phase: str, awaitable: Awaitable[Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        started = time.monotonic()
+        outcome = 'error'
+        try:
+            result = await awaitable
+            outcome = str((result or {}).get('status') or 'missing')
+            return result
+        finally:
+            PAYMENT_PHASE_SECONDS.observe(time.monotonic() - started, phase=phase, outcome=outcome)
+
+    def _hold_after_error(self, payment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        payment_id = payment['payment_id']
+        guild_id = payment.get('guild_id')
+        current = self.db_handler.get_payment_request(payment_id, guild_id=guild_id)
+        if current and current.get('status') in {'processing', 'submitted'}:
+            self.db_handler.mark_payment_manual_hold(
+                payment_id,
+                reason='Worker hit an unexpected error; payment requires manual review',
+                guild_id=guild_id,
+            )
+            current = self.db_handler.get_payment_request(payment_id, guild_id=guild_id)
+        return current
+
+
+class _WalletLease:
+    """Per-recipient lock that is dropped from the table once nobody holds or waits on it."""
+
+    def __init__(self, engine: PaymentEngine, wallet: str):
+        self.engine = engine
+        self.wallet = wallet
+
+    async def __aenter__(self):
+        engine = self.engine
+        lock = engine._wallet_locks.setdefault(self.wallet, asyncio.Lock())
+        engine._wallet_users[self.wallet] = engine._wallet_users.get(self.wallet, 0) + 1
+        try:
+            await lock.acquire()
+        except BaseException:
+            self._release_user()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.engine._wallet_locks[self.wallet].release()
+        self._release_user()
+        return False
+
+    def _release_user(self) -> None:
+        engine = self.engine
+        engine._wallet_users[self.wallet] -= 1
+        if not engine._wallet_users[self.wallet]:
+            del engine._wallet_users[self.wallet]
+            del engine._wallet_locks[self.wallet]
+
+
+__all__ = ['PaymentEngine']
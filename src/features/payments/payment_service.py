@@ -5,7 +5,7 @@ from enum import Enum
 import logging
 import os
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Literal, Optional
 
 from src.common.redaction import redact_wallet as _redact_wallet
 from src.features.grants.pricing import usd_to_sol
@@ -130,6 +130,7 @@ class PaymentService:
             if str(name).strip()
         )
         self._on_cap_breach = on_cap_breach
+        self._queue_listeners: List[Callable[[], Any]] = []
 
     async def request_payment(
         self,
@@ -578,8 +579,22 @@ class PaymentService:
             confirmed_by=actor.kind.value,
         ):
             return None
+        self.notify_payment_queued()
         return self.db_handler.get_payment_request(payment_id, guild_id=payment.get('guild_id'))
 
+    def add_queue_listener(self, listener: Callable[[], Any]) -> None:
+        """Register a callback fired whenever a payment becomes due for execution."""
+        if listener not in self._queue_listeners:
+            self._queue_listeners.append(listener)
+
+    def notify_payment_queued(self) -> None:
+        """Wake registered workers so newly queued payments are claimed immediately."""
+        for listener in list(getattr(self, '_queue_listeners', ())):
+            try:
+                listener()
+            except Exception as exc:
+                self.logger.warning("[PaymentService] queue listener failed: %s", exc)
+
     async def reconcile_with_chain(
         self,
         payment_id: str,
@@ -764,6 +779,17 @@ class PaymentService:
 
     async def execute_payment(self, payment_id: str, *, guild_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """Execute one claimed payment request under the fail-closed state machine."""
+        payment = await self.submit_payment(payment_id, guild_id=guild_id)
+        if not payment or payment.get('status') != 'submitted':
+            return payment
+        return await self.confirm_submitted_payment(payment)
+
+    async def submit_payment(self, payment_id: str, *, guild_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Broadcast one claimed payment and record its signature, without waiting for confirmation.
+
+        Returns the refreshed row: ``submitted`` when the transaction is on its
+        way, otherwise the terminal (or unchanged) row.
+        """
         payment = self.db_handler.get_payment_request(payment_id, guild_id=guild_id)
         if not payment:
             return None
@@ -782,11 +808,11 @@ class PaymentService:
             return self.db_handler.get_payment_request(payment_id, guild_id=payment.get('guild_id'))
 
         if status == 'submitted':
-            return await self._confirm_submitted_payment(payment, payment_provider)
+            return payment
 
         if status != 'processing':
             self.logger.warning(
-                "[PaymentService] execute_payment received payment %s in unsupported status %s",
+                "[PaymentService] submit_payment received payment %s in unsupported status %s",
                 payment_id,
                 status,
             )
@@ -830,10 +856,21 @@ class PaymentService:
             send_phase='submitted',
             guild_id=payment.get('guild_id'),
         )
-        submitted_payment = self.db_handler.get_payment_request(payment_id, guild_id=payment.get('guild_id'))
-        if not submitted_payment:
-            return None
-        return await self._confirm_submitted_payment(submitted_payment, payment_provider)
+        return self.db_handler.get_payment_request(payment_id, guild_id=payment.get('guild_id'))
+
+    async def confirm_submitted_payment(self, payment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Wait for a submitted payment's transaction and record the terminal outcome."""
+        if payment.get('status') != 'submitted':
+            return payment
+        payment_provider = self._get_provider(payment.get('provider'))
+        if not payment_provider:
+            self.db_handler.mark_payment_manual_hold(
+                payment['payment_id'],
+                reason=f"Unsupported payment provider: {payment.get('provider')}",
+                guild_id=payment.get('guild_id'),
+            )
+            return self.db_handler.get_payment_request(payment['payment_id'], guild_id=payment.get('guild_id'))
+        return await self._confirm_submitted_payment(payment, payment_provider)
 
     async def recover_inflight(self, guild_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
         """Recover processing/submitted rows safely after restart."""
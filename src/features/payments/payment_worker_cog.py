@@ -11,13 +11,18 @@ from discord.ext import commands, tasks
 from src.common.redaction import redact_wallet as _redact_wallet
 from src.common.discord_utils import safe_delete_messages, safe_send_message
 
+from .payment_engine import PaymentEngine
 from .payment_service import PaymentService
 
 logger = logging.getLogger('DiscordBot')
 
 
 class PaymentWorkerCog(commands.Cog):
-    """Queue worker, restart recovery, and terminal handoff flow for payments."""
+    """Queue worker, restart recovery, and terminal handoff flow for payments.
+
+    Execution is delegated to PaymentEngine; the ``payment_worker`` loop is the
+    fallback poll for work nobody woke us for (retry_after, other replicas).
+    """
 
     def __init__(
         self,
@@ -49,6 +54,15 @@ class PaymentWorkerCog(commands.Cog):
             except ValueError:
                 logger.error("[PaymentWorkerCog] Invalid ADMIN_FALLBACK_CHANNEL_ID: %s", fallback_channel_env)
         self._startup_synced = False
+        self.engine = PaymentEngine(
+            db_handler,
+            self.payment_service,
+            self._handle_terminal_payment,
+            claim_limit=self.claim_batch_size,
+        )
+        add_queue_listener = getattr(self.payment_service, 'add_queue_listener', None)
+        if callable(add_queue_listener):
+            add_queue_listener(self.engine.wake)
 
     async def cog_load(self):
         self.payment_worker.change_interval(seconds=self.worker_interval_seconds)
@@ -62,6 +76,7 @@ class PaymentWorkerCog(commands.Cog):
             await self._ensure_startup_sync()
 
     def cog_unload(self):
+        self.engine.stop()
         if self.payment_worker.is_running():
             self.payment_worker.cancel()
             logger.info("[PaymentWorkerCog] Payment worker stopped.")
@@ -87,21 +102,17 @@ class PaymentWorkerCog(commands.Cog):
         if self._startup_synced:
             return
         self._startup_synced = True
-        await self._recover_inflight_payments()
+        try:
+            await self._recover_inflight_payments()
+        finally:
+            self.engine.open()
 
     @tasks.loop(seconds=30)
     async def payment_worker(self):
-        """Claim and execute due queued payment requests."""
+        """Claim due queued payment requests and hand them to the engine."""
         if not self.payment_service:
             return
-
-        claimed = self.db_handler.claim_due_payment_requests(limit=self.claim_batch_size)
-        if not claimed:
-            return
-
-        logger.info("[PaymentWorkerCog] Claimed %s payment request(s).", len(claimed))
-        for payment in claimed:
-            await self._process_claimed_payment(payment)
+        await self.engine.claim_available()
 
     @payment_worker.before_loop
     async def _before_payment_worker(self):
@@ -118,34 +129,6 @@ class PaymentWorkerCog(commands.Cog):
             if self._is_terminal(payment):
                 await self._handle_terminal_payment(payment)
 
-    async def _process_claimed_payment(self, payment: Dict[str, Any]):
-        payment_id = payment.get('payment_id')
-        guild_id = payment.get('guild_id')
-        if not payment_id:
-            return
-
-        try:
-            result = await self.payment_service.execute_payment(payment_id, guild_id=guild_id)
-        except Exception as exc:
-            logger.error(
-                "[PaymentWorkerCog] Unexpected error while executing payment %s: %s",
-                payment_id,
-                exc,
-                exc_info=True,
-            )
-            current = self.db_handler.get_payment_request(payment_id, guild_id=guild_id)
-            if current and current.get('status') in {'processing', 'submitted'}:
-                self.db_handler.mark_payment_manual_hold(
-                    payment_id,
-                    reason='Worker hit an unexpected error; payment requires manual review',
-                    guild_id=guild_id,
-                )
-                current = self.db_handler.get_payment_request(payment_id, guild_id=guild_id)
-            result = current
-
-        if result and self._is_terminal(result):
-            await self._handle_terminal_payment(result)
-
     async def _handle_terminal_payment(self, payment: Dict[str, Any]):
         # Only post the result publicly for successful payments. Failures and
         # manual holds are DM'd to the admin only — recipients shouldn't see
@@ -11,6 +11,7 @@ from src.common.db_handler import DatabaseHandler # <<< Added DB Handler import
 from src.common.openmuse_interactor import OpenMuseInteractor # <<< Added OpenMuse Interactor import
 from src.common.llm.claude_client import ClaudeClient # Added LLM Client import
 from .subfeatures.permission_handler import handle_request_curation_permission
+from .rule_index import CompiledRuleIndex
 
 # Assuming get_llm_response is structured to be importable like this:
 # This might need adjustment based on your project structure for src.common.llm
@@ -50,13 +51,41 @@ class Reactor:
         self.bot = bot_instance # <<< ADDED to store bot_instance
         self.llm_client = llm_client # Store LLM client instance
         self.watchlist_by_guild = {}
+        self.rule_index_by_guild = {}
+        # guild_id -> (raw watchlist fingerprint, normalized rules, compiled index)
+        self._compiled_watchlists = {}
         self._watchlist_refresh_marker = None
         self._load_watchlist()
 
+    @staticmethod
+    def _refresh_marker(sc):
+        # `version` only changes when config content changes; older configs expose a refresh timestamp.
+        marker = getattr(sc, 'version', None)
+        if marker is None:
+            marker = getattr(sc, '_last_refresh_monotonic', None)
+        return marker
+
+    def _compile_guild_rules(self, guild_id: int, raw_rules: list, compiled: dict):
+        """Normalize and index a guild's rules, reusing the previous build if the rules are unchanged."""
+        fingerprint = json.dumps(raw_rules, sort_keys=True, default=str)
+        previous = self._compiled_watchlists.get(guild_id)
+        if previous and previous[0] == fingerprint:
+            compiled[guild_id] = previous
+            return previous[1]
+
+        guild_rules = []
+        for i, rule in enumerate(raw_rules):
+            normalized = self._normalize_rule(rule, guild_id, i + 1)
+            if normalized:
+                guild_rules.append(normalized)
+        compiled[guild_id] = (fingerprint, guild_rules, CompiledRuleIndex(guild_rules))
+        return guild_rules
+
     def _load_watchlist(self):
         """Load and parse per-guild reactor rules from server_config."""
         sc = getattr(self.db_handler, 'server_config', None) if self.db_handler else None
         watchlist_by_guild = {}
+        compiled = {}
         valid_rules = 0
         try:
             servers = sc.get_enabled_servers(require_write=True) if sc else []
@@ -71,20 +100,16 @@ class Reactor:
                             env_prefix = 'DEV_' if self.dev_mode else ''
                             env_guild_id = int(os.getenv(f'{env_prefix}GUILD_ID', '0')) or 0
                             if env_guild_id:
-                                guild_rules = []
-                                for i, rule in enumerate(parsed):
-                                    normalized = self._normalize_rule(rule, env_guild_id, i + 1)
-                                    if normalized:
-                                        guild_rules.append(normalized)
+                                guild_rules = self._compile_guild_rules(env_guild_id, parsed, compiled)
                                 if guild_rules:
                                     watchlist_by_guild[env_guild_id] = guild_rules
                                     self.logger.info(f"[Reactor] Loaded {len(guild_rules)} rules from env REACTION_WATCHLIST for guild {env_guild_id}")
                     except (json.JSONDecodeError, ValueError) as e:
                         self.logger.error(f"[Reactor] Failed to parse env REACTION_WATCHLIST: {e}")
-                self.watchlist_by_guild = watchlist_by_guild
+                self._set_watchlists(watchlist_by_guild, compiled)
                 return
 
-            self._watchlist_refresh_marker = getattr(sc, '_last_refresh_monotonic', None)
+            self._watchlist_refresh_marker = self._refresh_marker(sc)
             for server in servers:
                 guild_id = server['guild_id']
                 parsed_watchlist = server.get('reaction_watchlist') or []
@@ -92,23 +117,26 @@ class Reactor:
                     self.logger.warning(f"[Reactor] reaction_watchlist for guild {guild_id} is not a list; skipping")
                     continue
 
-                guild_rules = []
-                for i, rule in enumerate(parsed_watchlist):
-                    normalized = self._normalize_rule(rule, guild_id, i + 1)
-                    if normalized:
-                        guild_rules.append(normalized)
-                        valid_rules += 1
+                guild_rules = self._compile_guild_rules(guild_id, parsed_watchlist, compiled)
+                valid_rules += len(guild_rules)
 
                 if guild_rules:
                     watchlist_by_guild[guild_id] = guild_rules
 
-            self.watchlist_by_guild = watchlist_by_guild
+            self._set_watchlists(watchlist_by_guild, compiled)
             total_guilds = len(self.watchlist_by_guild)
             self.logger.info(f"[Reactor] Loaded {valid_rules} valid rules across {total_guilds} guild(s) from server_config.reaction_watchlist.")
         except Exception as e:
             self.logger.error(f"[Reactor] Unexpected error loading watchlist: {e}")
             self.logger.error(traceback.format_exc())
-            self.watchlist_by_guild = {}
+            self._set_watchlists({}, {})
+
+    def _set_watchlists(self, watchlist_by_guild: dict, compiled: dict):
+        self.watchlist_by_guild = watchlist_by_guild
+        self._compiled_watchlists = compiled
+        self.rule_index_by_guild = {
+            guild_id: compiled[guild_id][2] for guild_id in watchlist_by_guild
+        }
 
     def _normalize_rule(self, rule, guild_id: int, rule_index: int):
         if not isinstance(rule, dict) or 'action' not in rule:
@@ -171,20 +199,22 @@ class Reactor:
         sc = getattr(self.db_handler, 'server_config', None) if self.db_handler else None
         if sc:
             sc._maybe_refresh()
-            refresh_marker = getattr(sc, '_last_refresh_monotonic', None)
-            if refresh_marker != self._watchlist_refresh_marker:
+            if self._refresh_marker(sc) != self._watchlist_refresh_marker:
                 self._load_watchlist()
         if guild_id is None:
             return []
         return self.watchlist_by_guild.get(guild_id, [])
 
+    def _get_rule_index_for_guild(self, guild_id: int | None):
+        self._get_watchlist_for_guild(guild_id)
+        return self.rule_index_by_guild.get(guild_id) if guild_id is not None else None
+
     def check_reaction(self, reaction, user):
         """Checks if a reaction matches any 'reaction' rule in the watchlist and returns the action name if matched."""
         guild_id = getattr(getattr(reaction, 'message', None), 'guild', None)
         guild_id = getattr(guild_id, 'id', None)
-        guild_watchlist = self._get_watchlist_for_guild(guild_id)
-        reaction_rules = [rule for rule in guild_watchlist if rule.get('trigger_type', 'reaction') == 'reaction']
-        if not reaction_rules:
+        rule_index = self._get_rule_index_for_guild(guild_id)
+        if rule_index is None or not rule_index.has_reaction_rules:
             self.logger.debug(f"[Reactor] check_reaction called for guild {guild_id}, but no reaction rules are loaded.")
             return None
         if user.bot:
@@ -194,33 +224,20 @@ class Reactor:
 
         emoji_str = str(reaction.emoji)
         user_id_str = str(user.id)
-        self.logger.debug(f"[Reactor] check_reaction: Checking User ID '{user_id_str}' with Emoji '{emoji_str}' against {len(reaction_rules)} reaction rules.")
-
-        for i, rule in enumerate(reaction_rules):
-            # Rule structure already validated in _load_watchlist
-            user_match = False
-            if rule['user_id'] == '*':
-                user_match = True
-            elif isinstance(rule['user_id'], list):
-                user_match = user_id_str in rule['user_id']
-            
-            emoji_match = (rule['emoji'] == '*' or rule['emoji'] == emoji_str)
-            self.logger.debug(f"[Reactor] Rule {i+1} Check: Target User(s)='{rule['user_id']}', Target Emoji='{rule['emoji']}'. Incoming User='{user_id_str}', Incoming Emoji='{emoji_str}'. User Match: {user_match}, Emoji Match: {emoji_match}")
-
-            if user_match and emoji_match:
-                action_name = rule['action']
-                self.logger.info(f"[Reactor] Reaction rule matched: User='{rule['user_id']}', Emoji='{rule['emoji']}'. Triggering action: '{action_name}' for user {user_id_str} on message {reaction.message.id}")
-                return action_name
-        
+        rule = rule_index.match_reaction(user_id_str, emoji_str)
+        if rule:
+            action_name = rule['action']
+            self.logger.info(f"[Reactor] Reaction rule matched: User='{rule['user_id']}', Emoji='{rule['emoji']}'. Triggering action: '{action_name}' for user {user_id_str} on message {reaction.message.id}")
+            return action_name
+
         self.logger.debug(f"[Reactor] check_reaction: No reaction rule matched for User ID '{user_id_str}' with Emoji '{emoji_str}'.")
         return None # No match
 
     def check_message(self, message: discord.Message):
         """Checks if a message matches any 'text' or 'attachment' rule in the watchlist."""
         guild_id = getattr(getattr(message, 'guild', None), 'id', None)
-        guild_watchlist = self._get_watchlist_for_guild(guild_id)
-        message_rules = [rule for rule in guild_watchlist if rule.get('trigger_type') in ['text', 'attachment']]
-        if not message_rules:
+        rule_index = self._get_rule_index_for_guild(guild_id)
+        if rule_index is None or not rule_index.has_message_rules:
             self.logger.debug(f"[Reactor] check_message called for guild {guild_id}, but no text/attachment rules are loaded.")
             return None
         if message.author.bot:
@@ -229,49 +246,22 @@ class Reactor:
 
         user_id_str = str(message.author.id)
         channel_id_str = str(message.channel.id)
-        self.logger.debug(f"[Reactor] check_message: Checking Message {message.id} from User '{user_id_str}' in Channel '{channel_id_str}' against {len(message_rules)} text/attachment rules.")
-
-        for i, rule in enumerate(message_rules):
-            # Check common filters first (user, channel)
-            channel_match = (rule.get('channel_id', '*') == '*' or rule.get('channel_id', '*') == channel_id_str)
-            user_match = (rule.get('user_id', '*') == '*' or rule.get('user_id', '*') == user_id_str)
-
-            if not channel_match or not user_match:
-                continue # Skip rule if channel or user doesn't match
-
-            trigger_type = rule['trigger_type']
+        attachment_types = [
+            ((getattr(attachment, 'content_type', '') or '').lower(), attachment)
+            for attachment in (message.attachments or [])
+        ]
+        match = rule_index.match_message(channel_id_str, user_id_str, message.content, attachment_types)
+        if match:
+            rule, attachment = match
             action_name = rule['action']
+            if rule['trigger_type'] == 'attachment':
+                self.logger.info(f"[Reactor] Attachment rule matched: Type='{rule['attachment_type']}', Channel='{rule.get('channel_id', '*')}', User='{rule.get('user_id', '*')}'. Triggering action: '{action_name}' for message {message.id} (Attachment: {attachment.filename})")
+            elif 'text_pattern' in rule:
+                self.logger.info(f"[Reactor] Text rule matched (regex): Pattern='{rule['text_pattern']}', Channel='{rule.get('channel_id', '*')}', User='{rule.get('user_id', '*')}'. Triggering action: '{action_name}' for message {message.id}")
+            else:
+                self.logger.info(f"[Reactor] Text rule matched (substring): Substr='{rule['text_contains'].lower()}', Channel='{rule.get('channel_id', '*')}', User='{rule.get('user_id', '*')}'. Triggering action: '{action_name}' for message {message.id}")
+            return action_name
 
-            # Check specific trigger conditions
-            if trigger_type == 'text':
-                if 'text_pattern' in rule:
-                    pattern = rule['text_pattern']
-                    try:
-                        if re.search(pattern, message.content):
-                            self.logger.info(f"[Reactor] Text rule matched (regex): Pattern='{pattern}', Channel='{rule.get('channel_id', '*')}', User='{rule.get('user_id', '*')}'. Triggering action: '{action_name}' for message {message.id}")
-                            return action_name  # Return first match
-                    except re.error as e:
-                        self.logger.error(f"[Reactor] Regex error during check_message for pattern '{pattern}': {e}")
-                        continue  # Skip this rule if regex is somehow invalid despite pre-check
-                elif 'text_contains' in rule:
-                    substr = rule['text_contains'].lower()
-                    if substr in message.content.lower():
-                        self.logger.info(f"[Reactor] Text rule matched (substring): Substr='{substr}', Channel='{rule.get('channel_id', '*')}', User='{rule.get('user_id', '*')}'. Triggering action: '{action_name}' for message {message.id}")
-                        return action_name  # Return first match
-
-            elif trigger_type == 'attachment':
-                target_type = rule['attachment_type'].lower() # Ensure comparison is case-insensitive
-                if message.attachments:
-                     for attachment in message.attachments:
-                         content_type = getattr(attachment, 'content_type', '').lower()
-                         # Direct match or wildcard check (e.g., "image/*")
-                         type_match = (target_type == '*' or 
-                                       content_type == target_type or
-                                       (target_type.endswith('/*') and content_type.startswith(target_type[:-1])))
-                         if type_match:
-                             self.logger.info(f"[Reactor] Attachment rule matched: Type='{rule['attachment_type']}', Channel='{rule.get('channel_id', '*')}', User='{rule.get('user_id', '*')}'. Triggering action: '{action_name}' for message {message.id} (Attachment: {attachment.filename})")
-                             return action_name # Return first match
-        
         self.logger.debug(f"[Reactor] check_message: No text/attachment rule matched for Message {message.id}.")
         return None # No match
 
@@ -117,6 +117,13 @@ class ReactorCog(commands.Cog):
             return True
         return sc.is_feature_enabled(guild_id, channel_id, feature)
 
+    async def _warm_parent_channel(self, channel_id):
+        """Resolve a first-seen thread's parent off the loop so feature checks inherit its config."""
+        sc = getattr(getattr(self.bot, 'db_handler', None), 'server_config', None)
+        warm = getattr(sc, 'warm_parent_channels', None)
+        if warm is not None and channel_id:
+            await warm([channel_id])
+
     def _load_message_linker_config(self):
         """Load message_linker channel configuration from server_config."""
         try:
@@ -201,6 +208,7 @@ class ReactorCog(commands.Cog):
         if message.author.bot or not message.guild:
             return
 
+        await self._warm_parent_channel(message.channel.id)
         if not self._is_feature_enabled(message.guild.id, message.channel.id, 'reactions'):
             return
 
@@ -289,6 +297,7 @@ class ReactorCog(commands.Cog):
                 return
 
             # Feature guard: reactions_enabled
+            await self._warm_parent_channel(payload.channel_id)
             if not self._is_feature_enabled(payload.guild_id, payload.channel_id, 'reactions'):
                 return
 
@@ -483,6 +492,7 @@ class ReactorCog(commands.Cog):
             return
 
         # Feature guard: reactions_enabled
+        await self._warm_parent_channel(payload.channel_id)
         if not self._is_feature_enabled(payload.guild_id, payload.channel_id, 'reactions'):
             return
 
@@ -0,0 +1,156 @@
+"""Compiled per-guild index over normalized Reactor watchlist rules.
+
+Rules are bucketed by (user, emoji) for reaction triggers and by
+(channel, user) for text/attachment triggers, with '*' as its own bucket.
+A lookup only touches the (at most four) buckets that can apply and keeps
+the watchlist's first-match-wins order by comparing rule positions.
+
+Regexes are compiled once, and the lowercase `text_contains` literals in a
+bucket are merged into a single alternation used as a prefilter, so a
+message that contains none of them costs one search instead of one per rule.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+WILDCARD = '*'
+
+# Bucket key -> rules in watchlist order, as (position, rule)
+_Bucket = List[Tuple[int, dict]]
+
+
+class _MessageBucket:
+    """Text/attachment rules sharing one (channel, user) key."""
+
+    __slots__ = ('rules', 'literal_prefilter', 'has_non_literal')
+
+    def __init__(self):
+        self.rules: List[Tuple[int, dict, Optional[re.Pattern]]] = []
+        self.literal_prefilter: Optional[re.Pattern] = None
+        self.has_non_literal = False
+
+    def finalize(self) -> None:
+        literals = [
+            rule['text_contains'].lower()
+            for _, rule, _ in self.rules
+            if rule['trigger_type'] == 'text' and 'text_pattern' not in rule
+        ]
+        self.has_non_literal = len(literals) != len(self.rules)
+        if literals:
+            # Longest first so the alternation doesn't stop at a shorter prefix.
+            ordered = sorted(set(literals), key=len, reverse=True)
+            self.literal_prefilter = re.compile('|'.join(re.escape(lit) for lit in ordered))
+
+
+def _attachment_type_matches(target_type: str, content_type: str) -> bool:
+    return (
+        target_type == WILDCARD
+        or content_type == target_type
+        or (target_type.endswith('/*') and content_type.startswith(target_type[:-1]))
+    )
+
+
+class CompiledRuleIndex:
+    """Matches reactions and messages against one guild's normalized rules."""
+
+    def __init__(self, rules: Sequence[dict]):
+        self.rule_count = len(rules)
+        self._reaction_buckets: Dict[Tuple[str, str], _Bucket] = {}
+        self._message_buckets: Dict[Tuple[str, str], _MessageBucket] = {}
+
+        for position, rule in enumerate(rules):
+            trigger_type = rule.get('trigger_type', 'reaction')
+            if trigger_type == 'reaction':
+                if isinstance(rule['user_id'], list):
+                    # Only the bare string '*' is a wildcard; inside a list,
+                    # '*' is compared like any id and never matches a user.
+                    users = [user_key for user_key in rule['user_id'] if str(user_key) != WILDCARD]
+                else:
+                    users = [rule['user_id']]
+                for user_key in users:
+                    key = (str(user_key), str(rule['emoji']))
+                    self._reaction_buckets.setdefault(key, []).append((position, rule))
+            elif trigger_type in ('text', 'attachment'):
+                key = (str(rule.get('channel_id', WILDCARD)), str(rule.get('user_id', WILDCARD)))
+                pattern = None
+                if trigger_type == 'text' and 'text_pattern' in rule:
+                    pattern = re.compile(rule['text_pattern'])
+                self._message_buckets.setdefault(key, _MessageBucket()).rules.append((position, rule, pattern))
+
+        for bucket in self._message_buckets.values():
+            bucket.finalize()
+
+    @property
+    def has_reaction_rules(self) -> bool:
+        return bool(self._reaction_buckets)
+
+    @property
+    def has_message_rules(self) -> bool:
+        return bool(self._message_buckets)
+
+    @staticmethod
+    def _keys(first: str, second: str) -> Iterable[Tuple[str, str]]:
+        return ((first, second), (first, WILDCARD), (WILDCARD, second), (WILDCARD, WILDCARD))
+
+    def match_reaction(self, user_id: str, emoji: str) -> Optional[dict]:
+        """Return the first rule (in watchlist order) matching this user/emoji."""
+        best: Optional[Tuple[int, dict]] = None
+        for key in self._keys(user_id, emoji):
+            bucket = self._reaction_buckets.get(key)
+            if bucket and (best is None or bucket[0][0] < best[0]):
+                best = bucket[0]
+        return best[1] if best else None
+
+    def match_message(
+        self,
+        channel_id: str,
+        user_id: str,
+        content: str,
+        attachment_types: Sequence[Tuple[str, object]] = (),
+    ) -> Optional[Tuple[dict, object]]:
+        """Return (rule, matched attachment or None) for the first matching message rule.
+
+        `attachment_types` is a sequence of (lowercased content_type, attachment).
+        """
+        content = content or ''
+        lowered = None
+        best: Optional[Tuple[int, dict, object]] = None
+        seen_keys = set()
+        for key in self._keys(channel_id, user_id):
+            if key in seen_keys:
+                continue
+            seen_keys.add(key)
+            bucket = self._message_buckets.get(key)
+            if bucket is None:
+                continue
+            literal_hit = True
+            if bucket.literal_prefilter is not None:
+                if lowered is None:
+                    lowered = content.lower()
+                literal_hit = bucket.literal_prefilter.search(lowered) is not None
+                if not literal_hit and not bucket.has_non_literal:
+                    continue
+            for position, rule, pattern in bucket.rules:
+                if best is not None and position >= best[0]:
+                    break
+                matched, attachment = self._rule_matches(rule, pattern, content, lowered, literal_hit, attachment_types)
+                if matched:
+                    best = (position, rule, attachment)
+                    break
+        return (best[1], best[2]) if best else None
+
+    @staticmethod
+    def _rule_matches(rule, pattern, content, lowered, literal_hit, attachment_types):
+        if rule['trigger_type'] == 'text':
+            if pattern is not None:
+                return pattern.search(content) is not None, None
+            if not literal_hit:
+                return False, None
+            if lowered is None:
+                lowered = content.lower()
+            return rule['text_contains'].lower() in lowered, None
+        target_type = rule['attachment_type'].lower()
+        for content_type, attachment in attachment_types:
+            if _attachment_type_matches(target_type, content_type):
+                return True, attachment
+        return False, None
@@ -4,6 +4,7 @@ import logging
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
+from src.common.db_executor import run_db_call
 from src.common.soul import BOT_VOICE
 
 # --- Constants for Dispute Resolution Feature ---
@@ -127,11 +128,11 @@ async def handle_initiate_dispute_resolution(
                     member = await message.guild.fetch_member(aid)
                     author_details_cache[aid] = member.display_name
                 else:
-                    member_data = await asyncio.to_thread(db_handler.get_member, aid)
+                    member_data = await run_db_call(db_handler.get_member, aid)
                     author_details_cache[aid] = member_data.get('username', str(aid)) if member_data else str(aid)
             except discord.NotFound:
                 logger.warning(f"[Reactor][DisputeResolver] Could not find member {aid} in guild. Falling back to DB.")
-                member_data = await asyncio.to_thread(db_handler.get_member, aid)
+                member_data = await run_db_call(db_handler.get_member, aid)
                 author_details_cache[aid] = member_data.get('username', str(aid)) if member_data else str(aid)
             except Exception as e:
                 logger.warning(f"[Reactor][DisputeResolver] Could not fetch member data for author ID {aid}: {e}")
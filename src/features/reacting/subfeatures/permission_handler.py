@@ -4,6 +4,7 @@ from urllib.parse import quote
 from discord.ext import commands # Added for commands.Bot type hint
 
 from src.common import discord_utils # Added import
+from src.common.db_executor import run_db_call
 
 # Assuming DatabaseHandler and OpenMuseInteractor will be passed or imported appropriately
 # from src.common.db_handler import DatabaseHandler
@@ -269,7 +270,7 @@ async def handle_request_curation_permission(
         return
 
     try:
-        author_member_data = await asyncio.to_thread(db_handler.get_member, author.id)
+        author_member_data = await run_db_call(db_handler.get_member, author.id)
 
         if not author_member_data:
              logger.info(f"[Reactor][PermissionHandler] Author {author.id} not found in DB. Creating member entry.")
@@ -596,6 +596,9 @@ class LiveUpdateSocialAgent:
                 system_prompt=system_prompt,
                 messages=messages,
                 max_tokens=4096,
+                # The system prompt only varies by mode and chain settings, so
+                # consecutive runs in a batch can share its cached prefix.
+                prompt_cache=True,
             )
             return response or ""
         except Exception as e:
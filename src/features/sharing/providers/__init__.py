@@ -11,7 +11,14 @@ class SocialPublishProvider(ABC):
 
     @abstractmethod
     async def publish(self, request: SocialPublishRequest) -> Optional[Dict[str, Any]]:
-        """Publish a request and return normalized provider metadata."""
+        """Publish a request and return normalized provider metadata.
+
+        Providers that implement ``prepare`` also accept ``prepared=`` with its result.
+        """
+
+    async def prepare(self, request: SocialPublishRequest) -> Optional[Dict[str, Any]]:
+        """Do slow pre-publish work (e.g. media upload) ahead of ``publish``; None when there is none."""
+        return None
 
     @abstractmethod
     async def delete(self, publication: Dict[str, Any]) -> bool:
@@ -15,6 +15,7 @@ from ..subfeatures.social_poster import (
     CONSUMER_SECRET,
     delete_tweet,
     post_tweet,
+    upload_tweet_media,
 )
 from . import SocialPublishProvider
 
@@ -26,7 +27,20 @@ STATUS_URL_RE = re.compile(r'(?:twitter|x)\.com/.+/status/(\d+)', re.IGNORECASE)
 class XProvider(SocialPublishProvider):
     """X/Twitter provider implementation."""
 
-    async def publish(self, request: SocialPublishRequest) -> Optional[Dict[str, Any]]:
+    async def prepare(self, request: SocialPublishRequest) -> Optional[Dict[str, Any]]:
+        """Upload the request's media so ``publish`` only has to create the tweet."""
+        if request.action == 'retweet' or not request.media_hints:
+            return None
+        media_id = await upload_tweet_media(request.media_hints)
+        if media_id is None:
+            return None
+        return {'media_ids': [media_id]}
+
+    async def publish(
+        self,
+        request: SocialPublishRequest,
+        prepared: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Dict[str, Any]]:
         metadata = self._request_metadata(request)
         user_details = metadata.get('user_details')
         if not user_details:
@@ -52,6 +66,7 @@ class XProvider(SocialPublishProvider):
             original_content=metadata.get('original_content'),
             in_reply_to_tweet_id=target_ref if request.action == 'reply' else None,
             quote_tweet_id=target_ref if request.action == 'quote' else None,
+            media_ids=(prepared or {}).get('media_ids'),
         )
         if not tweet_result:
             return None
@@ -0,0 +1,265 @@
+"""
+PublicationDispatcher — runs claimed social publications concurrently, in due order.
+
+SharingCog used to claim a batch every 30 seconds and publish each row in
+sequence, so a backlog after an outage drained one post at a time. The
+dispatcher instead:
+
+  - orders work by due time (``retry_after`` or ``scheduled_at``): every wait
+    below is a priority queue on that key, so the most overdue post goes first;
+  - pipelines media uploads: ``prepare_publication`` runs as soon as an upload
+    slot is free, while earlier posts are still waiting for (or holding) their
+    provider's post slot, so the post call only has to create the post;
+  - gives each provider its own post budget — a concurrency cap plus a
+    sliding-window rate limit — so one platform's limits never hold up another;
+  - records how long after its due time each publication was published.
+
+Claiming, backlog refills and draining come from ``ClaimedWorkExecutor``.
+
+Tunables (env): SOCIAL_PUBLISH_MAX_IN_FLIGHT, SOCIAL_PUBLISH_UPLOAD_CONCURRENCY,
+SOCIAL_PUBLISH_<PLATFORM>_CONCURRENCY, SOCIAL_PUBLISH_<PLATFORM>_PER_WINDOW,
+SOCIAL_PUBLISH_<PLATFORM>_WINDOW_SECONDS.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from src.common.claimed_work import ClaimedWorkExecutor
+from src.common.db_executor import run_db_call
+from src.common.env import env_float, env_int
+from src.common.metrics import REGISTRY
+
+logger = logging.getLogger('DiscordBot')
+
+LAG_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0, 7200.0, 21600.0)
+
+PUBLISH_DUE_LAG_SECONDS = REGISTRY.histogram(
+    'bot_social_publish_due_lag_seconds', 'Time from a publication being due to it finishing.',
+    ('platform', 'outcome'), buckets=LAG_BUCKETS,
+)
+PUBLICATIONS_IN_FLIGHT = REGISTRY.gauge(
+    'bot_social_publications_in_flight', 'Claimed social publications by dispatch phase.', ('phase',),
+)
+
+PLATFORM_ALIASES = {'x': 'twitter'}
+
+
+@dataclass(frozen=True)
+class PublishBudget:
+    """Post budget for one provider: concurrent posts plus an optional rate window."""
+
+    concurrency: int = 1
+    max_per_window: Optional[int] = None
+    window_seconds: float = 900.0
+
+
+# X allows 100 posts per 15 minutes per user on the v2 API; stay well under it.
+DEFAULT_BUDGETS: Dict[str, PublishBudget] = {
+    'twitter': PublishBudget(concurrency=2, max_per_window=50, window_seconds=900.0),
+    'youtube': PublishBudget(concurrency=1, max_per_window=10, window_seconds=900.0),
+}
+
+
+def normalize_platform(platform: Optional[str]) -> str:
+    normalized = (platform or 'unknown').strip().lower()
+    return PLATFORM_ALIASES.get(normalized, normalized)
+
+
+def budget_for(platform: str, overrides: Optional[Dict[str, PublishBudget]] = None) -> PublishBudget:
+    """The configured budget for ``platform``: explicit override, then env, then defaults."""
+    if overrides and platform in overrides:
+        return overrides[platform]
+    default = DEFAULT_BUDGETS.get(platform, PublishBudget())
+    prefix = f'SOCIAL_PUBLISH_{platform.upper()}'
+    return PublishBudget(
+        concurrency=env_int(f'{prefix}_CONCURRENCY', default.concurrency),
+        max_per_window=env_int(f'{prefix}_PER_WINDOW', default.max_per_window),
+        window_seconds=env_float(f'{prefix}_WINDOW_SECONDS', default.window_seconds),
+    )
+
+
+def _parse_timestamp(value: Any) -> Optional[float]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def due_timestamp(publication: Dict[str, Any]) -> float:
+    """When a claimed publication became due: the later of retry_after and scheduled_at."""
+    due = [ts for ts in (_parse_timestamp(publication.get(key)) for key in ('retry_after', 'scheduled_at')) if ts]
+    return max(due) if due else time.time()
+
+
+class PriorityGate:
+    """Admits waiters lowest-priority-value first, under a concurrency cap and optional rate window."""
+
+    def __init__(
+        self,
+        concurrency: int,
+        max_per_window: Optional[int] = None,
+        window_seconds: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.concurrency = max(int(concurrency), 1)
+        self.max_per_window = max_per_window
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._active = 0
+        self._waiters: List[Tuple[float, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._admitted: Deque[float] = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    @asynccontextmanager
+    async def slot(self, priority: float) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: float) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._pump()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # admitted just as we were cancelled: pass the slot on
+            raise
+
+    def release(self) -> None:
+        self._active -= 1
+        self._pump()
+
+    def _rate_delay(self) -> float:
+        if not self.max_per_window:
+            return 0.0
+        now = self._clock()
+        while self._admitted and now - self._admitted[0] >= self.window_seconds:
+            self._admitted.popleft()
+        if len(self._admitted) < self.max_per_window:
+            return 0.0
+        return self._admitted[0] + self.window_seconds - now
+
+    def _pump(self) -> None:
+        while self._waiters and self._active < self.concurrency:
+            future = self._waiters[0][2]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            delay = self._rate_delay()
+            if delay > 0:
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+                return
+            heapq.heappop(self._waiters)
+            self._active += 1
+            if self.max_per_window:
+                self._admitted.append(self._clock())
+            future.set_result(None)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._pump()
+
+
+class PublicationDispatcher(ClaimedWorkExecutor):
+    """Due-ordered, per-provider-budgeted executor for claimed social publications."""
+
+    log_name = 'PublicationDispatcher'
+    noun = 'due social publication'
+    id_key = 'publication_id'
+    task_prefix = 'social-publication'
+    initial_phase = 'upload'
+    in_flight_gauge = PUBLICATIONS_IN_FLIGHT
+
+    def __init__(
+        self,
+        db_handler,
+        social_publish_service,
+        execute: Callable[[Dict[str, Any], Optional[Dict[str, Any]]], Awaitable[Any]],
+        *,
+        claim_limit: int = 10,
+        max_in_flight: Optional[int] = None,
+        upload_concurrency: Optional[int] = None,
+        budgets: Optional[Dict[str, PublishBudget]] = None,
+    ):
+        super().__init__(
+            db_handler,
+            claim_limit=claim_limit,
+            max_in_flight=max_in_flight or env_int('SOCIAL_PUBLISH_MAX_IN_FLIGHT', 20),
+        )
+        self.social_publish_service = social_publish_service
+        self.execute = execute
+        self._budget_overrides = budgets
+        self._uploads = PriorityGate(upload_concurrency or env_int('SOCIAL_PUBLISH_UPLOAD_CONCURRENCY', 2))
+        self._gates: Dict[str, PriorityGate] = {}
+
+    def gate(self, platform: str) -> PriorityGate:
+        gate = self._gates.get(platform)
+        if gate is None:
+            budget = budget_for(platform, self._budget_overrides)
+            gate = self._gates[platform] = PriorityGate(
+                budget.concurrency, budget.max_per_window, budget.window_seconds,
+            )
+        return gate
+
+    # ------------------------------------------------------------------
+    # Claimed-work hooks
+    # ------------------------------------------------------------------
+
+    async def _claim(self, limit: int) -> List[Dict[str, Any]]:
+        return await run_db_call(self.db_handler.claim_due_social_publications, limit=limit)
+
+    def _order(self, claimed: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return sorted(claimed, key=due_timestamp)
+
+    async def _execute(self, publication: Dict[str, Any]) -> None:
+        publication_id = publication['publication_id']
+        platform = normalize_platform(publication.get('platform'))
+        due = due_timestamp(publication)
+        outcome = 'error'
+        try:
+            async with self._uploads.slot(due):
+                prepared = await self.social_publish_service.prepare_publication(publication_id)
+            self._enter_phase(publication_id, 'post')
+            async with self.gate(platform).slot(due):
+                result = await self.execute(publication, prepared)
+            outcome = 'ok' if result is not None and getattr(result, 'success', False) else 'error'
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            raise
+        except Exception as e:
+            logger.error(
+                f"[PublicationDispatcher] Unexpected error for publication {publication_id} "
+                f"(platform={platform}): {e}",
+                exc_info=True,
+            )
+        finally:
+            PUBLISH_DUE_LAG_SECONDS.observe(max(time.time() - due, 0.0), platform=platform, outcome=outcome)
+
+
+__all__ = ['PriorityGate', 'PublicationDispatcher', 'PublishBudget', 'budget_for', 'due_timestamp']
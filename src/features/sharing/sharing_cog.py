@@ -8,6 +8,7 @@ from discord.ext import commands, tasks
 from src.common.db_handler import DatabaseHandler
 
 from .providers.x_provider import XProvider
+from .publication_dispatcher import PublicationDispatcher
 from .providers.youtube_zapier_provider import YouTubeZapierProvider
 from .sharer import Sharer
 from .social_publish_service import SocialPublishService
@@ -17,7 +18,11 @@ logger = logging.getLogger('DiscordBot')
 
 
 class SharingCog(commands.Cog):
-    """Sharing entrypoints plus the scheduled social publication worker."""
+    """Sharing entrypoints plus the scheduled social publication worker.
+
+    The worker tick only claims; claimed publications run concurrently on the
+    PublicationDispatcher, in due order and within each provider's budget.
+    """
 
     def __init__(
         self,
@@ -36,6 +41,12 @@ class SharingCog(commands.Cog):
         self.claim_batch_size = max(int(os.getenv('SOCIAL_PUBLISH_CLAIM_LIMIT', '10')), 1)
         self.max_attempts = max(int(os.getenv('SOCIAL_PUBLISH_MAX_ATTEMPTS', '3')), 1)
         self.retry_delay_seconds = max(int(os.getenv('SOCIAL_PUBLISH_RETRY_SECONDS', '300')), 1)
+        self.dispatcher = PublicationDispatcher(
+            self.db_handler,
+            self.social_publish_service,
+            self._process_claimed_publication,
+            claim_limit=self.claim_batch_size,
+        )
 
         self.sharer_instance = Sharer(
             bot=self.bot,
@@ -71,30 +82,21 @@ class SharingCog(commands.Cog):
             logger.info("[SharingCog] Scheduled publication worker started.")
 
     def cog_unload(self):
+        self.dispatcher.stop()
         if self.scheduled_publication_worker.is_running():
             self.scheduled_publication_worker.cancel()
             logger.info("[SharingCog] Scheduled publication worker stopped.")
 
     @tasks.loop(seconds=30)
     async def scheduled_publication_worker(self):
-        """Claim and execute due queued social publications."""
-        claimed_publications = self.db_handler.claim_due_social_publications(
-            limit=self.claim_batch_size,
-        )
-        if not claimed_publications:
-            return
-
-        logger.info(
-            f"[SharingCog] Claimed {len(claimed_publications)} due social publication(s)."
-        )
-        for publication in claimed_publications:
-            await self._process_claimed_publication(publication)
+        """Claim due queued social publications and hand them to the dispatcher."""
+        await self.dispatcher.claim_available()
 
     @scheduled_publication_worker.before_loop
     async def _before_scheduled_publication_worker(self):
         await self.bot.wait_until_ready()
 
-    async def _process_claimed_publication(self, publication: dict):
+    async def _process_claimed_publication(self, publication: dict, prepared: Optional[dict] = None):
         publication_id = publication.get('publication_id')
         platform = publication.get('platform')
         action = publication.get('action')
@@ -102,16 +104,16 @@ class SharingCog(commands.Cog):
 
         if not publication_id:
             logger.warning("[SharingCog] Claimed publication without publication_id; skipping.")
-            return
+            return None
 
         try:
-            result = await self.social_publish_service.execute_publication(publication_id)
+            result = await self.social_publish_service.execute_publication(publication_id, prepared=prepared)
             if result.success:
                 logger.info(
                     f"[SharingCog] Publication {publication_id} succeeded "
                     f"(platform={platform}, action={action})."
                 )
-                return
+                return result
 
             error_message = result.error or "Unknown publish failure"
             if self._should_retry_publication(error_message, attempt_count):
@@ -124,12 +126,13 @@ class SharingCog(commands.Cog):
                         f"(platform={platform}, action={action}, attempt={attempt_count}, "
                         f"retry_after={retry_after.isoformat()}, error={error_message})."
                     )
-                    return
+                    return result
 
             logger.error(
                 f"[SharingCog] Publication {publication_id} failed "
                 f"(platform={platform}, action={action}, attempt={attempt_count}, error={error_message})."
             )
+            return result
         except Exception as e:
             logger.error(
                 f"[SharingCog] Unexpected scheduler error for publication {publication_id} "
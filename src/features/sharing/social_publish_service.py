@@ -234,7 +234,32 @@ class SocialPublishService:
             success=True,
         )
 
-    async def execute_publication(self, publication_id: str) -> SocialPublishResult:
+    async def prepare_publication(self, publication_id: str) -> Optional[Dict[str, Any]]:
+        """Run the provider's pre-publish work (media upload) for a claimed publication.
+
+        Best effort: returns None when there is nothing to prepare or it failed,
+        and ``execute_publication`` then does the full publish as before.
+        Integrity and routing are still enforced by ``execute_publication``.
+        """
+        publication = self.db_handler.get_social_publication_by_id(publication_id)
+        if not publication or not self._verify_publication_integrity(publication):
+            return None
+        request = self._request_from_publication(publication)
+        provider = self._get_provider(request.platform) if request else None
+        prepare = getattr(provider, 'prepare', None)
+        if prepare is None:
+            return None
+        try:
+            return await prepare(request)
+        except Exception as e:
+            self.logger.warning(f"[SocialPublishService] prepare failed for {publication_id}: {e}", exc_info=True)
+            return None
+
+    async def execute_publication(
+        self,
+        publication_id: str,
+        prepared: Optional[Dict[str, Any]] = None,
+    ) -> SocialPublishResult:
         if not self._publication_signing_secret:
             return SocialPublishResult(
                 publication_id=publication_id,
@@ -293,7 +318,10 @@ class SocialPublishService:
             )
 
         try:
-            provider_result = await provider.publish(request)
+            if prepared is not None:
+                provider_result = await provider.publish(request, prepared=prepared)
+            else:
+                provider_result = await provider.publish(request)
             if not provider_result:
                 self.db_handler.mark_social_publication_failed(
                     publication_id,
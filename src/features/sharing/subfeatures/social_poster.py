@@ -381,6 +381,93 @@ async def generate_media_title(attachment: Dict, original_comment: Optional[str]
 
     return title
 
+# --- Media Upload ---
+
+async def _upload_primary_attachment(api_v1: tweepy.API, attachments: List[Dict]) -> Optional[str]:
+    """Upload the first attachment via the v1.1 media endpoint; None if its file is unavailable."""
+    loop = asyncio.get_event_loop()
+    # Assume the first attachment is the primary one to post
+    # TODO: Handle multiple attachments if Twitter API allows/needed
+    attachment = attachments[0]
+    media_path = attachment.get('local_path')
+    durable_url = attachment.get('durable_url')
+
+    # ── durable_url fallback: download to temp file when local_path absent ──
+    if (not media_path or not os.path.exists(media_path)) and durable_url:
+        logger.info(
+            "post_tweet: local_path missing for %s, downloading from durable_url: %s",
+            attachment.get('filename', 'unknown'), durable_url[:80],
+        )
+        try:
+            import tempfile as _tempfile
+            from src.features.sharing.live_update_social.helpers import download_media_url
+
+            temp_dir = _tempfile.mkdtemp(prefix="tweet_media_")
+            downloaded = await download_media_url(
+                url=durable_url,
+                dest_dir=temp_dir,
+                filename_prefix="tweet",
+            )
+            if downloaded and downloaded.get("local_path") and os.path.exists(downloaded["local_path"]):
+                media_path = downloaded["local_path"]
+                attachment["local_path"] = media_path
+                logger.info("post_tweet: downloaded durable_url → %s", media_path)
+            else:
+                logger.error("post_tweet: durable_url download failed for %s", durable_url[:80])
+                return None
+        except Exception as _dl_err:
+            logger.error("post_tweet: durable_url download error: %s", _dl_err, exc_info=True)
+            return None
+
+    if not media_path or not os.path.exists(media_path):
+        logger.error(f"Cannot post tweet, media file path invalid or file missing: {media_path}")
+        return None
+
+    filename = attachment.get('filename', Path(media_path).name)
+    file_extension = Path(filename).suffix.lower()
+
+    logger.info(f"Uploading media ({filename}) to Twitter...")
+    if file_extension == '.gif':
+        # GIFs need chunked upload and specific media category
+        media = await loop.run_in_executor(None,
+            lambda: api_v1.media_upload(media_path, chunked=True, media_category="tweet_gif")
+        )
+    else:
+         # Other types (images/videos) - use standard upload (chunked is good practice for videos)
+         # Tweepy v1's media_upload handles chunking automatically if file is large enough
+         media = await loop.run_in_executor(None,
+             lambda: api_v1.media_upload(media_path, chunked=True)
+         )
+
+    media_id = media.media_id_string
+    logger.info(f"Twitter Media Upload successful. Media ID: {media_id}")
+    return media_id
+
+
+async def upload_tweet_media(attachments: Optional[List[Dict]]) -> Optional[str]:
+    """Upload a post's media ahead of time so the tweet can be created from its media ID.
+
+    Returns None when there is nothing to upload or the upload fails; post_tweet
+    then uploads inline as usual.
+    """
+    if not attachments:
+        return None
+    if not all([CONSUMER_KEY, CONSUMER_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET]):
+        logger.error("Cannot upload tweet media, API credentials missing.")
+        return None
+    try:
+        return await _upload_primary_attachment(_build_api_v1(), attachments)
+    except Exception as e:
+        logger.error(f"Error uploading tweet media ahead of posting: {e}", exc_info=True)
+        return None
+
+
+def _build_api_v1() -> tweepy.API:
+    auth = tweepy.OAuthHandler(CONSUMER_KEY, CONSUMER_SECRET)
+    auth.set_access_token(ACCESS_TOKEN, ACCESS_TOKEN_SECRET)
+    return tweepy.API(auth)
+
+
 # --- Main Posting Function ---
 
 async def post_tweet(
@@ -389,9 +476,12 @@ async def post_tweet(
     attachments: Optional[List[Dict]],
     original_content: Optional[str],
     in_reply_to_tweet_id: Optional[str] = None,
-    quote_tweet_id: Optional[str] = None
+    quote_tweet_id: Optional[str] = None,
+    media_ids: Optional[List[str]] = None,
 ) -> Optional[Dict[str, str]]:
     """Uploads media and posts a tweet with a generated caption.
+
+    ``media_ids`` from ``upload_tweet_media`` skip the upload step.
     
     Returns:
         Dict with 'url' and 'id' keys if successful, None if failed
@@ -411,69 +501,18 @@ async def post_tweet(
 
     try:
         # --- Media Upload (v1.1 API) ---
-        auth = tweepy.OAuthHandler(CONSUMER_KEY, CONSUMER_SECRET)
-        auth.set_access_token(ACCESS_TOKEN, ACCESS_TOKEN_SECRET)
-        api_v1 = tweepy.API(auth)
+        api_v1 = _build_api_v1()
         
         loop = asyncio.get_event_loop()
         media_id = None
 
-        if attachments:
-            # Assume the first attachment is the primary one to post
-            # TODO: Handle multiple attachments if Twitter API allows/needed
-            attachment = attachments[0]
-            media_path = attachment.get('local_path')
-            durable_url = attachment.get('durable_url')
-            
-            # ── durable_url fallback: download to temp file when local_path absent ──
-            if (not media_path or not os.path.exists(media_path)) and durable_url:
-                logger.info(
-                    "post_tweet: local_path missing for %s, downloading from durable_url: %s",
-                    attachment.get('filename', 'unknown'), durable_url[:80],
-                )
-                try:
-                    import tempfile as _tempfile
-                    from src.features.sharing.live_update_social.helpers import download_media_url
-                    
-                    temp_dir = _tempfile.mkdtemp(prefix="tweet_media_")
-                    downloaded = await download_media_url(
-                        url=durable_url,
-                        dest_dir=temp_dir,
-                        filename_prefix="tweet",
-                    )
-                    if downloaded and downloaded.get("local_path") and os.path.exists(downloaded["local_path"]):
-                        media_path = downloaded["local_path"]
-                        attachment["local_path"] = media_path
-                        logger.info("post_tweet: downloaded durable_url → %s", media_path)
-                    else:
-                        logger.error("post_tweet: durable_url download failed for %s", durable_url[:80])
-                        return None
-                except Exception as _dl_err:
-                    logger.error("post_tweet: durable_url download error: %s", _dl_err, exc_info=True)
-                    return None
-            
-            if not media_path or not os.path.exists(media_path):
-                logger.error(f"Cannot post tweet, media file path invalid or file missing: {media_path}")
+        if media_ids:
+            media_id = media_ids[0]
+            logger.info(f"Using pre-uploaded Twitter media. Media ID: {media_id}")
+        elif attachments:
+            media_id = await _upload_primary_attachment(api_v1, attachments)
+            if media_id is None:
                 return None
-
-            filename = attachment.get('filename', Path(media_path).name)
-            file_extension = Path(filename).suffix.lower()
-
-            logger.info(f"Uploading media ({filename}) to Twitter...")
-            if file_extension == '.gif':
-                # GIFs need chunked upload and specific media category
-                media = await loop.run_in_executor(None,
-                    lambda: api_v1.media_upload(media_path, chunked=True, media_category="tweet_gif")
-                )
-            else:
-                 # Other types (images/videos) - use standard upload (chunked is good practice for videos)
-                 # Tweepy v1's media_upload handles chunking automatically if file is large enough
-                 media = await loop.run_in_executor(None,
-                     lambda: api_v1.media_upload(media_path, chunked=True)
-                 )
-
-            media_id = media.media_id_string
-            logger.info(f"Twitter Media Upload successful. Media ID: {media_id}")
         else:
             logger.info("Posting text-only tweet without media attachments.")
 
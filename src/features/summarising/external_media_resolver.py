@@ -6,16 +6,26 @@ Two-tier safety:
   2. Platform-policy respect (skip yt-dlp for fallback-link-only domains).
 
 All side-effectful functions (subprocess, HTTP, filesystem) are injectable
-so the resolver can be tested without real network calls.
+so the resolver can be tested without real network calls. Injected callables
+may be coroutine functions (awaited) or plain functions (run in a worker
+thread), so ``resolve_async`` never blocks the event loop.
+
+ExternalMediaResolverService wraps the resolver for long-running callers:
+a bounded worker pool, de-duplication of concurrent requests per cache key,
+LRU size management of the cache directory, and latency / hit-rate metrics.
 """
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
+import inspect
+import json
 import logging
 import os
 import subprocess
 import tempfile
+import threading
 import time
 from dataclasses import dataclass, field
 from enum import Enum
@@ -62,6 +72,12 @@ _CACHE_DIR = os.environ.get("EXTERNAL_MEDIA_CACHE_DIR", os.path.join(tempfile.ge
 # Max bytes configurable via env var
 _MAX_BYTES = int(os.environ.get("EXTERNAL_MEDIA_MAX_BYTES", str(DEFAULT_MAX_BYTES)))
 
+# Resolver service: concurrent fetches and on-disk cache budget (LRU-evicted)
+DEFAULT_RESOLVER_WORKERS = int(os.environ.get("EXTERNAL_MEDIA_RESOLVER_WORKERS", "2"))
+DEFAULT_CACHE_MAX_BYTES = int(os.environ.get("EXTERNAL_MEDIA_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+_USER_AGENT = "Mozilla/5.0 (compatible; BNDC-Bot/1.0; +https://github.com/banodoco/brain-of-bndc)"
+
 
 # ---------------------------------------------------------------------------
 # Outcome enum
@@ -122,16 +138,7 @@ def _default_run_yt_dlp_json(
     """
     try:
         proc = subprocess.run(
-            [
-                "yt-dlp",
-                "--dump-json",
-                "--no-playlist",
-                "--no-check-certificates",
-                "--socket-timeout", str(timeout),
-                "--retries", "1",
-                "--flat-playlist",
-                url,
-            ],
+            _yt_dlp_args(url, timeout),
             capture_output=True,
             text=True,
             timeout=timeout + 5,
@@ -143,22 +150,7 @@ def _default_run_yt_dlp_json(
     except Exception as exc:
         return False, f"yt-dlp subprocess error: {exc}"
 
-    if proc.returncode != 0:
-        stderr = (proc.stderr or "").strip()
-        if stderr:
-            return False, f"yt-dlp exit {proc.returncode}: {stderr[:500]}"
-        return False, f"yt-dlp exit {proc.returncode}"
-
-    stdout = (proc.stdout or "").strip()
-    if not stdout:
-        return False, "yt-dlp produced empty output"
-
-    try:
-        import json
-        data = json.loads(stdout)
-        return True, data
-    except json.JSONDecodeError as exc:
-        return False, f"yt-dlp JSON parse error: {exc}"
+    return _parse_yt_dlp_output(proc.returncode, proc.stdout, proc.stderr)
 
 
 def _default_download_url_to_path(
@@ -180,10 +172,7 @@ def _default_download_url_to_path(
         req = urllib.request.Request(
             url,
             headers={
-                "User-Agent": (
-                    "Mozilla/5.0 (compatible; BNDC-Bot/1.0; "
-                    "+https://github.com/banodoco/brain-of-bndc)"
-                ),
+                "User-Agent": _USER_AGENT,
             },
         )
         with urllib.request.urlopen(req, timeout=timeout) as resp:
@@ -222,6 +211,124 @@ def _default_download_url_to_path(
         return False, None, 0, f"download error: {exc}"
 
 
+def _yt_dlp_args(url: str, timeout: int) -> List[str]:
+    return [
+        "yt-dlp",
+        "--dump-json",
+        "--no-playlist",
+        "--no-check-certificates",
+        "--socket-timeout", str(timeout),
+        "--retries", "1",
+        "--flat-playlist",
+        url,
+    ]
+
+
+def _parse_yt_dlp_output(returncode: int, stdout: str, stderr: str) -> Tuple[bool, Any]:
+    if returncode != 0:
+        stderr = (stderr or "").strip()
+        if stderr:
+            return False, f"yt-dlp exit {returncode}: {stderr[:500]}"
+        return False, f"yt-dlp exit {returncode}"
+
+    stdout = (stdout or "").strip()
+    if not stdout:
+        return False, "yt-dlp produced empty output"
+
+    try:
+        return True, json.loads(stdout)
+    except json.JSONDecodeError as exc:
+        return False, f"yt-dlp JSON parse error: {exc}"
+
+
+async def _default_run_yt_dlp_json_async(
+    url: str,
+    *,
+    timeout: int = DEFAULT_YT_DLP_TIMEOUT,
+) -> Tuple[bool, Any]:
+    """Async ``_default_run_yt_dlp_json`` on ``asyncio.create_subprocess_exec``."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *_yt_dlp_args(url, timeout),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        return False, "yt-dlp binary not found"
+    except Exception as exc:
+        return False, f"yt-dlp subprocess error: {exc}"
+
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout + 5)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return False, f"yt-dlp timed out after {timeout}s"
+    return _parse_yt_dlp_output(
+        proc.returncode,
+        stdout.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace"),
+    )
+
+
+async def _default_download_url_to_path_async(
+    url: str,
+    dest_path: str,
+    *,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    timeout: int = DEFAULT_DOWNLOAD_TIMEOUT,
+) -> Tuple[bool, Optional[str], int, Optional[str]]:
+    """Async ``_default_download_url_to_path``: streams chunks straight to disk.
+
+    Writes to ``dest_path + '.part'`` and renames on success, so a failed or
+    oversize download never leaves a truncated file at ``dest_path``.
+    """
+    import aiohttp
+
+    part_path = dest_path + ".part"
+    total_read = 0
+    try:
+        await asyncio.to_thread(os.makedirs, os.path.dirname(dest_path), exist_ok=True)
+        async with aiohttp.ClientSession(
+            headers={"User-Agent": _USER_AGENT},
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as session:
+            async with session.get(url) as resp:
+                if resp.status >= 400:
+                    return False, None, 0, f"HTTP {resp.status}: {resp.reason}"
+                content_type = resp.headers.get("Content-Type", "").strip()
+                f = await asyncio.to_thread(open, part_path, "wb")
+                try:
+                    async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+                        total_read += len(chunk)
+                        if total_read > max_bytes:
+                            return False, content_type, total_read, (
+                                f"oversize: downloaded {total_read} bytes, "
+                                f"cap is {max_bytes}"
+                            )
+                        await asyncio.to_thread(f.write, chunk)
+                finally:
+                    await asyncio.to_thread(f.close)
+        await asyncio.to_thread(os.replace, part_path, dest_path)
+        return True, content_type, total_read, None
+    except asyncio.TimeoutError:
+        return False, None, 0, f"download timed out after {timeout}s"
+    except aiohttp.ClientError as exc:
+        return False, None, 0, f"URL error: {exc}"
+    except Exception as exc:
+        return False, None, 0, f"download error: {exc}"
+    finally:
+        await asyncio.to_thread(_discard_file, part_path)
+
+
+def _discard_file(path: str) -> None:
+    if os.path.exists(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
 def _default_ensure_cache_dir(base_dir: str = _CACHE_DIR) -> str:
     """Ensure the cache directory exists and return its path."""
     os.makedirs(base_dir, exist_ok=True)
@@ -242,6 +349,21 @@ def _resolve_file_path(cache_dir: str, url_key: str, content_hash_val: str) -> s
     return os.path.join(subdir, filename)
 
 
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def _invoke(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Await coroutine functions; run plain callables in a worker thread."""
+    if inspect.iscoroutinefunction(fn):
+        return await fn(*args, **kwargs)
+    return await asyncio.to_thread(fn, *args, **kwargs)
+
+
 def _provenance_check(
     source_url: str,
     resolved_cdn_url: str,
@@ -287,9 +409,9 @@ class ExternalMediaResolver:
     download_timeout: int = DEFAULT_DOWNLOAD_TIMEOUT
     safelist: Tuple[str, ...] = SAFELISTED_DOMAINS
 
-    # Injectable side-effectful functions
-    _run_yt_dlp: Callable[..., Tuple[bool, Any]] = _default_run_yt_dlp_json
-    _download: Callable[..., Tuple[bool, Optional[str], int, Optional[str]]] = _default_download_url_to_path
+    # Injectable side-effectful functions (sync or async)
+    _run_yt_dlp: Callable[..., Any] = _default_run_yt_dlp_json_async
+    _download: Callable[..., Any] = _default_download_url_to_path_async
     _ensure_cache: Callable[..., str] = _default_ensure_cache_dir
     _get_cache: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None  # DB cache lookup
     _upsert_cache: Optional[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = None  # DB cache write
@@ -299,9 +421,29 @@ class ExternalMediaResolver:
         source_url: str,
         *,
         source_message_id: Optional[str] = None,
+    ) -> ResolverResult:
+        """Blocking wrapper around :meth:`resolve_async` for code without a running loop."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.resolve_async(source_url, source_message_id=source_message_id))
+        raise RuntimeError(
+            "ExternalMediaResolver.resolve() is blocking and cannot run inside an event loop; "
+            "await resolve_async() instead"
+        )
+
+    async def resolve_async(
+        self,
+        source_url: str,
+        *,
+        source_message_id: Optional[str] = None,
+        use_cache: bool = True,
     ) -> ResolverResult:
         """Resolve a single external media URL.
 
+        ``use_cache=False`` skips the DB cache lookup (e.g. when the cached
+        file has been evicted from disk).
+
         Flow:
           1. Check platform policy → skip long-form domains immediately.
           2. Check source domain against safelist → skip non-safelisted.
@@ -365,9 +507,9 @@ class ExternalMediaResolver:
         url_key = make_cache_key(source_url)
 
         # ── Step 2: Check DB cache ─────────────────────────────────────
-        if self._get_cache is not None:
+        if self._get_cache is not None and use_cache:
             try:
-                cached = self._get_cache(url_key)
+                cached = await _invoke(self._get_cache, url_key)
                 if cached is not None and cached.get("status") in ("downloaded", "cache_hit"):
                     logger.debug(
                         "ExternalMediaResolver: cache hit for %s",
@@ -396,7 +538,8 @@ class ExternalMediaResolver:
 
         # ── Step 3: yt-dlp metadata extraction ────────────────────────
         start_time = time.monotonic()
-        success, metadata_or_error = self._run_yt_dlp(
+        success, metadata_or_error = await _invoke(
+            self._run_yt_dlp,
             source_url,
             timeout=self.yt_dlp_timeout,
         )
@@ -421,7 +564,7 @@ class ExternalMediaResolver:
                 metadata={"yt_dlp_elapsed": elapsed},
                 trace=f"metadata_failed: {error_str}",
             )
-            self._persist_to_cache(result)
+            await asyncio.to_thread(self._persist_to_cache, result)
             return result
 
         metadata: Dict[str, Any] = metadata_or_error if isinstance(metadata_or_error, dict) else {}
@@ -446,7 +589,7 @@ class ExternalMediaResolver:
                 },
                 trace="metadata_failed: no downloadable URL in metadata",
             )
-            self._persist_to_cache(result)
+            await asyncio.to_thread(self._persist_to_cache, result)
             return result
 
         resolved_url_sanitised = sanitise_url_for_logs(candidate_url)
@@ -477,19 +620,20 @@ class ExternalMediaResolver:
                 },
                 trace=f"rejected: unsupported content type {candidate_content_type}",
             )
-            self._persist_to_cache(result)
+            await asyncio.to_thread(self._persist_to_cache, result)
             return result
 
         # ── Step 7: Download with streaming byte-limit ─────────────────
         _ensure_cache = self._ensure_cache if self._ensure_cache else _default_ensure_cache_dir
-        cache_dir = _ensure_cache(self.cache_dir)
+        cache_dir = await _invoke(_ensure_cache, self.cache_dir)
 
         # Compute preliminary content hash from URL (placeholder until download)
         temp_content_hash = _content_hash(candidate_url.encode("utf-8"))
         dest_path = _resolve_file_path(cache_dir, url_key, temp_content_hash)
 
         d_start = time.monotonic()
-        d_success, d_content_type, d_byte_size, d_error = self._download(
+        d_success, d_content_type, d_byte_size, d_error = await _invoke(
+            self._download,
             candidate_url,
             dest_path,
             max_bytes=self.max_bytes,
@@ -524,7 +668,7 @@ class ExternalMediaResolver:
                 },
                 trace=f"download_failed: {d_error}",
             )
-            self._persist_to_cache(result)
+            await asyncio.to_thread(self._persist_to_cache, result)
             # Clean up partial file
             try:
                 if os.path.exists(dest_path):
@@ -535,9 +679,7 @@ class ExternalMediaResolver:
 
         # ── Step 8: Recompute content_hash from actual content ────────
         try:
-            with open(dest_path, "rb") as f:
-                actual_data = f.read()
-            actual_hash = _content_hash(actual_data)
+            actual_hash = await asyncio.to_thread(_hash_file, dest_path)
         except Exception as exc:
             result = ResolverResult(
                 outcome=ResolveOutcome.DOWNLOAD_FAILED,
@@ -551,7 +693,7 @@ class ExternalMediaResolver:
                 failure_reason=f"hash computation failed: {exc}",
                 trace=f"download_failed: hash error: {exc}",
             )
-            self._persist_to_cache(result)
+            await asyncio.to_thread(self._persist_to_cache, result)
             return result
 
         # Rename file to include actual content hash
@@ -602,7 +744,7 @@ class ExternalMediaResolver:
                 },
                 trace=f"rejected: {compat_reason}",
             )
-            self._persist_to_cache(result)
+            await asyncio.to_thread(self._persist_to_cache, result)
             return result
 
         # ── Step 10: Success ───────────────────────────────────────────
@@ -632,7 +774,7 @@ class ExternalMediaResolver:
             },
             trace=f"downloaded: {media_kind} {effective_content_type} {d_byte_size} bytes",
         )
-        self._persist_to_cache(result)
+        await asyncio.to_thread(self._persist_to_cache, result)
         return result
 
     def _extract_best_candidate(
@@ -789,3 +931,181 @@ def create_resolver(
         kwargs["_ensure_cache"] = ensure_cache
 
     return ExternalMediaResolver(**kwargs)
+
+
+# ---------------------------------------------------------------------------
+# Async resolver service
+# ---------------------------------------------------------------------------
+
+RESOLVE_LATENCY_BUCKETS_MS = (100, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class ExternalMediaResolverService:
+    """Long-lived, loop-friendly front end for an :class:`ExternalMediaResolver`.
+
+    - at most ``workers`` resolutions run at once (bounded worker pool);
+    - concurrent requests for the same ``make_cache_key`` share one fetch;
+    - after each download the cache directory is trimmed to
+      ``max_cache_bytes`` by evicting least-recently-used files; cache hits
+      refresh a file's recency, and a DB cache hit whose file was evicted is
+      re-fetched;
+    - a returned ``file_path`` is pinned against eviction until the caller
+      passes the result to ``release()``;
+    - ``get_metrics()`` reports resolve latency, outcomes and cache hit rate.
+    """
+
+    def __init__(
+        self,
+        resolver: Optional[ExternalMediaResolver] = None,
+        *,
+        workers: int = DEFAULT_RESOLVER_WORKERS,
+        max_cache_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    ) -> None:
+        self.resolver = resolver or ExternalMediaResolver()
+        self.workers = max(1, workers)
+        self.max_cache_bytes = max_cache_bytes
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # url_key -> callers still using the file; eviction runs in a worker thread.
+        self._pins: Dict[str, int] = {}
+        self._pins_lock = threading.Lock()
+        self._metrics: Dict[str, Any] = {
+            "requests": 0,
+            "deduplicated": 0,
+            "resolved": 0,
+            "cache_hits": 0,
+            "evicted_files": 0,
+            "evicted_bytes": 0,
+            "latency_ms_total": 0.0,
+            "latency_ms_max": 0.0,
+            "latency_buckets_ms": {**{str(b): 0 for b in RESOLVE_LATENCY_BUCKETS_MS}, "inf": 0},
+            "outcomes": {},
+        }
+
+    async def resolve(self, source_url: str, *, source_message_id: Optional[str] = None) -> ResolverResult:
+        """Resolve ``source_url``; call ``release(result)`` once done with its file."""
+        self._metrics["requests"] += 1
+        url_key = make_cache_key(source_url)
+        self._pin(url_key)
+        try:
+            result = await self._resolve_shared(url_key, source_url, source_message_id)
+        except BaseException:
+            self._unpin(url_key)
+            raise
+        if not result.file_path:
+            self._unpin(url_key)
+        return result
+
+    def release(self, result: ResolverResult) -> None:
+        """Let the cache evict ``result``'s file again; no-op without a file."""
+        if result.file_path:
+            self._unpin(result.url_key)
+
+    async def _resolve_shared(
+        self, url_key: str, source_url: str, source_message_id: Optional[str]
+    ) -> ResolverResult:
+        pending = self._inflight.get(url_key)
+        if pending is not None:
+            self._metrics["deduplicated"] += 1
+            return await asyncio.shield(pending)
+
+        task = asyncio.ensure_future(self._resolve_pooled(source_url, source_message_id))
+        self._inflight[url_key] = task
+        task.add_done_callback(lambda _t: self._inflight.pop(url_key, None))
+        return await asyncio.shield(task)
+
+    def _pin(self, url_key: str) -> None:
+        with self._pins_lock:
+            self._pins[url_key] = self._pins.get(url_key, 0) + 1
+
+    def _unpin(self, url_key: str) -> None:
+        with self._pins_lock:
+            remaining = self._pins.get(url_key, 0) - 1
+            if remaining > 0:
+                self._pins[url_key] = remaining
+            else:
+                self._pins.pop(url_key, None)
+
+    async def _resolve_pooled(self, source_url: str, source_message_id: Optional[str]) -> ResolverResult:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        async with self._semaphore:
+            started = time.monotonic()
+            result = await self.resolver.resolve_async(source_url, source_message_id=source_message_id)
+            if result.outcome == ResolveOutcome.CACHE_HIT and result.file_path:
+                if os.path.exists(result.file_path):
+                    await asyncio.to_thread(_touch, result.file_path)
+                else:
+                    result = await self.resolver.resolve_async(
+                        source_url, source_message_id=source_message_id, use_cache=False,
+                    )
+            if result.outcome == ResolveOutcome.DOWNLOADED and self.max_cache_bytes > 0:
+                await asyncio.to_thread(self._enforce_cache_budget)
+            self._record(result, (time.monotonic() - started) * 1000)
+            return result
+
+    def _record(self, result: ResolverResult, latency_ms: float) -> None:
+        metrics = self._metrics
+        metrics["resolved"] += 1
+        if result.outcome == ResolveOutcome.CACHE_HIT:
+            metrics["cache_hits"] += 1
+        outcome = str(result.outcome.value)
+        metrics["outcomes"][outcome] = metrics["outcomes"].get(outcome, 0) + 1
+        metrics["latency_ms_total"] += latency_ms
+        metrics["latency_ms_max"] = max(metrics["latency_ms_max"], latency_ms)
+        for bound in RESOLVE_LATENCY_BUCKETS_MS:
+            if latency_ms <= bound:
+                metrics["latency_buckets_ms"][str(bound)] += 1
+                break
+        else:
+            metrics["latency_buckets_ms"]["inf"] += 1
+
+    def _enforce_cache_budget(self) -> None:
+        """Evict least-recently-used unpinned cache files until the directory fits the budget."""
+        entries = []
+        total = 0
+        for root, _dirs, files in os.walk(self.resolver.cache_dir):
+            for name in files:
+                if name.endswith(".part"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                total += stat.st_size
+                entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+        if total <= self.max_cache_bytes:
+            return
+        for _used, size, path in sorted(entries):
+            if total <= self.max_cache_bytes:
+                break
+            url_key = os.path.basename(path).split("_", 1)[0]
+            with self._pins_lock:
+                if url_key in self._pins:
+                    continue
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+            total -= size
+            self._metrics["evicted_files"] += 1
+            self._metrics["evicted_bytes"] += size
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = self._metrics
+        resolved = metrics["resolved"]
+        return {
+            **{k: v for k, v in metrics.items() if k not in ("latency_ms_total", "latency_buckets_ms", "outcomes")},
+            "in_flight": len(self._inflight),
+            "pinned": len(self._pins),
+            "cache_hit_rate": round(metrics["cache_hits"] / resolved, 4) if resolved else None,
+            "avg_latency_ms": round(metrics["latency_ms_total"] / resolved, 1) if resolved else None,
+            "latency_buckets_ms": dict(metrics["latency_buckets_ms"]),
+            "outcomes": dict(metrics["outcomes"]),
+        }
+
+
+def _touch(path: str) -> None:
+    now = time.time()
+    os.utime(path, (now, now))
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import asyncio
 import gzip
 import io
 import json
@@ -16,6 +15,7 @@ from typing import Any, Dict, List, Optional
 
 import discord
 
+from src.common.db_executor import run_db_call
 from src.common.db_handler import DatabaseHandler
 from src.common.urls import message_jump_url
 
@@ -747,7 +747,7 @@ class LiveTopCreations:
 
     @staticmethod
     async def _call_db(method: Any, *args: Any, **kwargs: Any) -> Any:
-        return await asyncio.to_thread(method, *args, **kwargs)
+        return await run_db_call(method, *args, **kwargs)
 
     @classmethod
     def _source_kind(
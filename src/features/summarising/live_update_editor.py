@@ -19,6 +19,7 @@ from typing import Any, Dict, List, Optional
 
 import discord
 
+from src.common.db_executor import run_db_call
 from src.common.db_handler import DatabaseHandler
 from src.common.urls import message_jump_url
 from src.features.summarising.live_update_prompts import LiveUpdateCandidateGenerator
@@ -2018,7 +2019,7 @@ class LiveUpdateEditor:
 
     @staticmethod
     async def _call_db(method: Any, *args: Any, **kwargs: Any) -> Any:
-        return await asyncio.to_thread(method, *args, **kwargs)
+        return await run_db_call(method, *args, **kwargs)
 
     @staticmethod
     def _snapshot_memory(memory: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -8,13 +8,14 @@ Anthropic or Discord dependencies.
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import re
 import os
 import tempfile
+import threading
 import time
-from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta, timezone
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 from urllib.parse import unquote, urlparse
@@ -24,12 +25,23 @@ import discord
 
 from src.features.summarising.live_update_prompts import DEFAULT_LIVE_UPDATE_MODEL
 from src.common.external_media import extract_external_urls  # T6: shared helper
+from src.common.llm.prompt_cache import PromptAssembler, PromptCacheStats, cache_usage, stable_json
+from src.features.summarising.topic_identity import (
+    SIMILARITY_COLLISION_THRESHOLD,
+    Collision,
+    TopicIdentity,
+    _canonical_prefix_match,
+    _coerce_topic_identity,
+    _normalize_author_set,
+    _slugify,
+    canonicalize_topic_key,
+    trigram_similarity,
+)
+from src.features.summarising.topic_index import TopicTrigramIndex
 
 
 logger = logging.getLogger("DiscordBot")
 
-SIMILARITY_COLLISION_THRESHOLD = 0.55
-
 READ_TOOL_NAMES = {
     "search_topics",
     "search_messages",
@@ -51,6 +63,22 @@ WRITE_TOOL_NAMES = {
     "finalize_run",
 }
 
+# Per-tool concurrency caps for read tools run in parallel within one model
+# turn (TOPIC_EDITOR_TOOL_CONCURRENCY_<TOOL> overrides; everything else uses
+# TOPIC_EDITOR_TOOL_CONCURRENCY). Vision tools download media and call paid
+# APIs, so they get tighter caps and longer timeouts.
+TOOL_CONCURRENCY_DEFAULTS = {
+    "understand_image": 3,
+    "understand_video": 2,
+}
+TOOL_TIMEOUT_DEFAULTS = {
+    "understand_image": 90.0,
+    "understand_video": 180.0,
+}
+
+# Upper bounds (ms) of the per-tool latency histogram recorded in run metadata.
+TOOL_LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
 
 TOPIC_EDITOR_SYSTEM_PROMPT = """You are the BNDC live-update writer.
 
@@ -200,7 +228,7 @@ TOPIC_EDITOR_TOOLS: List[Dict[str, Any]] = [
         "input_schema": {
             "type": "object",
             "properties": {
-                "query": {"type": "string", "description": "free-text content match (ILIKE)"},
+                "query": {"type": "string", "description": "free-text content match (words, \"phrases\", -exclusions, or substrings); archive results are ranked by relevance"},
                 "from_author_id": {"type": "integer", "description": "equivalent to Discord 'from:' — restrict to messages this author wrote"},
                 "in_channel_id": {"type": "integer", "description": "equivalent to Discord 'in:' — restrict to one channel"},
                 "mentions_author_id": {"type": "integer", "description": "equivalent to Discord 'mentions:' — restrict to messages that mention this author"},
@@ -214,6 +242,7 @@ TOPIC_EDITOR_TOOLS: List[Dict[str, Any]] = [
                 "is_reply": {"type": "boolean", "description": "if true, only messages that are replies (reply_to_message_id IS NOT NULL)"},
                 "limit": {"type": "integer", "description": "default 20, max 50"},
                 "scope": {"type": "string", "enum": ["window", "archive"], "description": "default 'window'"},
+                "cursor": {"type": "string", "description": "archive only: pass the previous result's next_cursor to fetch the next page"},
             },
             "required": [],
         },
@@ -528,6 +557,9 @@ class TopicEditor:
         self.trace_channel_id = os.getenv("LIVE_UPDATE_TRACE_CHANNEL_ID")
         self.media_shortlist_min_reactions = self._env_int("TOPIC_EDITOR_MEDIA_SHORTLIST_MIN_REACTIONS", 5)
         self.media_shortlist_limit = self._env_int("TOPIC_EDITOR_MEDIA_SHORTLIST_LIMIT", 5)
+        # System prompt and tools are fixed for the editor, so every turn of a
+        # run shares one cacheable prefix.
+        self.prompt_assembler = PromptAssembler(TOPIC_EDITOR_SYSTEM_PROMPT, TOPIC_EDITOR_TOOLS)
 
     async def run_once(self, trigger: str = "scheduled") -> Dict[str, Any]:
         if not self.db:
@@ -669,7 +701,7 @@ class TopicEditor:
                 auto_shortlisted_media=auto_shortlisted_media,
             )
             messages_arg: List[Dict[str, Any]] = [
-                {"role": "user", "content": [{"type": "text", "text": repr(initial_payload)}]}
+                {"role": "user", "content": [{"type": "text", "text": stable_json(initial_payload)}]}
             ]
             dispatcher_context = {
                 "run_id": run_id,
@@ -678,6 +710,7 @@ class TopicEditor:
                 "messages": messages,
                 "active_topics": active_topics,
                 "aliases": aliases,
+                "topic_index": self._build_topic_index(active_topics, aliases or []),
                 "seen_tool_call_ids": set(),
                 "idempotent_results": {},
                 "observation_count": 0,
@@ -685,11 +718,18 @@ class TopicEditor:
                 "finalize": None,
                 "vision_budget_usd": self._env_float("TOPIC_EDITOR_VISION_BUDGET_PER_RUN", 1.0),
                 "vision_cost_usd": 0.0,
+                "vision_budget_lock": threading.Lock(),
+                "context_lock": threading.RLock(),
+                "tool_semaphores": {},
+                "tool_latency": {},
+                "tool_dispatch": {"parallel_batches": 0, "max_parallel": 0},
             }
             tool_calls: List[Dict[str, Any]] = []
             outcomes: List[Dict[str, Any]] = []
             total_input_tokens = 0
             total_output_tokens = 0
+            total_cached_input_tokens = 0
+            prompt_cache_stats = PromptCacheStats()
             cumulative_tokens = 0
             cumulative_cost_usd = 0.0
             has_cost_estimate = False
@@ -719,9 +759,14 @@ class TopicEditor:
                 if turn_reasoning:
                     text_chunks.append(turn_reasoning)
                 usage = self._extract_usage(response)
+                prompt_cache_stats.record(response)
                 total_input_tokens += int(usage.get("input_tokens", 0) or 0)
                 total_output_tokens += int(usage.get("output_tokens", 0) or 0)
-                cumulative_tokens = total_input_tokens + total_output_tokens
+                # Cache reads/writes are billed separately from input_tokens but
+                # still count towards the per-run token budget.
+                total_cached_input_tokens += int(usage.get("cache_read_input_tokens", 0) or 0)
+                total_cached_input_tokens += int(usage.get("cache_creation_input_tokens", 0) or 0)
+                cumulative_tokens = total_input_tokens + total_cached_input_tokens + total_output_tokens
                 turn_cost = self._estimate_cost_usd(usage)
                 if turn_cost is not None:
                     has_cost_estimate = True
@@ -740,8 +785,7 @@ class TopicEditor:
                     if finalize_calls:
                         tool_calls.extend(finalize_calls)
                         self._populate_idempotent_results(finalize_calls, dispatcher_context)
-                        for call in finalize_calls:
-                            outcomes.append(self._dispatch_tool_call(call, dispatcher_context))
+                        outcomes.extend(await self._dispatch_turn_tool_calls(finalize_calls, dispatcher_context))
                         if dispatcher_context.get("finalize"):
                             metadata["budget_cap_exceeded_after_finalize"] = cap_reason
                             break
@@ -779,8 +823,8 @@ class TopicEditor:
                 tool_calls.extend(turn_tool_calls)
                 self._populate_idempotent_results(turn_tool_calls, dispatcher_context)
                 turn_results: List[Dict[str, Any]] = []
-                for call in turn_tool_calls:
-                    outcome = self._dispatch_tool_call(call, dispatcher_context)
+                turn_outcomes = await self._dispatch_turn_tool_calls(turn_tool_calls, dispatcher_context)
+                for call, outcome in zip(turn_tool_calls, turn_outcomes):
                     outcomes.append(outcome)
                     turn_results.append(
                         {
@@ -832,6 +876,7 @@ class TopicEditor:
             metadata["usage"] = {"input_tokens": total_input_tokens, "output_tokens": total_output_tokens}
             metadata["cumulative_cost_usd"] = cumulative_cost_usd if has_cost_estimate else None
             metadata["cumulative_tokens"] = cumulative_tokens
+            metadata["prompt_cache"] = prompt_cache_stats.summary()
             metadata["max_cost_usd"] = max_cost_usd
             metadata["max_tokens"] = max_tokens
             metadata["turn_count"] = turn_count
@@ -840,6 +885,8 @@ class TopicEditor:
             finalize = dispatcher_context.get("finalize") or {}
             metadata["reasoning"] = finalize.get("overall_reasoning") or "\n\n".join(text_chunks).strip()
             metadata["topics_considered"] = finalize.get("topics_considered") or []
+            metadata["tool_latency"] = dispatcher_context["tool_latency"]
+            metadata["tool_dispatch"] = dispatcher_context["tool_dispatch"]
             # Capture surface info for the trace embed.
             metadata["source_message_timestamps"] = [m.get("created_at") for m in messages if m.get("created_at")]
             metadata["source_channel_counts"] = self._tally_channels(messages)
@@ -906,9 +953,7 @@ class TopicEditor:
             return await client.messages.create(
                 model=self.model,
                 max_tokens=4096,
-                system=TOPIC_EDITOR_SYSTEM_PROMPT,
-                messages=list(messages_arg),
-                tools=TOPIC_EDITOR_TOOLS,
+                **self.prompt_assembler.request_kwargs(messages_arg),
             )
         return await self.llm_client.generate_chat_completion(
             model=self.model,
@@ -1099,7 +1144,124 @@ class TopicEditor:
                 )
         return out
 
-    def _dispatch_tool_call(self, call: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    async def _dispatch_turn_tool_calls(
+        self, calls: Sequence[Dict[str, Any]], context: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Run one model turn's tool calls, returning outcomes in call order.
+
+        Consecutive read tools have no side effects on each other, so each run
+        of them is dispatched concurrently on worker threads. Write tools are a
+        barrier: they run one at a time, in order, after every earlier call has
+        finished, so later reads in the same turn still observe their effects.
+        """
+        outcomes: List[Dict[str, Any]] = []
+        index = 0
+        while index < len(calls):
+            call = calls[index]
+            if call.get("name") not in READ_TOOL_NAMES:
+                outcomes.append(await self._run_tool_call(call, context, timeout=None))
+                index += 1
+                continue
+            batch_end = index
+            while batch_end < len(calls) and calls[batch_end].get("name") in READ_TOOL_NAMES:
+                batch_end += 1
+            batch = calls[index:batch_end]
+            if len(batch) > 1:
+                stats = context.setdefault("tool_dispatch", {"parallel_batches": 0, "max_parallel": 0})
+                stats["parallel_batches"] = int(stats.get("parallel_batches") or 0) + 1
+                stats["max_parallel"] = max(int(stats.get("max_parallel") or 0), len(batch))
+            outcomes.extend(await asyncio.gather(*(
+                self._run_tool_call(read_call, context, timeout=self._tool_timeout(read_call.get("name")))
+                for read_call in batch
+            )))
+            index = batch_end
+        return outcomes
+
+    async def _run_tool_call(
+        self, call: Dict[str, Any], context: Dict[str, Any], *, timeout: Optional[float]
+    ) -> Dict[str, Any]:
+        """Dispatch one call off the event loop under its tool's concurrency cap.
+
+        A timed-out call is reported as a tool_error. Its worker thread cannot be
+        interrupted, so it is handed a cancellation flag instead: once set, the
+        tool stops before charging the vision budget or persisting anything, and
+        whatever it returns is discarded.
+        """
+        name = str(call.get("name") or "")
+        semaphore = self._tool_semaphore(name, context)
+        cancelled = threading.Event()
+        started = time.monotonic()
+        timed_out = False
+        async with semaphore:
+            try:
+                work = asyncio.to_thread(self._dispatch_tool_call, call, context, cancelled=cancelled)
+                outcome = await (asyncio.wait_for(work, timeout) if timeout else work)
+            except asyncio.TimeoutError:
+                cancelled.set()
+                timed_out = True
+                logger.warning(
+                    "TopicEditor tool timed out: run_id=%s tool=%s tool_call_id=%s timeout=%ss",
+                    context.get("run_id"), name, call.get("id"), timeout,
+                )
+                outcome = {
+                    "tool_call_id": call.get("id"),
+                    "tool": name,
+                    "outcome": "tool_error",
+                    "error": f"tool timed out after {timeout:g}s",
+                }
+        self._record_tool_latency(context, name, (time.monotonic() - started) * 1000, timed_out=timed_out)
+        return outcome
+
+    def _tool_semaphore(self, name: str, context: Dict[str, Any]) -> asyncio.Semaphore:
+        semaphores = context.setdefault("tool_semaphores", {})
+        semaphore = semaphores.get(name)
+        if semaphore is None:
+            default = TOOL_CONCURRENCY_DEFAULTS.get(name) or self._env_int("TOPIC_EDITOR_TOOL_CONCURRENCY", 4)
+            limit = self._env_int(f"TOPIC_EDITOR_TOOL_CONCURRENCY_{name.upper()}", default)
+            semaphore = semaphores[name] = asyncio.Semaphore(max(1, limit))
+        return semaphore
+
+    def _tool_timeout(self, name: Optional[str]) -> Optional[float]:
+        default = TOOL_TIMEOUT_DEFAULTS.get(str(name)) or self._env_float("TOPIC_EDITOR_TOOL_TIMEOUT_SECONDS", 30.0)
+        timeout = self._env_float(f"TOPIC_EDITOR_TOOL_TIMEOUT_{str(name).upper()}", default)
+        return timeout if timeout > 0 else None
+
+    @staticmethod
+    def _record_tool_latency(context: Dict[str, Any], name: str, elapsed_ms: float, *, timed_out: bool = False) -> None:
+        latency = context.setdefault("tool_latency", {})
+        entry = latency.get(name)
+        if entry is None:
+            entry = latency[name] = {
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "timeouts": 0,
+                "buckets": {str(bound): 0 for bound in TOOL_LATENCY_BUCKETS_MS} | {"inf": 0},
+            }
+        entry["count"] += 1
+        entry["total_ms"] = round(entry["total_ms"] + elapsed_ms, 3)
+        entry["max_ms"] = round(max(entry["max_ms"], elapsed_ms), 3)
+        if timed_out:
+            entry["timeouts"] += 1
+        for bound in TOOL_LATENCY_BUCKETS_MS:
+            if elapsed_ms <= bound:
+                entry["buckets"][str(bound)] += 1
+                break
+        else:
+            entry["buckets"]["inf"] += 1
+
+    @staticmethod
+    def _context_lock(context: Dict[str, Any]) -> threading.RLock:
+        """Guards run-context state that tool calls mutate from worker threads."""
+        return context.setdefault("context_lock", threading.RLock())
+
+    def _dispatch_tool_call(
+        self,
+        call: Dict[str, Any],
+        context: Dict[str, Any],
+        *,
+        cancelled: Optional[threading.Event] = None,
+    ) -> Dict[str, Any]:
         name = call["name"]
         args = call["input"]
         # d3 first: DB-backed cross-run replay (returns prior outcome if (run_id, tool_call_id) was seen in a prior process)
@@ -1108,12 +1270,16 @@ class TopicEditor:
             return replay_outcome
         # d1: real read-tool dispatch when read tools are called
         if name in READ_TOOL_NAMES:
-            return self._dispatch_read_tool(call, context)
+            return self._dispatch_read_tool(call, context, cancelled=cancelled)
         # d3: in-process idempotency fast path for write tools within a single run
         if name in WRITE_TOOL_NAMES and self._is_idempotent_replay(call, context):
             return {"tool_call_id": call.get("id"), "tool": name, "outcome": "idempotent_replay"}
         if name == "record_observation":
-            if int(context.get("observation_count") or 0) >= 3:
+            with self._context_lock(context):
+                observation_count = int(context.get("observation_count") or 0)
+                if observation_count < 3:
+                    context["observation_count"] = observation_count + 1
+            if observation_count >= 3:
                 self._store_transition({
                     "run_id": context["run_id"],
                     "guild_id": context["guild_id"],
@@ -1137,7 +1303,6 @@ class TopicEditor:
                 "observation_kind": args.get("observation_kind") or "considered",
                 "reason": self._cap_text(args.get("reason"), 500),
             }, environment=self.environment)
-            context["observation_count"] = int(context.get("observation_count") or 0) + 1
             self._store_transition({
                 "run_id": context["run_id"],
                 "guild_id": context["guild_id"],
@@ -1158,7 +1323,13 @@ class TopicEditor:
             return self._dispatch_finalize_run(call, context)
         return {"tool_call_id": call["id"], "tool": name, "outcome": "unknown_tool"}
 
-    def _dispatch_read_tool(self, call: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    def _dispatch_read_tool(
+        self,
+        call: Dict[str, Any],
+        context: Dict[str, Any],
+        *,
+        cancelled: Optional[threading.Event] = None,
+    ) -> Dict[str, Any]:
         name = call["name"]
         args = call.get("input") or {}
         try:
@@ -1200,6 +1371,7 @@ class TopicEditor:
                         before=args.get("before"),
                         is_reply=args.get("is_reply"),
                         limit=int(args.get("limit") if args.get("limit") is not None else 20),
+                        cursor=args.get("cursor"),
                     )
                 else:
                     raise ValueError(f"Unknown scope: {scope}")
@@ -1217,9 +1389,9 @@ class TopicEditor:
                     limit=10,
                 )
             elif name == "understand_image":
-                return self._dispatch_understand_media(call, context, "image")
+                return self._dispatch_understand_media(call, context, "image", cancelled=cancelled)
             elif name == "understand_video":
-                return self._dispatch_understand_media(call, context, "video")
+                return self._dispatch_understand_media(call, context, "video", cancelled=cancelled)
             elif name == "get_reply_chain":
                 max_depth = max(1, min(int(args.get("max_depth") or 5), 15))
                 result = self.db.get_reply_chain(
@@ -1248,7 +1420,12 @@ class TopicEditor:
     _VIDEO_MODEL_MAP = {"fast": "gemini-2.5-flash", "best": "gemini-2.5-pro"}
 
     def _dispatch_understand_media(
-        self, call: Dict[str, Any], context: Dict[str, Any], media_kind: str
+        self,
+        call: Dict[str, Any],
+        context: Dict[str, Any],
+        media_kind: str,
+        *,
+        cancelled: Optional[threading.Event] = None,
     ) -> Dict[str, Any]:
         """Shared dispatch for understand_image / understand_video.
 
@@ -1399,6 +1576,8 @@ class TopicEditor:
             cached_by_hash = None
         if cached_by_hash is not None:
             understanding = cached_by_hash.get("understanding") or {}
+            if cancelled is not None and cancelled.is_set():
+                return self._cancelled_tool_outcome(call)
             # Persist the row for this (message_id, attachment_index) so future
             # PK lookups hit immediately, without another download.
             try:
@@ -1420,20 +1599,26 @@ class TopicEditor:
                 "result": {"cached": True, "dedup": True, "understanding": understanding},
             }
 
-        # (f) budget check
+        # (f) budget check — reserved up front so concurrent vision calls in
+        # one turn cannot jointly overspend; released again if the call fails.
         budget = float(context.get("vision_budget_usd") or 1.0)
-        spent = float(context.get("vision_cost_usd") or 0.0)
         cost_estimate = self._VISION_COST_IMAGE if media_kind == "image" else self._VISION_COST_VIDEO
-        if spent + cost_estimate > budget:
-            return {
-                "tool_call_id": call["id"],
-                "tool": name,
-                "outcome": "budget_exceeded",
-                "error": (
-                    f"vision budget spent ${spent:.2f} of ${budget:.2f}; "
-                    f"estimated cost ${cost_estimate:.2f} would exceed cap"
-                ),
-            }
+        budget_lock = context.setdefault("vision_budget_lock", threading.Lock())
+        with budget_lock:
+            if cancelled is not None and cancelled.is_set():
+                return self._cancelled_tool_outcome(call)
+            spent = float(context.get("vision_cost_usd") or 0.0)
+            if spent + cost_estimate > budget:
+                return {
+                    "tool_call_id": call["id"],
+                    "tool": name,
+                    "outcome": "budget_exceeded",
+                    "error": (
+                        f"vision budget spent ${spent:.2f} of ${budget:.2f}; "
+                        f"estimated cost ${cost_estimate:.2f} would exceed cap"
+                    ),
+                }
+            context["vision_cost_usd"] = round(spent + cost_estimate, 4)
 
         # (g) call vision API
         try:
@@ -1442,6 +1627,8 @@ class TopicEditor:
             else:
                 understanding = describe_video(media_bytes, model)
         except Exception as exc:
+            with budget_lock:
+                context["vision_cost_usd"] = round(float(context.get("vision_cost_usd") or 0.0) - cost_estimate, 4)
             return {
                 "tool_call_id": call["id"],
                 "tool": name,
@@ -1449,10 +1636,9 @@ class TopicEditor:
                 "error": f"vision API call failed: {exc}",
             }
 
-        # deduct cost
-        context["vision_cost_usd"] = round(spent + cost_estimate, 4)
-
         # (h) persist and return
+        if cancelled is not None and cancelled.is_set():
+            return self._cancelled_tool_outcome(call)
         try:
             self.db.upsert_message_media_understanding({
                 "message_id": message_id,
@@ -1473,6 +1659,15 @@ class TopicEditor:
             "result": {"cached": False, "understanding": understanding},
         }
 
+    @staticmethod
+    def _cancelled_tool_outcome(call: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "tool_call_id": call.get("id"),
+            "tool": call.get("name"),
+            "outcome": "tool_error",
+            "error": "tool call cancelled after timeout",
+        }
+
     def _parse_time_bound(self, value: Optional[str], default: datetime) -> datetime:
         """Parse a time-bound string: ISO timestamp or relative like '24h', '7d'.
 
@@ -1689,10 +1884,11 @@ class TopicEditor:
                 "error": f"overall_reasoning must be >=100 chars; got {len(reasoning)}",
             }
         # Accept — capture into context for the run loop to detect + into transitions for audit.
-        context["finalize"] = {
-            "overall_reasoning": reasoning,
-            "topics_considered": list(topics_considered),
-        }
+        with self._context_lock(context):
+            context["finalize"] = {
+                "overall_reasoning": reasoning,
+                "topics_considered": list(topics_considered),
+            }
         self._store_transition({
             "run_id": context["run_id"],
             "guild_id": context["guild_id"],
@@ -2042,11 +2238,10 @@ class TopicEditor:
                 source_message_ids=source_ids,
             )
 
-        collisions = detect_topic_collisions(
+        collisions = self._topic_index(context).detect_collisions(
             proposed_canonical_key=canonical_key,
             headline=args.get("headline") or "",
             source_authors=source_authors,
-            existing_topics=self._topics_with_aliases(context["active_topics"], context.get("aliases") or []),
         )
         unresolved = unresolved_collisions(collisions, args.get("override_collisions") or [])
         if unresolved:
@@ -2086,8 +2281,18 @@ class TopicEditor:
         topic_id = topic.get("topic_id") if topic else None
         if topic_id:
             topic.setdefault("source_message_ids", source_ids)
-            if state == "posted":
-                context.setdefault("created_topics", []).append(topic)
+            # Later create calls in this run must collide with this topic too.
+            with self._context_lock(context):
+                self._topic_index(context).add_topic({
+                    "topic_id": topic_id,
+                    "canonical_key": topic.get("canonical_key") or canonical_key,
+                    "headline": topic.get("headline") or args.get("headline") or "",
+                    "source_authors": source_authors,
+                    "aliases": [args.get("proposed_key") or canonical_key],
+                    "state": topic.get("state") or state,
+                })
+                if state == "posted":
+                    context.setdefault("created_topics", []).append(topic)
             for message_id in source_ids:
                 self.db.add_topic_source({
                     "topic_id": topic_id,
@@ -2135,9 +2340,10 @@ class TopicEditor:
         tool_call_id = call.get("id")
         if tool_call_id:
             key = (str(context.get("run_id")), str(tool_call_id))
-            context.setdefault("accepted_tool_call_ids", set()).add(key)
-            if args.get("override_collisions"):
-                context.setdefault("override_retry_consumed_tool_call_ids", set()).add(key)
+            with self._context_lock(context):
+                context.setdefault("accepted_tool_call_ids", set()).add(key)
+                if args.get("override_collisions"):
+                    context.setdefault("override_retry_consumed_tool_call_ids", set()).add(key)
         return {
             "tool_call_id": call["id"],
             "tool": call["name"],
@@ -2422,6 +2628,13 @@ class TopicEditor:
                 "guild_id": context["guild_id"],
                 "run_id": context["run_id"],
             }, environment=self.environment)
+        wanted = set(source_ids)
+        new_authors = self._source_authors([
+            message for message in context.get("messages") or []
+            if str(message.get("message_id")) in wanted
+        ])
+        with self._context_lock(context):
+            self._topic_index(context).add_topic_authors(args.get("topic_id"), new_authors)
         self._store_transition({
             "topic_id": args.get("topic_id"),
             "run_id": context["run_id"],
@@ -2451,6 +2664,8 @@ class TopicEditor:
             })
             return {"tool_call_id": call["id"], "tool": call["name"], "outcome": "tool_error", "action": "discard", "error": error}
         self.db.update_topic(args.get("topic_id"), {"state": "discarded", "guild_id": context["guild_id"]}, guild_id=context["guild_id"], environment=self.environment)
+        with self._context_lock(context):
+            self._topic_index(context).remove_topic(args.get("topic_id"))
         self._store_transition({
             "topic_id": args.get("topic_id"),
             "run_id": context["run_id"],
@@ -2478,9 +2693,10 @@ class TopicEditor:
     ) -> Dict[str, Any]:
         args = call["input"]
         if reason == "topic_collision" and call.get("id"):
-            context.setdefault("collision_rejected_tool_call_ids", set()).add(
-                (str(context.get("run_id")), str(call["id"]))
-            )
+            with self._context_lock(context):
+                context.setdefault("collision_rejected_tool_call_ids", set()).add(
+                    (str(context.get("run_id")), str(call["id"]))
+                )
         self._store_transition(build_rejected_transition(
             run_id=context["run_id"],
             environment=self.environment,
@@ -2563,12 +2779,13 @@ class TopicEditor:
         if not tool_call_id:
             return False
         key = (str(context.get("run_id")), str(tool_call_id))
-        seen = context.setdefault("seen_tool_call_ids", set())
-        if key in seen:
-            if self._is_collision_override_retry(call, context, key):
-                return False
-            return True
-        seen.add(key)
+        with self._context_lock(context):
+            seen = context.setdefault("seen_tool_call_ids", set())
+            if key in seen:
+                if self._is_collision_override_retry(call, context, key):
+                    return False
+                return True
+            seen.add(key)
         return False
 
     def _is_collision_override_retry(
@@ -2589,6 +2806,20 @@ class TopicEditor:
             return False
         return True
 
+    def _build_topic_index(self, topics: Sequence[Dict[str, Any]], aliases: Sequence[Dict[str, Any]]) -> TopicTrigramIndex:
+        return TopicTrigramIndex(self._topics_with_aliases(topics, aliases), aliases)
+
+    def _topic_index(self, context: Dict[str, Any]) -> TopicTrigramIndex:
+        """The run's collision index, built on first use for hand-made contexts."""
+        with self._context_lock(context):
+            index = context.get("topic_index")
+            if index is None:
+                index = context["topic_index"] = self._build_topic_index(
+                    context.get("active_topics") or [],
+                    context.get("aliases") or [],
+                )
+        return index
+
     def _topics_with_aliases(
         self,
         topics: Sequence[Dict[str, Any]],
@@ -2748,6 +2979,13 @@ class TopicEditor:
                 5,
                 f"cumulative_tokens={metadata.get('cumulative_tokens')} cumulative_cost_usd={metadata.get('cumulative_cost_usd')}",
             )
+        prompt_cache = metadata.get("prompt_cache") or {}
+        if prompt_cache.get("turns"):
+            lines.append(
+                f"prompt_cache read/write/uncached={prompt_cache.get('cache_read_input_tokens', 0)}/"
+                f"{prompt_cache.get('cache_creation_input_tokens', 0)}/{prompt_cache.get('uncached_input_tokens', 0)} "
+                f"hit_ratio={prompt_cache.get('cache_hit_ratio')}"
+            )
         shortlist_lines = [
             (
                 f"- `{item.get('message_id')}` -> `{item.get('topic_id')}` "
@@ -2758,6 +2996,7 @@ class TopicEditor:
         sections = [
             ("Auto-shortlisted media", shortlist_lines),
             ("Tool calls", tool_lines),
+            ("Tool latency", self._format_tool_latency_lines(metadata)),
             ("Rejections", rejection_lines),
             ("Overrides", override_lines),
             ("Observations", observation_lines),
@@ -2865,6 +3104,12 @@ class TopicEditor:
             f"cumulative cost: `{self._format_cost(metadata.get('cumulative_cost_usd'))}`",
             f"latency: `{updates.get('latency_ms', 0)} ms`",
         ]
+        prompt_cache = metadata.get("prompt_cache") or {}
+        if prompt_cache.get("cache_hit_ratio") is not None:
+            model_lines.append(
+                f"prompt cache: `{prompt_cache.get('cache_read_input_tokens', 0)}` read · "
+                f"`{prompt_cache.get('cache_hit_ratio'):.0%}` hit"
+            )
         embed.add_field(name="model & cost", value="\n".join(model_lines)[:1024], inline=True)
 
         # --- field: input context (time range + channel coverage) ---
@@ -2899,6 +3144,11 @@ class TopicEditor:
                 value = value[:1000] + "\n…"
             embed.add_field(name=f"tool calls ({len(outcomes)})", value=value, inline=False)
 
+        # --- field: per-tool latency ---
+        latency_lines = self._format_tool_latency_lines(metadata)
+        if latency_lines:
+            embed.add_field(name="tool latency", value="\n".join(latency_lines)[:1024], inline=False)
+
         # --- field: rejections (if any) ---
         rejection_lines = []
         for outcome in outcomes or []:
@@ -3285,12 +3535,12 @@ class TopicEditor:
                 outcome = result.outcome.value if hasattr(result, "outcome") else "unknown"
 
                 if outcome in ("cache_hit", "downloaded") and result.file_path:
-                    # Send as discord.File
+                    # Send as discord.File; the resolver keeps the file pinned until released.
                     try:
                         filename = os.path.basename(result.file_path)
                         with open(result.file_path, "rb") as fh:
                             discord_file = discord.File(fh, filename=filename)
-                        sent = await channel.send(file=discord_file)
+                            sent = await channel.send(file=discord_file)
                         mid = getattr(sent, "id", None)
                         trace = {
                             "url": safe_url,
@@ -3314,6 +3564,8 @@ class TopicEditor:
                         sent = await channel.send(fallback_url)
                         mid = getattr(sent, "id", None)
                         return (int(mid) if mid else None, None, trace)
+                    finally:
+                        self._release_external_media(result)
 
                 # ---- any other outcome: send the fallback URL ----
                 trace = {
@@ -3486,6 +3738,12 @@ class TopicEditor:
                 pass
             raise
 
+    def _release_external_media(self, result: Any) -> None:
+        """Unpin a resolved file once it has been sent so the cache may evict it."""
+        service = getattr(self, "_external_media_service", None)
+        if service is not None and getattr(result, "file_path", None):
+            service.release(result)
+
     async def _resolve_external_for_publish(
         self, source_url: str, ref: Dict[str, Any]
     ) -> Any:
@@ -3499,19 +3757,23 @@ class TopicEditor:
         """
         from src.features.summarising.external_media_resolver import (
             ExternalMediaResolver,
+            ExternalMediaResolverService,
             ResolverResult,
             ResolveOutcome,
         )
         from src.common.external_media import make_cache_key
 
-        resolver = ExternalMediaResolver()
-        # Wire DB cache if available
-        if self.db is not None and hasattr(self.db, "get_external_media_cache"):
-            resolver._get_cache = self.db.get_external_media_cache
-            resolver._upsert_cache = self.db.upsert_external_media_cache
+        service = getattr(self, "_external_media_service", None)
+        if service is None:
+            resolver = ExternalMediaResolver()
+            # Wire DB cache if available
+            if self.db is not None and hasattr(self.db, "get_external_media_cache"):
+                resolver._get_cache = self.db.get_external_media_cache
+                resolver._upsert_cache = self.db.upsert_external_media_cache
+            service = self._external_media_service = ExternalMediaResolverService(resolver)
 
         try:
-            result = resolver.resolve(source_url)
+            result = await service.resolve(source_url)
             return result
         except Exception as exc:
             logger.warning(
@@ -3586,13 +3848,11 @@ class TopicEditor:
         return calls
 
     def _extract_usage(self, response: Any) -> Dict[str, int]:
-        usage = getattr(response, "usage", None)
+        usage = cache_usage(response)
         if not usage:
             return {}
-        return {
-            "input_tokens": int(getattr(usage, "input_tokens", 0) or 0),
-            "output_tokens": int(getattr(usage, "output_tokens", 0) or 0),
-        }
+        usage.pop("total_input_tokens", None)
+        return usage
 
     def _estimate_cost_usd(self, usage: Dict[str, Any]) -> Optional[float]:
         try:
@@ -3602,6 +3862,9 @@ class TopicEditor:
             output_rate = float(os.getenv("TOPIC_EDITOR_OUTPUT_COST_PER_MTOKENS", "0") or 0)
             if input_rate <= 0 and output_rate <= 0:
                 return None
+            # Anthropic bills cache reads at 0.1x and cache writes at 1.25x the input rate.
+            input_tokens += 0.1 * float(usage.get("cache_read_input_tokens") or 0)
+            input_tokens += 1.25 * float(usage.get("cache_creation_input_tokens") or 0)
             return round((input_tokens / 1_000_000.0 * input_rate) + (output_tokens / 1_000_000.0 * output_rate), 6)
         except (TypeError, ValueError):
             return None
@@ -3665,6 +3928,29 @@ class TopicEditor:
             return f"cumulative_tokens={cumulative_tokens} exceeded TOPIC_EDITOR_MAX_TOKENS"
         return f"max_turns={max_turns} reached without finalize_run"
 
+    @staticmethod
+    def _format_tool_latency_lines(metadata: Dict[str, Any]) -> List[str]:
+        """One line per tool: call count, mean/max latency and histogram p95 bound."""
+        lines: List[str] = []
+        for name, entry in sorted((metadata.get("tool_latency") or {}).items()):
+            count = int(entry.get("count") or 0)
+            if not count:
+                continue
+            p95_bound = "inf"
+            seen = 0
+            for bound, bucket_count in (entry.get("buckets") or {}).items():
+                seen += int(bucket_count or 0)
+                if seen >= count * 0.95:
+                    p95_bound = bound
+                    break
+            timeouts = int(entry.get("timeouts") or 0)
+            lines.append(
+                f"- `{name}` n={count} avg={entry.get('total_ms', 0) / count:.0f}ms "
+                f"max={entry.get('max_ms', 0):.0f}ms p95<={p95_bound}ms"
+                + (f" timeouts={timeouts}" if timeouts else "")
+            )
+        return lines
+
     def _format_cost(self, value: Any) -> str:
         return f"${value:.4f}" if isinstance(value, (int, float)) else "n/a"
 
@@ -3841,44 +4127,6 @@ class TopicEditor:
         return f"live_update_editor:{guild_id or 'unknown'}:{live_channel_id or 'unknown'}"
 
 
-@dataclass(frozen=True)
-class TopicIdentity:
-    topic_id: str
-    canonical_key: str
-    headline: str
-    source_authors: Sequence[str] = field(default_factory=tuple)
-    aliases: Sequence[str] = field(default_factory=tuple)
-    state: Optional[str] = None
-    display_slug: Optional[str] = None
-
-
-@dataclass(frozen=True)
-class Collision:
-    topic_id: str
-    canonical_key: str
-    headline: str
-    reason: str
-    similarity: Optional[float] = None
-    aliases: Sequence[str] = field(default_factory=tuple)
-    state: Optional[str] = None
-
-
-def canonicalize_topic_key(
-    headline: str,
-    *,
-    creator_name: Optional[str] = None,
-    topic_date: Optional[date | str] = None,
-) -> str:
-    """Return the locked sprint canonical key for a topic headline."""
-    parts: List[str] = []
-    if creator_name:
-        parts.append(_slugify(creator_name))
-    parts.append(_slugify(headline))
-    if topic_date:
-        parts.append(str(topic_date)[:10])
-    return "-".join(part for part in parts if part).strip("-")
-
-
 def canonicalize_proposed_key(
     proposed_key: Optional[str],
     headline: str,
@@ -4585,55 +4833,6 @@ def collision_to_dict(collision: Collision) -> Dict[str, Any]:
     }
 
 
-def trigram_similarity(a: str, b: str) -> float:
-    a_trigrams = _trigrams(a)
-    b_trigrams = _trigrams(b)
-    if not a_trigrams and not b_trigrams:
-        return 1.0
-    if not a_trigrams or not b_trigrams:
-        return 0.0
-    return (2.0 * len(a_trigrams & b_trigrams)) / (len(a_trigrams) + len(b_trigrams))
-
-
-def _slugify(value: str) -> str:
-    return re.sub(r"[^a-z0-9]+", "-", (value or "").lower()).strip("-")
-
-
-def _canonical_prefix_match(a: str, b: str) -> bool:
-    if not a or not b:
-        return False
-    return a.startswith(b) or b.startswith(a)
-
-
-def _normalize_author_set(authors: Sequence[Any]) -> Set[str]:
-    return {
-        str(author).strip().lower()
-        for author in authors or []
-        if str(author).strip()
-    }
-
-
-def _trigrams(value: str) -> Set[str]:
-    normalized = f"  {_slugify(value).replace('-', ' ')}  "
-    if len(normalized) < 3:
-        return {normalized} if normalized.strip() else set()
-    return {normalized[index:index + 3] for index in range(len(normalized) - 2)}
-
-
-def _coerce_topic_identity(topic: TopicIdentity | Dict[str, Any]) -> TopicIdentity:
-    if isinstance(topic, TopicIdentity):
-        return topic
-    return TopicIdentity(
-        topic_id=str(topic.get("topic_id")),
-        canonical_key=str(topic.get("canonical_key") or ""),
-        headline=str(topic.get("headline") or ""),
-        source_authors=tuple(topic.get("source_authors") or ()),
-        aliases=tuple(topic.get("aliases") or ()),
-        state=topic.get("state"),
-        display_slug=topic.get("display_slug"),
-    )
-
-
 def _render_source_suffix(topic: Dict[str, Any]) -> str:
     ids = [str(item) for item in topic.get("source_message_ids") or [] if item]
     if not ids:
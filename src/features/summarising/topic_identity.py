@@ -0,0 +1,102 @@
+"""
+Topic identity primitives shared by the TopicEditor and its collision index.
+
+Kept free of TopicEditor imports so ``topic_index`` can depend on them without
+a cycle back into ``topic_editor``.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+SIMILARITY_COLLISION_THRESHOLD = 0.55
+
+
+@dataclass(frozen=True)
+class TopicIdentity:
+    topic_id: str
+    canonical_key: str
+    headline: str
+    source_authors: Sequence[str] = field(default_factory=tuple)
+    aliases: Sequence[str] = field(default_factory=tuple)
+    state: Optional[str] = None
+    display_slug: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Collision:
+    topic_id: str
+    canonical_key: str
+    headline: str
+    reason: str
+    similarity: Optional[float] = None
+    aliases: Sequence[str] = field(default_factory=tuple)
+    state: Optional[str] = None
+
+
+def canonicalize_topic_key(
+    headline: str,
+    *,
+    creator_name: Optional[str] = None,
+    topic_date: Optional[date | str] = None,
+) -> str:
+    """Return the locked sprint canonical key for a topic headline."""
+    parts: List[str] = []
+    if creator_name:
+        parts.append(_slugify(creator_name))
+    parts.append(_slugify(headline))
+    if topic_date:
+        parts.append(str(topic_date)[:10])
+    return "-".join(part for part in parts if part).strip("-")
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    a_trigrams = _trigrams(a)
+    b_trigrams = _trigrams(b)
+    if not a_trigrams and not b_trigrams:
+        return 1.0
+    if not a_trigrams or not b_trigrams:
+        return 0.0
+    return (2.0 * len(a_trigrams & b_trigrams)) / (len(a_trigrams) + len(b_trigrams))
+
+
+def _slugify(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", (value or "").lower()).strip("-")
+
+
+def _canonical_prefix_match(a: str, b: str) -> bool:
+    if not a or not b:
+        return False
+    return a.startswith(b) or b.startswith(a)
+
+
+def _normalize_author_set(authors: Sequence[Any]) -> Set[str]:
+    return {
+        str(author).strip().lower()
+        for author in authors or []
+        if str(author).strip()
+    }
+
+
+def _trigrams(value: str) -> Set[str]:
+    normalized = f"  {_slugify(value).replace('-', ' ')}  "
+    if len(normalized) < 3:
+        return {normalized} if normalized.strip() else set()
+    return {normalized[index:index + 3] for index in range(len(normalized) - 2)}
+
+
+def _coerce_topic_identity(topic: TopicIdentity | Dict[str, Any]) -> TopicIdentity:
+    if isinstance(topic, TopicIdentity):
+        return topic
+    return TopicIdentity(
+        topic_id=str(topic.get("topic_id")),
+        canonical_key=str(topic.get("canonical_key") or ""),
+        headline=str(topic.get("headline") or ""),
+        source_authors=tuple(topic.get("source_authors") or ()),
+        aliases=tuple(topic.get("aliases") or ()),
+        state=topic.get("state"),
+        display_slug=topic.get("display_slug"),
+    )
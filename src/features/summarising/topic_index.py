@@ -0,0 +1,264 @@
+"""
+In-memory inverted index over a TopicEditor run's known topics and aliases.
+
+``detect_topic_collisions`` and ``resolve_topic_alias`` in topic_editor.py scan
+every topic/alias per call. The editor calls them for each create tool in a
+run, so TopicTrigramIndex builds the lookups once per run and is updated
+incrementally as topics are created, gain sources, or are discarded:
+
+- canonical keys and alias keys -> topic slots, plus a sorted key list, so a
+  prefix collision (either key a prefix of the other) is a dict probe per
+  prefix of the proposed key plus a bisect range scan;
+- source author -> topic slots, since a headline-similarity collision needs
+  at least one shared author;
+- headline trigram -> topic slots, used to count shared trigrams when an
+  author's topic set is too large to score one by one.
+
+Results match the linear functions exactly, in the same (insertion) order.
+"""
+
+from __future__ import annotations
+
+import bisect
+from collections import Counter
+from dataclasses import replace
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from src.features.summarising.topic_identity import (
+    SIMILARITY_COLLISION_THRESHOLD,
+    Collision,
+    TopicIdentity,
+    _coerce_topic_identity,
+    _normalize_author_set,
+    _trigrams,
+    canonicalize_topic_key,
+)
+
+# Above this many author-matched candidates, count shared trigrams through the
+# posting lists instead of intersecting each candidate's trigram set.
+_DIRECT_SCORE_LIMIT = 64
+
+
+class _PrefixKeys:
+    """Multimap of canonical keys -> slots with prefix lookups in both directions."""
+
+    def __init__(self) -> None:
+        self.slots_by_key: Dict[str, Set[int]] = {}
+        self.sorted_keys: List[str] = []
+
+    def add(self, key: str, slot: int) -> None:
+        if not key:
+            return
+        slots = self.slots_by_key.get(key)
+        if slots is None:
+            slots = self.slots_by_key[key] = set()
+            bisect.insort(self.sorted_keys, key)
+        slots.add(slot)
+
+    def discard(self, key: str, slot: int) -> None:
+        slots = self.slots_by_key.get(key)
+        if not slots:
+            return
+        slots.discard(slot)
+        if not slots:
+            del self.slots_by_key[key]
+            index = bisect.bisect_left(self.sorted_keys, key)
+            if index < len(self.sorted_keys) and self.sorted_keys[index] == key:
+                del self.sorted_keys[index]
+
+    def matching(self, key: str) -> Set[int]:
+        """Slots whose key is a prefix of ``key`` or has ``key`` as a prefix."""
+        if not key:
+            return set()
+        found: Set[int] = set()
+        for end in range(1, len(key) + 1):
+            found.update(self.slots_by_key.get(key[:end], ()))
+        start = bisect.bisect_left(self.sorted_keys, key)
+        for existing in self.sorted_keys[start:]:
+            if not existing.startswith(key):
+                break
+            found.update(self.slots_by_key[existing])
+        return found
+
+
+class TopicTrigramIndex:
+    """Collision and alias lookups for one editor run."""
+
+    def __init__(
+        self,
+        topics: Iterable[TopicIdentity | Dict[str, Any]] = (),
+        aliases: Iterable[Dict[str, Any]] = (),
+    ) -> None:
+        self._topics: Dict[int, TopicIdentity] = {}
+        self._trigram_sets: Dict[int, Set[str]] = {}
+        self._authors: Dict[int, Set[str]] = {}
+        self._slot_by_topic_id: Dict[str, int] = {}
+        self._next_slot = 0
+        self._keys = _PrefixKeys()
+        self._alias_keys = _PrefixKeys()
+        self._by_author: Dict[str, Set[int]] = {}
+        self._by_trigram: Dict[str, Set[int]] = {}
+        self._alias_rows: Dict[str, List[Dict[str, Any]]] = {}
+        for topic in topics or ():
+            self.add_topic(topic)
+        for alias in aliases or ():
+            self.add_alias_row(alias)
+
+    def __len__(self) -> int:
+        return len(self._topics)
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------------------------------
+
+    def add_topic(self, raw_topic: TopicIdentity | Dict[str, Any]) -> None:
+        """Index a topic; re-adding a known topic_id replaces it in place."""
+        topic = _coerce_topic_identity(raw_topic)
+        slot = self._slot_by_topic_id.get(topic.topic_id)
+        if slot is not None:
+            self._unindex(slot)
+        else:
+            slot = self._next_slot
+            self._next_slot += 1
+            self._slot_by_topic_id[topic.topic_id] = slot
+        self._index(slot, topic)
+
+    update_topic = add_topic
+
+    def add_topic_alias(self, topic_id: Any, alias_key: str) -> None:
+        slot = self._slot_by_topic_id.get(str(topic_id))
+        if slot is None or not alias_key:
+            return
+        topic = self._topics[slot]
+        if alias_key in topic.aliases:
+            return
+        self._topics[slot] = TopicIdentity(
+            topic_id=topic.topic_id,
+            canonical_key=topic.canonical_key,
+            headline=topic.headline,
+            source_authors=topic.source_authors,
+            aliases=tuple(topic.aliases) + (alias_key,),
+            state=topic.state,
+            display_slug=topic.display_slug,
+        )
+        self._alias_keys.add(canonicalize_topic_key(alias_key), slot)
+
+    def add_topic_authors(self, topic_id: Any, authors: Sequence[str]) -> None:
+        """Merge newly attached source authors into an indexed topic."""
+        slot = self._slot_by_topic_id.get(str(topic_id))
+        if slot is None:
+            return
+        topic = self._topics[slot]
+        known = _normalize_author_set(topic.source_authors)
+        added = tuple(author for author in authors or () if str(author).strip().lower() not in known)
+        if not added:
+            return
+        self._unindex(slot)
+        self._index(slot, replace(topic, source_authors=tuple(topic.source_authors) + added))
+
+    def remove_topic(self, topic_id: Any) -> None:
+        slot = self._slot_by_topic_id.pop(str(topic_id), None)
+        if slot is not None:
+            self._unindex(slot)
+
+    def add_alias_row(self, alias: Dict[str, Any]) -> None:
+        """Index a topic_aliases-style row for resolve_alias()."""
+        key = canonicalize_topic_key(str(alias.get("alias_key") or ""))
+        self._alias_rows.setdefault(key, []).append(alias)
+
+    def _index(self, slot: int, topic: TopicIdentity) -> None:
+        trigrams = _trigrams(topic.headline)
+        authors = _normalize_author_set(topic.source_authors)
+        self._topics[slot] = topic
+        self._trigram_sets[slot] = trigrams
+        self._authors[slot] = authors
+        self._keys.add(canonicalize_topic_key(topic.canonical_key), slot)
+        for alias in topic.aliases:
+            self._alias_keys.add(canonicalize_topic_key(alias), slot)
+        for author in authors:
+            self._by_author.setdefault(author, set()).add(slot)
+        for trigram in trigrams:
+            self._by_trigram.setdefault(trigram, set()).add(slot)
+
+    def _unindex(self, slot: int) -> None:
+        topic = self._topics.pop(slot)
+        self._keys.discard(canonicalize_topic_key(topic.canonical_key), slot)
+        for alias in topic.aliases:
+            self._alias_keys.discard(canonicalize_topic_key(alias), slot)
+        for author in self._authors.pop(slot):
+            self._by_author[author].discard(slot)
+        for trigram in self._trigram_sets.pop(slot):
+            self._by_trigram[trigram].discard(slot)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def detect_collisions(
+        self,
+        *,
+        proposed_canonical_key: str,
+        headline: str,
+        source_authors: Sequence[str],
+        threshold: float = SIMILARITY_COLLISION_THRESHOLD,
+    ) -> List[Collision]:
+        """Indexed equivalent of ``detect_topic_collisions`` over the indexed topics."""
+        proposed = canonicalize_topic_key(proposed_canonical_key)
+        query = _trigrams(headline)
+        prefix_slots = self._keys.matching(proposed) | self._alias_keys.matching(proposed)
+
+        author_slots: Set[int] = set()
+        for author in _normalize_author_set(source_authors):
+            author_slots.update(self._by_author.get(author, ()))
+        similar_slots: Set[int] = set()
+        if author_slots:
+            if len(author_slots) <= _DIRECT_SCORE_LIMIT or not query:
+                for slot in author_slots:
+                    if _dice(query, self._trigram_sets[slot]) >= threshold:
+                        similar_slots.add(slot)
+            else:
+                shared: Counter = Counter()
+                for trigram in query:
+                    shared.update(self._by_trigram.get(trigram, ()))
+                for slot, count in shared.items():
+                    if slot in author_slots and (2.0 * count) / (len(query) + len(self._trigram_sets[slot])) >= threshold:
+                        similar_slots.add(slot)
+
+        collisions: List[Collision] = []
+        for slot in sorted(prefix_slots | similar_slots):
+            topic = self._topics[slot]
+            collisions.append(Collision(
+                topic_id=topic.topic_id,
+                canonical_key=topic.canonical_key,
+                headline=topic.headline,
+                reason="canonical_key_prefix" if slot in prefix_slots else "headline_similarity_author_overlap",
+                similarity=_dice(query, self._trigram_sets[slot]),
+                aliases=tuple(topic.aliases),
+                state=topic.state,
+            ))
+        return collisions
+
+    def resolve_alias(
+        self,
+        proposed_key: str,
+        *,
+        environment: Optional[str] = None,
+        guild_id: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Indexed equivalent of ``resolve_topic_alias`` over the indexed alias rows."""
+        for alias in self._alias_rows.get(canonicalize_topic_key(proposed_key), ()):
+            if environment is not None and alias.get("environment") != environment:
+                continue
+            if guild_id is not None and alias.get("guild_id") != guild_id:
+                continue
+            return alias
+        return None
+
+
+def _dice(a: Set[str], b: Set[str]) -> float:
+    # Same arithmetic as topic_editor.trigram_similarity on precomputed sets.
+    if not a and not b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    return (2.0 * len(a & b)) / (len(a) + len(b))
@@ -16,7 +16,9 @@ def _install_llm_stub() -> None:
         return
 
     llm_module = types.ModuleType("src.common.llm")
-    llm_module.__path__ = []
+    # Keep the real package path so dependency-free submodules (prompt_cache)
+    # still import; the client modules are stubbed below.
+    llm_module.__path__ = [str(REPO_ROOT / "src" / "common" / "llm")]
 
     async def get_llm_response(*_args, **_kwargs):
         return "Generated description"
@@ -0,0 +1,320 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import src.features.archiving.archive_task as archive_task_module
+from src.common.db_handler import DatabaseHandler
+from src.features.archiving.archive_task import ArchiveTask, ArchiveWriteError
+
+
+class FakeDB:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stored = []
+        self.reactions = []
+
+    async def store_messages(self, messages):
+        await asyncio.sleep(0.01)
+        with self.lock:
+            self.stored.extend(m["message_id"] for m in messages)
+
+    def bulk_upsert_reactions(self, message_ids, rows, guild_id=None):
+        with self.lock:
+            self.reactions.append((list(message_ids), len(rows), guild_id))
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDB()
+    monkeypatch.setattr(archive_task_module, "_get_db", lambda: db)
+    monkeypatch.setattr(archive_task_module, "load_dotenv", lambda **_kwargs: None)
+    return db
+
+
+def _task(monkeypatch, workers=3, queue_size=16):
+    monkeypatch.setenv("ARCHIVE_DB_WORKERS", str(workers))
+    monkeypatch.setenv("ARCHIVE_DB_QUEUE_SIZE", str(queue_size))
+    bot = SimpleNamespace(loop=asyncio.get_running_loop())
+    return ArchiveTask(bot, guild_id=1, channel_ids=[10])
+
+
+def test_every_write_for_one_channel_lands_before_drain_returns(monkeypatch, fake_db):
+    async def main():
+        task = _task(monkeypatch, workers=4)
+        for batch in range(10):
+            await task._store_messages_and_reactions([
+                {"message_id": batch * 10 + i, "channel_id": 10, "_reaction_rows": [{"x": 1}] if i == 0 else []}
+                for i in range(3)
+            ])
+        await task._drain_db_writes(10)
+        task._shutdown_db_worker()
+        return task
+
+    task = asyncio.run(main())
+
+    assert sorted(fake_db.stored) == [batch * 10 + i for batch in range(10) for i in range(3)]
+    assert sorted(fake_db.reactions) == [([batch * 10], 1, 1) for batch in range(10)]
+    metrics = task.get_stage_metrics()
+    assert metrics["db_write"]["ops"] == 10
+    assert metrics["db_write"]["items"] == 30
+    assert metrics["pending_writes"] == 0
+
+
+def test_reads_run_concurrently_on_separate_workers(monkeypatch, fake_db):
+    def slow_read(_db):
+        time.sleep(0.2)
+        return threading.current_thread().name
+
+    async def main():
+        task = _task(monkeypatch, workers=3)
+        started = time.monotonic()
+        names = await asyncio.gather(*(task._db_operation(slow_read) for _ in range(3)))
+        elapsed = time.monotonic() - started
+        task._shutdown_db_worker()
+        return names, elapsed
+
+    names, elapsed = asyncio.run(main())
+
+    assert len(set(names)) == 3
+    assert elapsed < 0.5
+
+
+def test_full_queue_applies_backpressure_without_blocking_loop(monkeypatch, fake_db):
+    release = threading.Event()
+
+    def blocked(_db):
+        release.wait(5)
+
+    async def main():
+        task = _task(monkeypatch, workers=1, queue_size=1)
+        first = await task._db_write(blocked, channel_id=10)
+        await asyncio.sleep(0.05)  # worker picks up the first write
+        await task._db_write(blocked, channel_id=10)  # fills the queue
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker_task = asyncio.create_task(ticker())
+        threading.Timer(0.2, release.set).start()
+        await task._db_write(blocked, channel_id=10)  # waits for space
+        await task._drain_db_writes()
+        ticker_task.cancel()
+        task._shutdown_db_worker()
+        return task, ticks, first
+
+    task, ticks, first = asyncio.run(main())
+
+    assert first.done()
+    assert ticks >= 5
+    assert task.get_stage_metrics()["db_write"]["backpressure_waits"] == 1
+
+
+def test_single_channel_backfill_keeps_several_workers_busy(monkeypatch, fake_db):
+    lock = threading.Lock()
+    busy = 0
+    peak = 0
+    threads = set()
+
+    def slow_write(_db):
+        nonlocal busy, peak
+        with lock:
+            busy += 1
+            peak = max(peak, busy)
+            threads.add(threading.current_thread().name)
+        time.sleep(0.1)
+        with lock:
+            busy -= 1
+
+    async def main():
+        task = _task(monkeypatch, workers=4)
+        started = time.monotonic()
+        for _ in range(8):
+            await task._db_write(slow_write, channel_id=10)
+        await task._drain_db_writes(10)
+        elapsed = time.monotonic() - started
+        task._shutdown_db_worker()
+        return elapsed
+
+    elapsed = asyncio.run(main())
+
+    assert peak > 1
+    assert len(threads) == 4
+    assert elapsed < 0.6  # 8 x 100ms on one worker would take 800ms
+
+
+def test_failed_write_is_raised_on_drain_and_skips_the_channels_later_writes(monkeypatch, fake_db):
+    def broken(_db):
+        raise RuntimeError("boom")
+
+    async def main():
+        # One worker, so the later write for channel 10 is still queued when
+        # the failure lands.
+        task = _task(monkeypatch, workers=1)
+        await task._store_messages_and_reactions([{"message_id": 1, "channel_id": 10}], new_count=1)
+        await task._db_write(broken, channel_id=10)
+        await task._store_messages_and_reactions([{"message_id": 2, "channel_id": 10}], new_count=1)
+        await task._store_messages_and_reactions([{"message_id": 3, "channel_id": 20}], new_count=1)
+        with pytest.raises(ArchiveWriteError) as raised:
+            await task._drain_db_writes()
+        # The failure is reported once; a later pass over the channel starts clean.
+        await task._drain_db_writes()
+        task._shutdown_db_worker()
+        return task, raised.value
+
+    task, error = asyncio.run(main())
+
+    assert error.failures == {10: "boom"}
+    assert sorted(fake_db.stored) == [1, 3]  # message 2 was never written past the failure
+    assert task.total_messages_archived == 2  # counted only once written
+    assert task.get_stage_metrics()["db_write"]["errors"] == 2
+    assert task._pending_writes == {}
+
+
+class BatchDB(FakeDB):
+    def __init__(self, existing=()):
+        super().__init__()
+        self.existing = set(existing)
+        self.calls = []
+
+    def get_existing_message_ids(self, ids):
+        self.calls.append(("exists", list(ids)))
+        return self.existing & set(ids)
+
+    def message_exists(self, message_id):
+        self.calls.append(("message_exists", message_id))
+        return message_id in self.existing
+
+    def bulk_upsert_channels(self, rows, guild_id=None):
+        self.calls.append(("channels", [r["channel_id"] for r in rows]))
+
+    def bulk_upsert_members(self, rows, guild_id=None):
+        self.calls.append(("members", sorted(r["member_id"] for r in rows)))
+
+    async def store_messages(self, messages):
+        self.calls.append(("store", [m["message_id"] for m in messages]))
+
+
+def _message(message_id, author_id, reactions=()):
+    return SimpleNamespace(
+        id=message_id,
+        author=SimpleNamespace(id=author_id, name=f"user{author_id}", avatar=None, bot=False),
+        channel=SimpleNamespace(id=10, name="general", category=None, nsfw=False),
+        content="hi",
+        created_at=archive_task_module.datetime(2026, 1, 1, tzinfo=archive_task_module.timezone.utc),
+        attachments=[],
+        embeds=[],
+        reactions=list(reactions),
+        reference=None,
+        edited_at=None,
+        pinned=False,
+        type="default",
+        flags=SimpleNamespace(value=0),
+    )
+
+
+def test_batch_runs_one_existence_query_and_one_upsert_per_entity_type(monkeypatch):
+    db = BatchDB(existing={2})
+    monkeypatch.setattr(archive_task_module, "_get_db", lambda: db)
+    monkeypatch.setattr(archive_task_module, "load_dotenv", lambda **_kwargs: None)
+
+    async def main():
+        task = _task(monkeypatch, workers=2)
+        task.bot.get_guild = lambda _gid: SimpleNamespace(get_member=lambda _uid: None)
+        batch = [_message(i, author_id=100 + i % 2) for i in range(1, 6)]
+        processed, new_count = await task._process_batch(batch, 10)
+        await task._store_messages_and_reactions(processed)
+        await task._drain_db_writes()
+        task._shutdown_db_worker()
+        return processed, new_count
+
+    processed, new_count = asyncio.run(main())
+
+    assert [m["message_id"] for m in processed] == [1, 3, 4, 5]
+    assert new_count == 4
+    assert db.calls == [
+        ("exists", [1, 2, 3, 4, 5]),
+        ("channels", [10]),
+        ("members", [100, 101]),
+        ("store", [1, 3, 4, 5]),
+    ]
+
+
+def test_in_depth_batch_keeps_existing_messages_and_reuses_existence_result(monkeypatch):
+    db = BatchDB(existing={1})
+    monkeypatch.setattr(archive_task_module, "_get_db", lambda: db)
+    monkeypatch.setattr(archive_task_module, "load_dotenv", lambda **_kwargs: None)
+
+    async def main():
+        task = _task(monkeypatch, workers=1)
+        task.in_depth = True
+        task.bot.get_guild = lambda _gid: SimpleNamespace(get_member=lambda _uid: None)
+        processed, new_count = await task._process_batch([_message(1, 100), _message(2, 100)], 10)
+        task._shutdown_db_worker()
+        return processed, new_count
+
+    processed, new_count = asyncio.run(main())
+
+    assert [m["message_id"] for m in processed] == [1, 2]
+    assert new_count == 1
+    assert [call[0] for call in db.calls] == ["exists"]
+
+
+def _handler_with_storage(**storage):
+    db = DatabaseHandler.__new__(DatabaseHandler)
+    db.storage_handler = SimpleNamespace(supabase_client=None, **storage)
+    db.server_config = SimpleNamespace(is_write_allowed=lambda guild_id: True)
+    return db
+
+
+def test_bulk_entity_upserts_raise_when_the_batch_is_not_stored():
+    async def stored_none(rows):
+        return 0  # the storage layer logs a failed batch and reports 0 stored
+
+    async def broken(rows):
+        raise ConnectionError("supabase unreachable")
+
+    partial = _handler_with_storage(store_members_to_supabase=stored_none, store_channels_to_supabase=stored_none)
+    with pytest.raises(RuntimeError, match="stored only 0 of 1 members"):
+        partial.bulk_upsert_members([{"member_id": 1}], guild_id=1)
+    with pytest.raises(RuntimeError, match="stored only 0 of 1 channels"):
+        partial.bulk_upsert_channels([{"channel_id": 10}], guild_id=1)
+
+    failing = _handler_with_storage(store_members_to_supabase=broken, store_channels_to_supabase=broken)
+    with pytest.raises(ConnectionError):
+        failing.bulk_upsert_members([{"member_id": 1}], guild_id=1)
+    with pytest.raises(ConnectionError):
+        failing.bulk_upsert_channels([{"channel_id": 10}], guild_id=1)
+
+
+def test_failed_member_upsert_fails_the_archive_write(monkeypatch):
+    class MemberFailureDB(BatchDB):
+        def bulk_upsert_members(self, rows, guild_id=None):
+            raise RuntimeError("stored only 0 of 2 members")
+
+    db = MemberFailureDB()
+    monkeypatch.setattr(archive_task_module, "_get_db", lambda: db)
+    monkeypatch.setattr(archive_task_module, "load_dotenv", lambda **_kwargs: None)
+
+    async def main():
+        task = _task(monkeypatch, workers=1)
+        task.bot.get_guild = lambda _gid: SimpleNamespace(get_member=lambda _uid: None)
+        processed, new_count = await task._process_batch([_message(1, 100), _message(2, 101)], 10)
+        await task._store_messages_and_reactions(processed, new_count=new_count)
+        with pytest.raises(ArchiveWriteError) as raised:
+            await task._drain_db_writes()
+        task._shutdown_db_worker()
+        return task, raised.value
+
+    task, error = asyncio.run(main())
+
+    assert error.failures == {10: "stored only 0 of 2 members"}
+    assert task.total_messages_archived == 0
+    assert "store" not in [call[0] for call in db.calls]
@@ -0,0 +1,198 @@
+import json
+import re
+
+import pytest
+
+from src.common.bulk_export import KeysetScan, export_scan, iter_pages, iter_rows
+
+_OPS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+
+def _split_top_level(expr):
+    parts, depth, current = [], 0, ""
+    for ch in expr:
+        if ch == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += ch == "("
+        depth -= ch == ")"
+        current += ch
+    return parts + [current]
+
+
+def _parse_term(term, sample):
+    if term.startswith("and("):
+        terms = [_parse_term(t, sample) for t in _split_top_level(term[4:-1])]
+        return lambda row: all(t(row) for t in terms)
+    column, op, raw = re.match(r'(\w+)\.(\w+)\.(.*)', term).groups()
+    value = json.loads(raw) if raw.startswith('"') else type(sample[column])(raw)
+    return lambda row: _OPS[op](row[column], value)
+
+
+class FakeQuery:
+    def __init__(self, client, rows):
+        self.client = client
+        self.rows = rows
+        self.orders = []
+        self.page_limit = None
+
+    def select(self, columns):
+        self.client.selects.append(columns)
+        return self
+
+    def __getattr__(self, op):
+        if op not in _OPS:
+            raise AttributeError(op)
+
+        def apply(column, value):
+            self.rows = [r for r in self.rows if _OPS[op](r[column], value)]
+            return self
+        return apply
+
+    def in_(self, column, values):
+        self.rows = [r for r in self.rows if r[column] in values]
+        return self
+
+    def or_(self, expr):
+        self.client.or_filters.append(expr)
+        branches = [_parse_term(t, self.rows[0] if self.rows else {}) for t in _split_top_level(expr)]
+        self.rows = [r for r in self.rows if any(b(r) for b in branches)]
+        return self
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self.page_limit = n
+        return self
+
+    def execute(self):
+        self.client.executes += 1
+        rows = list(self.rows)
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda r: r[column], reverse=desc)
+        return type("Result", (), {"data": rows[:self.page_limit][:self.client.max_rows]})()
+
+
+class FakeClient:
+    def __init__(self, rows, max_rows=1000):
+        self.rows = rows
+        self.max_rows = max_rows
+        self.selects = []
+        self.or_filters = []
+        self.executes = 0
+
+    def table(self, name):
+        assert name == "discord_messages"
+        return FakeQuery(self, self.rows)
+
+
+def _messages(count=95):
+    # Few distinct timestamps, so (created_at, message_id) ties are exercised.
+    return [
+        {
+            "message_id": 1000 + i,
+            "created_at": f"2026-05-01T00:{i % 7:02d}:00+00:00",
+            "channel_id": 10 + i % 3,
+            "content": f'msg "{i}", (x)',
+        }
+        for i in range(count)
+    ]
+
+
+def test_composite_keyset_visits_every_row_once_in_order():
+    client = FakeClient(_messages())
+    scan = KeysetScan(
+        "discord_messages",
+        columns="content",
+        key=("created_at", "message_id"),
+        filters=(("in", "channel_id", [10, 11]),),
+        page_size=10,
+    )
+
+    rows = list(iter_rows(client, scan))
+
+    expected = sorted(
+        (m for m in _messages() if m["channel_id"] in (10, 11)),
+        key=lambda m: (m["created_at"], m["message_id"]),
+    )
+    assert [r["message_id"] for r in rows] == [m["message_id"] for m in expected]
+    assert client.selects[0] == "content, created_at, message_id"
+    assert client.or_filters[0].startswith('created_at.gt."2026-05-01T00:')
+    assert client.executes == -(-len(expected) // 10) + 1  # every page, then the empty one
+
+
+def test_scan_keeps_paging_when_max_rows_caps_every_page():
+    client = FakeClient(_messages(), max_rows=6)
+    scan = KeysetScan("discord_messages", key=("created_at", "message_id"), page_size=10)
+
+    rows = list(iter_rows(client, scan))
+
+    assert len(rows) == 95
+    assert len({r["message_id"] for r in rows}) == 95
+
+
+def test_descending_scan_respects_limit():
+    client = FakeClient(_messages())
+    scan = KeysetScan("discord_messages", key="message_id", descending=True, page_size=20, limit=45)
+
+    pages = list(iter_pages(client, scan))
+
+    assert [len(p) for p in pages] == [20, 20, 5]
+    assert pages[0][0]["message_id"] == 1094
+    assert pages[-1][-1]["message_id"] == 1050
+
+
+def test_jsonl_export_resumes_from_checkpoint(tmp_path):
+    scan = KeysetScan("discord_messages", key=("created_at", "message_id"), page_size=8)
+    out = tmp_path / "train.jsonl"
+    checkpoint = tmp_path / "checkpoint.json"
+
+    def transform(row):
+        if row["channel_id"] == 12:
+            stats["skipped"] += 1
+            return None
+        return {"id": row["message_id"]}
+
+    stats = {"skipped": 0}
+    seen = {"n": 0}
+
+    def failing_transform(row):
+        seen["n"] += 1
+        if seen["n"] == 30:
+            raise RuntimeError("connection dropped")
+        return transform(row)
+
+    with pytest.raises(RuntimeError):
+        export_scan(FakeClient(_messages()), scan, out, transform=failing_transform,
+                    checkpoint_path=checkpoint, state=stats)
+    saved = json.loads(checkpoint.read_text())
+    assert saved["rows_read"] == 24 and not saved["complete"]
+
+    stats = {"skipped": -1}  # replaced by the checkpointed value
+    result = export_scan(FakeClient(_messages()), scan, out, transform=transform,
+                         checkpoint_path=checkpoint, state=stats)
+
+    expected = [
+        m["message_id"]
+        for m in sorted(_messages(), key=lambda m: (m["created_at"], m["message_id"]))
+        if m["channel_id"] != 12
+    ]
+    written = [json.loads(line)["id"] for line in out.read_text().splitlines()]
+    assert result.resumed
+    assert written == expected
+    assert result.rows_read == 95 and result.rows_written == len(expected)
+    assert stats["skipped"] == 95 - len(expected)
+    assert json.loads(checkpoint.read_text())["complete"]
+
+    with pytest.raises(ValueError):
+        export_scan(FakeClient(_messages()), KeysetScan("discord_messages"), out, checkpoint_path=checkpoint)
@@ -0,0 +1,75 @@
+"""ClaimedWorkExecutor claiming, backlog refills and phase accounting against an in-memory queue."""
+
+import asyncio
+
+import pytest
+
+from src.common.claimed_work import ClaimedWorkExecutor
+from src.common.metrics import Gauge
+
+
+pytestmark = pytest.mark.anyio
+
+IN_FLIGHT = Gauge('test_claimed_work_in_flight', 'Rows in flight by phase.', ('phase',))
+
+
+class QueueExecutor(ClaimedWorkExecutor):
+    log_name = 'QueueExecutor'
+    id_key = 'row_id'
+    task_prefix = 'test-row'
+    in_flight_gauge = IN_FLIGHT
+
+    def __init__(self, rows, **kwargs):
+        super().__init__(None, **kwargs)
+        self.rows = list(rows)
+        self.running = 0
+        self.peak = 0
+        self.finished = []
+
+    async def _claim(self, limit):
+        batch, self.rows = self.rows[:limit], self.rows[limit:]
+        return batch
+
+    def _order(self, claimed):
+        return sorted(claimed, key=lambda row: row['row_id'], reverse=True)
+
+    async def _execute(self, row):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        self._enter_phase(row['row_id'], 'work')
+        assert IN_FLIGHT.value(phase='work') >= 1
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return row['row_id']
+
+    async def _finish(self, row, result):
+        assert row['row_id'] not in self._tasks  # runs after the row has left the in-flight set
+        self.finished.append(result)
+
+
+async def test_backlog_is_claimed_as_rows_finish_without_exceeding_max_in_flight():
+    executor = QueueExecutor([{'row_id': f'r{i:02d}'} for i in range(12)], claim_limit=3, max_in_flight=4)
+
+    assert await executor.claim_available() == 3
+    await executor.drain()
+
+    assert sorted(executor.finished) == [f'r{i:02d}' for i in range(12)]
+    assert executor.finished[:3] == ['r02', 'r01', 'r00']  # _order applied to the first batch
+    assert executor.peak <= 4
+    assert executor.rows == []
+    assert executor.in_flight == 0
+    assert IN_FLIGHT.value(phase='waiting') == 0
+    assert IN_FLIGHT.value(phase='work') == 0
+
+
+async def test_stopped_executor_claims_nothing_but_finishes_claimed_rows():
+    executor = QueueExecutor([{'row_id': 'a'}, {'row_id': 'b'}, {'row_id': 'c'}], claim_limit=1, max_in_flight=1)
+
+    assert await executor.claim_available() == 1
+    executor.stop()
+    await executor.drain()
+
+    assert executor.finished == ['a']
+    assert await executor.claim_available() == 0
+    assert executor.rows == [{'row_id': 'b'}, {'row_id': 'c'}]
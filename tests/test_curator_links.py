@@ -0,0 +1,44 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from src.features.curating.curator import ArtCurator, classify_links
+
+
+pytestmark = pytest.mark.anyio
+
+
+def test_links_are_classified_against_allowed_embed_domains():
+    assert classify_links("no links here") == ([], True, False)
+    assert classify_links("https://YouTu.be/abc and https://rxddit.com/r/x") == (
+        ["https://YouTu.be/abc", "https://rxddit.com/r/x"], True, True,
+    )
+    links, all_allowed, any_allowed = classify_links("https://vimeo.com/1 https://example.com/art.png")
+    assert len(links) == 2 and not all_allowed and any_allowed
+
+
+class FakeGuild:
+    id = 1
+
+    def __init__(self):
+        self.fetches = 0
+
+    def get_member(self, member_id):
+        return None
+
+    async def fetch_member(self, member_id):
+        self.fetches += 1
+        return SimpleNamespace(id=member_id)
+
+
+async def test_curator_shares_bot_db_handler_and_caches_fetched_members():
+    shared = object()
+    curator = ArtCurator(logger=logging.getLogger('DiscordBot'), dev_mode=True, bot_ref=SimpleNamespace(db_handler=shared, server_config=None))
+    guild = FakeGuild()
+
+    first = await curator.resolve_member(guild, 42)
+    second = await curator.resolve_member(guild, 42)
+
+    assert curator.db_handler is shared
+    assert first is second and guild.fetches == 1
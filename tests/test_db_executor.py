@@ -0,0 +1,171 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.common.db_executor import DatabaseExecutor
+from src.common.db_handler import DatabaseHandler
+
+
+@pytest.fixture
+def executor():
+    ex = DatabaseExecutor(max_workers=2, call_workers=2, default_timeout=5)
+    yield ex
+    ex.shutdown()
+
+
+def test_run_reuses_one_loop_thread_across_calls(executor):
+    async def current_thread_name():
+        await asyncio.sleep(0)
+        return threading.current_thread().name
+
+    names = {executor.run(current_thread_name()) for _ in range(20)}
+
+    assert names == {"db-executor-loop"}
+    metrics = executor.get_metrics()
+    assert metrics["submitted"] == 20
+    assert metrics["completed"] == 20
+    assert metrics["queue_depth"] == 0
+    assert metrics["in_flight"] == 0
+
+
+def test_run_works_from_inside_a_running_loop(executor):
+    async def fetch():
+        return await asyncio.to_thread(lambda: threading.current_thread().name)
+
+    async def caller():
+        # Sync DatabaseHandler methods are still called from cogs' event loop.
+        return executor.run(fetch())
+
+    assert asyncio.run(caller()).startswith("db-io")
+
+
+def test_run_passes_through_non_awaitables(executor):
+    assert executor.run({"already": "resolved"}) == {"already": "resolved"}
+    assert executor.get_metrics()["submitted"] == 0
+
+
+def test_run_enforces_per_call_deadline(executor):
+    async def slow():
+        await asyncio.sleep(5)
+
+    with pytest.raises(TimeoutError):
+        executor.run(slow(), timeout=0.05)
+
+    metrics = executor.get_metrics()
+    assert metrics["timed_out"] == 1
+    assert metrics["queue_depth"] == 0
+
+
+def test_run_async_keeps_caller_loop_responsive(executor):
+    def blocking_db_call(value):
+        time.sleep(0.2)
+        return value * 2
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        result = await executor.run_async(blocking_db_call, 21)
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(main())
+    assert result == 42
+    assert ticks >= 5
+
+
+def test_run_async_propagates_errors_and_counts_failures(executor):
+    def broken():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(executor.run_async(broken))
+
+    assert executor.get_metrics()["failed"] == 1
+
+
+def test_database_handler_dispatches_through_shared_executor(monkeypatch, executor):
+    monkeypatch.setattr("src.common.db_handler.get_db_executor", lambda: executor)
+    db = DatabaseHandler.__new__(DatabaseHandler)
+
+    async def lookup():
+        return 7
+
+    assert db._run_async_in_thread(lookup()) == 7
+    assert executor.get_metrics()["completed"] == 1
+
+
+def test_calls_have_no_deadline_unless_configured(monkeypatch):
+    monkeypatch.delenv("DB_EXECUTOR_CALL_TIMEOUT_SECONDS", raising=False)
+    assert DatabaseExecutor(max_workers=1).default_timeout is None
+
+    monkeypatch.setenv("DB_EXECUTOR_CALL_TIMEOUT_SECONDS", "12")
+    assert DatabaseExecutor(max_workers=1).default_timeout == 12
+
+
+def test_reentrant_calls_reuse_one_nested_loop(executor):
+    async def inner():
+        return threading.current_thread().name
+
+    async def outer():
+        # A sync DatabaseHandler method called from a coroutine on the shared loop.
+        return executor.run(inner())
+
+    names = {executor.run(outer()) for _ in range(5)}
+
+    assert names == {"db-executor-nested-loop"}
+    assert threading.active_count() < 20
+
+
+def test_async_callables_are_timed_once_after_they_resolve(executor):
+    async def slow_lookup():
+        await asyncio.sleep(0.1)
+        return 3
+
+    assert asyncio.run(executor.run_async(slow_lookup)) == 3
+
+    metrics = executor.get_metrics()
+    assert (metrics["submitted"], metrics["completed"]) == (1, 1)
+    assert metrics["avg_run_ms"] >= 90
+
+
+def test_doubly_reentrant_call_honours_the_deadline(executor):
+    async def stuck():
+        await asyncio.sleep(2)
+
+    async def middle():
+        return executor.run(stuck(), timeout=0.1)
+
+    async def outer():
+        return executor.run(middle())
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        executor.run(outer())
+
+    assert time.monotonic() - started < 1.5
+    assert executor.get_metrics()["timed_out"] == 1
+
+
+def test_executor_is_shut_down_only_when_the_last_owner_releases(monkeypatch):
+    from src.common import db_executor
+
+    monkeypatch.setattr(db_executor, "_shared_executor", None)
+    monkeypatch.setattr(db_executor, "_owners", 0)
+    first = db_executor.retain_db_executor()
+    assert db_executor.retain_db_executor() is first
+
+    db_executor.release_db_executor()
+    assert db_executor.get_db_executor() is first
+
+    db_executor.release_db_executor()
+    assert db_executor.get_db_executor() is not first
+    db_executor.shutdown_db_executor()
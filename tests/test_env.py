@@ -0,0 +1,27 @@
+from src.common.env import env_float, env_int
+
+
+def test_env_int_falls_back_on_unset_malformed_or_too_small(monkeypatch):
+    monkeypatch.delenv("TEST_ENV_INT", raising=False)
+    assert env_int("TEST_ENV_INT", 4) == 4
+    assert env_int("TEST_ENV_INT", None) is None
+
+    monkeypatch.setenv("TEST_ENV_INT", " 12 ")
+    assert env_int("TEST_ENV_INT", 4) == 12
+    monkeypatch.setenv("TEST_ENV_INT", "twelve")
+    assert env_int("TEST_ENV_INT", 4) == 4
+    monkeypatch.setenv("TEST_ENV_INT", "0")
+    assert env_int("TEST_ENV_INT", 4) == 4
+    assert env_int("TEST_ENV_INT", 4, minimum=0) == 0
+
+
+def test_env_float_requires_a_positive_value_unless_zero_is_allowed(monkeypatch):
+    monkeypatch.setenv("TEST_ENV_FLOAT", "1.5")
+    assert env_float("TEST_ENV_FLOAT", 2.0) == 1.5
+    monkeypatch.setenv("TEST_ENV_FLOAT", "-1")
+    assert env_float("TEST_ENV_FLOAT", 2.0) == 2.0
+    monkeypatch.setenv("TEST_ENV_FLOAT", "0")
+    assert env_float("TEST_ENV_FLOAT", 2.0) == 2.0
+    assert env_float("TEST_ENV_FLOAT", 2.0, allow_zero=True) == 0.0
+    monkeypatch.setenv("TEST_ENV_FLOAT", "10m")
+    assert env_float("TEST_ENV_FLOAT", None) is None
@@ -145,6 +145,7 @@ def test_iter_messages_pages_newest_first_by_message_id():
             self.batches = [
                 [{"message_id": 30}, {"message_id": 20}],
                 [{"message_id": 10}],
+                [],  # a short page is not the end; the empty one is
             ]
 
         def table(self, name):
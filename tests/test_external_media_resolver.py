@@ -640,3 +640,180 @@ class TestResolverTrace:
         result = resolver.resolve("https://evil.com/file.exe")
         assert result.trace
         assert "non-safelisted" in result.trace.lower()
+
+
+# ---------------------------------------------------------------------------
+# 16. Async resolver service
+# ---------------------------------------------------------------------------
+
+class TestResolverService:
+    @staticmethod
+    def _resolver(tmpdir, calls, *, payload=b"x" * 1000, delay=0.05):
+        import asyncio
+
+        async def _fake_yt_dlp(url, **kw):
+            calls.append(url)
+            await asyncio.sleep(delay)
+            return True, {"url": f"https://cdn.x.com/{len(calls)}.png", "ext": "png"}
+
+        async def _fake_download(url, dest, **kw):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            with open(dest, "wb") as f:
+                f.write(payload + url.encode())
+            return True, "image/png", len(payload), None
+
+        return ExternalMediaResolver(cache_dir=tmpdir, _run_yt_dlp=_fake_yt_dlp, _download=_fake_download)
+
+    def test_concurrent_requests_for_same_url_share_one_fetch(self):
+        import asyncio
+        from src.features.summarising.external_media_resolver import ExternalMediaResolverService
+
+        calls: List[str] = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            service = ExternalMediaResolverService(self._resolver(tmpdir, calls), workers=2)
+
+            async def run():
+                return await asyncio.gather(
+                    *[service.resolve("https://x.com/user/status/1") for _ in range(5)],
+                    *[service.resolve(f"https://x.com/user/status/{i}") for i in range(2, 6)],
+                )
+
+            results = asyncio.run(run())
+
+        assert sorted(calls) == sorted(f"https://x.com/user/status/{i}" for i in range(1, 6))
+        assert all(r.outcome == ResolveOutcome.DOWNLOADED for r in results)
+        assert len({id(r) for r in results[:5]}) == 1
+        metrics = service.get_metrics()
+        assert metrics["requests"] == 9
+        assert metrics["deduplicated"] == 4
+        assert metrics["resolved"] == 5
+        assert metrics["in_flight"] == 0
+        assert metrics["outcomes"] == {"downloaded": 5}
+
+    def test_worker_pool_bounds_concurrent_fetches(self):
+        import asyncio
+        from src.features.summarising.external_media_resolver import ExternalMediaResolverService
+
+        active = {"now": 0, "max": 0}
+
+        async def _fake_yt_dlp(url, **kw):
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+            await asyncio.sleep(0.02)
+            active["now"] -= 1
+            return False, "yt-dlp exit 1"
+
+        service = ExternalMediaResolverService(ExternalMediaResolver(_run_yt_dlp=_fake_yt_dlp), workers=3)
+
+        async def run():
+            await asyncio.gather(*[service.resolve(f"https://x.com/user/status/{i}") for i in range(10)])
+
+        asyncio.run(run())
+        assert active["max"] == 3
+
+    def test_cache_directory_is_trimmed_lru_and_evicted_hits_refetch(self):
+        import asyncio
+        import time as _time
+        from src.features.summarising.external_media_resolver import ExternalMediaResolverService
+
+        calls: List[str] = []
+        rows: Dict[str, Dict[str, Any]] = {}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            resolver = self._resolver(tmpdir, calls, delay=0)
+            resolver._get_cache = lambda key: rows.get(key)
+            resolver._upsert_cache = lambda row: rows.__setitem__(row["url_key"], row)
+            service = ExternalMediaResolverService(resolver, max_cache_bytes=2500)
+
+            async def run():
+                first = await service.resolve("https://x.com/user/status/1")
+                service.release(first)
+                _time.sleep(0.01)
+                second = await service.resolve("https://x.com/user/status/2")
+                service.release(second)
+                _time.sleep(0.01)
+                hit = await service.resolve("https://x.com/user/status/1")  # cache hit refreshes recency
+                service.release(hit)
+                _time.sleep(0.01)
+                third = await service.resolve("https://x.com/user/status/3")
+                service.release(third)
+                return first, second, third
+
+            first, second, third = asyncio.run(run())
+            assert os.path.exists(first.file_path)
+            assert not os.path.exists(second.file_path)
+            assert os.path.exists(third.file_path)
+
+            refetched = asyncio.run(service.resolve("https://x.com/user/status/2"))
+            assert refetched.outcome == ResolveOutcome.DOWNLOADED
+
+        assert calls.count("https://x.com/user/status/2") == 2
+        metrics = service.get_metrics()
+        assert metrics["cache_hits"] == 1
+        assert metrics["evicted_files"] >= 1
+
+    def test_returned_files_stay_pinned_until_released(self):
+        import asyncio
+        import time as _time
+        from src.features.summarising.external_media_resolver import ExternalMediaResolverService
+
+        calls: List[str] = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            service = ExternalMediaResolverService(self._resolver(tmpdir, calls, delay=0), max_cache_bytes=1500)
+
+            async def run():
+                first = await service.resolve("https://x.com/user/status/1")
+                _time.sleep(0.01)
+                second = await service.resolve("https://x.com/user/status/2")
+                pinned_survived = os.path.exists(first.file_path)
+                service.release(first)
+                _time.sleep(0.01)
+                third = await service.resolve("https://x.com/user/status/3")
+                return first, second, third, pinned_survived
+
+            first, second, third, pinned_survived = asyncio.run(run())
+
+            assert pinned_survived
+            assert not os.path.exists(first.file_path)
+            assert os.path.exists(second.file_path)
+            assert os.path.exists(third.file_path)
+            assert service.get_metrics()["pinned"] == 2
+
+    def test_blocking_resolve_refuses_to_run_inside_a_loop(self):
+        import asyncio
+
+        async def run():
+            with pytest.raises(RuntimeError, match="resolve_async"):
+                ExternalMediaResolver().resolve("https://x.com/user/status/1")
+
+        asyncio.run(run())
+
+    def test_default_yt_dlp_runner_does_not_block_the_loop(self, monkeypatch):
+        import asyncio
+        import stat
+        from src.features.summarising.external_media_resolver import _default_run_yt_dlp_json_async
+
+        with tempfile.TemporaryDirectory() as bindir:
+            script = os.path.join(bindir, "yt-dlp")
+            with open(script, "w") as f:
+                f.write('#!/bin/sh\nsleep 0.3\necho \'{"url": "https://cdn.x.com/a.png", "ext": "png"}\'\n')
+            os.chmod(script, os.stat(script).st_mode | stat.S_IEXEC)
+            monkeypatch.setenv("PATH", bindir + os.pathsep + os.environ.get("PATH", ""))
+
+            async def run():
+                ticks = 0
+
+                async def ticker():
+                    nonlocal ticks
+                    while True:
+                        await asyncio.sleep(0.01)
+                        ticks += 1
+
+                task = asyncio.create_task(ticker())
+                result = await _default_run_yt_dlp_json_async("https://x.com/user/status/1", timeout=5)
+                task.cancel()
+                return result, ticks
+
+            (ok, data), ticks = asyncio.run(run())
+
+        assert ok and data["ext"] == "png"
+        assert ticks >= 10
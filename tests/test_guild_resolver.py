@@ -0,0 +1,94 @@
+import time
+from types import SimpleNamespace
+
+from src.common.db_handler import DatabaseHandler
+from src.common.guild_resolver import GuildIdResolver
+
+
+class CountingLoader:
+    def __init__(self, mapping):
+        self.mapping = mapping
+        self.calls = []
+
+    def __call__(self, ids):
+        self.calls.append(list(ids))
+        return {i: self.mapping[i] for i in ids if i in self.mapping}
+
+
+def make_resolver(messages=None, channels=None, **kwargs):
+    message_loader = CountingLoader(messages or {})
+    channel_loader = CountingLoader(channels or {})
+    resolver = GuildIdResolver(message_loader, channel_loader, **kwargs)
+    return resolver, message_loader, channel_loader
+
+
+def test_repeat_lookups_hit_the_cache():
+    resolver, message_loader, _ = make_resolver(messages={1: 9})
+
+    assert resolver.resolve_message(1) == 9
+    assert resolver.resolve_message(1) == 9
+
+    assert message_loader.calls == [[1]]
+    assert resolver.get_metrics()["hits"] == 1
+    assert resolver.get_metrics()["misses"] == 1
+
+
+def test_unknown_ids_are_negatively_cached_until_ttl_expires():
+    resolver, message_loader, _ = make_resolver(negative_ttl_seconds=0.05)
+
+    assert resolver.resolve_message(404) is None
+    assert resolver.resolve_message(404) is None
+    assert len(message_loader.calls) == 1
+    assert resolver.get_metrics()["negative_hits"] == 1
+
+    time.sleep(0.06)
+    resolver.resolve_message(404)
+    assert len(message_loader.calls) == 2
+
+
+def test_prefetch_loads_only_misses_in_one_call():
+    resolver, message_loader, _ = make_resolver(messages={1: 9, 2: 9, 3: 8})
+    resolver.remember_message(1, 9)
+
+    assert resolver.prefetch_messages([1, 2, 3, 3]) == {1: 9, 2: 9, 3: 8}
+    assert message_loader.calls == [[2, 3]]
+
+
+def test_seed_messages_populates_message_and_channel_entries():
+    resolver, message_loader, channel_loader = make_resolver()
+    resolver.seed_messages([{"message_id": 1, "channel_id": 10, "thread_id": 11, "guild_id": 9}])
+
+    assert resolver.resolve_message(1) == 9
+    assert resolver.resolve_channel(10) == 9
+    assert resolver.resolve_channel(11) == 9
+    assert message_loader.calls == [] and channel_loader.calls == []
+
+
+def test_lru_bound_evicts_oldest_entries():
+    resolver, message_loader, _ = make_resolver(messages={1: 9, 2: 9, 3: 9}, max_messages=2)
+    resolver.prefetch_messages([1, 2, 3])
+
+    resolver.resolve_message(1)
+    assert message_loader.calls[-1] == [1]
+
+
+def test_load_errors_are_not_negatively_cached():
+    calls = []
+
+    def broken(ids):
+        calls.append(ids)
+        raise RuntimeError("boom")
+
+    resolver = GuildIdResolver(broken, broken)
+    assert resolver.resolve_message(1) is None
+    assert resolver.resolve_message(1) is None
+    assert len(calls) == 2
+
+
+def test_database_handler_channel_lookup_prefers_server_config_seed():
+    db = DatabaseHandler.__new__(DatabaseHandler)
+    db.storage_handler = None
+    db.server_config = SimpleNamespace(get_channel_guild_ids=lambda: {10: 9})
+
+    assert db._resolve_channel_guild_id(10) == 9
+    assert db._resolve_channel_guild_id(11) is None
@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.common.llm.client_registry import (
+    LLMClientRegistry,
+    RetryableLLMError,
+    is_retryable,
+    report_usage,
+    retry_after_seconds,
+)
+
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class FakeClient:
+    instances = 0
+
+    def __init__(self):
+        FakeClient.instances += 1
+        self.failures = []
+        self.active = 0
+        self.max_active = 0
+        self.kwargs = []
+
+    async def generate_chat_completion(self, model, system_prompt, messages, **kwargs):
+        self.kwargs.append(kwargs)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if self.failures:
+                raise self.failures.pop(0)
+            report_usage(input_tokens=100, output_tokens=7)
+            return f"{model}: ok"
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture(autouse=True)
+def _reset_instances():
+    FakeClient.instances = 0
+
+
+def test_client_is_pooled_and_concurrency_capped(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY_FAKE", "2")
+    registry = LLMClientRegistry({"fake": FakeClient})
+
+    async def run():
+        results = await asyncio.gather(*[
+            registry.generate("fake", "model-a" if i % 2 else "model-b", "sys", [{"role": "user", "content": "hi"}])
+            for i in range(6)
+        ])
+        return results, registry.get_client("fake")
+
+    results, client = asyncio.run(run())
+
+    assert FakeClient.instances == 1
+    assert client.max_active == 2
+    assert sorted(results) == ["model-a: ok"] * 3 + ["model-b: ok"] * 3
+    metrics = registry.get_metrics()
+    assert metrics["fake/model-a"]["calls"] == 3
+    assert metrics["fake/model-a"]["input_tokens"] == 300
+    assert metrics["fake/model-b"]["output_tokens"] == 21
+
+
+def test_retries_honour_retry_after_and_stop_on_client_errors():
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    registry = LLMClientRegistry({"fake": FakeClient}, sleep=fake_sleep)
+
+    async def run():
+        client = registry.get_client("fake")
+        client.failures = [FakeStatusError(429, {"retry-after": "7"}), FakeStatusError(503, {"retry-after-ms": "1500"})]
+        first = await registry.generate("fake", "m", "sys", [{"role": "user", "content": "hi"}])
+        client.failures = [FakeStatusError(400)]
+        with pytest.raises(FakeStatusError):
+            await registry.generate("fake", "m", "sys", [{"role": "user", "content": "hi"}])
+        return first
+
+    assert asyncio.run(run()) == "m: ok"
+    assert sleeps == [7.0, 1.5]
+    stats = registry.get_metrics()["fake/m"]
+    assert (stats["calls"], stats["errors"], stats["attempts"], stats["retries"]) == (2, 1, 4, 2)
+
+
+def test_retry_classification_follows_exception_causes():
+    wrapped = RuntimeError("Claude call failed")
+    wrapped.__cause__ = FakeStatusError(429, {"retry-after": "3"})
+
+    assert is_retryable(wrapped)
+    assert retry_after_seconds(wrapped) == 3.0
+    assert is_retryable(RetryableLLMError("empty response"))
+    assert not is_retryable(FakeStatusError(401))
+    assert not is_retryable(ValueError("bad messages"))
@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+from src.common import loop_watchdog
+from src.common.loop_watchdog import (
+    BLOCKED_STALLS,
+    OTHER_SITE,
+    UNATTRIBUTED,
+    LoopWatchdog,
+    _Capture,
+    release_loop_watchdog,
+    start_loop_watchdog,
+)
+
+
+def blocking_supabase_call(seconds):
+    time.sleep(seconds)
+
+
+def test_watchdog_attributes_stalls_to_the_blocking_call_site():
+    watchdog = LoopWatchdog(threshold=0.05, interval=0.01, report_interval=3600)
+
+    async def scenario():
+        watchdog.start()
+        await asyncio.sleep(0.05)
+        for _ in range(3):
+            blocking_supabase_call(0.2)
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(0.05)  # short awaits stay below the threshold
+        watchdog.stop()
+
+    asyncio.run(scenario())
+
+    offenders = watchdog.get_offenders()
+    assert offenders, "expected the blocking calls to be recorded"
+    top = offenders[0]
+    assert top["site"].startswith("tests/test_loop_watchdog.py:")
+    assert top["site"].endswith("in blocking_supabase_call")
+    assert "time.sleep" not in top["site"]
+    assert top["count"] == 3
+    assert 150 <= top["max_ms"] < 1000
+    assert top["stack"][-1] == top["site"]
+    assert sum(o["count"] for o in offenders if o["site"] != top["site"]) == 0
+
+
+def test_offenders_are_ranked_by_total_blocked_time_and_bounded():
+    watchdog = LoopWatchdog(threshold=0.1, interval=0.01, max_sites=2, log_cooldown=0)
+
+    watchdog.record_stall(0.3)
+    watchdog.record_stall(0.2)
+    assert watchdog.get_offenders()[0]["site"] == UNATTRIBUTED
+    assert watchdog.get_offenders()[0]["count"] == 2
+
+    watchdog.record_stall(1.0, _Capture(0.0, "src/a.py:1 in slow", "ssl.py:9 in read", ["src/a.py:1 in slow"]))
+    watchdog.record_stall(0.6, _Capture(0.0, "src/b.py:2 in slower", "", []))
+
+    ranked = watchdog.get_offenders()
+    assert [o["site"] for o in ranked] == ["src/a.py:1 in slow", "src/b.py:2 in slower"]
+    assert ranked[0]["blocked_in"] == "ssl.py:9 in read"
+    assert watchdog.snapshot()["threshold_ms"] == 100.0
+
+
+def test_blocked_metrics_collapse_sites_beyond_the_label_cap(monkeypatch):
+    monkeypatch.setattr(loop_watchdog, "METRIC_SITE_LIMIT", 2)
+    monkeypatch.setattr(loop_watchdog, "_metric_sites", set())
+    watchdog = LoopWatchdog(threshold=0.1, interval=0.01, log_cooldown=3600)
+    other_before = BLOCKED_STALLS.value(site=OTHER_SITE)
+
+    for name in ("a", "b", "c", "d", "a"):
+        watchdog.record_stall(0.2, _Capture(0.0, f"src/cap_{name}.py:1 in f", "", []))
+
+    assert loop_watchdog._metric_sites == {"src/cap_a.py:1 in f", "src/cap_b.py:1 in f"}
+    assert BLOCKED_STALLS.value(site="src/cap_c.py:1 in f") == 0
+    assert BLOCKED_STALLS.value(site=OTHER_SITE) - other_before == 2
+    # The in-process ranking still keeps the real call sites.
+    assert len(watchdog.get_offenders()) == 4
+
+
+def test_shared_watchdog_stops_only_when_the_last_owner_releases(monkeypatch):
+    monkeypatch.setattr(loop_watchdog, "_watchdog", None)
+    monkeypatch.setattr(loop_watchdog, "_owners", 0)
+    monkeypatch.setenv("LOOP_WATCHDOG_ENABLED", "true")
+
+    async def scenario():
+        first = start_loop_watchdog(threshold=1.0, interval=0.01)
+        second = start_loop_watchdog()
+        assert first is second
+        release_loop_watchdog()
+        await asyncio.sleep(0)
+        still_running = first.snapshot()["running"]
+        release_loop_watchdog()
+        await asyncio.sleep(0)
+        return first, still_running
+
+    watchdog, still_running = asyncio.run(scenario())
+    assert still_running is True
+    assert watchdog.snapshot()["running"] is False
+    assert loop_watchdog._owners == 0
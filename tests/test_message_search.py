@@ -0,0 +1,159 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from scripts.local_message_search import LocalMessageSearch
+from src.common.message_search import (
+    MessageSearch,
+    is_missing_search_rpc,
+    search_messages,
+)
+from src.common.storage_handler import StorageHandler
+
+START = datetime(2026, 5, 1, tzinfo=timezone.utc)
+WORDS = ["wan", "lora", "flux", "render", "upscale", "motion", "comfy", "node"]
+
+
+def _fixture_messages(count=400):
+    messages = []
+    for i in range(count):
+        words = [WORDS[(i * 7 + j) % len(WORDS)] for j in range(1 + i % 4)]
+        messages.append({
+            "message_id": 1000 + i,
+            "guild_id": 1,
+            "channel_id": 10 + i % 3,
+            "author_id": 40 + i % 5,
+            "content": " ".join(words) + (f" <@{99}>" if i % 11 == 0 else "") + (" https://x.test" if i % 13 == 0 else ""),
+            "created_at": (START + timedelta(minutes=i % 50)).isoformat(),
+            "attachments": [{"filename": "clip.mp4", "content_type": "video/mp4"}] if i % 6 == 0 else [],
+            "reaction_count": i % 9,
+            "reference_id": 1000 + i - 1 if i % 4 == 0 and i else None,
+        })
+    return messages
+
+
+@pytest.fixture
+def index():
+    local = LocalMessageSearch()
+    local.add_channels([
+        {"channel_id": 10, "channel_name": "general"},
+        {"channel_id": 11, "channel_name": "art"},
+        {"channel_id": 12, "channel_name": "after-dark", "nsfw": True},
+    ])
+    local.add_messages(_fixture_messages())
+    yield local
+    local.close()
+
+
+def _all_pages(client, search):
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = search_messages(client, MessageSearch(**{**search.__dict__, "cursor": cursor}))
+        seen.extend(page["messages"])
+        pages += 1
+        if not page["has_more"]:
+            assert page["next_cursor"] is None
+            return seen, pages
+        cursor = page["next_cursor"]
+
+
+@pytest.mark.parametrize("sort", ["relevance", "date", "reactions"])
+def test_cursor_pages_are_complete_and_ordered(index, sort):
+    rows, pages = _all_pages(index, MessageSearch(query="lora", guild_id=1, sort=sort, limit=17))
+
+    expected = {m["message_id"] for m in _fixture_messages() if "lora" in m["content"]}
+    ids = [row["message_id"] for row in rows]
+    assert len(ids) == len(set(ids)) == len(expected)
+    assert set(ids) == expected
+    assert pages == -(-len(expected) // 17)
+    key = {"relevance": "rank", "date": "created_at", "reactions": "reaction_count"}[sort]
+    sort_keys = [(row[key], row["created_at"], row["message_id"]) for row in rows]
+    assert sort_keys == sorted(sort_keys, reverse=True)
+
+
+def test_filters_are_pushed_down(index):
+    search = MessageSearch(
+        query="wan",
+        guild_id=1,
+        channel_ids=(10, 11, 12),
+        exclude_author_ids=(41,),
+        after=(START + timedelta(minutes=10)).isoformat(),
+        before=(START + timedelta(minutes=40)).isoformat(),
+        is_reply=False,
+        has=("video",),
+        min_reactions=2,
+        exclude_nsfw=True,
+        limit=500,
+    )
+    rows, _ = _all_pages(index, search)
+
+    expected = {
+        m["message_id"] for m in _fixture_messages()
+        if "wan" in m["content"] and m["channel_id"] in (10, 11) and m["author_id"] != 41
+        and START + timedelta(minutes=10) <= datetime.fromisoformat(m["created_at"]) <= START + timedelta(minutes=40)
+        and m["reference_id"] is None and m["attachments"] and m["reaction_count"] >= 2
+    }
+    assert expected and {row["message_id"] for row in rows} == expected
+
+    mentions, _ = _all_pages(index, MessageSearch(mentions_author_id=99, has=("link",), limit=50))
+    assert {row["message_id"] for row in mentions} == {
+        m["message_id"] for m in _fixture_messages() if "<@99>" in m["content"] and "https://" in m["content"]
+    }
+    with pytest.raises(ValueError):
+        search_messages(index, MessageSearch(query="wan", cursor="not-a-cursor"))
+
+
+class _FakeTable:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return type("Result", (), {"data": self.rows})()
+
+
+class _FakeSupabase:
+    def __init__(self, index, missing_rpc=False):
+        self.index = index
+        self.missing_rpc = missing_rpc
+        self.tables = []
+
+    def rpc(self, name, params):
+        if self.missing_rpc:
+            error = RuntimeError("Could not find the function public.search_discord_messages")
+            error.code = "PGRST202"
+            raise error
+        return self.index.rpc(name, params)
+
+    def table(self, name):
+        self.tables.append(name)
+        if name == "discord_channels":
+            return _FakeTable([{"channel_id": 10, "channel_name": "general", "nsfw": False},
+                               {"channel_id": 11, "channel_name": "art", "nsfw": False}])
+        return _FakeTable([{"message_id": 1, "channel_id": 10, "content": "wan ilike hit"}])
+
+
+def test_storage_handler_pages_with_cursor_and_falls_back_without_rpc(index):
+    storage = StorageHandler.__new__(StorageHandler)
+    storage.supabase_client = _FakeSupabase(index)
+
+    async def run():
+        first = await storage.search_messages_unified(query="flux", guild_id=1, has=["video"], limit=5)
+        second = await storage.search_messages_unified(query="flux", guild_id=1, has=["video"], limit=5,
+                                                       cursor=first["next_cursor"])
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first["truncated"] and first["next_cursor"]
+    assert len(first["messages"]) == 5
+    assert not {m["message_id"] for m in first["messages"]} & {m["message_id"] for m in second["messages"]}
+    assert all(m["channel_name"] in ("general", "art") for m in first["messages"] + second["messages"])
+
+    storage.supabase_client = _FakeSupabase(index, missing_rpc=True)
+    fallback = asyncio.run(storage.search_messages_unified(query="wan"))
+    assert [m["message_id"] for m in fallback["messages"]] == ["1"]
+    assert storage._search_rpc_available is False
+    assert is_missing_search_rpc(RuntimeError("function search_discord_messages(text) does not exist"))
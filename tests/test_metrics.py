@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from src.common.db_executor import DatabaseExecutor
+from src.common.health_server import HealthCheckHandler, HealthServer
+from src.common.metrics import (
+    DB_CALL_SECONDS,
+    TASK_LOOP_SECONDS,
+    MetricsRegistry,
+    instrument_loop,
+)
+
+
+def test_render_prometheus_text_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("app_requests_total", "Requests.", ("route",))
+    depth = registry.gauge("app_queue_depth", "Queue depth.")
+    latency = registry.histogram("app_latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+
+    requests.inc(route='/a"b')
+    requests.inc(2, route='/a"b')
+    depth.set_function(lambda: 7)
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value, route="/x")
+
+    text = registry.render()
+
+    assert '# TYPE app_requests_total counter' in text
+    assert 'app_requests_total{route="/a\\"b"} 3' in text
+    assert 'app_queue_depth 7' in text
+    assert 'app_latency_seconds_bucket{route="/x",le="0.1"} 1' in text
+    assert 'app_latency_seconds_bucket{route="/x",le="1"} 2' in text
+    assert 'app_latency_seconds_bucket{route="/x",le="+Inf"} 3' in text
+    assert 'app_latency_seconds_count{route="/x"} 3' in text
+    assert 'app_latency_seconds_sum{route="/x"} 3.55' in text
+    assert registry.counter("app_requests_total", "Requests.", ("route",)) is requests
+    with pytest.raises(ValueError):
+        registry.gauge("app_requests_total", "Clash.")
+    with pytest.raises(ValueError):
+        requests.inc(method="GET")
+
+
+def test_counters_are_thread_safe():
+    registry = MetricsRegistry()
+    counter = registry.counter("app_hits_total", "Hits.")
+    histogram = registry.histogram("app_op_seconds", "Ops.")
+
+    def hammer():
+        for _ in range(5000):
+            counter.inc()
+            histogram.observe(0.01)
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.value() == 40000
+    assert histogram.count() == 40000
+
+
+def lookup_member(member_id):
+    return member_id
+
+
+async def failing_write():
+    raise RuntimeError("boom")
+
+
+def test_db_executor_records_call_latency_by_method():
+    executor = DatabaseExecutor(max_workers=1, call_workers=1, default_timeout=5)
+    ok_before = DB_CALL_SECONDS.count(method="lookup_member", outcome="ok")
+    error_before = DB_CALL_SECONDS.count(method="failing_write", outcome="error")
+    try:
+        assert asyncio.run(executor.run_async(lookup_member, 5)) == 5
+        with pytest.raises(RuntimeError):
+            executor.run(failing_write())
+    finally:
+        executor.shutdown()
+
+    assert DB_CALL_SECONDS.count(method="lookup_member", outcome="ok") == ok_before + 1
+    assert DB_CALL_SECONDS.count(method="failing_write", outcome="error") == error_before + 1
+
+
+def test_instrument_loop_times_iterations_and_keeps_name():
+    class FakeLoop:
+        def __init__(self, coro):
+            self.coro = coro
+
+    async def refresh_things(cog):
+        if cog == "bad":
+            raise ValueError("bad")
+
+    loop = FakeLoop(refresh_things)
+    instrument_loop(loop, "Cog.refresh_things")
+    instrument_loop(loop, "Cog.refresh_things")  # idempotent
+
+    asyncio.run(loop.coro("good"))
+    with pytest.raises(ValueError):
+        asyncio.run(loop.coro("bad"))
+
+    assert loop.coro.__name__ == "refresh_things"
+    assert TASK_LOOP_SECONDS.count(loop="Cog.refresh_things", outcome="ok") == 1
+    assert TASK_LOOP_SECONDS.count(loop="Cog.refresh_things", outcome="error") == 1
+
+
+def test_health_server_serves_metrics_endpoint():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), HealthCheckHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        HealthServer().increment_messages_archived(3)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{base}/metrics") as response:
+            content_type = response.headers["Content-Type"]
+            body = response.read().decode()
+        with urllib.request.urlopen(f"{base}/status") as response:
+            status = response.read().decode()
+    finally:
+        server.shutdown()
+
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert "# TYPE bot_messages_archived_total counter" in body
+    assert "bot_db_call_duration_seconds" in body
+    assert '"messages_archived": ' in status
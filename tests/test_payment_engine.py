@@ -0,0 +1,193 @@
+"""PaymentEngine against the real PaymentService/SolanaProvider stack and a local fake Solana RPC."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+from solders.hash import Hash
+from solders.keypair import Keypair
+
+_DUMMY_SECRET_B58 = (
+    "4h4q8HoeFGAqwQY1pBQ4X9Fb4TVWYR5Hv1fQha6GWwhey7gm3eLMeCzPK1mt6wtMoypYwRkEDKzGvGpEe77K33zC"
+)
+os.environ.setdefault("SOLANA_PRIVATE_KEY", _DUMMY_SECRET_B58)
+
+import src.features.grants.solana_client as solana_client_module  # noqa: E402
+from src.features.grants.solana_client import SolanaClient  # noqa: E402
+from src.features.payments.payment_engine import PaymentEngine  # noqa: E402
+from src.features.payments.payment_service import PaymentActor, PaymentActorKind, PaymentService  # noqa: E402
+from src.features.payments.solana_provider import SolanaProvider  # noqa: E402
+
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeSolanaRpc:
+    """In-process stand-in for the Solana JSON-RPC node.
+
+    A transfer lands ``confirm_latency`` seconds after it is first broadcast;
+    status polls block until then. Records how many unconfirmed transfers
+    were outstanding, overall and per recipient.
+    """
+
+    def __init__(self, confirm_latency):
+        self.confirm_latency = confirm_latency
+        self.landing = {}
+        self.recipient_of = {}
+        self.pending = set()
+        self.max_pending = 0
+        self.max_pending_per_wallet = 0
+
+    def __call__(self, rpc_url):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    async def get_balance(self, pubkey, commitment=None):
+        return SimpleNamespace(value=1_000 * 1_000_000_000)
+
+    async def get_recent_prioritization_fees(self):
+        return SimpleNamespace(value=[])
+
+    async def get_latest_blockhash(self, commitment=None):
+        return SimpleNamespace(value=SimpleNamespace(blockhash=Hash.default(), last_valid_block_height=0))
+
+    async def send_transaction(self, tx, opts=None):
+        signature = str(tx.signatures[0])
+        if signature not in self.landing:
+            recipient = str(tx.message.account_keys[1])
+            self.landing[signature] = time.monotonic() + self.confirm_latency
+            self.recipient_of[signature] = recipient
+            self.pending.add(signature)
+            same_wallet = sum(1 for sig in self.pending if self.recipient_of[sig] == recipient)
+            self.max_pending = max(self.max_pending, len(self.pending))
+            self.max_pending_per_wallet = max(self.max_pending_per_wallet, same_wallet)
+        return SimpleNamespace(value=signature)
+
+    async def get_signature_statuses(self, signatures, search_transaction_history=False):
+        signature = str(signatures[0])
+        await asyncio.sleep(max(self.landing[signature] - time.monotonic(), 0))
+        self.pending.discard(signature)
+        return SimpleNamespace(value=[SimpleNamespace(err=None, confirmation_status="confirmed", slot=1)])
+
+
+class FakePaymentDB:
+    def __init__(self):
+        self.rows = {}
+        self.claim_limits = []
+
+    def add(self, payment_id, wallet, status="queued", producer="grants", is_test=False):
+        self.rows[payment_id] = {
+            "payment_id": payment_id,
+            "guild_id": 1,
+            "producer": producer,
+            "provider": "solana_payouts",
+            "recipient_wallet": wallet,
+            "amount_token": 0.01,
+            "token_price_usd": 100.0,
+            "is_test": is_test,
+            "status": status,
+            "tx_signature": None,
+        }
+
+    def claim_due_payment_requests(self, limit):
+        self.claim_limits.append(limit)
+        claimed = [row for row in self.rows.values() if row["status"] == "queued"][:limit]
+        for row in claimed:
+            row["status"] = "processing"
+        return [dict(row) for row in claimed]
+
+    def get_payment_request(self, payment_id, guild_id=None):
+        row = self.rows.get(payment_id)
+        return dict(row) if row else None
+
+    def mark_payment_confirmed_by_user(self, payment_id, guild_id=None, confirmed_by_user_id=None, confirmed_by=None):
+        self.rows[payment_id]["status"] = "queued"
+        return True
+
+    def mark_payment_submitted(self, payment_id, tx_signature, guild_id=None, **kwargs):
+        self.rows[payment_id].update(status="submitted", tx_signature=tx_signature)
+        return True
+
+    def mark_payment_confirmed(self, payment_id, guild_id=None):
+        self.rows[payment_id]["status"] = "confirmed"
+        return True
+
+    def mark_payment_failed(self, payment_id, error=None, guild_id=None, **kwargs):
+        self.rows[payment_id].update(status="failed", last_error=error)
+        return True
+
+    def mark_payment_manual_hold(self, payment_id, reason=None, guild_id=None):
+        self.rows[payment_id].update(status="manual_hold", last_error=reason)
+        return True
+
+    def mark_wallet_verified(self, wallet_id, guild_id=None):
+        return True
+
+
+def _stack(monkeypatch, confirm_latency, **engine_kwargs):
+    rpc = FakeSolanaRpc(confirm_latency)
+    monkeypatch.setattr(solana_client_module, "AsyncClient", rpc)
+    db = FakePaymentDB()
+    provider = SolanaProvider(SolanaClient(private_key=_DUMMY_SECRET_B58), confirm_timeout_seconds=10)
+    service = PaymentService(db, {"solana_payouts": provider}, test_payment_amount=0.002085)
+    terminal = []
+
+    async def on_terminal(payment):
+        terminal.append(payment)
+
+    engine = PaymentEngine(db, service, on_terminal, **engine_kwargs)
+    service.add_queue_listener(engine.wake)
+    return rpc, db, service, engine, terminal
+
+
+async def test_confirmations_overlap_while_each_wallet_stays_serialized(monkeypatch):
+    rpc, db, _service, engine, terminal = _stack(
+        monkeypatch, confirm_latency=0.3, claim_limit=2, max_concurrency=2, max_in_flight=4,
+    )
+    shared_wallet = str(Keypair().pubkey())
+    db.add("pay-a1", shared_wallet)
+    db.add("pay-a2", shared_wallet)
+    for index in range(5):
+        db.add(f"pay-{index}", str(Keypair().pubkey()))
+
+    started = time.monotonic()
+    engine.open()
+    await asyncio.sleep(0)
+    await engine.drain()
+    elapsed = time.monotonic() - started
+
+    assert {row["status"] for row in db.rows.values()} == {"confirmed"}
+    assert sorted(payment["payment_id"] for payment in terminal) == sorted(db.rows)
+    assert rpc.max_pending_per_wallet == 1
+    assert 2 < rpc.max_pending <= 4
+    assert all(limit <= 4 for limit in db.claim_limits)
+    # Sequential execution would take 7 x 0.3s; overlapping confirmations need
+    # roughly three confirmation rounds.
+    assert elapsed < 1.5
+
+
+async def test_confirming_a_payment_wakes_the_engine_without_a_worker_tick(monkeypatch):
+    _rpc, db, service, engine, terminal = _stack(monkeypatch, confirm_latency=0.01)
+    db.add("pay-test", str(Keypair().pubkey()), status="pending_confirmation", is_test=True)
+
+    engine.open()
+    await asyncio.sleep(0)
+    await engine.drain()
+    assert db.rows["pay-test"]["status"] == "pending_confirmation"
+
+    service.confirm_payment("pay-test", actor=PaymentActor(PaymentActorKind.AUTO, None), guild_id=1)
+    await asyncio.sleep(0)
+    await engine.drain()
+
+    assert db.rows["pay-test"]["status"] == "confirmed"
+    assert [payment["payment_id"] for payment in terminal] == ["pay-test"]
+    assert len(db.claim_limits) == 2
@@ -0,0 +1,157 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from src.common.llm.prompt_cache import PromptAssembler, PromptCacheStats, stable_json
+from src.features.summarising.topic_editor import TOPIC_EDITOR_SYSTEM_PROMPT, TopicEditor
+from tests.test_topic_editor_runtime import FakeDB
+
+
+def _strip_cache_control(value):
+    if isinstance(value, dict):
+        return {k: _strip_cache_control(v) for k, v in value.items() if k != "cache_control"}
+    if isinstance(value, list):
+        return [_strip_cache_control(v) for v in value]
+    return value
+
+
+def _has_breakpoint(value):
+    if isinstance(value, dict):
+        return "cache_control" in value or any(_has_breakpoint(v) for v in value.values())
+    if isinstance(value, list):
+        return any(_has_breakpoint(v) for v in value)
+    return False
+
+
+class CachingFakeMessages:
+    """Offline stand-in for Anthropic prompt caching.
+
+    The request is split into segments (tools, system, each message). A prefix
+    ending at a segment carrying cache_control is written to the cache; a later
+    request reads the longest previously written prefix whose stripped bytes
+    match its own. Tokens are approximated as bytes // 4.
+    """
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+        self.cache = set()
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        segments = [kwargs.get("tools"), kwargs.get("system"), *kwargs["messages"]]
+        keys, sizes, breakpoints = [], [], []
+        for index, segment in enumerate(segments):
+            keys.append(stable_json(_strip_cache_control(segment)))
+            sizes.append(len(keys[-1]) // 4)
+            if _has_breakpoint(segment):
+                breakpoints.append(index)
+
+        read = 0
+        for end in range(len(segments), 0, -1):
+            if "\x00".join(keys[:end]) in self.cache:
+                read = sum(sizes[:end])
+                break
+        written = 0
+        for end in breakpoints:
+            key = "\x00".join(keys[: end + 1])
+            if key not in self.cache:
+                self.cache.add(key)
+                written = max(written, sum(sizes[: end + 1]) - read)
+        total = sum(sizes)
+        usage = SimpleNamespace(
+            input_tokens=total - read - written,
+            output_tokens=10,
+            cache_read_input_tokens=read,
+            cache_creation_input_tokens=written,
+        )
+        return SimpleNamespace(content=self.responses.pop(0), usage=usage)
+
+
+def _tool_use(call_id, name, tool_input):
+    return SimpleNamespace(type="tool_use", id=call_id, name=name, input=tool_input)
+
+
+def test_stable_json_is_independent_of_key_order():
+    a = {"b": 1, "a": {"y": [1, {"d": 2, "c": 3}], "x": None}}
+    b = {"a": {"x": None, "y": [1, {"c": 3, "d": 2}]}, "b": 1}
+
+    assert stable_json(a) == stable_json(b)
+    assert json.loads(stable_json(a)) == a
+
+
+def test_assembler_marks_breakpoints_on_copies_only():
+    prompt = PromptAssembler("system text", [{"name": "t", "input_schema": {}}], enabled=True)
+    transcript = [
+        {"role": "user", "content": "hello"},
+        {"role": "assistant", "content": [{"type": "text", "text": "hi"}]},
+        {"role": "user", "content": [{"type": "tool_result", "tool_use_id": "1", "content": "ok"}]},
+    ]
+
+    kwargs = prompt.request_kwargs(transcript)
+
+    assert kwargs["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert kwargs["messages"][-1]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert not _has_breakpoint(kwargs["messages"][:-1])
+    assert not _has_breakpoint(transcript)
+    assert kwargs["tools"] == [{"name": "t", "input_schema": {}}]
+    assert PromptAssembler("system text", enabled=False).system() == "system text"
+
+
+def test_assembler_omits_an_empty_system_prompt():
+    transcript = [{"role": "user", "content": "hello"}]
+
+    for enabled in (True, False):
+        prompt = PromptAssembler("", enabled=enabled)
+        assert prompt.system() is None
+        assert "system" not in prompt.request_kwargs(transcript)
+
+
+def test_topic_editor_turns_share_a_byte_stable_prefix(monkeypatch):
+    monkeypatch.delenv("LLM_PROMPT_CACHE_ENABLED", raising=False)
+    fake = CachingFakeMessages([
+        [_tool_use("read-1", "search_topics", {"query": "lora"})],
+        [_tool_use("read-2", "get_author_profile", {"author_id": 42})],
+        [_tool_use("fin", "finalize_run", {"overall_reasoning": "Nothing here warranted a post; checked topics and author context. " * 2})],
+    ])
+    editor = TopicEditor(
+        db_handler=FakeDB(),
+        llm_client=SimpleNamespace(client=SimpleNamespace(messages=fake)),
+        guild_id=1,
+        live_channel_id=2,
+        environment="prod",
+    )
+
+    result = asyncio.run(editor.run_once("manual"))
+
+    assert result["status"] == "completed"
+    assert len(fake.calls) == 3
+    first, second, third = fake.calls
+    assert first["system"][0]["text"] == TOPIC_EDITOR_SYSTEM_PROMPT
+    # Each request's history is the previous request verbatim (minus breakpoints).
+    assert _strip_cache_control(second["messages"][: len(first["messages"])]) == _strip_cache_control(first["messages"])
+    assert _strip_cache_control(third["messages"][: len(second["messages"])]) == _strip_cache_control(second["messages"])
+    assert stable_json(_strip_cache_control(first["system"])) == stable_json(_strip_cache_control(third["system"]))
+    # The initial payload is deterministic JSON, not a Python repr.
+    json.loads(first["messages"][0]["content"][0]["text"])
+
+    prompt_cache = editor.db.completed[0][1]["metadata"]["prompt_cache"]
+    turns = prompt_cache["turns"]
+    assert turns[0]["cache_read_input_tokens"] == 0
+    assert turns[0]["cache_creation_input_tokens"] > 0
+    assert all(turn["cache_read_input_tokens"] > 0 for turn in turns[1:])
+    assert prompt_cache["cache_hit_ratio"] > 0.3
+
+
+def test_cache_stats_summarise_per_turn_usage():
+    stats = PromptCacheStats()
+    stats.record(SimpleNamespace(usage=SimpleNamespace(input_tokens=10, output_tokens=1, cache_read_input_tokens=0, cache_creation_input_tokens=90)))
+    stats.record(SimpleNamespace(usage=SimpleNamespace(input_tokens=5, output_tokens=1, cache_read_input_tokens=95, cache_creation_input_tokens=0)))
+    stats.record(SimpleNamespace(usage=None))
+
+    summary = stats.summary()
+
+    assert [t["turn"] for t in summary["turns"]] == [1, 2]
+    assert summary["uncached_input_tokens"] == 15
+    assert summary["cache_read_input_tokens"] == 95
+    assert summary["cache_hit_ratio"] == round(95 / 200, 4)
@@ -0,0 +1,164 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.common.metrics import RATE_LIMIT_WAIT_SECONDS
+from src.common.rate_limiter import (
+    BACKGROUND,
+    INTERACTIVE,
+    RateLimitScheduler,
+    current_priority,
+    parse_rate_limit_headers,
+    rate_limit_priority,
+)
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_calls_draw_on_global_route_and_key_buckets():
+    scheduler = RateLimitScheduler()
+    scheduler.configure("svc", 1.0, 100.0)
+    scheduler.configure("svc.send", per_key_rate=10.0, per_key_capacity=1.0)
+
+    assert await scheduler.acquire("svc.send", "chan-1") == 0
+    assert await scheduler.acquire("svc.send", "chan-2") == 0  # other keys are not held up
+    waited = await scheduler.acquire("svc.send", "chan-1")
+
+    assert 0.08 <= waited < 0.3
+    assert scheduler.bucket("svc").tokens < 97.5  # every call also spent global budget
+    assert RATE_LIMIT_WAIT_SECONDS.count(bucket="svc.send:chan-1", priority=INTERACTIVE) >= 1
+
+
+async def test_exhausted_headers_hold_every_caller_until_the_reset():
+    scheduler = RateLimitScheduler()
+    scheduler.configure("svc", 100.0, 100.0)
+
+    scheduler.observe_headers("svc", {"X-RateLimit-Limit": "5", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "0.2"})
+    started = time.monotonic()
+    await asyncio.gather(scheduler.acquire("svc.read"), scheduler.acquire("svc.read"))
+
+    assert time.monotonic() - started >= 0.19
+
+
+def test_provider_header_formats_are_parsed():
+    openai = parse_rate_limit_headers({
+        "x-ratelimit-limit-requests": "500",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "6m0s",
+        "x-ratelimit-remaining-tokens": "1200",
+        "x-ratelimit-reset-tokens": "20ms",
+    })
+    assert openai["requests"] == (500.0, 0.0, 360.0)
+    assert openai["tokens"] == (None, 1200.0, 0.02)
+
+    anthropic = parse_rate_limit_headers({"anthropic-ratelimit-requests-limit": "50", "anthropic-ratelimit-requests-remaining": "3"})
+    assert anthropic["requests"][:2] == (50.0, 3.0)
+
+    discord_global = parse_rate_limit_headers({"X-RateLimit-Global": "true", "Retry-After": "1.5"})
+    assert discord_global == {"global": (None, 0.0, 1.5)}
+
+
+async def test_background_work_neither_starves_nor_crowds_out_interactive_calls():
+    scheduler = RateLimitScheduler()
+    scheduler.configure("svc", 100.0, 1.0)
+    await scheduler.acquire("svc")  # drain the burst so everything below queues
+    order = []
+
+    async def call(priority):
+        await scheduler.acquire("svc", priority=priority)
+        order.append(priority or current_priority())
+
+    background = [asyncio.create_task(call(BACKGROUND)) for _ in range(10)]
+    await asyncio.sleep(0)
+    with rate_limit_priority(INTERACTIVE):
+        interactive = [asyncio.create_task(call(None)) for _ in range(10)]
+    await asyncio.gather(*background, *interactive)
+
+    first_ten = order[:10]
+    assert first_ten.count(INTERACTIVE) == 8
+    assert first_ten.count(BACKGROUND) == 2
+
+
+async def test_token_usage_charged_after_a_call_delays_the_next_one():
+    scheduler = RateLimitScheduler()
+    scheduler.configure("llm.fake#tokens", 100.0, 10.0)
+
+    assert await scheduler.acquire("llm.fake") == 0
+    scheduler.charge("llm.fake", 30)
+    waited = await scheduler.acquire("llm.fake")
+
+    assert 0.18 <= waited < 0.5
+
+
+def test_waiters_on_another_loop_are_woken_on_their_own_loop():
+    now = [0.0]
+    scheduler = RateLimitScheduler(clock=lambda: now[0])
+    scheduler.configure("svc", 0.01, 2.0)
+    scheduler.bucket("svc").tokens = 0.0
+    other_loop = asyncio.new_event_loop()
+    queued = threading.Event()
+
+    async def wait_on_other_loop():
+        task = asyncio.ensure_future(scheduler.acquire("svc"))
+        await asyncio.sleep(0)
+        queued.set()
+        return await asyncio.wait_for(task, timeout=5)
+
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("waited", other_loop.run_until_complete(wait_on_other_loop())))
+    thread.start()
+    try:
+        assert queued.wait(5)
+        now[0] = 1000.0  # refilled; the next pump (on this loop) admits the other loop's waiter
+
+        async def pump_here():
+            await scheduler.acquire("svc")
+
+        asyncio.run(pump_here())
+        thread.join(2)  # well before the other loop's own 100s timer or 5s timeout
+        assert not thread.is_alive()
+        assert result["waited"] == 1000.0
+    finally:
+        thread.join(5)
+        other_loop.close()
+
+
+def test_loops_on_two_threads_share_a_bucket_without_overdrawing_it():
+    def yielding_clock():
+        time.sleep(0)  # hand the GIL over mid-admission to provoke interleaving
+        return time.monotonic()
+
+    scheduler = RateLimitScheduler(clock=yielding_clock)
+    scheduler.configure("svc", 400.0, 5.0)
+    bucket = scheduler.bucket("svc")
+    lowest = [bucket.tokens]
+    take = bucket.take
+
+    def recording_take(cost=1.0):
+        take(cost)
+        lowest[0] = min(lowest[0], bucket.tokens)
+
+    bucket.take = recording_take
+    errors = []
+
+    def worker():
+        async def main():
+            await asyncio.wait_for(asyncio.gather(*(scheduler.acquire("svc") for _ in range(60))), timeout=10)
+
+        try:
+            asyncio.run(main())
+        except BaseException as exc:  # surfaced below; a thread would swallow it
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(15)
+
+    assert errors == []
+    assert lowest[0] >= -1e-9  # never admitted without a whole token
+    assert scheduler.snapshot()["_waiting"] == {"interactive": 0.0, "background": 0.0}
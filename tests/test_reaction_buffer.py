@@ -0,0 +1,264 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.common.db_handler import DatabaseHandler
+from src.features.logging.reaction_buffer import ReactionWriteBuffer
+
+
+class FakeDB:
+    """Records state and log writes; ``fail_times`` fails that many whole write calls,
+    ``bad_keys`` rows always fail on their own."""
+
+    def __init__(self, fail_times=0, bad_keys=()):
+        self.state_calls = []
+        self.log_calls = []
+        self.fail_times = fail_times
+        self.bad_keys = set(bad_keys)
+
+    def _failed(self, rows):
+        if self.fail_times:
+            self.fail_times -= 1
+            return list(rows), False
+        return [row for row in rows if (row["message_id"], row["user_id"]) in self.bad_keys], True
+
+    def apply_reaction_states(self, state_rows):
+        failed, ok = self._failed(state_rows)
+        if ok:
+            self.state_calls.append([row for row in state_rows if row not in failed])
+        return failed
+
+    def append_reaction_log(self, log_rows):
+        failed, ok = self._failed(log_rows)
+        if ok:
+            self.log_calls.append([row for row in log_rows if row not in failed])
+        return failed
+
+
+def test_add_remove_pair_cancels_but_both_events_are_logged():
+    db = FakeDB()
+
+    async def main():
+        buffer = ReactionWriteBuffer(db, flush_interval_ms=10_000, max_batch=100)
+        await buffer.submit(1, 2, "🔥", "add", guild_id=9)
+        await buffer.submit(1, 2, "🔥", "remove", guild_id=9)
+        await buffer.submit(1, 3, "🔥", "add", guild_id=9)
+        await buffer.flush()
+        return buffer
+
+    buffer = asyncio.run(main())
+
+    assert len(db.state_calls) == len(db.log_calls) == 1
+    state_rows, log_rows = db.state_calls[0], db.log_calls[0]
+    assert state_rows == [
+        {"message_id": 1, "user_id": 3, "emoji": "🔥", "guild_id": 9, "removed_at": None}
+    ]
+    assert [row["action"] for row in log_rows] == ["add", "remove", "add"]
+    assert buffer.stats["cancelled_pairs"] == 1
+
+
+def test_repeated_removes_write_a_single_soft_delete():
+    db = FakeDB()
+
+    async def main():
+        buffer = ReactionWriteBuffer(db, flush_interval_ms=10_000, max_batch=100)
+        for _ in range(3):
+            await buffer.submit(1, 2, "👍", "remove", guild_id=9)
+        await buffer.flush()
+
+    asyncio.run(main())
+
+    state_rows, log_rows = db.state_calls[0], db.log_calls[0]
+    assert len(state_rows) == 1
+    assert state_rows[0]["removed_at"] is not None
+    assert len(log_rows) == 3
+
+
+def test_reaching_max_batch_wakes_the_flusher():
+    db = FakeDB()
+
+    async def main():
+        buffer = ReactionWriteBuffer(db, flush_interval_ms=10_000, max_batch=5)
+        buffer.start()
+        for user_id in range(5):
+            await buffer.submit(1, user_id, "👍", "add", guild_id=9)
+        for _ in range(50):
+            if db.state_calls:
+                break
+            await asyncio.sleep(0.01)
+        await buffer.close()
+
+    asyncio.run(main())
+
+    assert len(db.state_calls) == 1
+    assert len(db.state_calls[0]) == 5
+
+
+def test_close_flushes_pending_events():
+    db = FakeDB()
+
+    async def main():
+        buffer = ReactionWriteBuffer(db, flush_interval_ms=10_000, max_batch=100)
+        buffer.start()
+        await buffer.submit(1, 2, "👍", "add", guild_id=9)
+        await buffer.close()
+        return buffer
+
+    buffer = asyncio.run(main())
+
+    assert len(db.state_calls) == 1
+    assert buffer.pending == 0
+
+
+def test_failed_state_write_is_retried_without_duplicating_log_rows():
+    db = FakeDB(fail_times=1)  # the state write fails once, the log insert succeeds
+
+    async def main():
+        buffer = ReactionWriteBuffer(db, flush_interval_ms=10_000, max_batch=100)
+        await buffer.submit(1, 2, "👍", "add", guild_id=9)
+        assert await buffer.flush() is False
+        await buffer.submit(1, 4, "👍", "add", guild_id=9)
+        assert await buffer.flush() is True
+        return buffer
+
+    buffer = asyncio.run(main())
+
+    assert {row["user_id"] for row in db.state_calls[0]} == {2, 4}
+    assert [[row["user_id"] for row in rows] for rows in db.log_calls] == [[2], [4]]
+    assert buffer.stats["failed_flushes"] == 1
+
+
+def test_a_row_that_keeps_failing_is_dropped_without_blocking_others():
+    db = FakeDB(bad_keys={(1, 2)})
+
+    async def main():
+        buffer = ReactionWriteBuffer(db, flush_interval_ms=10_000, max_batch=100, max_attempts=2)
+        await buffer.submit(1, 2, "👍", "add", guild_id=9)
+        await buffer.submit(1, 3, "👍", "add", guild_id=9)
+        assert await buffer.flush() is False
+        assert await buffer.flush() is False
+        assert await buffer.flush() is True
+        return buffer
+
+    buffer = asyncio.run(main())
+
+    assert [[row["user_id"] for row in rows] for rows in db.state_calls] == [[3], []]
+    assert buffer.stats["dead_lettered"] == 2  # its state row and its log row
+    assert buffer.pending == 0
+
+
+def test_settle_writes_buffered_state_before_a_direct_write():
+    db = FakeDB()
+
+    async def main():
+        buffer = ReactionWriteBuffer(db, flush_interval_ms=10_000, max_batch=100)
+        await buffer.submit(1, 2, "👍", "add", guild_id=9)
+        await buffer.submit(7, 2, "👍", "add", guild_id=9)
+        await buffer.settle([5])  # nothing buffered for message 5
+        assert db.state_calls == []
+        await buffer.settle([1])
+        return buffer
+
+    buffer = asyncio.run(main())
+
+    assert len(db.state_calls) == 1
+    assert buffer.pending == 0
+
+
+def test_settle_discards_state_that_still_cannot_be_written():
+    db = FakeDB(fail_times=1)
+
+    async def main():
+        buffer = ReactionWriteBuffer(db, flush_interval_ms=10_000, max_batch=100)
+        await buffer.submit(1, 2, "👍", "add", guild_id=9)
+        await buffer.settle([1])
+        await buffer.flush()
+        return buffer
+
+    buffer = asyncio.run(main())
+
+    assert db.state_calls == []  # the add never lands after the direct write
+    assert buffer.stats["superseded"] == 1
+
+
+def test_backpressure_flushes_before_accepting_more():
+    db = FakeDB()
+
+    async def main():
+        buffer = ReactionWriteBuffer(db, flush_interval_ms=10_000, max_batch=2, max_pending=2)
+        for user_id in range(5):
+            await buffer.submit(1, user_id, "👍", "add", guild_id=9)
+        return buffer
+
+    buffer = asyncio.run(main())
+
+    assert buffer.stats["backpressure_waits"] == 2
+    assert buffer.pending == 1
+    assert sum(len(log_rows) for log_rows in db.log_calls) == 4
+
+
+def _fake_db_handler(fail_rows=lambda rows: False):
+    calls = []
+
+    class Query:
+        def __init__(self, name):
+            self.name = name
+            self.op = None
+
+        def upsert(self, rows):
+            self.op = ("upsert", rows)
+            return self
+
+        def insert(self, rows):
+            self.op = ("insert", rows)
+            return self
+
+        def update(self, values):
+            self.op = ("update", values)
+            return self
+
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: self
+
+        def execute(self):
+            if fail_rows(self.op[1]):
+                raise RuntimeError("bad row")
+            calls.append((self.op[0], self.name, self.op[1]))
+            return SimpleNamespace(data=[])
+
+    def rpc(name, params):
+        calls.append(("rpc", name, params))
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=1))
+
+    db = DatabaseHandler.__new__(DatabaseHandler)
+    db.storage_handler = SimpleNamespace(supabase_client=SimpleNamespace(table=Query, rpc=rpc))
+    db.server_config = SimpleNamespace(is_write_allowed=lambda guild_id: guild_id == 9)
+    return db, calls
+
+
+def test_reaction_states_upsert_adds_and_soft_delete_removals():
+    db, calls = _fake_db_handler()
+
+    failed = db.apply_reaction_states([
+        {"message_id": 1, "user_id": 2, "emoji": "👍", "guild_id": 9, "removed_at": None},
+        {"message_id": 5, "user_id": 2, "emoji": "👍", "guild_id": 7, "removed_at": None},
+        {"message_id": 1, "user_id": 3, "emoji": "👍", "guild_id": 9, "removed_at": "2026-10-16T00:00:00+00:00"},
+    ])
+
+    assert failed == []
+    assert [(kind, name) for kind, name, _ in calls] == [
+        ("upsert", "discord_reactions"),
+        ("rpc", "soft_delete_reactions"),  # UPDATE ... WHERE removed_at IS NULL, never an insert
+    ]
+    assert len(calls[0][2]) == 1  # guild 7 fails the write gate
+    assert calls[1][2]["p_keys"] == [{"message_id": 1, "user_id": 3, "emoji": "👍"}]
+
+
+def test_reaction_log_falls_back_to_single_rows_and_reports_failures():
+    db, calls = _fake_db_handler(fail_rows=lambda rows: any(row.get("user_id") == 666 for row in rows))
+    good = {"message_id": 1, "user_id": 2, "emoji": "👍", "action": "add", "guild_id": 9}
+    bad = {"message_id": 1, "user_id": 666, "emoji": "👍", "action": "add", "guild_id": 9}
+
+    failed = db.append_reaction_log([good, bad])
+
+    assert failed == [bad]
+    assert [(kind, [row["user_id"] for row in rows]) for kind, _, rows in calls] == [("insert", [2])]
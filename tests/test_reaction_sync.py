@@ -0,0 +1,138 @@
+from types import SimpleNamespace
+
+from src.common.db_handler import DatabaseHandler
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.op = "select"
+        self.payload = None
+        self.filters = []
+
+    def select(self, *_args):
+        return self
+
+    def upsert(self, rows):
+        self.op, self.payload = "upsert", rows
+        return self
+
+    def update(self, values):
+        self.op, self.payload = "update", values
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(("eq", column, value))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(("in", column, list(values)))
+        return self
+
+    def is_(self, column, value):
+        self.filters.append(("is", column, value))
+        return self
+
+    def execute(self):
+        self.client.calls.append((self.op, self.payload, self.filters))
+        if self.op == "select":
+            return SimpleNamespace(data=self.client.active)
+        return SimpleNamespace(data=[])
+
+
+class FakeClient:
+    def __init__(self, active, rpc_ok=True):
+        self.active = active
+        self.rpc_ok = rpc_ok
+        self.calls = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        client = self
+
+        class _Rpc:
+            def execute(self):
+                if client.rpc_ok is False:
+                    error = RuntimeError("Could not find the function public.soft_delete_reactions")
+                    error.code = "PGRST202"
+                    raise error
+                if client.rpc_ok == "timeout":
+                    raise TimeoutError("read timed out")
+                client.calls.append(("rpc", name, params["p_keys"]))
+                return SimpleNamespace(data=len(params["p_keys"]))
+
+        return _Rpc()
+
+
+def _db(client):
+    db = DatabaseHandler.__new__(DatabaseHandler)
+    db.storage_handler = SimpleNamespace(supabase_client=client)
+    db.server_config = SimpleNamespace(is_write_allowed=lambda guild_id: True)
+    return db
+
+
+def _active(message_id, user_id, emoji, guild_id=1):
+    return {"message_id": message_id, "user_id": user_id, "emoji": emoji, "guild_id": guild_id}
+
+
+def test_page_sync_reads_once_and_writes_only_the_diff():
+    client = FakeClient(active=[_active(1, 10, "👍"), _active(1, 11, "👍"), _active(2, 10, "🔥")])
+    db = _db(client)
+
+    ok = db.bulk_upsert_reactions(
+        [1, 2, 3],
+        [
+            {"message_id": 1, "user_id": 10, "emoji": "👍"},  # unchanged
+            {"message_id": 3, "user_id": 12, "emoji": "👍"},  # new
+        ],
+        guild_id=1,
+    )
+
+    assert ok is True
+    ops = [call[0] for call in client.calls]
+    assert ops == ["select", "upsert", "rpc"]
+    assert client.calls[1][1] == [
+        {"message_id": 3, "user_id": 12, "emoji": "👍", "removed_at": None, "guild_id": 1}
+    ]
+    assert client.calls[2][2] == [
+        {"message_id": 1, "user_id": 11, "emoji": "👍"},
+        {"message_id": 2, "user_id": 10, "emoji": "🔥"},
+    ]
+
+
+def test_soft_delete_falls_back_to_grouped_in_filtered_updates():
+    client = FakeClient(
+        active=[_active(1, u, "👍") for u in (10, 11, 12)] + [_active(2, 10, "🔥")],
+        rpc_ok=False,
+    )
+    db = _db(client)
+
+    assert db.bulk_upsert_reactions([1, 2], [], guild_id=1) is True
+
+    updates = [call for call in client.calls if call[0] == "update"]
+    assert len(updates) == 2
+    assert ("in", "user_id", [10, 11, 12]) in updates[0][2]
+    assert db._soft_delete_rpc_available is False
+
+
+def test_transient_rpc_failure_falls_back_once_but_keeps_the_rpc():
+    client = FakeClient(active=[_active(1, 10, "👍")], rpc_ok="timeout")
+    db = _db(client)
+
+    assert db.bulk_upsert_reactions([1], [], guild_id=1) is True
+
+    assert [call[0] for call in client.calls] == ["select", "update"]
+    assert getattr(db, "_soft_delete_rpc_available", True) is True
+
+
+def test_single_message_sync_delegates_to_bulk_path():
+    client = FakeClient(active=[_active(5, 10, "👍", guild_id=None)])
+    db = _db(client)
+
+    assert db.upsert_reactions_batch(5, [{"message_id": 5, "user_id": 10, "emoji": "👍"}], guild_id=1)
+
+    # Row is active but missing guild_id, so it is re-upserted to backfill it.
+    assert [call[0] for call in client.calls] == ["select", "upsert"]
@@ -0,0 +1,134 @@
+import logging
+from types import SimpleNamespace
+
+from scripts.bench_reactor_rules import (
+    build_events,
+    build_rules,
+    linear_match_message,
+    linear_match_reaction,
+)
+from src.features.reacting.reactor import Reactor
+from src.features.reacting.rule_index import CompiledRuleIndex
+
+
+def test_index_agrees_with_linear_scan_on_generated_watchlists():
+    rules = build_rules(300, n_channels=20, n_users=50)
+    index = CompiledRuleIndex(rules)
+    emojis = ["🔥", "👍", "🐦", "✅"]
+
+    for i, (channel, user, content, types) in enumerate(build_events(2000, 300, n_channels=20, n_users=50)):
+        got = index.match_message(channel, user, content, [(t, None) for t in types])
+        assert (got[0] if got else None) is linear_match_message(rules, channel, user, content, types)
+        emoji = emojis[i % 4]
+        assert index.match_reaction(user, emoji) is linear_match_reaction(rules, user, emoji)
+
+
+def test_first_rule_in_watchlist_order_wins_across_buckets():
+    rules = [
+        {"trigger_type": "text", "text_contains": "Hello", "channel_id": "*", "user_id": "*", "action": "wildcard"},
+        {"trigger_type": "text", "text_pattern": "hello", "channel_id": "1", "user_id": "2", "action": "scoped"},
+        {"trigger_type": "reaction", "user_id": ["2"], "emoji": "🔥", "action": "scoped_reaction"},
+        {"trigger_type": "reaction", "user_id": "*", "emoji": "*", "action": "any_reaction"},
+    ]
+    index = CompiledRuleIndex(rules)
+
+    assert index.match_message("1", "2", "say HELLO")[0]["action"] == "wildcard"
+    assert index.match_message("1", "2", "say hello")[0]["action"] == "wildcard"
+    assert index.match_reaction("2", "🔥")["action"] == "scoped_reaction"
+    assert index.match_reaction("3", "🔥")["action"] == "any_reaction"
+
+
+def test_literal_prefilter_skips_bucket_but_still_runs_regexes():
+    rules = [
+        {"trigger_type": "text", "text_contains": "alpha", "channel_id": "*", "user_id": "*", "action": "a"},
+        {"trigger_type": "text", "text_pattern": r"\d{3}", "channel_id": "*", "user_id": "*", "action": "digits"},
+        {"trigger_type": "attachment", "attachment_type": "video/*", "channel_id": "*", "user_id": "*", "action": "vid"},
+    ]
+    index = CompiledRuleIndex(rules)
+    attachment = SimpleNamespace(filename="clip.mp4")
+
+    assert index.match_message("1", "2", "nothing here") is None
+    assert index.match_message("1", "2", "code 123")[0]["action"] == "digits"
+    assert index.match_message("1", "2", "", [("video/mp4", attachment)]) == (rules[2], attachment)
+
+
+class _FakeServerConfig:
+    def __init__(self, watchlist):
+        self.version = 1
+        self.watchlist = watchlist
+
+    def _maybe_refresh(self):
+        pass
+
+    def get_enabled_servers(self, require_write=False):
+        return [{"guild_id": 1, "reaction_watchlist": self.watchlist}]
+
+
+def _reactor(server_config):
+    reactor = Reactor.__new__(Reactor)
+    reactor.logger = logging.getLogger("test")
+    reactor.dev_mode = False
+    reactor.db_handler = SimpleNamespace(server_config=server_config)
+    reactor.watchlist_by_guild = {}
+    reactor.rule_index_by_guild = {}
+    reactor._compiled_watchlists = {}
+    reactor._watchlist_refresh_marker = None
+    reactor._load_watchlist()
+    return reactor
+
+
+def _reaction(user_id, emoji):
+    message = SimpleNamespace(id=99, guild=SimpleNamespace(id=1))
+    return SimpleNamespace(message=message, emoji=emoji), SimpleNamespace(id=user_id, bot=False)
+
+
+def test_reactor_rebuilds_index_only_when_config_version_changes():
+    sc = _FakeServerConfig([{"trigger_type": "reaction", "user_id": "5", "emoji": "🐦", "action": "tweet"}])
+    reactor = _reactor(sc)
+    first_index = reactor.rule_index_by_guild[1]
+
+    assert reactor.check_reaction(*_reaction(5, "🐦")) == "tweet"
+    assert reactor.rule_index_by_guild[1] is first_index
+
+    # Version bump with identical rules reuses the compiled index.
+    sc.version = 2
+    reactor.check_reaction(*_reaction(5, "🐦"))
+    assert reactor.rule_index_by_guild[1] is first_index
+
+    sc.version = 3
+    sc.watchlist = [{"trigger_type": "reaction", "user_id": "*", "emoji": "🐦", "action": "log_general_reaction"}]
+    assert reactor.check_reaction(*_reaction(6, "🐦")) == "log_general_reaction"
+    assert reactor.rule_index_by_guild[1] is not first_index
+
+
+def test_reactor_check_message_uses_index():
+    sc = _FakeServerConfig([
+        {"trigger_type": "text", "text_pattern": "(?i)urgent", "channel_id": "10", "action": "log_special_keyword"},
+    ])
+    reactor = _reactor(sc)
+
+    def message(channel_id, content):
+        return SimpleNamespace(
+            id=1,
+            guild=SimpleNamespace(id=1),
+            author=SimpleNamespace(id=7, bot=False),
+            channel=SimpleNamespace(id=channel_id),
+            content=content,
+            attachments=[],
+        )
+
+    assert reactor.check_message(message(10, "This is URGENT")) == "log_special_keyword"
+    assert reactor.check_message(message(11, "This is URGENT")) is None
+
+
+def test_star_inside_a_user_list_is_not_a_wildcard():
+    rules = [
+        {"trigger_type": "reaction", "user_id": ["*", "42"], "emoji": "🔥", "action": "listed"},
+        {"trigger_type": "reaction", "user_id": "*", "emoji": "👍", "action": "anyone"},
+    ]
+    index = CompiledRuleIndex(rules)
+
+    assert index.match_reaction("7", "🔥") is None
+    assert index.match_reaction("7", "🔥") == linear_match_reaction(rules, "7", "🔥")
+    assert index.match_reaction("42", "🔥")["action"] == "listed"
+    assert index.match_reaction("7", "👍")["action"] == "anyone"
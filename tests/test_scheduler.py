@@ -72,7 +72,10 @@ class FakeService:
         self.results = list(results)
         self.executed = []
 
-    async def execute_publication(self, publication_id):
+    async def prepare_publication(self, publication_id):
+        return None
+
+    async def execute_publication(self, publication_id, prepared=None):
         self.executed.append(publication_id)
         return self.results.pop(0)
 
@@ -147,6 +150,12 @@ class FakePaymentService:
         self.execute_calls.append((payment_id, guild_id))
         return self.execute_results.pop(0)
 
+    async def submit_payment(self, payment_id, guild_id=None):
+        return await self.execute_payment(payment_id, guild_id=guild_id)
+
+    async def confirm_submitted_payment(self, payment):
+        return payment
+
     async def reconcile_with_chain(self, payment_id, guild_id=None):
         self.reconcile_calls.append((payment_id, guild_id))
         result = self.reconcile_results.pop(0)
@@ -359,6 +368,7 @@ async def test_scheduler_claims_executes_and_waits_for_bot_ready(monkeypatch):
 
     await cog._before_scheduled_publication_worker()
     await cog.scheduled_publication_worker.coro(cog)
+    await cog.dispatcher.drain()
 
     assert bot.ready_waits == 1
     assert db_handler.claim_limits == [cog.claim_batch_size]
@@ -471,7 +481,9 @@ async def test_payment_scheduler_claims_executes_notifies_and_hands_off():
     bot = FakePaymentBot(payment_service, producer_cog=producer_cog)
     cog = payment_worker_cog_module.PaymentWorkerCog(bot, db_handler, payment_service=payment_service)
 
+    cog.engine.accepting = True  # restart recovery already ran
     await cog.payment_worker.coro(cog)
+    await cog.engine.drain()
 
     assert db_handler.claim_limits == [cog.claim_batch_size]
     assert payment_service.execute_calls == [("pay-1", 1)]
@@ -0,0 +1,254 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from src.common.server_config import ServerConfig
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.op = None
+
+    def select(self, *_args, **_kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(("eq", column, value))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(("in", column, list(values)))
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(("gt", column, value))
+        return self
+
+    def limit(self, _n):
+        return self
+
+    def execute(self):
+        self.db.calls.append((self.table, list(self.filters)))
+        rows = list(self.db.rows.get(self.table, []))
+        for kind, column, value in self.filters:
+            if kind == "eq":
+                rows = [r for r in rows if r.get(column) == value]
+            elif kind == "in":
+                rows = [r for r in rows if r.get(column) in value]
+            elif kind == "gt":
+                rows = [r for r in rows if (r.get(column) or "") > value]
+        if self.db.gate is not None:
+            self.db.gate.wait(5)
+        return SimpleNamespace(data=rows)
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+        self.gate = None
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def _server(guild_id, updated_at, enabled=True):
+    return {"guild_id": guild_id, "enabled": enabled, "updated_at": updated_at}
+
+
+def test_delta_refresh_only_fetches_changed_rows_and_bumps_version():
+    db = FakeSupabase({
+        "server_config": [_server(1, "2026-01-01"), _server(2, "2026-01-01")],
+        "channel_effective_config": [],
+    })
+    sc = ServerConfig(db)
+    first_version = sc.version
+
+    db.calls.clear()
+    sc.refresh()
+    assert ("server_config", [("gt", "updated_at", "2026-01-01")]) in db.calls
+    assert sc.version == first_version  # nothing changed
+
+    db.rows["server_config"][1] = _server(2, "2026-02-01", enabled=False)
+    sc.refresh()
+    assert sc._servers[2]["enabled"] is False
+    assert sc._servers[1]["enabled"] is True
+    assert sc.version == first_version + 1
+    assert sc.get_refresh_metrics()["delta_refreshes"] == 2
+
+
+def test_failed_refresh_keeps_previous_snapshot():
+    db = FakeSupabase({"server_config": [_server(1, "2026-01-01")], "channel_effective_config": []})
+    sc = ServerConfig(db)
+
+    def broken(_name):
+        raise RuntimeError("db down")
+
+    db.table = broken
+    sc.refresh(force_full=True)
+
+    assert 1 in sc._servers
+    assert sc.get_refresh_metrics()["failures"] >= 1
+
+
+def test_maybe_refresh_inside_event_loop_does_not_block_readers(monkeypatch):
+    db = FakeSupabase({"server_config": [_server(1, "2026-01-01")], "channel_effective_config": []})
+    monkeypatch.setenv("SERVER_CONFIG_REFRESH_SECONDS", "1")
+    sc = ServerConfig(db)
+    db.gate = threading.Event()
+    sc._snapshot = type(sc._snapshot)(**{**sc._snapshot.__dict__, "loaded_at": time.monotonic() - 10})
+
+    async def read():
+        started = time.monotonic()
+        sc._maybe_refresh()
+        sc._maybe_refresh()  # second call sees the in-flight refresh
+        return time.monotonic() - started, sc.get_refresh_metrics()
+
+    elapsed, metrics = asyncio.run(read())
+    assert elapsed < 1
+    assert metrics["refresh_in_progress"] is True
+    assert metrics["background_refreshes"] == 1
+    assert 1 in sc._servers
+
+    db.gate.set()
+    for _ in range(100):
+        if not sc._refresh_lock.locked():
+            break
+        time.sleep(0.01)
+    assert sc.get_refresh_metrics()["staleness_seconds"] < 5
+
+
+def test_concurrent_callers_start_only_one_background_refresh(monkeypatch):
+    db = FakeSupabase({"server_config": [_server(1, "2026-01-01")], "channel_effective_config": []})
+    monkeypatch.setenv("SERVER_CONFIG_REFRESH_SECONDS", "1")
+    sc = ServerConfig(db)
+    db.gate = threading.Event()
+    sc._snapshot = type(sc._snapshot)(**{**sc._snapshot.__dict__, "loaded_at": time.monotonic() - 10})
+    start = threading.Barrier(8)
+
+    async def call():
+        sc._maybe_refresh()
+
+    def caller():
+        start.wait()
+        asyncio.run(call())
+
+    threads = [threading.Thread(target=caller) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sc.get_refresh_metrics()["background_refreshes"] == 1
+    db.gate.set()
+    for _ in range(100):
+        if not sc._refresh_lock.locked():
+            break
+        time.sleep(0.01)
+    assert not sc._refresh_lock.locked()
+
+
+def test_parent_lookups_are_batched_and_negatively_cached():
+    db = FakeSupabase({
+        "server_config": [],
+        "channel_effective_config": [{"channel_id": 10, "parent_id": None}],
+        "discord_channels": [
+            {"channel_id": 101, "parent_id": 10},
+            {"channel_id": 102, "parent_id": 10},
+            {"channel_id": 103, "parent_id": None},
+        ],
+    })
+    sc = ServerConfig(db)
+    db.calls.clear()
+
+    parents = sc.prefetch_parent_channels([101, 102, 103, 999, 10])
+    assert parents == {10: None, 101: 10, 102: 10, 103: None, 999: None}
+    assert db.calls == [("discord_channels", [("in", "channel_id", [101, 102, 103, 999])])]
+
+    db.calls.clear()
+    assert sc.resolve_parent_channel(101) == 10
+    assert sc.resolve_parent_channel(999) is None
+    assert db.calls == []
+
+
+def test_parent_cache_miss_inside_loop_is_resolved_off_the_loop(monkeypatch):
+    from src.common import server_config as server_config_module
+
+    db = FakeSupabase({
+        "server_config": [],
+        "channel_effective_config": [],
+        "discord_channels": [{"channel_id": 201, "parent_id": 20}, {"channel_id": 202, "parent_id": 20}],
+    })
+    sc = ServerConfig(db)
+    db.calls.clear()
+    loop_thread = []
+
+    async def fake_run_db_call(fn, *args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    monkeypatch.setattr(server_config_module, "run_db_call", fake_run_db_call)
+    original_prefetch = sc.prefetch_parent_channels
+
+    def prefetch(channel_ids):
+        loop_thread.append(threading.current_thread() is threading.main_thread())
+        return original_prefetch(channel_ids)
+
+    sc.prefetch_parent_channels = prefetch
+
+    async def scenario():
+        first = sc.resolve_parent_channel(201)  # miss: answered from cache later
+        sc.resolve_parent_channel(201)  # the same lookup is not started twice
+        await asyncio.gather(*sc._parent_lookup_tasks)
+        await sc.warm_parent_channels([201, 202])
+        return first, sc.resolve_parent_channel(201), sc.resolve_parent_channel(202)
+
+    assert asyncio.run(scenario()) == (None, 20, 20)
+    assert loop_thread == [False, False]
+    assert db.calls == [
+        ("discord_channels", [("eq", "channel_id", 201)]),
+        ("discord_channels", [("eq", "channel_id", 202)]),
+    ]
+
+
+def test_failed_full_load_does_not_reset_the_full_refresh_clock():
+    db = FakeSupabase({"server_config": [_server(1, "2026-01-01")], "channel_effective_config": []})
+    sc = ServerConfig(db)
+    loaded_full_at = sc._snapshot.full_loaded_at
+    assert loaded_full_at > 0
+
+    real_table = db.table
+
+    def broken(name):
+        if name == "server_config":
+            raise RuntimeError("db down")
+        return real_table(name)
+
+    db.table = broken
+    sc.refresh(force_full=True)
+    assert sc._snapshot.full_loaded_at == loaded_full_at
+
+    sc._snapshot = type(sc._snapshot)(**{**sc._snapshot.__dict__, "full_loaded_at": 0.0})
+    sc.refresh()
+    assert sc._snapshot.full_loaded_at == 0.0  # next refresh retries the full load
+
+    db.table = real_table
+    db.calls.clear()
+    sc.refresh()
+    assert ("server_config", []) in db.calls
+    assert sc._snapshot.full_loaded_at > 0
+
+
+def test_refresh_stats_are_exported_as_metrics():
+    from src.common.metrics import REGISTRY
+
+    db = FakeSupabase({"server_config": [_server(1, "2026-01-01")], "channel_effective_config": []})
+    sc = ServerConfig(db)
+    sc.refresh()
+
+    rendered = REGISTRY.render()
+    assert 'bot_server_config_refresh{stat="refreshes"} 2' in rendered
+    assert 'bot_server_config_refresh{stat="servers"} 1' in rendered
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+
+from aiohttp import web
+
+from src.common.storage_handler import StorageHandler
+
+CHUNK = bytes(range(256)) * 4096  # 1 MiB
+FILE_MB = 6
+
+
+class FakeBucket:
+    def __init__(self, uploads):
+        self.uploads = uploads
+
+    def upload(self, path, file, file_options):
+        # Read the body the way httpx multipart does: chunk by chunk.
+        digest, size = hashlib.sha256(), 0
+        if isinstance(file, bytes):
+            digest.update(file)
+            size = len(file)
+        else:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+                size += len(chunk)
+        self.uploads.append({"path": path, "size": size, "sha256": digest.hexdigest(), "file_options": file_options})
+
+    def get_public_url(self, path):
+        return f"https://cdn.example/{path}"
+
+
+def make_storage(uploads):
+    storage = StorageHandler.__new__(StorageHandler)
+    bucket = FakeBucket(uploads)
+    storage.supabase_client = type("FakeSupabase", (), {
+        "storage": type("FakeStorage", (), {"from_": staticmethod(lambda _name: bucket)})(),
+    })()
+    return storage
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_get("/{name}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def _video(request):
+    response = web.StreamResponse(headers={"Content-Type": "video/mp4"})
+    await response.prepare(request)
+    for _ in range(FILE_MB):
+        await response.write(CHUNK)
+    await response.write_eof()
+    return response
+
+
+def test_large_download_streams_through_temp_file_in_chunks(monkeypatch):
+    monkeypatch.setattr(StorageHandler, "DOWNLOAD_SPILL_THRESHOLD", 1024 * 1024)
+    monkeypatch.setattr(StorageHandler, "HTTP_CHUNK_SIZE", 256 * 1024)
+    uploads = []
+    storage = make_storage(uploads)
+    spooled = []
+    real_unlink = os.unlink
+    monkeypatch.setattr("src.common.storage_handler.os.unlink", lambda p: (spooled.append(p), real_unlink(p)))
+    writes = []
+    real_temp = tempfile.NamedTemporaryFile
+
+    class RecordingSpool:
+        def __init__(self, *args, **kwargs):
+            self._file = real_temp(*args, **kwargs)
+            self.name = self._file.name
+
+        def write(self, chunk):
+            writes.append(len(chunk))
+            return self._file.write(chunk)
+
+        def writelines(self, chunks):
+            for chunk in chunks:
+                self.write(chunk)
+
+        def close(self):
+            self._file.close()
+
+    monkeypatch.setattr("src.common.storage_handler.tempfile.NamedTemporaryFile", RecordingSpool)
+
+    async def run():
+        runner, base_url = await _serve(_video)
+        try:
+            url = await storage.download_and_upload_url(f"{base_url}/clip.mp4", "2026-10-16/clip.mp4")
+            session = storage._http_session()
+            await storage.close_http_sessions()
+            return url, session
+        finally:
+            await runner.cleanup()
+
+    url, session = asyncio.run(run())
+
+    expected = hashlib.sha256()
+    for _ in range(FILE_MB):
+        expected.update(CHUNK)
+    assert url == "https://cdn.example/2026-10-16/clip.mp4"
+    assert uploads == [{
+        "path": "2026-10-16/clip.mp4",
+        "size": FILE_MB * len(CHUNK),
+        "sha256": expected.hexdigest(),
+        "file_options": {"content-type": "video/mp4", "upsert": "true"},
+    }]
+    # The body reached disk as many bounded chunks, never as one buffer.
+    assert sum(writes) == FILE_MB * len(CHUNK)
+    assert len(writes) >= FILE_MB * len(CHUNK) // StorageHandler.HTTP_CHUNK_SIZE
+    assert max(writes) <= StorageHandler.HTTP_CHUNK_SIZE
+    assert len(spooled) == 1 and not os.path.exists(spooled[0])
+    assert session.closed
+
+
+def test_small_downloads_stay_in_memory_and_reuse_one_session():
+    uploads = []
+    storage = make_storage(uploads)
+
+    async def image(request):
+        return web.Response(body=b"png-bytes", content_type="image/png")
+
+    async def run():
+        runner, base_url = await _serve(image)
+        try:
+            first = await storage.download_file(f"{base_url}/a.png?ex=1")
+            session = storage._http_session()
+            await storage.download_and_upload_url(f"{base_url}/b.png", "b.png")
+            assert storage._http_session() is session
+            await storage.close_http_sessions()
+            return first
+        finally:
+            await runner.cleanup()
+
+    first = asyncio.run(run())
+
+    assert first == {
+        "bytes": b"png-bytes",
+        "content_type": "image/png",
+        "filename": "a.png",
+        "size": 9,
+        "sha256": hashlib.sha256(b"png-bytes").hexdigest(),
+    }
+    assert uploads[0]["sha256"] == first["sha256"]
+
+
+def test_close_http_sessions_closes_sessions_on_other_loops():
+    storage = make_storage([])
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+    thread.start()
+
+    async def open_session():
+        return storage._http_session()
+
+    try:
+        other_session = asyncio.run_coroutine_threadsafe(open_session(), other_loop).result(5)
+
+        async def run():
+            own_session = storage._http_session()
+            await storage.close_http_sessions()
+            return own_session
+
+        own_session = asyncio.run(run())
+        assert own_session.closed
+        assert other_session.closed
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join(5)
+        other_loop.close()
@@ -0,0 +1,216 @@
+import json
+import logging
+
+from src.common.log_handler import SupabaseLogHandler
+
+
+class FakeInsert:
+    def __init__(self, table, rows):
+        self.table, self.rows = table, rows
+
+    def execute(self):
+        self.table.calls.append(len(self.rows))
+        if self.table.fail_with is not None:
+            raise self.table.fail_with
+        rejected = [row for row in self.rows if row["message"].startswith("poison")]
+        if rejected:
+            raise RejectedRows()
+        self.table.inserted.extend(self.rows)
+
+
+class RejectedRows(Exception):
+    code = "22P02"
+
+
+class FakeTable:
+    def __init__(self):
+        self.inserted = []
+        self.calls = []
+        self.fail_with = None
+
+    def insert(self, rows):
+        return FakeInsert(self, rows)
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.logs = FakeTable()
+
+    def table(self, _name):
+        return self.logs
+
+
+def make_handler(tmp_path, client, **kwargs):
+    handler = SupabaseLogHandler(
+        client=client,
+        spool_path=str(tmp_path / "spool.jsonl"),
+        flush_interval=3600,
+        **kwargs,
+    )
+    logger = logging.getLogger(f"test-supabase-log-{id(handler)}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    return handler, logger
+
+
+def test_logs_survive_outage_and_restart_then_replay_in_larger_batches(tmp_path):
+    down = FakeSupabase()
+    down.logs.fail_with = ConnectionError("supabase unreachable")
+    handler, logger = make_handler(tmp_path, down, batch_size=5, max_batch_size=50)
+    for i in range(200):
+        logger.info("event %s", i, extra={"payload": {"i": i}, "obj": object()})
+    handler.flush()
+
+    metrics = handler.get_metrics()
+    assert metrics["backlog_records"] == 200
+    assert metrics["dropped_failed"] == 0
+    assert metrics["consecutive_failures"] == 1
+    assert metrics["next_batch_size"] == 50
+    handler.close()
+
+    up = FakeSupabase()
+    restarted, _logger = make_handler(tmp_path, up, batch_size=5, max_batch_size=50)
+    assert restarted.get_metrics()["replayed_on_start"] == 200
+    restarted.flush()
+
+    assert [row["message"] for row in up.logs.inserted] == [f"event {i}" for i in range(200)]
+    assert up.logs.inserted[7]["extra"]["payload"] == repr({"i": 7})
+    assert isinstance(up.logs.inserted[7]["extra"]["obj"], str)
+    assert up.logs.calls[0] == 50  # backlog-sized batches, not batch_size
+    metrics = restarted.get_metrics()
+    assert metrics["backlog_records"] == 0
+    assert metrics["spool_bytes"] == 0
+    assert (tmp_path / "spool.jsonl").stat().st_size == 0
+    restarted.close()
+
+
+def test_rejected_records_are_isolated_and_dropped_after_bounded_retries(tmp_path):
+    client = FakeSupabase()
+    handler, logger = make_handler(tmp_path, client, batch_size=10, max_attempts=2)
+    for message in ["a", "b", "poison", "c"]:
+        logger.info(message)
+
+    for _ in range(6):
+        handler.flush()
+
+    assert [row["message"] for row in client.logs.inserted] == ["a", "b", "c"]
+    metrics = handler.get_metrics()
+    assert metrics["dropped_failed"] == 1
+    assert metrics["backlog_records"] == 0
+    handler.close()
+
+
+def test_spool_cap_and_torn_tail_are_counted_not_fatal(tmp_path):
+    spool = tmp_path / "spool.jsonl"
+    spool.write_bytes(json.dumps({"message": "kept"}).encode() + b"\n" + b'{"message": "tor')
+    client = FakeSupabase()
+    handler, logger = make_handler(tmp_path, client, max_spool_bytes=spool.stat().st_size + 400)
+    for i in range(20):
+        logger.info("x" * 100)
+    handler.flush()
+
+    metrics = handler.get_metrics()
+    assert metrics["dropped_overflow"] > 0
+    assert metrics["dropped_corrupt"] == 1
+    assert client.logs.inserted[0]["message"] == "kept"
+    assert len(client.logs.inserted) == 1 + 20 - metrics["dropped_overflow"]
+    handler.close()
+
+
+def test_emit_snapshots_extras_and_leaves_serializing_to_the_flush(tmp_path, monkeypatch):
+    client = FakeSupabase()
+    handler, logger = make_handler(tmp_path, client)
+    serialized = []
+    real_serialize = handler._serialize
+    monkeypatch.setattr(handler, "_serialize", lambda entry: serialized.append(entry) or real_serialize(entry))
+    payload = {"state": "before"}
+    logger.info("snapshot", extra={"payload": payload, "count": 3, "flag": None})
+    payload["state"] = "after"
+    assert serialized == []  # nothing encoded on the logging thread
+    handler.flush()
+
+    assert len(serialized) == 1
+    extra = client.logs.inserted[0]["extra"]
+    assert extra == {"payload": repr({"state": "before"}), "count": 3, "flag": None}
+    handler.close()
+
+
+class APIError(Exception):
+    def __init__(self, code=None, status_code=None):
+        super().__init__(code or status_code)
+        self.code = code
+        self.status_code = status_code
+
+
+def test_postgrest_and_4xx_errors_are_rejections_but_connection_failures_are_not():
+    assert SupabaseLogHandler._is_rejection(APIError(code="PGRST204"))
+    assert SupabaseLogHandler._is_rejection(APIError(code="PGRST102"))
+    assert SupabaseLogHandler._is_rejection(APIError(status_code=400))
+    assert not SupabaseLogHandler._is_rejection(APIError(code="PGRST000"))
+    assert not SupabaseLogHandler._is_rejection(APIError(status_code=429))
+    assert not SupabaseLogHandler._is_rejection(APIError(status_code=503))
+    assert not SupabaseLogHandler._is_rejection(ConnectionError("down"))
+
+
+def test_postgrest_rejection_advances_the_offset(tmp_path):
+    client = FakeSupabase()
+    client.logs.fail_with = APIError(code="PGRST204")
+    handler, logger = make_handler(tmp_path, client, batch_size=10, max_attempts=2)
+    for message in ["a", "b"]:
+        logger.info(message)
+
+    for _ in range(6):
+        handler.flush()
+
+    metrics = handler.get_metrics()
+    assert metrics["dropped_failed"] == 2
+    assert metrics["backlog_records"] == 0
+    assert metrics["spool_bytes"] == 0
+    handler.close()
+
+
+def test_backlog_cap_ignores_shipped_bytes_and_spool_is_compacted(tmp_path):
+    client = FakeSupabase()
+    handler, logger = make_handler(tmp_path, client, max_spool_bytes=4000)
+    for round_ in range(10):
+        for i in range(3):
+            logger.info("r%s-%s %s", round_, i, "x" * 150)
+        handler._drain_queue_to_spool()
+        if round_:
+            # Ship only the previous round, so the spool never empties and truncates.
+            rows = handler._read_batch(3)
+            handler._commit(rows[-1][1], len(rows))
+
+    metrics = handler.get_metrics()
+    assert metrics["dropped_overflow"] == 0
+    assert metrics["backlog_records"] == 3
+    assert (tmp_path / "spool.jsonl").stat().st_size < 4000 + 1000
+    handler.flush()
+    assert len(client.logs.inserted) == 3
+    handler.close()
+
+
+def test_default_spool_is_per_process_and_adopts_dead_process_spools(tmp_path, monkeypatch):
+    import os
+    import subprocess
+    import sys
+
+    monkeypatch.delenv("SUPABASE_LOG_SPOOL_PATH", raising=False)
+    monkeypatch.setenv("SUPABASE_LOG_SPOOL_DIR", str(tmp_path))
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    orphan = tmp_path / f"supabase_log_spool.{dead.pid}.jsonl"
+    shipped = json.dumps({"message": "already shipped"}).encode() + b"\n"
+    orphan.write_bytes(shipped + json.dumps({"message": "left behind"}).encode() + b"\n")
+    (tmp_path / f"supabase_log_spool.{dead.pid}.jsonl.offset").write_text(str(len(shipped)))
+
+    client = FakeSupabase()
+    handler = SupabaseLogHandler(client=client, flush_interval=3600)
+    handler.flush()
+
+    assert handler.spool_path == str(tmp_path / f"supabase_log_spool.{os.getpid()}.jsonl")
+    assert [row["message"] for row in client.logs.inserted] == ["left behind"]
+    assert handler.get_metrics()["adopted_spools"] == 1
+    assert not orphan.exists()
+    handler.close()
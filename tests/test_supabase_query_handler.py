@@ -0,0 +1,160 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.common.supabase_query_handler import MessageQuery, SupabaseQueryHandler
+
+
+class FakeQuery:
+    def __init__(self, rows, calls, max_rows=1000):
+        self._rows = rows
+        self._calls = calls
+        self._max_rows = max_rows
+        self._ops = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self._ops.append((name, args, kwargs))
+            return self
+        return record
+
+    def execute(self):
+        self._calls.append(list(self._ops))
+        rows = list(self._rows)
+        descending = False
+        limit = None
+        for name, args, kwargs in self._ops:
+            if name == "eq":
+                rows = [row for row in rows if row.get(args[0]) == args[1]]
+            elif name == "neq":
+                rows = [row for row in rows if row.get(args[0]) != args[1]]
+            elif name == "gt":
+                rows = [row for row in rows if row[args[0]] > args[1]]
+            elif name == "lt":
+                rows = [row for row in rows if row[args[0]] < args[1]]
+            elif name == "order":
+                descending = kwargs.get("desc", False)
+            elif name == "limit":
+                limit = args[0]
+        rows.sort(key=lambda row: row["message_id"], reverse=descending)
+        return SimpleNamespace(data=rows[:limit][:self._max_rows])
+
+
+class FakeRpc:
+    """RPC response capped at PostgREST max-rows, windowed by .range()."""
+
+    def __init__(self, rows, max_rows):
+        self._rows = rows
+        self._max_rows = max_rows
+        self._window = (0, len(rows) - 1)
+        self.ranges = []
+
+    def range(self, start, end):
+        self._window = (start, end)
+        self.ranges.append((start, end))
+        return self
+
+    def execute(self):
+        start, end = self._window
+        return SimpleNamespace(data=self._rows[start:end + 1][:self._max_rows])
+
+
+class FakeSupabase:
+    def __init__(self, rows, rpc_rows=None, max_rows=1000):
+        self.rows = rows
+        self.rpc_rows = rpc_rows
+        self.max_rows = max_rows
+        self.calls = []
+        self.rpc_calls = []
+
+    def table(self, _name):
+        return FakeQuery(self.rows, self.calls, self.max_rows)
+
+    def rpc(self, name, params):
+        self.rpc_calls.append((name, params))
+        if self.rpc_rows is None:
+            raise RuntimeError("function not found")
+        return FakeRpc(self.rpc_rows, self.max_rows)
+
+
+def make_rows(count, channel_id=10):
+    return [
+        {
+            "message_id": 1000 + i,
+            "channel_id": channel_id,
+            "author_id": 1,
+            "created_at": f"2026-01-{(i % 28) + 1:02d}T00:00:00+00:00",
+        }
+        for i in range(count)
+    ]
+
+
+def test_get_all_message_ids_uses_keyset_pages_and_selects_only_ids():
+    supabase = FakeSupabase(make_rows(25) + make_rows(5, channel_id=99))
+    handler = SupabaseQueryHandler(supabase)
+
+    ids = asyncio.run(handler.get_all_message_ids(10))
+
+    assert ids == [1000 + i for i in range(25)]
+    # No OFFSET ranges; each later page starts after the previous cursor.
+    ops = [dict((name, args) for name, args, _ in call) for call in supabase.calls]
+    assert all("range" not in call for call in ops)
+    assert ops[0]["select"] == ("message_id",)
+    assert "gt" not in ops[0]
+
+
+def test_iter_message_pages_pushes_limit_down():
+    supabase = FakeSupabase(make_rows(50))
+    handler = SupabaseQueryHandler(supabase)
+    spec = MessageQuery(channel_ids=(10,), descending=True, limit=7, page_size=5)
+
+    rows = asyncio.run(handler.fetch_messages(spec))
+
+    assert [row["message_id"] for row in rows] == [1049 - i for i in range(7)]
+    limits = [args[0] for call in supabase.calls for name, args, _ in call if name == "limit"]
+    assert limits == [5, 2]
+    cursors = [args for call in supabase.calls for name, args, _ in call if name == "lt"]
+    assert cursors == [("message_id", 1045)]
+
+
+def test_iter_message_pages_keeps_paging_when_max_rows_caps_every_page():
+    supabase = FakeSupabase(make_rows(25), max_rows=4)
+    handler = SupabaseQueryHandler(supabase)
+    spec = MessageQuery(channel_ids=(10,), page_size=10)
+
+    rows = asyncio.run(handler.fetch_messages(spec))
+
+    assert [row["message_id"] for row in rows] == [1000 + i for i in range(25)]
+    assert len(supabase.calls) == 8  # seven capped pages and the empty one that ends paging
+
+
+def test_get_message_dates_prefers_server_side_rpc():
+    supabase = FakeSupabase(make_rows(3), rpc_rows=[{"message_date": "2026-01-02"}, {"message_date": "2026-01-01"}])
+    handler = SupabaseQueryHandler(supabase)
+
+    dates = asyncio.run(handler.get_message_dates(10))
+
+    assert dates == ["2026-01-01", "2026-01-02"]
+    assert supabase.rpc_calls == [("get_channel_message_dates", {"p_channel_id": 10})] * 2
+    assert supabase.calls == []
+
+
+def test_get_message_dates_pages_past_postgrest_max_rows():
+    rpc_rows = [{"message_date": f"{1000 + day}-01-01"} for day in range(2500)]
+    supabase = FakeSupabase([], rpc_rows=rpc_rows, max_rows=700)
+    handler = SupabaseQueryHandler(supabase)
+
+    dates = asyncio.run(handler.get_message_dates(10))
+
+    assert len(dates) == 2500
+    assert dates[0] == "1000-01-01" and dates[-1] == "3499-01-01"
+    assert len(supabase.rpc_calls) == 5  # four capped pages and the empty one that ends paging
+
+
+def test_get_message_dates_falls_back_to_streaming_created_at():
+    supabase = FakeSupabase(make_rows(30))
+    handler = SupabaseQueryHandler(supabase)
+
+    dates = asyncio.run(handler.get_message_dates(10))
+
+    assert dates == [f"2026-01-{day:02d}" for day in range(1, 29)]
+    assert dict((name, args) for name, args, _ in supabase.calls[0])["select"] == ("created_at, message_id",)
@@ -4,6 +4,7 @@ All tests stub ``vision_clients`` via monkeypatch — zero real API calls.
 """
 
 import json
+import threading
 from types import SimpleNamespace
 
 import pytest
@@ -463,6 +464,49 @@ def test_budget_cap_returns_budget_exceeded(monkeypatch):
     assert len(db.upserts) == 0
 
 
+def test_cancelled_call_neither_charges_budget_nor_persists(monkeypatch):
+    """A call cancelled after its timeout stops before the budget and the DB."""
+    db = MediaUnderstandingFakeDB()
+
+    messages = [
+        {
+            "message_id": 100,
+            "guild_id": 1,
+            "channel_id": 10,
+            "author_id": 42,
+            "content": "image",
+            "created_at": "2026-05-13T10:00:00Z",
+            "author_context_snapshot": {"username": "alice"},
+            "attachments": [{"url": "https://cdn.test/img.png"}],
+        }
+    ]
+    context = _make_context(messages=messages, vision_budget=1.0, vision_cost=0.0)
+    cancelled = threading.Event()
+
+    def slow_describe_image(*_args, **_kwargs):
+        cancelled.set()  # the dispatcher gives up while the API call is in flight
+        return dict(FAKE_IMAGE_UNDERSTANDING)
+
+    monkeypatch.setattr(vision_clients, "describe_image", slow_describe_image)
+    monkeypatch.setattr(vision_clients, "_sha256", lambda data: "cancelled-hash")
+    _mock_requests(monkeypatch)
+
+    editor = TopicEditor(db_handler=db, llm_client=None, guild_id=1, environment="prod")
+
+    call = {"id": "vision-cancel", "name": "understand_image", "input": {"message_id": 100, "attachment_index": 0, "mode": "fast"}}
+    outcome = editor._dispatch_understand_media(call, context, "image", cancelled=cancelled)
+
+    assert outcome["outcome"] == "tool_error"
+    assert "cancelled" in outcome["error"]
+    assert len(db.upserts) == 0
+
+    again = editor._dispatch_understand_media(
+        {**call, "id": "vision-cancel-2"}, context, "image", cancelled=cancelled
+    )
+    assert again["outcome"] == "tool_error"
+    assert float(context["vision_cost_usd"]) == pytest.approx(0.01)
+
+
 # ---------------------------------------------------------------------------
 # Test 5: budget not deducted on cache hit
 # ---------------------------------------------------------------------------
@@ -746,6 +746,12 @@ def test_storage_search_messages_unified_filters_archive_messages():
             assert table_name == "discord_messages"
             return Query()
 
+        def rpc(self, name, params):
+            # Database without the search migration: exercises the ILIKE fallback.
+            error = RuntimeError(f"Could not find the function public.{name}")
+            error.code = "PGRST202"
+            raise error
+
     async def pass_through_channel_context(rows):
         return rows
 
@@ -1853,6 +1859,7 @@ def test_search_messages_archive_scope_dispatch():
         "before": "1h",
         "is_reply": None,
         "limit": 20,
+        "cursor": None,
     }]
 
 
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+
+from src.features.summarising.topic_editor import TopicEditor
+
+
+class RecordingEditor(TopicEditor):
+    """Replaces per-tool work with sleeps so dispatch ordering can be observed."""
+
+    def __init__(self, delays):
+        super().__init__(db_handler=object(), llm_client=object(), guild_id=1, live_channel_id=2, environment="prod")
+        self.delays = delays
+        self.events = []
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.peak = {}
+        self.cancelled = {}
+
+    def _dispatch_tool_call(self, call, context, *, cancelled=None):
+        name = call["name"]
+        self.cancelled[call["id"]] = cancelled
+        with self.lock:
+            self.events.append(("start", call["id"]))
+            self.in_flight[name] = self.in_flight.get(name, 0) + 1
+            self.peak[name] = max(self.peak.get(name, 0), self.in_flight[name])
+        time.sleep(self.delays.get(name, 0.0))
+        with self.lock:
+            self.in_flight[name] -= 1
+            self.events.append(("end", call["id"]))
+        return {"tool_call_id": call["id"], "tool": name, "outcome": "read"}
+
+
+def _call(call_id, name):
+    return {"id": call_id, "name": name, "input": {}}
+
+
+def test_read_calls_run_concurrently_and_writes_act_as_barriers():
+    editor = RecordingEditor({"search_topics": 0.2, "get_author_profile": 0.2, "record_observation": 0.01})
+    calls = [
+        _call("r1", "search_topics"),
+        _call("r2", "get_author_profile"),
+        _call("w1", "record_observation"),
+        _call("r3", "search_topics"),
+    ]
+    context = {"run_id": "run-1"}
+
+    started = time.monotonic()
+    outcomes = asyncio.run(editor._dispatch_turn_tool_calls(calls, context))
+    elapsed = time.monotonic() - started
+
+    assert [o["tool_call_id"] for o in outcomes] == ["r1", "r2", "w1", "r3"]
+    assert elapsed < 0.55  # r1 and r2 overlap; sequential would be ~0.61s
+    assert editor.events.index(("start", "w1")) > max(editor.events.index(("end", "r1")), editor.events.index(("end", "r2")))
+    assert editor.events.index(("start", "r3")) > editor.events.index(("end", "w1"))
+    assert context["tool_dispatch"] == {"parallel_batches": 1, "max_parallel": 2}
+    assert context["tool_latency"]["search_topics"]["count"] == 2
+    assert sum(context["tool_latency"]["search_topics"]["buckets"].values()) == 2
+
+
+def test_per_tool_concurrency_cap_and_timeout(monkeypatch):
+    monkeypatch.setenv("TOPIC_EDITOR_TOOL_CONCURRENCY_UNDERSTAND_VIDEO", "1")
+    monkeypatch.setenv("TOPIC_EDITOR_TOOL_TIMEOUT_SEARCH_MESSAGES", "0.05")
+    editor = RecordingEditor({"understand_video": 0.05, "search_messages": 0.3})
+    calls = [
+        _call("v1", "understand_video"),
+        _call("v2", "understand_video"),
+        _call("v3", "understand_video"),
+        _call("slow", "search_messages"),
+    ]
+    context = {"run_id": "run-1"}
+
+    outcomes = asyncio.run(editor._dispatch_turn_tool_calls(calls, context))
+
+    assert editor.peak["understand_video"] == 1
+    assert [o["outcome"] for o in outcomes] == ["read", "read", "read", "tool_error"]
+    assert "timed out" in outcomes[3]["error"]
+    assert context["tool_latency"]["search_messages"]["timeouts"] == 1
+    assert editor.cancelled["slow"].is_set()
+    assert not editor.cancelled["v1"].is_set()
+    lines = TopicEditor._format_tool_latency_lines({"tool_latency": context["tool_latency"]})
+    assert any(line.startswith("- `search_messages` n=1") and "timeouts=1" in line for line in lines)
@@ -0,0 +1,147 @@
+from types import SimpleNamespace
+
+from scripts.bench_topic_index import build_queries, build_topics
+from src.features.summarising.topic_editor import (
+    TopicEditor,
+    detect_topic_collisions,
+    resolve_topic_alias,
+)
+from src.features.summarising.topic_index import TopicTrigramIndex
+from tests.test_topic_editor_runtime import FakeDB
+
+
+def test_index_matches_linear_collision_and_alias_scans():
+    topics, alias_rows = build_topics(400, n_authors=4)  # >64 topics per author: posting-list scoring path
+    index = TopicTrigramIndex(topics, alias_rows)
+
+    for key, headline, authors, alias in build_queries(topics, 80):
+        expected = detect_topic_collisions(
+            proposed_canonical_key=key, headline=headline, source_authors=authors, existing_topics=topics,
+        )
+        assert index.detect_collisions(proposed_canonical_key=key, headline=headline, source_authors=authors) == expected
+        for environment, guild_id in (("prod", 1), ("dev", 1), (None, None)):
+            assert index.resolve_alias(alias, environment=environment, guild_id=guild_id) is resolve_topic_alias(
+                alias, alias_rows, environment=environment, guild_id=guild_id,
+            )
+
+
+def test_index_updates_incrementally():
+    index = TopicTrigramIndex([
+        {"topic_id": "t1", "canonical_key": "wan-release", "headline": "Wan release", "source_authors": ["bob"]},
+    ])
+
+    def reasons(key, headline, authors=("alice",)):
+        return [(c.topic_id, c.reason) for c in index.detect_collisions(
+            proposed_canonical_key=key, headline=headline, source_authors=authors,
+        )]
+
+    assert reasons("ltx-depth", "LTX depth control workflow") == []
+
+    index.add_topic({"topic_id": "t2", "canonical_key": "ltx-depth-control", "headline": "LTX depth control workflow", "source_authors": ["alice"]})
+    assert reasons("ltx-depth", "LTX depth control workflow") == [("t2", "canonical_key_prefix")]
+    assert reasons("other-key", "LTX depth control workflows") == [("t2", "headline_similarity_author_overlap")]
+
+    index.update_topic({"topic_id": "t2", "canonical_key": "renamed", "headline": "Something else", "source_authors": ["alice"]})
+    assert reasons("ltx-depth", "LTX depth control workflow") == []
+
+    index.add_topic_alias("t1", "ltx-depth-v2")
+    assert reasons("ltx-depth", "unrelated") == [("t1", "canonical_key_prefix")]
+
+    index.add_topic_authors("t2", ["Carol"])
+    assert reasons("other", "Something else", authors=("carol",)) == [("t2", "headline_similarity_author_overlap")]
+
+    index.remove_topic("t1")
+    assert reasons("ltx-depth", "unrelated") == []
+    assert len(index) == 1
+
+
+def test_topic_created_in_run_collides_with_later_create_call():
+    db = FakeDB()
+    editor = TopicEditor(db_handler=db, llm_client=SimpleNamespace(), guild_id=1, live_channel_id=2, environment="prod")
+    context = {
+        "run_id": "run-1",
+        "guild_id": 1,
+        "messages": [{
+            "message_id": 100,
+            "guild_id": 1,
+            "channel_id": 10,
+            "author_id": 42,
+            "content": "Alice update",
+            "created_at": "2026-05-13T10:00:00Z",
+            "author_context_snapshot": {"username": "alice"},
+        }],
+        "active_topics": [],
+        "aliases": [],
+        "seen_tool_call_ids": set(),
+        "observation_count": 0,
+        "created_topics": [],
+        "finalize": None,
+    }
+
+    def watch(call_id, proposed_key):
+        return {
+            "id": call_id,
+            "name": "watch_topic",
+            "input": {
+                "proposed_key": proposed_key,
+                "headline": "Alice ships a new LoRA test",
+                "why_interesting": "Still developing.",
+                "source_message_ids": ["100"],
+            },
+        }
+
+    first = editor._dispatch_tool_call(watch("tool-1", "Alice LoRA Test"), context)
+    second = editor._dispatch_tool_call(watch("tool-2", "Alice LoRA Test again"), context)
+
+    assert first["outcome"] == "accepted"
+    assert second["outcome"] == "rejected_watch"
+    assert db.transitions[-1][0]["payload"]["collisions"][0]["topic_id"] == "topic-1"
+
+
+def test_discarded_topic_stops_colliding_within_the_run():
+    db = FakeDB()
+    editor = TopicEditor(db_handler=db, llm_client=SimpleNamespace(), guild_id=1, live_channel_id=2, environment="prod")
+    context = {
+        "run_id": "run-1",
+        "guild_id": 1,
+        "messages": [{
+            "message_id": 100,
+            "guild_id": 1,
+            "channel_id": 10,
+            "author_id": 42,
+            "content": "Alice update",
+            "created_at": "2026-05-13T10:00:00Z",
+            "author_context_snapshot": {"username": "alice"},
+        }],
+        "active_topics": [{
+            "topic_id": "old-1",
+            "canonical_key": "alice-lora-test",
+            "headline": "Alice LoRA test",
+            "state": "watching",
+            "source_authors": ["alice"],
+        }],
+        "aliases": [],
+        "seen_tool_call_ids": set(),
+        "observation_count": 0,
+        "created_topics": [],
+        "finalize": None,
+    }
+    watch = {
+        "id": "tool-2",
+        "name": "watch_topic",
+        "input": {
+            "proposed_key": "Alice LoRA Test",
+            "headline": "Alice ships a new LoRA test",
+            "why_interesting": "Still developing.",
+            "source_message_ids": ["100"],
+        },
+    }
+
+    discard = editor._dispatch_tool_call(
+        {"id": "tool-1", "name": "discard_topic", "input": {"topic_id": "old-1", "reason": "stale"}},
+        context,
+    )
+    outcome = editor._dispatch_tool_call(watch, context)
+
+    assert discard["outcome"] == "accepted"
+    assert outcome["outcome"] == "accepted"